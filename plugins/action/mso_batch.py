@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+
+# GNU General Public License v3.0+ (see LICENSE or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from ansible.errors import AnsibleError
+from ansible.module_utils._text import to_native, to_text
+from ansible.module_utils.connection import Connection
+from ansible.plugins.action import ActionBase
+
+COLLECTION_PREFIX = "cisco.mso."
+BATCH_OPTIONS = ["module", "items", "workers", "serialize_by"]
+DEFAULT_WORKERS = 8
+
+
+class ActionModule(ActionBase):
+    """Run one cisco.mso module for many parameter sets within a single task"""
+
+    TRANSFERS_FILES = False
+
+    def run(self, tmp=None, task_vars=None):
+        result = super(ActionModule, self).run(tmp, task_vars)
+        del tmp  # tmp no longer has any effect
+
+        args = self._task.args
+        module_name = args.get("module")
+        items = args.get("items")
+        serialize_by = args.get("serialize_by")
+        try:
+            workers = int(args.get("workers") or DEFAULT_WORKERS)
+        except (TypeError, ValueError):
+            return dict(failed=True, msg="Parameter 'workers' must be an integer")
+
+        if not module_name:
+            return dict(failed=True, msg="Parameter 'module' is required")
+        if not module_name.startswith(COLLECTION_PREFIX):
+            module_name = COLLECTION_PREFIX + module_name
+        if module_name.split(".")[-1] == "mso_batch":
+            return dict(failed=True, msg="Module 'mso_batch' can not be batched")
+        if not isinstance(items, list) or not all(isinstance(item, dict) for item in items):
+            return dict(failed=True, msg="Parameter 'items' must be a list of dictionaries")
+        if workers < 1:
+            return dict(failed=True, msg="Parameter 'workers' must be 1 or greater")
+
+        socket_path = getattr(self._connection, "socket_path", None)
+        if socket_path is None and self._connection.transport != "local":
+            return dict(failed=True, msg="mso_batch must run on the controller, use the HTTPAPI connection plugin or delegate_to: localhost")
+
+        common_args = dict((key, value) for key, value in args.items() if key not in BATCH_OPTIONS)
+
+        # Writes to the same schema (or template for NDO templates) are serialized, different schemas run concurrently
+        groups = OrderedDict()
+        for index, item in enumerate(items):
+            module_args = dict(common_args)
+            module_args.update(item)
+            if serialize_by:
+                group_key = module_args.get(serialize_by)
+            else:
+                group_key = module_args.get("schema") or module_args.get("template")
+            groups.setdefault(to_text(group_key), []).append((index, module_args))
+
+        # Without pipelining every item transfers its module to the same file of the shared remote tmp dir, so the items run one after the other
+        if not self._is_pipelining_enabled("new"):
+            workers = 1
+
+        def run_group(group):
+            return [(index, self._run_item(module_name, module_args, task_vars)) for index, module_args in group]
+
+        connection = Connection(socket_path) if socket_path else None
+        start = time.time()
+        results = [None] * len(items)
+        try:
+            if connection is not None:
+                # All items share the persistent connection, so the session is logged in once and GET responses are shared
+                connection.set_response_cache(True)
+            with ThreadPoolExecutor(max_workers=min(workers, len(groups) or 1)) as executor:
+                for group_results in executor.map(run_group, groups.values()):
+                    for index, item_result in group_results:
+                        item_result["item"] = items[index]
+                        results[index] = item_result
+        finally:
+            # Always disable the cache, later tasks using the persistent connection must not read stale responses
+            if connection is not None:
+                connection.set_response_cache(False)
+
+        failed = [item_result for item_result in results if item_result.get("failed")]
+        result.update(
+            changed=any(item_result.get("changed") for item_result in results),
+            results=results,
+            elapsed=round(time.time() - start, 3),
+        )
+        if failed:
+            result.update(failed=True, msg="{0} of {1} items failed for module {2}".format(len(failed), len(results), module_name))
+        return result
+
+    def _run_item(self, module_name, module_args, task_vars):
+        """Execute the module for one item, with the environment, become and connection settings of the task"""
+        try:
+            return self._execute_module(module_name=module_name, module_args=module_args, task_vars=task_vars)
+        except AnsibleError as e:
+            return dict(failed=True, msg="Failed to execute module '{0}': {1}".format(module_name, to_native(e)))
@@ -27,6 +27,26 @@ options:
     - name: ANSIBLE_HTTPAPI_LOGIN_DOMAIN
     vars:
     - name: ansible_httpapi_login_domain
+  fixture_mode:
+    description:
+    - Record REST interactions to, or replay them from, the fixture directory set in O(fixture_path).
+    - C(record) sends requests to MSO and stores each request/response pair as a compressed fixture.
+    - C(replay) serves the recorded responses without connecting to MSO.
+    - Record/replay is disabled when not set.
+    type: string
+    choices: [ record, replay ]
+    env:
+    - name: MSO_FIXTURE_MODE
+    vars:
+    - name: ansible_httpapi_fixture_mode
+  fixture_path:
+    description:
+    - The directory where fixtures are recorded to or replayed from.
+    type: path
+    env:
+    - name: MSO_FIXTURE_PATH
+    vars:
+    - name: ansible_httpapi_fixture_path
 """
 
 import json
@@ -37,12 +57,15 @@ from ansible.module_utils.six import PY3
 from ansible.module_utils._text import to_text
 from ansible.module_utils.connection import ConnectionError
 from ansible.plugins.httpapi import HttpApiBase
-from copy import copy
+from ansible_collections.cisco.mso.plugins.module_utils.codec import json_loads
+from ansible_collections.cisco.mso.plugins.module_utils.fixtures import FixtureError, fixture_store_from_env, timer
+from copy import copy, deepcopy
 
 
 CONNECTION_MAP = {"username": "remote_user", "timeout": "persistent_command_timeout"}
 RESET_KEYS = ["username", "password", "login_domain", "host", "port"]
 CONNECTION_KEYS = RESET_KEYS + ["use_proxy", "use_ssl", "timeout", "validate_certs"]
+CACHE_SCOPE_REGEX = re.compile(r"^(.*?/(?:schemas|templates)/(?!list-identity|summaries)[^/]+)")
 
 
 class HttpApi(HttpApiBase):
@@ -62,6 +85,9 @@ class HttpApi(HttpApiBase):
         self.info = {}
 
         self.connection_parameters = {}
+        self.fixtures = None
+        self.fixtures_loaded = False
+        self.response_cache = None
 
     def get_platform(self):
         return self.platform
@@ -69,6 +95,25 @@ class HttpApi(HttpApiBase):
     def set_params(self, params):
         self.params = params
 
+    def set_response_cache(self, enabled):
+        """Share GET responses between the modules using this connection (used by the mso_batch action plugin)"""
+        self.response_cache = {} if enabled else None
+
+    def _cache_scope(self, path):
+        """Return the schema or template an API path belongs to, None for collection paths"""
+        match = CACHE_SCOPE_REGEX.search(path.split("?", 1)[0])
+        return match.group(1) if match else None
+
+    def _invalidate_response_cache(self, path):
+        scope = self._cache_scope(path)
+        if scope is None:
+            self.response_cache.clear()
+            return
+        # Drop the written object and all collection paths (summaries, list-identity) which may reference it
+        for cached_path in list(self.response_cache):
+            if self._cache_scope(cached_path) in (scope, None):
+                del self.response_cache[cached_path]
+
     def set_backup_hosts(self):
         try:
             list_of_hosts = re.sub(r"[[\]]", "", self.connection.get_option("host")).split(",")
@@ -145,8 +190,31 @@ class HttpApi(HttpApiBase):
             self.error = dict(code=self.status, message="Value of <path> does not appear to be formated properly")
             raise ConnectionError(json.dumps(self._verify_response(None, method, path, None)))
         full_path = self.connection.get_option("host") + path
+
+        if self.response_cache is not None:
+            if method == "GET" and path in self.response_cache:
+                self.connection.queue_message("vvvv", "send_request() - cached response for {0}".format(path))
+                self.info = deepcopy(self.response_cache[path])
+                return self.info
+            elif method != "GET":
+                self._invalidate_response_cache(path)
+
+        fixtures = self._get_fixture_store()
+        if fixtures is not None and fixtures.replaying:
+            try:
+                self.info = fixtures.replay(method, path, data)
+            except FixtureError as e:
+                self.error = dict(code=-1, message=str(e))
+                raise ConnectionError(json.dumps(self._verify_response(None, method, full_path, None)))
+            self.connection.queue_message("vvvv", "send_request() - replayed fixture {0}".format(self.info.get("fixture")))
+            self.info.update(url=full_path, method=method)
+            if self.info.get("error") is not None:
+                self.error = self.info.get("error")
+            return self.info
+
         try:
             self.connection.queue_message("vvvv", "send_request() - connection.send({0}, {1}, {2}, {3})".format(path, data, method, self.headers))
+            start = timer()
             response, rdata = self.connection.send(path, data, method=method, headers=self.headers)
         except ConnectionError:
             self.connection.queue_message("vvvv", "login() - ConnectionError Exception")
@@ -156,7 +224,23 @@ class HttpApi(HttpApiBase):
             if self.error is None:
                 self.error = dict(code=self.status, message="MSO HTTPAPI send_request() Exception: {0} - {1}".format(e, traceback.format_exc()))
             raise ConnectionError(json.dumps(self._verify_response(None, method, full_path, None)))
-        return self._verify_response(response, method, full_path, rdata)
+        info = self._verify_response(response, method, full_path, rdata)
+        if fixtures is not None:
+            fixtures.record(method, path, data, info, elapsed=timer() - start)
+        if self.response_cache is not None and method == "GET" and info.get("status") == 200:
+            self.response_cache[path] = deepcopy(info)
+        return info
+
+    def _get_fixture_store(self):
+        """Load the record/replay fixture store once per persistent connection"""
+        if not self.fixtures_loaded:
+            try:
+                self.fixtures = fixture_store_from_env(self.get_option("fixture_mode"), self.get_option("fixture_path"))
+            except FixtureError as e:
+                self.error = dict(code=-1, message=str(e))
+                raise ConnectionError(json.dumps(self._verify_response(None, "GET", self.connection.get_option("host"), None)))
+            self.fixtures_loaded = True
+        return self.fixtures
 
     def set_connection_parameters(self):
         connection_parameters = {}
@@ -209,14 +293,14 @@ class HttpApi(HttpApiBase):
             response_value = response_data.getvalue()
         except Exception:
             response_value = response_data
-        response_text = to_text(response_value)
         try:
-            return json.loads(response_text) if response_text else {}
+            # Decode the raw response once, without an intermediate text copy of large schemas and templates
+            return json_loads(response_value) if response_value else {}
         # JSONDecodeError only available on Python 3.5+
         except Exception as e:
             # Expose RAW output for troubleshooting
             self.error = dict(code=-1, message="Unable to parse output as JSON, see 'raw' output. {0}".format(e))
-            self.info["raw"] = response_text
+            self.info["raw"] = to_text(response_value)
             return
 
     def _get_login_domain_id(self, domain_name):
@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+
+# GNU General Public License v3.0+ (see LICENSE or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+# JSON encoding and decoding of request and response payloads.
+# Responses are decoded with orjson when installed, the standard library json module otherwise.
+# Payloads are always encoded with the standard library json module: orjson output is compact and does not escape non-ASCII characters,
+# so the payloads, the sent and proposed output, and the recorded fixtures would depend on whether orjson is installed.
+# Set the environment variable MSO_JSON_CODEC to 'json' to force the standard library json module.
+
+import os
+from ansible.module_utils.basic import json
+from ansible.module_utils._text import to_text
+
+JSON_CODEC_ENV = "MSO_JSON_CODEC"
+
+# orjson is not imported at all when the standard library json module is forced
+HAS_ORJSON = False
+if os.environ.get(JSON_CODEC_ENV, "orjson") != "json":
+    try:
+        import orjson
+
+        HAS_ORJSON = True
+    except ImportError:
+        pass
+
+USE_ORJSON = HAS_ORJSON
+
+
+def json_dumps(data):
+    """
+    Encode data to a JSON string, with the separators and ASCII escaping of the standard library json module.
+    :param data: Data to encode. -> Any
+    :return: JSON document. -> Str
+    """
+    return json.dumps(data)
+
+
+def json_loads(data):
+    """
+    Decode a JSON document.
+    :param data: JSON document. -> Str | Bytes
+    :return: Decoded data. -> Any
+    :raises ValueError: When the document is not valid JSON.
+    """
+    if USE_ORJSON:
+        try:
+            # orjson accepts bytes directly, which avoids an extra decode of large responses
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # Retry with the standard library for documents orjson is stricter on (e.g. NaN, large integers)
+            pass
+        except TypeError:
+            data = to_text(data)
+    return json.loads(data)
@@ -11,6 +11,17 @@ PRIORITY_MAP = {
     "highest_priority": "level3",
 }
 
+# Well-known L4 port names accepted by filter entries and their port number
+FILTER_PORT_MAP = {
+    "ftpData": "20",
+    "smtp": "25",
+    "dns": "53",
+    "http": "80",
+    "pop3": "110",
+    "https": "443",
+    "rtsp": "554",
+}
+
 SERVICE_NODE_CONNECTOR_MAP = {
     "bd": {"id": "bd", "connector_type": "general"}
     # 'external_epg': {'id': 'externalEpg', 'connector_type': 'route-peering'}
@@ -38,3 +49,9 @@ EPG_U_SEG_ATTR_TYPE_MAP = {
 }
 
 EPG_U_SEG_ATTR_OPERATOR_LIST = ["equals", "contains", "starts_with", "ends_with"]
+
+# The mode of the fixture store, see module_utils/fixtures.py
+FIXTURE_MODE_ENV = "MSO_FIXTURE_MODE"
+
+# The path of the deploy queue, see module_utils/deployqueue.py
+DEPLOY_QUEUE_ENV = "MSO_DEPLOY_QUEUE"
@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+
+# GNU General Public License v3.0+ (see LICENSE or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+# Deploy queue: when MSO_DEPLOY_QUEUE is set, every successful write to a schema marks the templates it touched as dirty in a state file,
+# and a deploy of a template marks it clean. mso_deploy_queue_flush deploys every dirty template once.
+
+import os
+import re
+import tempfile
+from ansible_collections.cisco.mso.plugins.module_utils.codec import json_dumps, json_loads
+from ansible_collections.cisco.mso.plugins.module_utils.constants import DEPLOY_QUEUE_ENV
+
+try:
+    import fcntl
+
+    HAS_FCNTL = True
+except ImportError:
+    HAS_FCNTL = False
+
+# Increase when the queue file format changes
+QUEUE_FORMAT_VERSION = 1
+
+# Marks all templates of a schema dirty, when a write cannot be tied to a template
+ALL_TEMPLATES = "*"
+
+SCHEMA_PATH_REGEX = re.compile(r"^schemas/(?P<schema_id>[^/?]+)$")
+DEPLOY_PATH_REGEX = re.compile(r"^execute/schema/(?P<schema_id>[^/]+)/template/(?P<template>[^/?]+)$")
+
+
+class DeployQueueError(Exception):
+    pass
+
+
+def deploy_queue_from_env(path=None):
+    """
+    Build a deploy queue from an explicit path or from the MSO_DEPLOY_QUEUE environment variable.
+    :return: The deploy queue or None when the deploy queue is not enabled. -> DeployQueue | None
+    """
+    path = path or os.environ.get(DEPLOY_QUEUE_ENV)
+    return DeployQueue(path) if path else None
+
+
+def unescape(segment):
+    return segment.replace("~1", "/").replace("~0", "~")
+
+
+def patched_templates(ops):
+    """Return the names of the templates touched by JSON patch operations of a schema"""
+    templates = set()
+    for op in ops or []:
+        segments = [unescape(segment) for segment in (op.get("path") or "").lstrip("/").split("/")]
+        value = op.get("value")
+        if segments[0] == "templates":
+            if len(segments) == 1:
+                templates.update(template.get("name") for template in value or [])
+            elif segments[1] == "-":
+                templates.add((value or {}).get("name"))
+            elif not (len(segments) == 2 and op.get("op") == "remove"):
+                templates.add(segments[1])
+        elif segments[0] == "sites":
+            if len(segments) == 1:
+                templates.update(site.get("templateName") for site in value or [])
+            elif segments[1] == "-":
+                templates.add((value or {}).get("templateName"))
+            elif "-" in segments[1]:
+                templates.add(segments[1].split("-", 1)[1])
+            else:
+                # Sites addressed by index cannot be tied to a template without the schema
+                templates.add(ALL_TEMPLATES)
+    templates.discard(None)
+    return templates
+
+
+def queue_changes(path, method, data, qs, response):
+    """
+    Return the changes of the deploy queue for a successful request.
+    :return: The (schema id, template) pairs that became dirty, the pairs that were deployed, and the removed schema. -> Tuple
+    """
+    path = path.split("?")[0].strip("/")
+    dirty, deployed, removed_schema = [], [], None
+    match = SCHEMA_PATH_REGEX.match(path)
+    if match and method == "PATCH":
+        dirty = [(match.group("schema_id"), template) for template in patched_templates(data)]
+    elif match and method == "PUT":
+        dirty = [(match.group("schema_id"), template.get("name")) for template in (data or {}).get("templates") or []]
+    elif match and method == "DELETE":
+        removed_schema = match.group("schema_id")
+    elif path == "schemas" and method == "POST" and isinstance(response, dict):
+        dirty = [(response.get("id"), template.get("name")) for template in response.get("templates") or []]
+    elif DEPLOY_PATH_REGEX.match(path) and method == "GET" and not (qs or {}).get("undeploy"):
+        match = DEPLOY_PATH_REGEX.match(path)
+        deployed = [(match.group("schema_id"), match.group("template"))]
+    elif path == "task" and method == "POST" and isinstance(data, dict) and not data.get("undeploy"):
+        deployed = [(data.get("schemaId"), data.get("templateName"))]
+    return dirty, deployed, removed_schema
+
+
+class DeployQueue:
+    """
+    State file with the dirty templates of every schema and the number of writes since their last deploy.
+    Every update locks the queue file, so tasks running in parallel forks do not lose each other's templates.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def empty(self):
+        return dict(format_version=QUEUE_FORMAT_VERSION, templates={})
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return self.empty()
+        with open(self.path, "rb") as f:
+            try:
+                queue = json_loads(f.read())
+            except ValueError as e:
+                raise DeployQueueError("Deploy queue '{0}' is not valid: {1}".format(self.path, e))
+        if queue.get("format_version") != QUEUE_FORMAT_VERSION:
+            raise DeployQueueError("Deploy queue '{0}' was created by another version of this collection".format(self.path))
+        return queue
+
+    def save(self, queue):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(json_dumps(queue).encode("utf-8"))
+            os.rename(tmp, self.path)
+        except Exception:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+    def entries(self):
+        """Return the dirty templates, in the order they became dirty"""
+        return list(self.load().get("templates").values())
+
+    def update(self, dirty=None, deployed=None, removed_schema=None):
+        """Mark templates dirty, or clean when they were deployed or their schema was removed"""
+        if not (dirty or deployed or removed_schema):
+            return
+        lock = open(self.path + ".lock", "a")
+        try:
+            if HAS_FCNTL:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            queue = self.load()
+            templates = queue.get("templates")
+            for schema_id, template in dirty or []:
+                entry = templates.setdefault("{0}/{1}".format(schema_id, template), dict(schema_id=schema_id, template=template, changes=0))
+                entry["changes"] += 1
+            for schema_id, template in deployed or []:
+                templates.pop("{0}/{1}".format(schema_id, template), None)
+            if removed_schema:
+                for key in [key for key, entry in templates.items() if entry.get("schema_id") == removed_schema]:
+                    del templates[key]
+            self.save(queue)
+        finally:
+            lock.close()
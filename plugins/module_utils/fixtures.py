@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+
+# GNU General Public License v3.0+ (see LICENSE or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+from ansible.module_utils.six import binary_type, string_types
+from ansible_collections.cisco.mso.plugins.module_utils.constants import FIXTURE_MODE_ENV
+
+FIXTURE_MODES = ["record", "replay"]
+FIXTURE_PATH_ENV = "MSO_FIXTURE_PATH"
+
+# Response attributes that change on every request and would make replays non-deterministic
+VOLATILE_INFO_KEYS = ["date", "set-cookie", "x-request-id", "elapsed", "cookies_string", "cookies"]
+
+
+class FixtureError(Exception):
+    pass
+
+
+def fixture_store_from_env(mode=None, path=None):
+    """
+    Build a fixture store from explicit settings or from the MSO_FIXTURE_MODE and MSO_FIXTURE_PATH environment variables.
+    :param mode: Fixture mode, record or replay. -> Str | None
+    :param path: Directory holding the fixtures. -> Str | None
+    :return: Fixture store or None when record/replay is not enabled. -> MSOFixtureStore | None
+    """
+    mode = mode or os.environ.get(FIXTURE_MODE_ENV)
+    path = path or os.environ.get(FIXTURE_PATH_ENV)
+    if not mode:
+        return None
+    if mode not in FIXTURE_MODES:
+        raise FixtureError("Fixture mode '{0}' is not valid, use one of: {1}".format(mode, ", ".join(FIXTURE_MODES)))
+    if not path:
+        raise FixtureError("Fixture mode '{0}' requires a fixture directory in {1}".format(mode, FIXTURE_PATH_ENV))
+    return MSOFixtureStore(path, mode)
+
+
+class MSOFixtureStore:
+    """
+    Record and replay MSO/NDO REST interactions as gzip compressed JSON fixtures.
+
+    Each interaction is keyed on the method, the host independent uri (incl. query string) and the canonical request payload.
+    Repeated identical requests (e.g. a GET before and after a PATCH) are stored as numbered occurrences of the same key.
+    On replay, a cursor per key is persisted next to the fixtures so that consecutive module runs are served the occurrences
+    in recorded order; once all occurrences are consumed the last one is served again.
+    Remove the cursor files (see reset_cursors) to restart a replay from the beginning.
+    """
+
+    def __init__(self, path, mode):
+        self.path = path
+        self.mode = mode
+        if mode == "record" and not os.path.isdir(path):
+            os.makedirs(path)
+        elif mode == "replay" and not os.path.isdir(path):
+            raise FixtureError("Fixture directory '{0}' does not exist".format(path))
+
+    @property
+    def recording(self):
+        return self.mode == "record"
+
+    @property
+    def replaying(self):
+        return self.mode == "replay"
+
+    @staticmethod
+    def canonical_data(data):
+        """Return a stable string representation of a request payload"""
+        if isinstance(data, binary_type):
+            data = data.decode("utf-8")
+        if isinstance(data, string_types):
+            try:
+                data = json.loads(data)
+            except ValueError:
+                return data
+        if data in (None, {}, ""):
+            return ""
+        return json.dumps(data, sort_keys=True, separators=(",", ":"))
+
+    def key(self, method, uri, data=None):
+        digest = hashlib.sha1("\n".join([str(method).upper(), uri, self.canonical_data(data)]).encode("utf-8")).hexdigest()
+        return digest[:20]
+
+    def _fixture_file(self, key, occurrence):
+        return os.path.join(self.path, "{0}.{1:04d}.json.gz".format(key, occurrence))
+
+    def _cursor_file(self, key):
+        return os.path.join(self.path, "{0}.cursor".format(key))
+
+    def occurrences(self, key):
+        count = 0
+        while os.path.exists(self._fixture_file(key, count)):
+            count += 1
+        return count
+
+    def record(self, method, uri, data, info, elapsed=None):
+        """
+        Store a request/response pair.
+        :param info: Response info dictionary, the parsed response must be in 'body'. -> Dict
+        :param elapsed: Request duration in seconds, kept for timing regressions. -> Float
+        :return: Path of the written fixture. -> Str
+        """
+        key = self.key(method, uri, data)
+        fixture = dict(
+            method=str(method).upper(),
+            uri=uri,
+            data=self.canonical_data(data),
+            info=dict((k, v) for k, v in info.items() if k not in VOLATILE_INFO_KEYS),
+            elapsed=elapsed,
+            recorded=time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        )
+        fixture_file = self._fixture_file(key, self.occurrences(key))
+        self._atomic_write(fixture_file, json.dumps(fixture, sort_keys=True).encode("utf-8"), compress=True)
+        return fixture_file
+
+    def replay(self, method, uri, data=None):
+        """
+        Serve the next recorded response for a request.
+        :return: Copy of the recorded response info dictionary, incl. the parsed response in 'body'. -> Dict
+        """
+        key = self.key(method, uri, data)
+        available = self.occurrences(key)
+        if available == 0:
+            raise FixtureError("No fixture recorded for {0} {1} (key {2})".format(str(method).upper(), uri, key))
+
+        cursor_file = self._cursor_file(key)
+        cursor = 0
+        if os.path.exists(cursor_file):
+            with open(cursor_file) as f:
+                cursor = int(f.read().strip() or 0)
+        occurrence = min(cursor, available - 1)
+        self._atomic_write(cursor_file, str(cursor + 1).encode("utf-8"))
+
+        with gzip.open(self._fixture_file(key, occurrence), "rb") as f:
+            fixture = json.loads(f.read().decode("utf-8"))
+        info = fixture.get("info", {})
+        info["fixture"] = dict(key=key, occurrence=occurrence, elapsed=fixture.get("elapsed"))
+        return info
+
+    def reset_cursors(self):
+        """Restart a replay from the first recorded occurrence of every request"""
+        for name in os.listdir(self.path):
+            if name.endswith(".cursor"):
+                os.remove(os.path.join(self.path, name))
+
+    def _atomic_write(self, destination, content, compress=False):
+        fd, tmp = tempfile.mkstemp(dir=self.path, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                if compress:
+                    with gzip.GzipFile(fileobj=f, mode="wb", mtime=0) as gz:
+                        gz.write(content)
+                else:
+                    f.write(content)
+            os.rename(tmp, destination)
+        except Exception:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+
+def timer():
+    """Monotonic clock where available (Python 3), wall clock otherwise"""
+    return getattr(time, "monotonic", time.time)()
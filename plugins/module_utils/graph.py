@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+
+# GNU General Public License v3.0+ (see LICENSE or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+# Dependency graph of schema template objects built from their references (vrfRef, bdRef, epgRef, contractRef, ...).
+# Objects are ordered in layers: every object only depends on objects of previous layers, so each layer can be written at once.
+
+import re
+from collections import OrderedDict
+from ansible.module_utils.six import string_types
+
+# Object kinds with the template attribute holding them and the name attribute of their dictionary references
+OBJECT_KINDS = OrderedDict(
+    [
+        ("vrf", dict(attribute="vrfs", ref_name="vrfName")),
+        ("bd", dict(attribute="bds", ref_name="bdName")),
+        ("filter", dict(attribute="filters", ref_name="filterName")),
+        ("contract", dict(attribute="contracts", ref_name="contractName")),
+        ("anp", dict(attribute="anps", ref_name="anpName")),
+        ("epg", dict(attribute="epgs", ref_name="epgName")),
+        ("external_epg", dict(attribute="externalEpgs", ref_name="externalEpgName")),
+        ("l3out", dict(attribute="intersiteL3outs", ref_name="l3outName")),
+        ("service_graph", dict(attribute="serviceGraphs", ref_name="serviceGraphName")),
+    ]
+)
+
+# Reference categories MSOModule.dict_from_ref knows how to parse
+DICT_FROM_REF_CATEGORIES = ["vrfs", "bds", "filters", "contracts", "l3outs", "anps", "serviceGraphs"]
+
+TEXT_REF_REGEX = re.compile(r"^/schemas/(?P<schema_id>[^/]+)/templates/(?P<template>[^/]+)/(?P<category>[^/]+)/(?P<name>[^/]+)")
+
+
+class GraphError(Exception):
+    pass
+
+
+def object_key(schema_id, template, kind, name, anp=None):
+    """Return the graph key of an object, the name of an EPG includes its ANP"""
+    return (schema_id, template, kind, "{0}/{1}".format(anp, name) if kind == "epg" else name)
+
+
+def key_text(key):
+    """Return a readable description of a graph key"""
+    return "{0} '{1}' in template '{2}'".format(key[2], key[3], key[1])
+
+
+def ref_key(mso, ref):
+    """
+    Return the graph key of a reference, as text or as dictionary.
+    Text references are parsed with MSOModule.dict_from_ref.
+    :return: The key of the referenced object, or None when the reference is not a reference to a template object. -> Tuple | None
+    """
+    if isinstance(ref, string_types):
+        match = TEXT_REF_REGEX.match(ref)
+        if match is None:
+            return None
+        if match.group("category") == "externalEpgs":
+            ref = dict(schemaId=match.group("schema_id"), templateName=match.group("template"), externalEpgName=match.group("name"))
+        elif match.group("category") in DICT_FROM_REF_CATEGORIES:
+            ref = mso.dict_from_ref(ref)
+        else:
+            return None
+    if not isinstance(ref, dict) or not ref.get("schemaId") or not ref.get("templateName"):
+        return None
+    if ref.get("epgName") and ref.get("anpName"):
+        return object_key(ref.get("schemaId"), ref.get("templateName"), "epg", ref.get("epgName"), ref.get("anpName"))
+    for kind, details in OBJECT_KINDS.items():
+        if kind != "epg" and ref.get(details.get("ref_name")):
+            return object_key(ref.get("schemaId"), ref.get("templateName"), kind, ref.get(details.get("ref_name")))
+    return None
+
+
+def object_dependencies(mso, obj, skip=("epgs",)):
+    """
+    Return the keys of all objects referenced by an object and its nested attributes.
+    :param skip: Attributes holding nested objects that are graph nodes themselves, like the EPGs of an ANP. -> Tuple
+    """
+    dependencies = []
+    if isinstance(obj, dict):
+        for key, value in obj.items():
+            if key.endswith("Ref"):
+                dependency = ref_key(mso, value)
+                if dependency is not None:
+                    dependencies.append(dependency)
+            elif isinstance(value, (dict, list)) and key not in skip:
+                dependencies.extend(object_dependencies(mso, value, skip))
+    elif isinstance(obj, list):
+        for item in obj:
+            dependencies.extend(object_dependencies(mso, item, skip))
+    return dependencies
+
+
+def ref_schemas(value):
+    """Return the schema names of the references provided as dictionaries in the attributes"""
+    names = set()
+    if isinstance(value, dict):
+        for key, item in value.items():
+            if key.endswith("Ref") and isinstance(item, dict) and item.get("schema"):
+                names.add(item.get("schema"))
+            elif isinstance(item, (dict, list)):
+                names.update(ref_schemas(item))
+    elif isinstance(value, list):
+        for item in value:
+            names.update(ref_schemas(item))
+    return names
+
+
+def make_references(mso, value, schema_ids, schema_id, template):
+    """Replace the references provided as dictionaries with a name in the attributes by MSO references"""
+    if isinstance(value, dict):
+        result = {}
+        for key, item in value.items():
+            if key.endswith("Ref") and isinstance(item, dict) and "name" in item:
+                ref_schema_id = schema_ids.get(item.get("schema"), schema_id)
+                result[key] = mso.make_reference(dict(name=item.get("name"), template=item.get("template")), key[:-3], ref_schema_id, template)
+                if item.get("anp") is not None:
+                    result[key]["anpName"] = item.get("anp")
+            else:
+                result[key] = make_references(mso, item, schema_ids, schema_id, template)
+        return result
+    if isinstance(value, list):
+        return [make_references(mso, item, schema_ids, schema_id, template) for item in value]
+    return value
+
+
+def schema_objects(schema):
+    """
+    Return all template objects of a schema.
+    :return: The key, the object and the JSON patch path of every object, parents before their children. -> List[Tuple]
+    """
+    objects = []
+    for template in schema.get("templates") or []:
+        for kind, details in OBJECT_KINDS.items():
+            if kind == "epg":
+                continue
+            for obj in template.get(details.get("attribute")) or []:
+                path = "/templates/{0}/{1}/{2}".format(template.get("name"), details.get("attribute"), obj.get("name"))
+                objects.append((object_key(schema.get("id"), template.get("name"), kind, obj.get("name")), obj, path))
+                if kind == "anp":
+                    for epg in obj.get("epgs") or []:
+                        epg_path = "{0}/epgs/{1}".format(path, epg.get("name"))
+                        objects.append((object_key(schema.get("id"), template.get("name"), "epg", epg.get("name"), obj.get("name")), epg, epg_path))
+    return objects
+
+
+class DependencyGraph:
+    """
+    Graph of objects and the objects they depend on.
+    Dependencies on objects that are not in the graph are ignored, these objects are expected to exist already.
+    """
+
+    def __init__(self):
+        self.dependencies = OrderedDict()
+
+    def __contains__(self, key):
+        return key in self.dependencies
+
+    def add(self, key, dependencies=None):
+        self.dependencies.setdefault(key, set()).update(dependency for dependency in dependencies or [] if dependency != key)
+
+    def add_object(self, mso, key, obj):
+        """Add an object with its references, an EPG also depends on its ANP"""
+        dependencies = object_dependencies(mso, obj)
+        if key[2] == "epg":
+            dependencies.append(object_key(key[0], key[1], "anp", key[3].split("/")[0]))
+        self.add(key, dependencies)
+
+    def layers(self):
+        """
+        Order the objects in layers, every object only depends on objects of previous layers.
+        Objects keep their order of addition within a layer.
+        :return: The layers of object keys. -> List[List]
+        :raises GraphError: When objects depend on each other.
+        """
+        remaining = OrderedDict((key, set(d for d in dependencies if d in self.dependencies)) for key, dependencies in self.dependencies.items())
+        layers = []
+        while remaining:
+            layer = [key for key, dependencies in remaining.items() if not dependencies]
+            if not layer:
+                raise GraphError("Circular references between {0}".format(", ".join(key_text(key) for key in remaining)))
+            for key in layer:
+                del remaining[key]
+            for dependencies in remaining.values():
+                dependencies.difference_update(layer)
+            layers.append(layer)
+        return layers
+
+    def dependents(self, keys):
+        """Return the objects of the graph that directly depend on any of the objects"""
+        keys = set(keys)
+        return set(key for key, dependencies in self.dependencies.items() if dependencies & keys)
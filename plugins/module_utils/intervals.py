@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+
+# GNU General Public License v3.0+ (see LICENSE or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+# Helpers for sorted lists of closed integer intervals (VLAN encap blocks, port ranges, ...).
+# An interval is a (start, end) tuple with start <= end, both ends included.
+
+
+def normalize_interval(start, end=None):
+    """
+    Return an interval with start <= end.
+    :param start: First value of the interval. -> Int
+    :param end: Last value of the interval, defaults to start. -> Int | None
+    :return: Interval. -> Tuple
+    """
+    start = int(start)
+    end = start if end is None else int(end)
+    return (start, end) if start <= end else (end, start)
+
+
+def merge_intervals(intervals):
+    """
+    Merge overlapping and adjacent intervals.
+    :param intervals: Intervals in any order. -> List[Tuple]
+    :return: Sorted list of disjoint, non-adjacent intervals. -> List[Tuple]
+    """
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1] + 1:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def subtract_intervals(intervals, removals):
+    """
+    Remove intervals from a list of intervals, splitting intervals that are partially removed.
+    :param intervals: Intervals to remove from. -> List[Tuple]
+    :param removals: Intervals to remove. -> List[Tuple]
+    :return: Sorted list of the remaining disjoint intervals. -> List[Tuple]
+    """
+    removals = merge_intervals(removals)
+    result = []
+    for start, end in merge_intervals(intervals):
+        for remove_start, remove_end in removals:
+            if remove_end < start or remove_start > end:
+                continue
+            if remove_start > start:
+                result.append((start, remove_start - 1))
+            start = remove_end + 1
+            if start > end:
+                break
+        if start <= end:
+            result.append((start, end))
+    return result
+
+
+def overlapping_intervals(intervals, others):
+    """
+    Return the intersections between two lists of intervals.
+    :param intervals: First list of intervals. -> List[Tuple]
+    :param others: Second list of intervals. -> List[Tuple]
+    :return: Sorted list of the overlapping parts. -> List[Tuple]
+    """
+    intervals = merge_intervals(intervals)
+    others = merge_intervals(others)
+    overlaps = []
+    i = j = 0
+    while i < len(intervals) and j < len(others):
+        start = max(intervals[i][0], others[j][0])
+        end = min(intervals[i][1], others[j][1])
+        if start <= end:
+            overlaps.append((start, end))
+        if intervals[i][1] < others[j][1]:
+            i += 1
+        else:
+            j += 1
+    return overlaps
+
+
+def expand_intervals(intervals):
+    """Return every value of a list of intervals, in order"""
+    values = []
+    for start, end in merge_intervals(intervals):
+        values.extend(range(start, end + 1))
+    return values
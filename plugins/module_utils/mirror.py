@@ -0,0 +1,449 @@
+# -*- coding: utf-8 -*-
+
+# GNU General Public License v3.0+ (see LICENSE or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+# Local SQLite mirror of the MSO/NDO configuration, used by mso_mirror_sync and mso_mirror_query.
+# Schemas, sites and tenants are stored as JSON documents, and the objects, references, static ports and subnets
+# of the schemas are stored in indexed tables so questions like "which EPGs use VLAN 1234 on leaf 101" are answered
+# without querying MSO.
+
+import os
+import sqlite3
+import time
+from ansible.module_utils._text import to_text
+from ansible.module_utils.six import string_types
+from ansible_collections.cisco.mso.plugins.module_utils.codec import json_dumps, json_loads
+from ansible_collections.cisco.mso.plugins.module_utils.staticports import epg_ref_owner, parse_static_port_path
+
+try:
+    import ipaddress
+
+    HAS_IPADDRESS = True
+except ImportError:
+    HAS_IPADDRESS = False
+
+# Increase when the tables change, a mirror with another version is rebuilt on the next sync
+MIRROR_FORMAT_VERSION = 3
+
+MIRROR_TABLES = [
+    "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)",
+    "CREATE TABLE IF NOT EXISTS schemas (id TEXT PRIMARY KEY, name TEXT, data TEXT)",
+    "CREATE TABLE IF NOT EXISTS sites (id TEXT PRIMARY KEY, name TEXT, data TEXT)",
+    "CREATE TABLE IF NOT EXISTS tenants (id TEXT PRIMARY KEY, name TEXT, data TEXT)",
+    "CREATE TABLE IF NOT EXISTS templates (id TEXT PRIMARY KEY, name TEXT, type TEXT, data TEXT)",
+    "CREATE TABLE IF NOT EXISTS manifest (kind TEXT, id TEXT, marker TEXT, PRIMARY KEY (kind, id))",
+    "CREATE TABLE IF NOT EXISTS objects (schema_id TEXT, schema TEXT, template TEXT, site_id TEXT, kind TEXT, name TEXT, ref TEXT, data TEXT)",
+    "CREATE TABLE IF NOT EXISTS refs (schema_id TEXT, schema TEXT, template TEXT, site_id TEXT, source_ref TEXT, attribute TEXT, target_ref TEXT)",
+    "CREATE TABLE IF NOT EXISTS static_ports (schema_id TEXT, schema TEXT, template TEXT, site_id TEXT, site TEXT, anp TEXT, epg TEXT, "
+    + "type TEXT, path TEXT, pod TEXT, node TEXT, fex TEXT, interface TEXT, vlan INTEGER, micro_seg_vlan INTEGER, mode TEXT, deployment_immediacy TEXT)",
+    "CREATE TABLE IF NOT EXISTS subnets (schema_id TEXT, schema TEXT, template TEXT, site_id TEXT, owner_ref TEXT, vrf_ref TEXT, "
+    + "prefix TEXT, version INTEGER, first TEXT, last TEXT)",
+]
+
+MIRROR_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS objects_name ON objects (kind, name)",
+    "CREATE INDEX IF NOT EXISTS objects_ref ON objects (ref)",
+    "CREATE INDEX IF NOT EXISTS objects_schema ON objects (schema_id)",
+    "CREATE INDEX IF NOT EXISTS refs_target ON refs (target_ref)",
+    "CREATE INDEX IF NOT EXISTS refs_schema ON refs (schema_id)",
+    "CREATE INDEX IF NOT EXISTS static_ports_vlan ON static_ports (vlan, node)",
+    "CREATE INDEX IF NOT EXISTS static_ports_node ON static_ports (node, interface)",
+    "CREATE INDEX IF NOT EXISTS static_ports_schema ON static_ports (schema_id)",
+    "CREATE INDEX IF NOT EXISTS static_ports_site ON static_ports (site_id)",
+    "CREATE INDEX IF NOT EXISTS subnets_range ON subnets (version, first, last)",
+    "CREATE INDEX IF NOT EXISTS subnets_schema ON subnets (schema_id)",
+]
+
+# Attributes of the schema identities and template summaries that change with every update of the schema or template.
+# Schemas and templates without any of them are fetched on every sync.
+CHANGE_MARKER_KEYS = ["_updateVersion", "updateVersion", "version", "lastUpdated", "lastUpdateTime", "updatedAt", "modifiedAt"]
+
+# Schema tables holding one schema, their rows are replaced together when a schema is synced
+SCHEMA_TABLES = ["objects", "refs", "static_ports", "subnets"]
+
+# Template and site attributes holding lists of named objects, with the attributes holding their nested objects
+TEMPLATE_KINDS = dict(
+    anps=["epgs"],
+    bds=[],
+    vrfs=[],
+    filters=[],
+    contracts=[],
+    externalEpgs=[],
+    serviceGraphs=[],
+    intersiteL3outs=[],
+)
+
+# Attributes holding objects that are indexed on their own
+OBJECT_KINDS = set(TEMPLATE_KINDS).union(*TEMPLATE_KINDS.values())
+
+
+class MirrorError(Exception):
+    pass
+
+
+def ref_text(ref):
+    """
+    Return a reference as text, like '/schemas/<id>/templates/<template>/bds/<bd>'.
+    Dictionary references (schemaId, templateName, <kind>Name) are converted, other values are returned unchanged.
+    """
+    if not isinstance(ref, dict):
+        return ref
+    if not ref.get("schemaId") or not ref.get("templateName"):
+        return None
+    parts = ["", "schemas", ref.get("schemaId"), "templates", ref.get("templateName")]
+    names = [(key, value) for key, value in ref.items() if key.endswith("Name") and key not in ("templateName", "schemaName")]
+    # The parent objects come first, e.g. the ANP of an EPG
+    names.sort(key=lambda item: 0 if item[0] in ("anpName", "serviceGraphName") else 1)
+    for key, value in names:
+        parts.extend([key[: -len("Name")] + "s", value])
+    return "/".join(parts)
+
+
+def change_marker(obj):
+    """Return the change marker of a schema identity or template summary, or None when it has none"""
+    markers = [[key, obj.get(key)] for key in CHANGE_MARKER_KEYS if obj.get(key) is not None]
+    return json_dumps(markers) if markers else None
+
+
+def address_range(prefix):
+    """
+    Return the IP version and the first and last address of a prefix as fixed width hex strings, which sort like the addresses.
+    :return: Tuple of version, first and last address, or None when the prefix is not valid. -> Tuple | None
+    """
+    if prefix is None or not HAS_IPADDRESS:
+        return None
+    try:
+        network = ipaddress.ip_interface(to_text(prefix)).network
+    except ValueError:
+        return None
+    return network.version, "{0:032x}".format(int(network.network_address)), "{0:032x}".format(int(network.broadcast_address))
+
+
+class MSOMirror:
+    """
+    SQLite mirror of the MSO/NDO configuration.
+    Every sync of a schema replaces all its rows in a single transaction, so the mirror is consistent after an interrupted sync.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        try:
+            self.connection = sqlite3.connect(path)
+            self.connection.row_factory = sqlite3.Row
+            self.initialize()
+        except sqlite3.Error as e:
+            raise MirrorError("Unable to open mirror '{0}': {1}".format(path, e))
+
+    @classmethod
+    def open_existing(cls, path):
+        """Open a mirror that must exist, e.g. to query it"""
+        if not os.path.exists(path):
+            raise MirrorError("Mirror '{0}' does not exist, use mso_mirror_sync to create it.".format(path))
+        return cls(path)
+
+    def close(self):
+        self.connection.close()
+
+    def initialize(self):
+        """Create the tables and indexes, a mirror with another format version is emptied"""
+        with self.connection:
+            for statement in MIRROR_TABLES + MIRROR_INDEXES:
+                self.connection.execute(statement)
+        if self.get_meta("format_version") != to_text(MIRROR_FORMAT_VERSION):
+            with self.connection:
+                for table in ["meta", "schemas", "sites", "tenants", "templates", "manifest"] + SCHEMA_TABLES:
+                    self.connection.execute("DELETE FROM {0}".format(table))
+                self.set_meta("format_version", MIRROR_FORMAT_VERSION)
+
+    def get_meta(self, key, default=None):
+        row = self.connection.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return default if row is None else row["value"]
+
+    def set_meta(self, key, value):
+        self.connection.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, to_text(value)))
+
+    def stored(self, table):
+        """Return the stored documents of a table (schemas, sites or tenants) by id"""
+        return dict((row["id"], row["data"]) for row in self.connection.execute("SELECT id, data FROM {0}".format(table)))
+
+    def replace_documents(self, table, documents, name_key="name"):
+        """
+        Replace all documents of a table (sites or tenants).
+        :return: Whether the stored documents changed. -> Bool
+        """
+        new = dict((document.get("id"), json_dumps(document)) for document in documents)
+        if new == self.stored(table):
+            return False
+        self.connection.execute("DELETE FROM {0}".format(table))
+        self.connection.executemany(
+            "INSERT INTO {0} (id, name, data) VALUES (?, ?, ?)".format(table),
+            [(document.get("id"), document.get(name_key), new.get(document.get("id"))) for document in documents],
+        )
+        return True
+
+    def remove_schema(self, schema_id):
+        self.connection.execute("DELETE FROM schemas WHERE id = ?", (schema_id,))
+        for table in SCHEMA_TABLES:
+            self.connection.execute("DELETE FROM {0} WHERE schema_id = ?".format(table), (schema_id,))
+
+    def replace_schema(self, schema):
+        """
+        Replace a schema and all its indexed rows.
+        :return: Whether the stored schema changed. -> Bool
+        """
+        schema_id = schema.get("id")
+        data = json_dumps(schema)
+        row = self.connection.execute("SELECT data FROM schemas WHERE id = ?", (schema_id,)).fetchone()
+        if row is not None and row["data"] == data:
+            return False
+        self.remove_schema(schema_id)
+        self.connection.execute("INSERT INTO schemas (id, name, data) VALUES (?, ?, ?)", (schema_id, schema.get("displayName"), data))
+        rows = SchemaRows(schema, self.site_names())
+        for table, table_rows in rows.tables().items():
+            if table_rows:
+                columns = list(table_rows[0])
+                self.connection.executemany(
+                    "INSERT INTO {0} ({1}) VALUES ({2})".format(table, ", ".join(columns), ", ".join("?" * len(columns))),
+                    [tuple(table_row.get(column) for column in columns) for table_row in table_rows],
+                )
+        return True
+
+    def site_names(self):
+        return dict((row["id"], row["name"]) for row in self.connection.execute("SELECT id, name FROM sites"))
+
+    def manifest(self, kind):
+        """Return the stored change markers of the schemas or templates by id"""
+        return dict((row["id"], row["marker"]) for row in self.connection.execute("SELECT id, marker FROM manifest WHERE kind = ?", (kind,)))
+
+    def replace_manifest(self, kind, markers):
+        self.connection.execute("DELETE FROM manifest WHERE kind = ?", (kind,))
+        self.connection.executemany(
+            "INSERT INTO manifest (kind, id, marker) VALUES (?, ?, ?)", [(kind, key, marker) for key, marker in markers.items() if marker is not None]
+        )
+
+    def replace_template(self, summary, template):
+        """
+        Replace a template of templates/summaries.
+        :return: Whether the stored template changed. -> Bool
+        """
+        data = json_dumps(template)
+        row = self.connection.execute("SELECT data FROM templates WHERE id = ?", (summary.get("templateId"),)).fetchone()
+        if row is not None and row["data"] == data:
+            return False
+        self.connection.execute(
+            "INSERT OR REPLACE INTO templates (id, name, type, data) VALUES (?, ?, ?, ?)",
+            (summary.get("templateId"), summary.get("templateName"), summary.get("templateType"), data),
+        )
+        return True
+
+    def sync(self, schemas, sites=None, tenants=None, templates=None, manifest=None, dry_run=False):
+        """
+        Store schemas, templates, sites and tenants in a single transaction.
+        :param schemas: The schemas to store. -> List[Dict]
+        :param templates: The templates of templates/summaries to store as summary and template pairs, None to keep the stored templates. -> List | None
+        :param manifest: The change markers of all existing schemas and templates by kind and id. Schemas and templates in the manifest
+                         that are not provided did not change and are kept, the others are removed. Without manifest, all schemas are provided.
+                         -> Dict | None
+        :param dry_run: Roll the transaction back, to report the changes without storing them. -> Bool
+        :return: The ids of the changed and removed schemas and templates, and whether the sites or tenants changed. -> Dict
+        """
+        manifest = manifest or {}
+        result = dict(changed_schemas=[], removed_schemas=[], changed_templates=[], removed_templates=[], sites_changed=False, tenants_changed=False)
+        try:
+            if sites is not None:
+                result["sites_changed"] = self.replace_documents("sites", sites)
+            if tenants is not None:
+                result["tenants_changed"] = self.replace_documents("tenants", tenants)
+            for schema in schemas:
+                if self.replace_schema(schema):
+                    result["changed_schemas"].append(schema.get("id"))
+            kept = set(schema.get("id") for schema in schemas).union(manifest.get("schemas") or {})
+            for schema_id in sorted(set(self.stored("schemas")) - kept):
+                self.remove_schema(schema_id)
+                result["removed_schemas"].append(schema_id)
+            self.replace_manifest("schemas", manifest.get("schemas") or {})
+            if templates is not None:
+                for summary, template in templates:
+                    if self.replace_template(summary, template):
+                        result["changed_templates"].append(summary.get("templateId"))
+                kept = set(summary.get("templateId") for summary, template in templates).union(manifest.get("templates") or {})
+                for template_id in sorted(set(self.stored("templates")) - kept):
+                    self.connection.execute("DELETE FROM templates WHERE id = ?", (template_id,))
+                    result["removed_templates"].append(template_id)
+                self.replace_manifest("templates", manifest.get("templates") or {})
+            self.set_meta("synced_at", int(time.time()))
+        except sqlite3.Error as e:
+            self.connection.rollback()
+            raise MirrorError("Unable to update mirror '{0}': {1}".format(self.path, e))
+        if dry_run:
+            self.connection.rollback()
+        else:
+            self.connection.commit()
+        return result
+
+    def counts(self):
+        """Return the number of rows of every table"""
+        return dict(
+            (table, self.connection.execute("SELECT COUNT(*) FROM {0}".format(table)).fetchone()[0])
+            for table in ["schemas", "sites", "tenants", "templates"] + SCHEMA_TABLES
+        )
+
+    def select(self, table, columns="*", order=None, **filters):
+        """Return the rows of a table matching all non-None filters, a list filter matches any of its values"""
+        clauses = []
+        values = []
+        for column, value in filters.items():
+            if value is None:
+                continue
+            if isinstance(value, (list, tuple, set)):
+                clauses.append("{0} IN ({1})".format(column, ", ".join("?" * len(value))))
+                values.extend(value)
+            else:
+                clauses.append("{0} = ?".format(column))
+                values.append(value)
+        statement = "SELECT {0} FROM {1}".format(columns, table)
+        if clauses:
+            statement += " WHERE " + " AND ".join(clauses)
+        if order:
+            statement += " ORDER BY " + order
+        return [dict(row) for row in self.connection.execute(statement, values)]
+
+    def objects(self, kind=None, name=None, schema=None, template=None):
+        rows = self.select("objects", order="schema, template, kind, name", kind=kind, name=name, schema=schema, template=template, site_id="")
+        for row in rows:
+            row["data"] = json_loads(row.get("data"))
+        return rows
+
+    def references(self, target_refs):
+        """Return the references to any of the target references"""
+        return self.select("refs", order="schema, template, source_ref", target_ref=list(target_refs))
+
+    def static_ports(self, vlan=None, node=None, interface=None, site=None, schema=None):
+        return self.select("static_ports", order="site, node, interface, vlan", vlan=vlan, node=node, interface=interface, site=site, schema=schema)
+
+    def static_port_rows(self, site_id, exclude_schema_id=None):
+        """Return the distinct static ports of the EPGs of a site, except the static ports of a schema"""
+        statement = "SELECT DISTINCT schema_id, schema, template, anp, epg, path, vlan, mode FROM static_ports WHERE site_id = ? AND type != 'leaf'"
+        return [dict(row) for row in self.connection.execute(statement, (site_id,)) if row["schema_id"] != exclude_schema_id]
+
+    def subnets_containing(self, address):
+        """Return the subnets containing an IP address or prefix"""
+        bounds = address_range(address)
+        if bounds is None:
+            raise MirrorError("'{0}' is not a valid IP address or prefix".format(address))
+        statement = "SELECT * FROM subnets WHERE version = ? AND first <= ? AND last >= ? ORDER BY schema, template, prefix"
+        return [dict(row) for row in self.connection.execute(statement, (bounds[0], bounds[1], bounds[2]))]
+
+
+class SchemaRows:
+    """Flatten a schema in the rows of the objects, refs, static_ports and subnets tables"""
+
+    def __init__(self, schema, site_names=None):
+        self.schema = schema
+        self.site_names = site_names or {}
+        self.rows = dict((table, []) for table in SCHEMA_TABLES)
+        self.schema_base = dict(schema_id=schema.get("id"), schema=schema.get("displayName"))
+        for template in schema.get("templates") or []:
+            self.add_template(template)
+        for site in schema.get("sites") or []:
+            self.add_site(site)
+
+    def tables(self):
+        return self.rows
+
+    def base(self, template, site_id=""):
+        return dict(self.schema_base, template=template, site_id=site_id)
+
+    def template_ref(self, template):
+        return "/schemas/{0}/templates/{1}".format(self.schema.get("id"), template)
+
+    def add_template(self, template):
+        name = template.get("name")
+        base = self.base(name)
+        self.add_refs(base, self.template_ref(name), template)
+        for kind, nested_kinds in TEMPLATE_KINDS.items():
+            for obj in template.get(kind) or []:
+                ref = "{0}/{1}/{2}".format(self.template_ref(name), kind, obj.get("name"))
+                self.rows["objects"].append(dict(base, kind=kind, name=obj.get("name"), ref=ref, data=json_dumps(obj)))
+                self.add_refs(base, ref, obj)
+                self.add_subnets(base, ref, obj)
+                for nested_kind in nested_kinds:
+                    for nested in obj.get(nested_kind) or []:
+                        nested_ref = "{0}/{1}/{2}".format(ref, nested_kind, nested.get("name"))
+                        self.rows["objects"].append(dict(base, kind=nested_kind, name=nested.get("name"), ref=nested_ref, data=json_dumps(nested)))
+                        self.add_refs(base, nested_ref, nested)
+                        self.add_subnets(base, nested_ref, nested)
+
+    def add_site(self, site):
+        base = self.base(site.get("templateName"), site.get("siteId"))
+        site_ref = "{0}/sites/{1}".format(self.template_ref(site.get("templateName")), site.get("siteId"))
+        # The site objects are not indexed on their own, all their references belong to the site
+        self.add_refs(base, site_ref, site, skip=())
+        for kind, nested_kinds in TEMPLATE_KINDS.items():
+            for obj in site.get(kind) or []:
+                # Site objects are identified by the reference to their template object
+                ref = ref_text(obj.get(kind[:-1] + "Ref")) or site_ref
+                self.add_subnets(base, ref, obj)
+                for nested_kind in nested_kinds:
+                    for nested in obj.get(nested_kind) or []:
+                        nested_ref = ref_text(nested.get(nested_kind[:-1] + "Ref")) or ref
+                        self.add_subnets(base, nested_ref, nested)
+                        if nested_kind == "epgs":
+                            self.add_static_ports(base, nested_ref, nested)
+
+    def add_refs(self, base, source_ref, obj, attribute=None, skip=OBJECT_KINDS):
+        """Add all references found in an object and its nested attributes, except in the nested objects that are indexed on their own"""
+        if isinstance(obj, dict):
+            for key, value in obj.items():
+                path = key if attribute is None else "{0}.{1}".format(attribute, key)
+                if key.endswith("Ref") and isinstance(value, (dict,) + string_types) and value:
+                    target = ref_text(value)
+                    if target and target != source_ref:
+                        self.rows["refs"].append(dict(base, source_ref=source_ref, attribute=path, target_ref=target))
+                elif isinstance(value, (dict, list)) and key not in skip:
+                    self.add_refs(base, source_ref, value, path, skip)
+        elif isinstance(obj, list):
+            for item in obj:
+                self.add_refs(base, source_ref, item, attribute, skip)
+
+    def add_subnets(self, base, owner_ref, obj):
+        vrf_ref = ref_text(obj.get("vrfRef"))
+        for subnet in obj.get("subnets") or []:
+            prefix = subnet.get("ip")
+            bounds = address_range(prefix)
+            version, first, last = bounds if bounds else (None, None, None)
+            self.rows["subnets"].append(dict(base, owner_ref=owner_ref, vrf_ref=vrf_ref, prefix=prefix, version=version, first=first, last=last))
+
+    def add_static_ports(self, base, epg_ref, epg):
+        owner = epg_ref_owner(epg_ref) or (None, None, None, None)
+        site = self.site_names.get(base.get("site_id"))
+        ports = [(port, port.get("type") or "port") for port in epg.get("staticPorts") or []]
+        ports.extend((leaf, "leaf") for leaf in epg.get("staticLeafs") or [])
+        for port, port_type in ports:
+            parsed = parse_static_port_path(port.get("path")) or dict(nodes=[None])
+            for node in parsed.get("nodes"):
+                self.rows["static_ports"].append(
+                    dict(
+                        base,
+                        site=site,
+                        anp=owner[2],
+                        epg=owner[3],
+                        type=port_type,
+                        path=port.get("path"),
+                        pod=parsed.get("pod"),
+                        node=node,
+                        fex=parsed.get("fex"),
+                        interface=parsed.get("interface"),
+                        vlan=port.get("portEncapVlan"),
+                        micro_seg_vlan=port.get("microSegVlan"),
+                        mode=port.get("mode"),
+                        deployment_immediacy=port.get("deploymentImmediacy"),
+                    )
+                )
@@ -8,12 +8,8 @@ from __future__ import absolute_import, division, print_function
 __metaclass__ = type
 
 from copy import deepcopy
-import re
 import os
-import ast
-import datetime
-import shutil
-import tempfile
+import re
 from ansible.module_utils.basic import json
 from ansible.module_utils.basic import env_fallback
 from ansible.module_utils.six import PY3
@@ -22,17 +18,8 @@ from ansible.module_utils.six.moves.urllib.parse import urlencode, urljoin
 from ansible.module_utils.urls import fetch_url
 from ansible.module_utils._text import to_native, to_text
 from ansible.module_utils.connection import Connection
-from ansible_collections.cisco.mso.plugins.module_utils.constants import NDO_API_VERSION_PATH_FORMAT
-import socket
-import struct
-
-try:
-    from requests_toolbelt.multipart.encoder import MultipartEncoder
-
-    HAS_MULTIPART_ENCODER = True
-except ImportError:
-    HAS_MULTIPART_ENCODER = False
-
+from ansible_collections.cisco.mso.plugins.module_utils.constants import DEPLOY_QUEUE_ENV, FIXTURE_MODE_ENV, NDO_API_VERSION_PATH_FORMAT
+from ansible_collections.cisco.mso.plugins.module_utils.planerror import PLAN_PATH_ENV, PlanError
 
 if PY3:
 
@@ -113,190 +100,6 @@ def mso_argument_spec():
     )
 
 
-def mso_reference_spec():
-    return dict(
-        name=dict(type="str", required=True),
-        schema=dict(type="str"),
-        template=dict(type="str"),
-    )
-
-def ndo_templates_spec():
-    return dict(
-        name=dict(type="str", required=True),
-        template=dict(type="str", required=True),
-    )
-
-
-def mso_epg_subnet_spec():
-    return dict(
-        subnet=dict(type="str", required=True, aliases=["ip"]),
-        description=dict(type="str"),
-        scope=dict(type="str", default="private", choices=["private", "public"]),
-        shared=dict(type="bool", default=False),
-        no_default_gateway=dict(type="bool", default=False),
-    )
-
-
-def mso_subnet_spec():
-    subnet_spec = mso_epg_subnet_spec()
-    subnet_spec.update(dict(querier=dict(type="bool", default=False)))
-    return subnet_spec
-
-
-def mso_bd_subnet_spec():
-    subnet_spec = mso_epg_subnet_spec()
-    subnet_spec.update(dict(querier=dict(type="bool", default=False)))
-    subnet_spec.update(dict(primary=dict(type="bool", default=False)))
-    subnet_spec.update(dict(virtual=dict(type="bool", default=False)))
-    return subnet_spec
-
-
-def mso_dhcp_spec():
-    return dict(
-        dhcp_option_policy=dict(type="dict", options=mso_dhcp_option_spec()),
-        name=dict(type="str", required=True),
-        version=dict(type="int", required=True),
-    )
-
-
-def mso_dhcp_option_spec():
-    return dict(
-        name=dict(type="str", required=True),
-        version=dict(type="int", required=True),
-    )
-
-
-def mso_contractref_spec():
-    return dict(
-        name=dict(type="str", required=True),
-        schema=dict(type="str"),
-        template=dict(type="str"),
-        type=dict(type="str", required=True, choices=["consumer", "provider"]),
-    )
-
-
-def mso_expression_spec():
-    return dict(
-        type=dict(type="str", required=True, aliases=["tag"]),
-        operator=dict(type="str", choices=["not_in", "in", "equals", "not_equals", "has_key", "does_not_have_key"], required=True),
-        value=dict(type="str"),
-    )
-
-
-def mso_expression_spec_ext_epg():
-    return dict(
-        type=dict(type="str", choices=["ip_address"], required=True),
-        operator=dict(type="str", choices=["equals"], required=True),
-        value=dict(type="str", required=True),
-    )
-
-
-def mso_hub_network_spec():
-    return dict(
-        name=dict(type="str", required=True),
-        tenant=dict(type="str", required=True),
-    )
-
-
-def mso_object_migrate_spec():
-    return dict(
-        epg=dict(type="str", required=True),
-        anp=dict(type="str", required=True),
-    )
-
-
-def mso_service_graph_node_spec():
-    return dict(
-        type=dict(type="str", required=True),
-    )
-
-
-def mso_service_graph_node_device_spec():
-    return dict(
-        name=dict(type="str", required=True),
-    )
-
-
-def mso_service_graph_connector_spec():
-    return dict(
-        provider=dict(type="str", required=True),
-        consumer=dict(type="str", required=True),
-        # Only connectorType bd with value "general" is supported for now thus fixed in code
-        #  when connectorType externalEpg is supported "route-peering" should be added
-        #  also change SERVICE_NODE_CONNECTOR_TYPE_MAP in constants.py
-        #  also verify if connector type is specific to provider or always same for both
-        connector_object_type=dict(type="str", default="bd", choices=["bd"]),
-        provider_schema=dict(type="str"),
-        provider_template=dict(type="str"),
-        consumer_schema=dict(type="str"),
-        consumer_template=dict(type="str"),
-    )
-
-
-def mso_site_anp_epg_bulk_staticport_spec():
-    return dict(
-        type=dict(type="str", choices=["port", "vpc", "dpc"]),
-        pod=dict(type="str"),  # This parameter is not required for querying all objects
-        leaf=dict(type="str"),  # This parameter is not required for querying all objects
-        fex=dict(type="str"),  # This parameter is not required for querying all objects
-        path=dict(type="str"),  # This parameter is not required for querying all objects
-        vlan=dict(type="int"),  # This parameter is not required for querying all objects
-        primary_micro_segment_vlan=dict(type="int"),  # This parameter is not required for querying all objects
-        deployment_immediacy=dict(type="str", choices=["immediate", "lazy"]),
-        mode=dict(type="str", choices=["native", "regular", "untagged"]),
-    )
-
-
-# Copied from ansible's module uri.py (url): https://github.com/ansible/ansible/blob/cdf62edc65f564fff6b7e575e084026fa7faa409/lib/ansible/modules/uri.py
-def write_file(module, url, dest, content, resp, tmpsrc=None):
-    # create a tempfile with some test content
-
-    if tmpsrc is None and content is not None:
-        fd, tmpsrc = tempfile.mkstemp(dir=module.tmpdir)
-        f = open(tmpsrc, "wb")
-        try:
-            f.write(content)
-        except Exception as e:
-            os.remove(tmpsrc)
-            module.fail_json(msg="Failed to create temporary content file: {0}".format(to_native(e)))
-        f.close()
-
-    checksum_src = None
-    checksum_dest = None
-
-    # raise an error if there is no tmpsrc file
-    if not os.path.exists(tmpsrc):
-        os.remove(tmpsrc)
-        module.fail_json(msg="Source '{0}' does not exist".format(tmpsrc))
-    if not os.access(tmpsrc, os.R_OK):
-        os.remove(tmpsrc)
-        module.fail_json(msg="Source '{0}' is not readable".format(tmpsrc))
-    checksum_src = module.sha1(tmpsrc)
-
-    # check if there is no dest file
-    if os.path.exists(dest):
-        # raise an error if copy has no permission on dest
-        if not os.access(dest, os.W_OK):
-            os.remove(tmpsrc)
-            module.fail_json(msg="Destination '{0}' not writable".format(dest))
-        if not os.access(dest, os.R_OK):
-            os.remove(tmpsrc)
-            module.fail_json(msg="Destination '{0}' not readable".format(dest))
-        checksum_dest = module.sha1(dest)
-    else:
-        if not os.access(os.path.dirname(dest), os.W_OK):
-            os.remove(tmpsrc)
-            module.fail_json(msg="Destination dir '{0}' not writable".format(os.path.dirname(dest)))
-
-    if checksum_src != checksum_dest:
-        try:
-            shutil.copyfile(tmpsrc, dest)
-        except Exception as e:
-            os.remove(tmpsrc)
-            module.fail_json(msg="failed to copy {0} to {1}: {2}".format(tmpsrc, dest, to_native(e)))
-
-    os.remove(tmpsrc)
-
 def diff_dicts(dict1, dict2, exclude_key=None):
     keys_to_exclude = {'uuid'}
     if exclude_key:
@@ -331,6 +134,10 @@ def update_payload(diff, payload):
     return payload
 
 def int_to_ipv4(int_value):
+    # Imported here, only a few NDO modules need it
+    import socket
+    import struct
+
     return socket.inet_ntoa(struct.pack('!I', int_value))
 
 def get_template_id(template_name, template_type, template_dict):
@@ -381,6 +188,37 @@ class MSOModule(object):
         self.status = None
         self.url = None
         self.httpapi_logs = list()
+        self.login_pending = False
+
+        # Record/replay of REST interactions, see module_utils/fixtures.py
+        # With the HTTPAPI connection plugin the fixtures are handled by the connection plugin itself
+        self.fixtures = None
+        if self.module._socket_path is None and os.environ.get(FIXTURE_MODE_ENV):
+            from ansible_collections.cisco.mso.plugins.module_utils.fixtures import FixtureError, fixture_store_from_env
+
+            try:
+                self.fixtures = fixture_store_from_env()
+            except FixtureError as e:
+                self.fail_json(msg=to_native(e))
+
+        # Plan mode, see module_utils/plan.py
+        # Requests are served from a snapshot and writes are added to a plan, so no session is ever logged in
+        self.plan = None
+        if os.environ.get(PLAN_PATH_ENV):
+            from ansible_collections.cisco.mso.plugins.module_utils.plan import plan_from_env
+
+            try:
+                self.plan = plan_from_env()
+            except PlanError as e:
+                self.fail_json(msg=to_native(e))
+
+        # Deploy queue, see module_utils/deployqueue.py
+        # Successful writes mark their templates dirty, deploys mark them clean
+        self.deploy_queue = None
+        if os.environ.get(DEPLOY_QUEUE_ENV):
+            from ansible_collections.cisco.mso.plugins.module_utils.deployqueue import deploy_queue_from_env
+
+            self.deploy_queue = deploy_queue_from_env()
 
         if self.module._debug:
             self.module.warn("Enable debug output because ANSIBLE_DEBUG was set.")
@@ -410,9 +248,12 @@ class MSOModule(object):
             if self.params.get("host") is None:
                 self.fail_json(msg="Parameter 'host' is required when not using the HTTP API connection plugin")
 
-            if self.params.get("password"):
-                # Perform password-based authentication, log on using password
-                self.login()
+            if self.fixtures is not None and self.fixtures.replaying:
+                # Replayed responses do not require an authenticated session
+                pass
+            elif self.params.get("password"):
+                # Perform password-based authentication on the first request, so input validation runs before any network access
+                self.login_pending = True
             else:
                 self.fail_json(msg="Parameter 'password' is required for authentication")
         else:
@@ -435,6 +276,13 @@ class MSOModule(object):
             self.fail_json(msg="Login domain lookup failed for domain '%s': %s" % (domain, d))
         return d["id"]
 
+    def ensure_login(self):
+        """Log in to MSO when the login was deferred and not done yet"""
+        if self.login_pending:
+            # Reset first, the login domain lookup is a request by itself
+            self.login_pending = False
+            self.login()
+
     def login(self):
         """Log in to MSO"""
 
@@ -479,174 +327,13 @@ class MSOModule(object):
         if self.status not in [200, 201, 202, 204]:
             self.error = self.jsondata
 
-    def request_download(self, path, destination=None, method="GET", api_version="v1"):
-        if self.platform != "nd":
-            self.url = urljoin(self.baseuri, path)
-
-        redirected = False
-        redir_info = {}
-        redirect = {}
-        content = None
-        data = None
-
-        src = self.params.get("src")
-        if src:
-            try:
-                self.headers.update({"Content-Length": os.stat(src).st_size})
-                data = open(src, "rb")
-            except OSError:
-                self.fail_json(msg="Unable to open source file %s" % src, elapsed=0)
-
-        kwargs = {}
-        if destination is not None and os.path.isdir(destination):
-            # first check if we are redirected to a file download
-            if self.platform == "nd":
-                redir_info = self.connection.get_remote_file_io_stream(
-                    NDO_API_VERSION_PATH_FORMAT.format(api_version=api_version, path=path), self.module.tmpdir, method
-                )
-                # In place of Content-Disposition, NDO get_remote_file_io_stream returns content-disposition.
-                content_disposition = redir_info.get("content-disposition")
-            else:
-                check, redir_info = fetch_url(self.module, self.url, headers=self.headers, method=method, timeout=self.params.get("timeout"))
-                content_disposition = check.headers.get("Content-Disposition")
-
-            if content_disposition:
-                file_name = content_disposition.split("filename=")[1]
-            else:
-                self.fail_json(msg="Failed to fetch {0} backup information from MSO/NDO, response: {1}".format(self.params.get("backup"), redir_info))
-
-            # if we are redirected, update the url with the location header and update dest with the new url filename
-            if redir_info["status"] in (301, 302, 303, 307):
-                self.url = redir_info.get("location")
-                redirected = True
-            destination = os.path.join(destination, file_name)
-
-        # if destination file already exist, only download if file newer
-        if os.path.exists(destination):
-            kwargs["last_mod_time"] = datetime.datetime.utcfromtimestamp(os.path.getmtime(destination))
-
-        if self.platform == "nd":
-            if redir_info["status"] == 200 and redirected is False:
-                info = redir_info
-            else:
-                info = self.connection.get_remote_file_io_stream("/mso/{0}".format(self.url.split("/mso/", 1)), self.module.tmpdir, method)
-        else:
-            resp, info = fetch_url(
-                self.module,
-                self.url,
-                data=data,
-                headers=self.headers,
-                method=method,
-                timeout=self.params.get("timeout"),
-                unix_socket=self.params.get("unix_socket"),
-                **kwargs
-            )
-
-            try:
-                content = resp.read()
-            except AttributeError:
-                # there was no content, but the error read() may have been stored in the info as 'body'
-                content = info.pop("body", "")
-
-            if src:
-                # Try to close the open file handle
-                try:
-                    data.close()
-                except Exception:
-                    pass
-
-        redirect["redirected"] = redirected or info.get("url") != self.url
-        redirect.update(redir_info)
-        redirect.update(info)
-
-        write_file(self.module, self.url, destination, content, redirect, info.get("tmpsrc"))
-
-        return redirect, destination
-
-    def request_upload(self, path, fields=None, method="POST", api_version="v1"):
-        """Generic HTTP MultiPart POST method for MSO uploads."""
-        self.path = path
-        if self.platform != "nd":
-            self.url = urljoin(self.baseuri, path)
-
-        info = dict()
-
-        if self.platform == "nd":
-            try:
-                if os.path.exists(self.params.get("backup")):
-                    info = self.connection.send_file_request(
-                        method,
-                        NDO_API_VERSION_PATH_FORMAT.format(api_version=api_version, path=path),
-                        file=self.params.get("backup"),
-                        remote_path=self.params.get("remote_path"),
-                    )
-                else:
-                    self.fail_json(msg="Upload failed due to: No such file or directory, Backup file: '{0}'".format(self.params.get("backup")))
-            except Exception as error:
-                self.fail_json("NDO upload failed due to: {0}".format(error))
-        else:
-            if not HAS_MULTIPART_ENCODER:
-                self.fail_json(msg="requests-toolbelt is required for the upload state of this module")
-
-            mp_encoder = MultipartEncoder(fields=fields)
-            self.headers["Content-Type"] = mp_encoder.content_type
-            self.headers["Accept-Encoding"] = "gzip, deflate, br"
-
-            resp, info = fetch_url(
-                self.module,
-                self.url,
-                headers=self.headers,
-                data=mp_encoder,
-                method=method,
-                timeout=self.params.get("timeout"),
-                use_proxy=self.params.get("use_proxy"),
-            )
-        
-        self.response = info.get("msg")
-        self.status = info.get("status")
-
-        # Get change status from HTTP headers
-        if "modified" in info:
-            self.has_modified = True
-            if info.get("modified") == "false":
-                self.result["changed"] = False
-            elif info.get("modified") == "true":
-                self.result["changed"] = True
-
-        # 200: OK, 201: Created, 202: Accepted, 204: No Content
-        if self.status in (200, 201, 202, 204):
-            if self.platform == "nd":
-                return info
-            else:
-                output = resp.read()
-                if output:
-                    return json.loads(output)
-
-        # 400: Bad Request, 401: Unauthorized, 403: Forbidden,
-        # 405: Method Not Allowed, 406: Not Acceptable
-        # 500: Internal Server Error, 501: Not Implemented
-        elif self.status:
-            if self.status >= 400:
-                try:
-                    if self.platform == "nd":
-                        payload = info.get("body")
-                    else:
-                        payload = json.loads(resp.read())
-                except (ValueError, AttributeError):
-                    try:
-                        payload = json.loads(info.get("body"))
-                    except Exception:
-                        self.fail_json(msg="MSO Error:", info=info)
-                if "code" in payload:
-                    self.fail_json(msg="MSO Error {code}: {message}".format(**payload), info=info, payload=payload)
-                else:
-                    self.fail_json(msg="MSO Error:".format(**payload), info=info, payload=payload)
-        else:
-            self.fail_json(msg="Backup file upload failed due to: {0}".format(info))
-        return {}
-
     def request(self, path, method=None, data=None, qs=None, api_version="v1"):
         """Generic HTTP method for MSO requests."""
+        from ansible_collections.cisco.mso.plugins.module_utils.codec import json_dumps, json_loads
+
+        if self.plan is not None:
+            return self.plan_request(path, method, data)
+        self.ensure_login()
         self.path = path
 
         if method is not None:
@@ -685,7 +372,7 @@ class MSOModule(object):
                 uri = uri + update_qs(qs)
 
             try:
-                info = self.connection.send_request(method, uri, json.dumps(data))
+                info = self.connection.send_request(method, uri, json_dumps(data))
                 self.url = info.get("url")
                 self.httpapi_logs.extend(self.connection.pop_messages())
                 info.pop("date", None)
@@ -708,15 +395,19 @@ class MSOModule(object):
 
             if qs is not None:
                 self.url = self.url + update_qs(qs)
-            resp, info = fetch_url(
-                self.module,
-                self.url,
-                headers=self.headers,
-                data=json.dumps(data),
-                method=self.method,
-                timeout=self.params.get("timeout"),
-                use_proxy=self.params.get("use_proxy"),
-            )
+
+            if self.fixtures is not None:
+                resp, info = self.fixture_request(data, api_version, qs)
+            else:
+                resp, info = fetch_url(
+                    self.module,
+                    self.url,
+                    headers=self.headers,
+                    data=json_dumps(data),
+                    method=self.method,
+                    timeout=self.params.get("timeout"),
+                    use_proxy=self.params.get("use_proxy"),
+                )
 
         self.response = info.get("msg")
         self.status = info.get("status", -1)
@@ -736,17 +427,18 @@ class MSOModule(object):
                 output = resp.read()
                 if output:
                     try:
-                        return json.loads(output)
+                        output = json_loads(output)
                     except Exception as e:
                         self.error = dict(code=-1, message="Unable to parse output as JSON, see 'raw' output. {0}".format(e))
                         self.result["raw"] = output
                         return
+                    return self.queue_deploy(output, data, qs)
             except AttributeError:
-                return info.get("body")
+                return self.queue_deploy(info.get("body"), data, qs)
 
         # 204: No Content
         elif self.status == 204:
-            return {}
+            return self.queue_deploy({}, data, qs)
 
         # 404: Not Found
         elif self.method == "DELETE" and self.status == 404:
@@ -781,6 +473,94 @@ class MSOModule(object):
                 self.fail_json(msg=msg)
             return {}
 
+    def queue_deploy(self, response, data, qs):
+        """Mark the templates changed by a successful request dirty in the deploy queue, or clean when they were deployed"""
+        if self.deploy_queue is not None:
+            from ansible_collections.cisco.mso.plugins.module_utils.deployqueue import DeployQueueError, queue_changes
+
+            try:
+                self.deploy_queue.update(*queue_changes(self.path, self.method, data, qs, response))
+            except DeployQueueError as e:
+                self.fail_json(msg=to_native(e))
+        return response
+
+    def defer_deploy(self, schema_id, template):
+        """Add a template to the deploy queue instead of deploying it"""
+        if self.deploy_queue is None:
+            self.fail_json(msg="The deploy queue is not enabled, set the {0} environment variable".format(DEPLOY_QUEUE_ENV))
+        if not self.module.check_mode:
+            from ansible_collections.cisco.mso.plugins.module_utils.deployqueue import DeployQueueError
+
+            try:
+                self.deploy_queue.update(dirty=[(schema_id, template)])
+            except DeployQueueError as e:
+                self.fail_json(msg=to_native(e))
+
+    def plan_request(self, path, method, data):
+        """Serve a request from the snapshot of plan mode, or add a PATCH or PUT request to the plan"""
+        self.path = path
+        if method is not None:
+            self.method = method
+        try:
+            if self.method == "GET":
+                return self.plan.get(path)
+            if self.method == "PATCH":
+                if not data:
+                    return {}
+                self.patch_operation = data
+                return self.plan.patch(path, data)
+            if self.method == "PUT":
+                return self.plan.put(path, data)
+        except PlanError as e:
+            self.fail_json(msg=to_native(e))
+        self.fail_json(
+            msg="Request '{0} {1}' cannot be planned, only PATCH and PUT requests of schemas and templates can be planned".format(self.method, path)
+        )
+
+    def fixture_request(self, data, api_version, qs):
+        """Record or replay a request through the fixture store instead of a plain fetch_url"""
+        from ansible_collections.cisco.mso.plugins.module_utils.codec import json_dumps, json_loads
+        from ansible_collections.cisco.mso.plugins.module_utils.fixtures import FixtureError, timer
+
+        if api_version is not None:
+            uri = "/api/{0}/{1}".format(api_version, self.path.lstrip("/"))
+        else:
+            uri = "/{0}".format(self.path.lstrip("/"))
+        if qs is not None:
+            uri = uri + update_qs(qs)
+
+        if self.fixtures.replaying:
+            try:
+                info = self.fixtures.replay(self.method, uri, data)
+            except FixtureError as e:
+                self.fail_json(msg=to_native(e))
+            info["url"] = self.url
+            return None, info
+
+        start = timer()
+        resp, info = fetch_url(
+            self.module,
+            self.url,
+            headers=self.headers,
+            data=json_dumps(data),
+            method=self.method,
+            timeout=self.params.get("timeout"),
+            use_proxy=self.params.get("use_proxy"),
+        )
+        try:
+            output = resp.read()
+        except AttributeError:
+            output = info.pop("body", "")
+        elapsed = timer() - start
+
+        # Store the parsed response as body, request() returns the body as-is when there is no response object
+        try:
+            info["body"] = json_loads(output) if output else {}
+        except Exception:
+            info["body"] = to_text(output)
+        self.fixtures.record(self.method, uri, data, info, elapsed=elapsed)
+        return None, info
+
     def query_objs(self, path, key=None, api_version="v1", **kwargs):
         """Query the MSO REST API for objects in a path"""
         found = []
@@ -864,6 +644,22 @@ class MSOModule(object):
             self.fail_json(msg="Schema lookup failed for schema '{0}': '{1}'".format(schema, schema_id))
         return schema_id
 
+    def lookup_schemas(self, schemas, ignore_not_found_error=False):
+        """Look up schemas with a single query of the schema identities and return a dictionary of their ids by name"""
+        if schemas is None:
+            return schemas
+
+        identities = dict((s.get("displayName"), s.get("id")) for s in self.query_objs("schemas/list-identity", key="schemas"))
+        ids = {}
+        for schema in schemas:
+            if not identities.get(schema):
+                if not ignore_not_found_error:
+                    self.fail_json(msg="Provided schema '{0}' does not exist.".format(schema))
+                self.module.warn("Provided schema '{0}' does not exist.".format(schema))
+                continue
+            ids[schema] = identities.get(schema)
+        return ids
+
     def lookup_domain(self, domain, ignore_not_found_error=False):
         """Look up a domain and return its id"""
         if domain is None:
@@ -884,6 +680,9 @@ class MSOModule(object):
         if roles is None:
             return roles
 
+        # Imported here, only mso_user needs it
+        import ast
+
         ids = []
         for role in roles:
             access_type = "readWrite"
@@ -1339,12 +1138,14 @@ class MSOModule(object):
 
     def check_changed(self):
         """Check if changed by comparing new values from existing"""
+        from ansible_collections.cisco.mso.plugins.module_utils.codec import json_dumps
+
         existing = self.existing
         if "password" in existing:
             existing["password"] = self.sent.get("password")
 
         existing = self.remove_keys_from_dict_when_value_empty(existing)
-        self.stdout = json.dumps(existing)
+        self.stdout = json_dumps(existing)
 
         return not issubset(self.sent, existing)
 
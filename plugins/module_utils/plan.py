@@ -0,0 +1,267 @@
+# -*- coding: utf-8 -*-
+
+# GNU General Public License v3.0+ (see LICENSE or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+# Plan mode: modules read the schemas and templates from a snapshot (the mirror of mso_mirror_sync) instead of MSO,
+# and their PATCH and PUT requests are accumulated per schema and template in a plan file, which mso_plan_apply sends to MSO.
+
+import copy
+import os
+import tempfile
+from ansible.module_utils.six import string_types
+from ansible_collections.cisco.mso.plugins.module_utils.codec import json_dumps, json_loads
+from ansible_collections.cisco.mso.plugins.module_utils.mirror import MSOMirror, MirrorError, ref_text
+from ansible_collections.cisco.mso.plugins.module_utils.planerror import PLAN_PATH_ENV, PLAN_SNAPSHOT_ENV, PlanError
+
+try:
+    import fcntl
+
+    HAS_FCNTL = True
+except ImportError:
+    HAS_FCNTL = False
+
+# Increase when the plan file format changes
+PLAN_FORMAT_VERSION = 2
+
+# The kinds of documents that can be planned, also the snapshot tables holding them
+PLAN_KINDS = ["schemas", "templates"]
+
+
+def plan_from_env(path=None, snapshot=None):
+    """
+    Build a plan from explicit settings or from the MSO_PLAN_PATH and MSO_PLAN_SNAPSHOT environment variables.
+    :return: The plan or None when plan mode is not enabled. -> MSOPlan | None
+    """
+    path = path or os.environ.get(PLAN_PATH_ENV)
+    snapshot = snapshot or os.environ.get(PLAN_SNAPSHOT_ENV)
+    if not path:
+        return None
+    if not snapshot:
+        raise PlanError("Plan mode requires the path of a snapshot created by mso_mirror_sync in {0}".format(PLAN_SNAPSHOT_ENV))
+    return MSOPlan(path, snapshot)
+
+
+def unescape(segment):
+    return segment.replace("~1", "/").replace("~0", "~")
+
+
+def matches(item, segment):
+    """Whether a list item is addressed by a path segment: by name, by site and template, or by the name of its object reference"""
+    if not isinstance(item, dict):
+        return False
+    if item.get("name") == segment or "{0}-{1}".format(item.get("siteId"), item.get("templateName")) == segment:
+        return True
+    for key, value in item.items():
+        if key.endswith("Ref") and value:
+            text = ref_text(value)
+            if isinstance(text, string_types) and text.endswith("/" + segment):
+                return True
+    return False
+
+
+def list_index(items, segment, path):
+    if segment.isdigit():
+        index = int(segment)
+        if index >= len(items):
+            raise PlanError("Index {0} of path '{1}' is out of range".format(index, path))
+        return index
+    for index, item in enumerate(items):
+        if matches(item, segment):
+            return index
+    raise PlanError("Path '{0}' does not exist, '{1}' not found".format(path, segment))
+
+
+def apply_patch(document, ops):
+    """
+    Apply JSON patch operations to a document the way MSO does, list items can also be addressed by name.
+    Only the add, remove and replace operations are used by the modules.
+    """
+    for op in ops:
+        path = op.get("path")
+        segments = [unescape(segment) for segment in path.lstrip("/").split("/")]
+        parent = document
+        for segment in segments[:-1]:
+            if isinstance(parent, list):
+                parent = parent[list_index(parent, segment, path)]
+            elif isinstance(parent, dict) and segment in parent:
+                parent = parent[segment]
+            else:
+                raise PlanError("Path '{0}' does not exist, '{1}' not found".format(path, segment))
+        last = segments[-1]
+        value = copy.deepcopy(op.get("value"))
+        if op.get("op") not in ("add", "remove", "replace"):
+            raise PlanError("Operation '{0}' of path '{1}' cannot be planned".format(op.get("op"), path))
+        if isinstance(parent, list):
+            if op.get("op") == "add":
+                if last == "-":
+                    parent.append(value)
+                elif last.isdigit() and int(last) <= len(parent):
+                    parent.insert(int(last), value)
+                else:
+                    raise PlanError("Cannot add to path '{0}'".format(path))
+            elif op.get("op") == "remove":
+                del parent[list_index(parent, last, path)]
+            else:
+                parent[list_index(parent, last, path)] = value
+        elif isinstance(parent, dict):
+            if op.get("op") == "add":
+                parent[last] = value
+            elif last not in parent:
+                raise PlanError("Path '{0}' does not exist, '{1}' not found".format(path, last))
+            elif op.get("op") == "remove":
+                del parent[last]
+            else:
+                parent[last] = value
+        else:
+            raise PlanError("Path '{0}' does not exist".format(path))
+    return document
+
+
+class MSOPlan:
+    """
+    Plan file with the JSON patch operations of every schema and template, and their planned documents.
+    The base version of a document is the change marker of the snapshot when the document was first planned.
+    Every write locks the plan file, so tasks running in parallel forks do not lose each other's operations.
+    """
+
+    def __init__(self, path, snapshot):
+        self.path = path
+        self.snapshot = snapshot
+        self.mirror = None
+
+    def empty(self):
+        return dict(format_version=PLAN_FORMAT_VERSION, snapshot=self.snapshot, schemas={}, templates={})
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return self.empty()
+        with open(self.path, "rb") as f:
+            try:
+                plan = json_loads(f.read())
+            except ValueError as e:
+                raise PlanError("Plan file '{0}' is not valid: {1}".format(self.path, e))
+        if plan.get("format_version") != PLAN_FORMAT_VERSION:
+            raise PlanError("Plan file '{0}' was created by another version of this collection".format(self.path))
+        return plan
+
+    def save(self, plan):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(json_dumps(plan).encode("utf-8"))
+            os.rename(tmp, self.path)
+        except Exception:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+    def open_snapshot(self):
+        if self.mirror is None:
+            try:
+                self.mirror = MSOMirror.open_existing(self.snapshot)
+            except MirrorError as e:
+                raise PlanError(str(e))
+        return self.mirror
+
+    def snapshot_documents(self, kind):
+        return dict((key, json_loads(data)) for key, data in self.open_snapshot().stored(kind).items())
+
+    def documents(self, kind, plan=None):
+        """Return the documents of a kind by id, the planned document when a document was planned"""
+        documents = self.snapshot_documents(kind)
+        for key, entry in (plan or self.load()).get(kind).items():
+            documents[key] = entry.get("document")
+        return documents
+
+    def document(self, kind, key, plan=None):
+        entry = (plan or self.load()).get(kind).get(key)
+        if entry is not None:
+            return entry.get("document")
+        data = self.open_snapshot().stored(kind).get(key)
+        if data is None:
+            raise PlanError("{0} '{1}' is not in the snapshot '{2}'".format(kind[:-1].capitalize(), key, self.snapshot))
+        return json_loads(data)
+
+    def get(self, path):
+        """Serve a GET request from the snapshot and the plan"""
+        path = path.split("?")[0].strip("/")
+        if path == "schemas/list-identity":
+            identities = []
+            for schema in self.documents("schemas").values():
+                identity = dict((key, value) for key, value in schema.items() if key not in ("templates", "sites"))
+                identity["templates"] = [
+                    dict((key, value) for key, value in template.items() if not isinstance(value, list)) for template in schema.get("templates") or []
+                ]
+                identities.append(identity)
+            return dict(schemas=identities)
+        if path == "schemas":
+            return dict(schemas=list(self.documents("schemas").values()))
+        if path == "templates/summaries":
+            return [
+                dict(templateId=key, templateName=template.get("displayName") or template.get("name"), templateType=template.get("templateType"))
+                for key, template in self.documents("templates").items()
+            ]
+        parts = path.split("/")
+        if len(parts) == 2 and parts[0] in PLAN_KINDS:
+            return self.document(parts[0], parts[1])
+        if path in ("sites", "tenants"):
+            return {path: list(self.snapshot_documents(path).values())}
+        raise PlanError("Request 'GET {0}' cannot be served from the snapshot in plan mode".format(path))
+
+    def entry_key(self, method, path):
+        parts = path.split("?")[0].strip("/").split("/")
+        if len(parts) != 2 or parts[0] not in PLAN_KINDS:
+            raise PlanError("Request '{0} {1}' cannot be planned, only schemas and templates can be planned".format(method, path))
+        return parts
+
+    def update(self, kind, key, change):
+        """Apply a change to the planned document of a schema or template, and return the planned document"""
+        lock = open(self.path + ".lock", "a")
+        try:
+            if HAS_FCNTL:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            plan = self.load()
+            entry = plan.get(kind).get(key)
+            if entry is None:
+                document = self.document(kind, key, plan)
+                entry = dict(
+                    name=document.get("displayName") or document.get("name"),
+                    base=self.open_snapshot().manifest(kind).get(key),
+                    ops=[],
+                    replaces=0,
+                    document=document,
+                )
+            change(entry)
+            plan.get(kind)[key] = entry
+            self.save(plan)
+        finally:
+            lock.close()
+        return entry.get("document")
+
+    def patch(self, path, ops):
+        """Add the operations of a PATCH request to the plan and return the planned document"""
+        kind, key = self.entry_key("PATCH", path)
+
+        def change(entry):
+            entry["document"] = apply_patch(entry.get("document"), ops)
+            entry["ops"].extend(ops)
+
+        return self.update(kind, key, change)
+
+    def put(self, path, document):
+        """
+        Replace the planned document with the document of a PUT request, and return the planned document.
+        Once a document is replaced, mso_plan_apply sends the whole planned document with a single PUT request instead of the operations.
+        """
+        kind, key = self.entry_key("PUT", path)
+
+        def change(entry):
+            entry["document"] = copy.deepcopy(document)
+            entry["replaces"] += 1
+
+        return self.update(kind, key, change)
@@ -0,0 +1,17 @@
+# -*- coding: utf-8 -*-
+
+# GNU General Public License v3.0+ (see LICENSE or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+# The error and settings of plan mode, without the snapshot and mirror dependencies of module_utils/plan.py,
+# so MSOModule only imports plan mode when it is enabled.
+
+PLAN_PATH_ENV = "MSO_PLAN_PATH"
+PLAN_SNAPSHOT_ENV = "MSO_PLAN_SNAPSHOT"
+
+
+class PlanError(Exception):
+    pass
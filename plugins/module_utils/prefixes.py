@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+
+# GNU General Public License v3.0+ (see LICENSE or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+# Helpers to detect duplicate and overlapping IP prefixes (BD subnets, EPG subnets, ...) before they are sent to MSO.
+
+from ansible.module_utils._text import to_text
+
+try:
+    import ipaddress
+
+    HAS_IPADDRESS = True
+except ImportError:
+    HAS_IPADDRESS = False
+
+
+def normalize_gateway(value):
+    """
+    Return the canonical form of a gateway address with prefix length, like '10.0.0.1/24' or '2001:db8::1/64'.
+    Values that are not valid are returned unchanged.
+    """
+    if value is None or not HAS_IPADDRESS:
+        return value
+    try:
+        return to_text(ipaddress.ip_interface(to_text(value)))
+    except ValueError:
+        return value
+
+
+class PrefixIndex:
+    """
+    Index of IP prefixes per scope (usually a VRF).
+    Every prefix is stored with an owner, a description of the object it belongs to, which is used in the reported conflicts.
+    """
+
+    def __init__(self):
+        self.scopes = {}
+
+    def add(self, scope, prefix, owner, managed=False):
+        """
+        Add a prefix to a scope.
+        :param scope: The scope the prefix must be unique in, e.g. a VRF reference. -> Hashable
+        :param prefix: The prefix, host bits are allowed. -> Str
+        :param owner: Description of the object the prefix belongs to. -> Str
+        :param managed: Whether the prefix is provided by the user, only conflicts with a managed prefix are reported. -> Bool
+        """
+        if prefix is None or not HAS_IPADDRESS:
+            return
+        try:
+            network = ipaddress.ip_interface(to_text(prefix)).network
+        except ValueError:
+            return
+        self.scopes.setdefault(scope, []).append((network, to_text(prefix), owner, managed))
+
+    def conflicts(self):
+        """
+        Return the duplicate and overlapping prefixes of every scope that involve at least one managed prefix.
+        Prefixes are sorted once per scope and swept with a stack of enclosing prefixes, two prefixes overlap only when one contains the other.
+        :return: List of conflicts with the scope, both prefixes and owners. -> List[Dict]
+        """
+        conflicts = []
+        for scope, entries in self.scopes.items():
+            entries = sorted(entries, key=lambda entry: (entry[0].version, int(entry[0].network_address), entry[0].prefixlen))
+            stack = []
+            for entry in entries:
+                network = entry[0]
+                while stack and not (
+                    stack[-1][0].version == network.version
+                    and stack[-1][0].network_address <= network.network_address
+                    and network.broadcast_address <= stack[-1][0].broadcast_address
+                ):
+                    stack.pop()
+                for outer in stack:
+                    if outer[3] or entry[3]:
+                        conflicts.append(
+                            dict(
+                                scope=scope,
+                                type="duplicate" if outer[0] == network else "overlap",
+                                prefix=outer[1],
+                                owner=outer[2],
+                                other_prefix=entry[1],
+                                other_owner=entry[2],
+                            )
+                        )
+                stack.append(entry)
+        return conflicts
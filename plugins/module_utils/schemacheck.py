@@ -0,0 +1,239 @@
+# -*- coding: utf-8 -*-
+
+# GNU General Public License v3.0+ (see LICENSE or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+# Offline validation of a schema, without the schemas/{id}/validate API: dangling references, site-local objects without
+# their template object, duplicate object names and duplicate subnets within a VRF. All problems are reported at once.
+
+from ansible_collections.cisco.mso.plugins.module_utils.graph import key_text, ref_key, schema_objects
+from ansible_collections.cisco.mso.plugins.module_utils.prefixes import PrefixIndex
+
+VALIDATION_CHOICES = ["remote", "local", "both"]
+
+# Site-local object lists with the reference to their template object, the EPGs of a site ANP are handled with their ANP
+SITE_OBJECT_REFS = [
+    ("vrfs", "vrfRef"),
+    ("bds", "bdRef"),
+    ("anps", "anpRef"),
+    ("contracts", "contractRef"),
+    ("externalEpgs", "externalEpgRef"),
+    ("intersiteL3outs", "l3outRef"),
+    ("serviceGraphs", "serviceGraphRef"),
+]
+
+
+def problem(kind, path, msg):
+    return dict(type=kind, path=path, msg=msg)
+
+
+def reference_paths(value, path, skip=("epgs",)):
+    """Return the path and value of every reference of an object and its nested attributes"""
+    references = []
+    if isinstance(value, dict):
+        for key, item in value.items():
+            if key.endswith("Ref"):
+                references.append(("{0}/{1}".format(path, key), item))
+            elif isinstance(item, (dict, list)) and key not in skip:
+                references.extend(reference_paths(item, "{0}/{1}".format(path, key), skip))
+    elif isinstance(value, list):
+        for index, item in enumerate(value):
+            references.extend(reference_paths(item, "{0}/{1}".format(path, index), skip))
+    return references
+
+
+class SchemaChecker:
+    """
+    Validate schemas locally. Every schema is fetched once, the identities of all schemas are only fetched when a schema
+    references another schema, and the objects of all fetched schemas are indexed on their graph key.
+    """
+
+    def __init__(self, mso):
+        self.mso = mso
+        self.identities = None
+        self.schemas = {}
+        self.objects = {}
+
+    def load(self, schema_id):
+        """Fetch and index a schema, or return None when it does not exist"""
+        if schema_id not in self.schemas:
+            if schema_id is not None and self.identities is not None and schema_id not in self.identities:
+                self.schemas[schema_id] = None
+            else:
+                self.schemas[schema_id] = self.mso.query_obj("schemas/{0}".format(schema_id)) or None
+            for key, obj, path in schema_objects(self.schemas.get(schema_id) or {}):
+                self.objects.setdefault(key, obj)
+        return self.schemas.get(schema_id)
+
+    def exists(self, key):
+        """Whether the object of a graph key exists, the schemas of other references are fetched on demand"""
+        if key[0] not in self.schemas:
+            if self.identities is None:
+                self.identities = dict((identity.get("id"), identity) for identity in self.mso.query_objs("schemas/list-identity", key="schemas"))
+            self.load(key[0])
+        return key in self.objects
+
+    def check(self, schema_id):
+        """
+        Validate a schema and the references to the other schemas.
+        :return: The problems with their type, path and message, empty when the schema is valid. -> List[Dict]
+        """
+        schema = self.load(schema_id)
+        if schema is None:
+            return [problem("missing_schema", "/", "Schema '{0}' does not exist".format(schema_id))]
+        problems = []
+        objects = schema_objects(schema)
+
+        # Duplicate names, an EPG only has to be unique within its ANP
+        seen = set()
+        for key, obj, path in objects:
+            if key in seen:
+                problems.append(problem("duplicate_name", path, "Duplicate {0}".format(key_text(key))))
+            seen.add(key)
+
+        # Dangling references of the template objects
+        for key, obj, path in objects:
+            for ref_path, ref in reference_paths(obj, path):
+                target = ref_key(self.mso, ref)
+                if target is not None and not self.exists(target):
+                    msg = "{0} references missing {1}".format(key_text(key), self.target_text(target))
+                    problems.append(problem("dangling_reference", ref_path, msg))
+
+        # Site-local objects must reference an object of the template of the site
+        templates = set(template.get("name") for template in schema.get("templates") or [])
+        for site in schema.get("sites") or []:
+            site_path = "/sites/{0}-{1}".format(site.get("siteId"), site.get("templateName"))
+            if site.get("templateName") not in templates:
+                msg = "Site '{0}' is associated with missing template '{1}'".format(site.get("siteId"), site.get("templateName"))
+                problems.append(problem("missing_template", site_path, msg))
+                continue
+            for attribute, ref_name in SITE_OBJECT_REFS:
+                for obj in site.get(attribute) or []:
+                    problems.extend(self.check_site_object(schema_id, site, site_path, attribute, ref_name, obj, seen))
+                    if attribute == "anps":
+                        anp_path = "{0}/anps/{1}".format(site_path, self.ref_name(obj.get("anpRef")))
+                        for epg in obj.get("epgs") or []:
+                            problems.extend(self.check_site_object(schema_id, site, anp_path, "epgs", "epgRef", epg, seen))
+
+        problems.extend(self.check_subnets(schema))
+        return problems
+
+    def check_site_object(self, schema_id, site, parent_path, attribute, ref_name, obj, template_keys):
+        problems = []
+        target = ref_key(self.mso, obj.get(ref_name))
+        path = "{0}/{1}/{2}".format(parent_path, attribute, self.ref_name(obj.get(ref_name)))
+        if target is None or target[:2] != (schema_id, site.get("templateName")) or target not in template_keys:
+            problems.append(
+                problem(
+                    "missing_template_object",
+                    path,
+                    "Site-local {0} '{1}' of site '{2}' has no object in template '{3}'".format(
+                        attribute[:-1], self.ref_name(obj.get(ref_name)), site.get("siteId"), site.get("templateName")
+                    ),
+                )
+            )
+        for ref_path, ref in reference_paths(dict((key, value) for key, value in obj.items() if key != ref_name), path):
+            ref_target = ref_key(self.mso, ref)
+            if ref_target is not None and not self.exists(ref_target):
+                msg = "Site-local {0} references missing {1}".format(attribute[:-1], self.target_text(ref_target))
+                problems.append(problem("dangling_reference", ref_path, msg))
+        return problems
+
+    def check_subnets(self, schema):
+        """Report the duplicate subnets within a VRF, the subnets of the template are deployed to every site as well"""
+        template_subnets = []
+        site_subnets = []
+        for template in schema.get("templates") or []:
+            for bd in template.get("bds") or []:
+                vrf = ref_key(self.mso, bd.get("vrfRef"))
+                owner = "{0}/{1}".format(template.get("name"), bd.get("name"))
+                for subnet in bd.get("subnets") or []:
+                    template_subnets.append((vrf, subnet.get("ip"), owner))
+            for anp in template.get("anps") or []:
+                for epg in anp.get("epgs") or []:
+                    vrf = self.bd_vrf(ref_key(self.mso, epg.get("bdRef")))
+                    owner = "{0}/{1}/{2}".format(template.get("name"), anp.get("name"), epg.get("name"))
+                    for subnet in epg.get("subnets") or []:
+                        template_subnets.append((vrf, subnet.get("ip"), owner))
+        for site in schema.get("sites") or []:
+            for bd in site.get("bds") or []:
+                bd_key = ref_key(self.mso, bd.get("bdRef"))
+                owner = "{0}/{1}/{2}".format(site.get("siteId"), site.get("templateName"), self.ref_name(bd.get("bdRef")))
+                for subnet in bd.get("subnets") or []:
+                    site_subnets.append(((self.bd_vrf(bd_key), site.get("siteId")), subnet.get("ip"), owner))
+            for anp in site.get("anps") or []:
+                for epg in anp.get("epgs") or []:
+                    epg_key = ref_key(self.mso, epg.get("epgRef"))
+                    epg_obj = self.objects.get(epg_key) if epg_key else None
+                    vrf = self.bd_vrf(ref_key(self.mso, epg_obj.get("bdRef"))) if epg_obj else None
+                    owner = "{0}/{1}/{2}".format(site.get("siteId"), site.get("templateName"), self.ref_name(epg.get("epgRef")))
+                    for subnet in epg.get("subnets") or []:
+                        site_subnets.append(((vrf, site.get("siteId")), subnet.get("ip"), owner))
+
+        prefix_index = PrefixIndex()
+        for vrf, prefix, owner in template_subnets:
+            if vrf is not None:
+                prefix_index.add((vrf, None), prefix, owner, managed=True)
+        site_scopes = set()
+        for scope, prefix, owner in site_subnets:
+            if scope[0] is not None:
+                prefix_index.add(scope, prefix, owner, managed=True)
+                site_scopes.add(scope)
+        for vrf, site_id in site_scopes:
+            for template_vrf, prefix, owner in template_subnets:
+                if template_vrf == vrf:
+                    prefix_index.add((vrf, site_id), prefix, owner)
+
+        problems = []
+        for conflict in prefix_index.conflicts():
+            if conflict.get("type") != "duplicate":
+                continue
+            vrf, site_id = conflict.get("scope")
+            problems.append(
+                problem(
+                    "duplicate_subnet",
+                    "/sites/{0}".format(site_id) if site_id else "/templates",
+                    "Duplicate subnet {0} ({1}) and {2} ({3}) in {4}{5}".format(
+                        conflict.get("prefix"),
+                        conflict.get("owner"),
+                        conflict.get("other_prefix"),
+                        conflict.get("other_owner"),
+                        key_text(vrf),
+                        " on site '{0}'".format(site_id) if site_id else "",
+                    ),
+                )
+            )
+        return problems
+
+    def bd_vrf(self, bd_key):
+        """Return the key of the VRF of a BD, or None when the BD or its VRF is not known"""
+        bd = self.objects.get(bd_key) if bd_key else None
+        return ref_key(self.mso, bd.get("vrfRef")) if bd else None
+
+    def target_text(self, key):
+        if self.schemas.get(key[0]) is None:
+            return "{0} in missing schema '{1}'".format(key_text(key), key[0])
+        return key_text(key)
+
+    def ref_name(self, ref):
+        key = ref_key(self.mso, ref)
+        return key[3].split("/")[-1] if key else ref
+
+
+def validate_schema(mso, schema_id, validation="remote"):
+    """
+    Validate a schema before it is deployed, locally, with the validation API of MSO, or both.
+    The local validation runs first and fails with all problems, before the validation API is called.
+    :return: The problems found locally. -> List[Dict]
+    """
+    problems = []
+    if validation in ("local", "both"):
+        problems = SchemaChecker(mso).check(schema_id)
+        if problems:
+            mso.fail_json(msg="Schema validation failed: {0}".format("; ".join(item.get("msg") for item in problems)), problems=problems)
+    if validation in ("remote", "both"):
+        mso.validate_schema(schema_id)
+    return problems
@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2018, Dag Wieers (@dagwieers) <dag@wieers.com>
+# Simplified BSD License (see licenses/simplified_bsd.txt or https://opensource.org/licenses/BSD-2-Clause)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+# Argument spec builders used by a subset of the modules.
+# Kept out of module_utils/mso.py so modules that do not need them do not ship them.
+
+
+def mso_reference_spec():
+    return dict(
+        name=dict(type="str", required=True),
+        schema=dict(type="str"),
+        template=dict(type="str"),
+    )
+
+
+def ndo_templates_spec():
+    return dict(
+        name=dict(type="str", required=True),
+        template=dict(type="str", required=True),
+    )
+
+
+def mso_epg_subnet_spec():
+    return dict(
+        subnet=dict(type="str", required=True, aliases=["ip"]),
+        description=dict(type="str"),
+        scope=dict(type="str", default="private", choices=["private", "public"]),
+        shared=dict(type="bool", default=False),
+        no_default_gateway=dict(type="bool", default=False),
+    )
+
+
+def mso_subnet_spec():
+    subnet_spec = mso_epg_subnet_spec()
+    subnet_spec.update(dict(querier=dict(type="bool", default=False)))
+    return subnet_spec
+
+
+def mso_bd_subnet_spec():
+    subnet_spec = mso_epg_subnet_spec()
+    subnet_spec.update(dict(querier=dict(type="bool", default=False)))
+    subnet_spec.update(dict(primary=dict(type="bool", default=False)))
+    subnet_spec.update(dict(virtual=dict(type="bool", default=False)))
+    return subnet_spec
+
+
+def mso_dhcp_spec():
+    return dict(
+        dhcp_option_policy=dict(type="dict", options=mso_dhcp_option_spec()),
+        name=dict(type="str", required=True),
+        version=dict(type="int", required=True),
+    )
+
+
+def mso_dhcp_option_spec():
+    return dict(
+        name=dict(type="str", required=True),
+        version=dict(type="int", required=True),
+    )
+
+
+def mso_contractref_spec():
+    return dict(
+        name=dict(type="str", required=True),
+        schema=dict(type="str"),
+        template=dict(type="str"),
+        type=dict(type="str", required=True, choices=["consumer", "provider"]),
+    )
+
+
+def mso_expression_spec():
+    return dict(
+        type=dict(type="str", required=True, aliases=["tag"]),
+        operator=dict(type="str", choices=["not_in", "in", "equals", "not_equals", "has_key", "does_not_have_key"], required=True),
+        value=dict(type="str"),
+    )
+
+
+def mso_expression_spec_ext_epg():
+    return dict(
+        type=dict(type="str", choices=["ip_address"], required=True),
+        operator=dict(type="str", choices=["equals"], required=True),
+        value=dict(type="str", required=True),
+    )
+
+
+def mso_hub_network_spec():
+    return dict(
+        name=dict(type="str", required=True),
+        tenant=dict(type="str", required=True),
+    )
+
+
+def mso_object_migrate_spec():
+    return dict(
+        epg=dict(type="str", required=True),
+        anp=dict(type="str", required=True),
+    )
+
+
+def mso_service_graph_node_spec():
+    return dict(
+        type=dict(type="str", required=True),
+    )
+
+
+def mso_service_graph_node_device_spec():
+    return dict(
+        name=dict(type="str", required=True),
+    )
+
+
+def mso_service_graph_connector_spec():
+    return dict(
+        provider=dict(type="str", required=True),
+        consumer=dict(type="str", required=True),
+        # Only connectorType bd with value "general" is supported for now thus fixed in code
+        #  when connectorType externalEpg is supported "route-peering" should be added
+        #  also change SERVICE_NODE_CONNECTOR_TYPE_MAP in constants.py
+        #  also verify if connector type is specific to provider or always same for both
+        connector_object_type=dict(type="str", default="bd", choices=["bd"]),
+        provider_schema=dict(type="str"),
+        provider_template=dict(type="str"),
+        consumer_schema=dict(type="str"),
+        consumer_template=dict(type="str"),
+    )
+
+
+def mso_site_anp_epg_bulk_staticport_spec():
+    return dict(
+        type=dict(type="str", choices=["port", "vpc", "dpc"]),
+        pod=dict(type="str"),  # This parameter is not required for querying all objects
+        leaf=dict(type="str"),  # This parameter is not required for querying all objects
+        fex=dict(type="str"),  # This parameter is not required for querying all objects
+        path=dict(type="str"),  # This parameter is not required for querying all objects
+        vlan=dict(type="int"),  # This parameter is not required for querying all objects
+        primary_micro_segment_vlan=dict(type="int"),  # This parameter is not required for querying all objects
+        deployment_immediacy=dict(type="str", choices=["immediate", "lazy"]),
+        mode=dict(type="str", choices=["native", "regular", "untagged"]),
+    )
+
+
+def mso_schema_epg_bulk_contract_spec():
+    return dict(
+        schema=dict(type="str"),
+        template=dict(type="str"),
+        anp=dict(type="str"),
+        epg=dict(type="str"),
+        external_epg=dict(type="str"),
+        contract=dict(type="dict", required=True, options=mso_contractref_spec()),
+    )
+
+
+def mso_schema_bulk_object_spec():
+    return dict(
+        kind=dict(type="str", required=True, choices=["anp", "bd", "contract", "epg", "external_epg", "filter", "l3out", "service_graph", "vrf"]),
+        name=dict(type="str", required=True),
+        display_name=dict(type="str"),
+        schema=dict(type="str"),
+        template=dict(type="str"),
+        anp=dict(type="str"),
+        attributes=dict(type="dict"),
+    )
+
+
+def mso_tenant_drift_static_port_spec():
+    return dict(
+        schema=dict(type="str"),
+        template=dict(type="str"),
+        site=dict(type="str", required=True),
+        anp=dict(type="str", required=True),
+        epg=dict(type="str", required=True),
+        type=dict(type="str", default="port", choices=["port", "vpc", "dpc"]),
+        pod=dict(type="str", required=True),
+        leaf=dict(type="str", required=True),
+        fex=dict(type="str"),
+        path=dict(type="str", required=True),
+        vlan=dict(type="int"),
+        deployment_immediacy=dict(type="str", choices=["immediate", "lazy"]),
+        mode=dict(type="str", choices=["native", "regular", "untagged"]),
+    )
@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*-
+
+# GNU General Public License v3.0+ (see LICENSE or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+# Helpers to parse static port paths and to detect static ports of different EPGs of a site that conflict on an interface.
+
+import re
+from ansible.module_utils._text import to_text
+
+# topology/pod-1/paths-101/pathep-[eth1/1], topology/pod-1/protpaths-101-102/pathep-[vpc_pg],
+# topology/pod-1/paths-101/extpaths-151/pathep-[eth1/1] and topology/pod-1/node-101 (static leafs)
+STATIC_PORT_PATH_REGEX = re.compile(
+    r"^topology/pod-(?P<pod>\d+)/(?P<kind>paths|protpaths|node)-(?P<nodes>\d+(?:-\d+)?)(?:/extpaths-(?P<fex>\d+))?(?:/pathep-\[(?P<interface>.+)\])?$"
+)
+
+EPG_REF_REGEX = re.compile(r"^/schemas/(?P<schema_id>[^/]+)/templates/(?P<template>[^/]+)/anps/(?P<anp>[^/]+)/epgs/(?P<epg>[^/]+)$")
+
+# Modes in which the static port carries the untagged traffic of the interface
+ACCESS_MODES = ["native", "untagged"]
+
+
+def parse_static_port_path(path):
+    """
+    Parse a static port path.
+    :return: The pod, the nodes (two for a vPC), the fex and the interface of the path, or None when the path is not known. -> Dict | None
+    """
+    match = STATIC_PORT_PATH_REGEX.match(to_text(path or "").strip())
+    if match is None:
+        return None
+    return dict(pod=match.group("pod"), nodes=match.group("nodes").split("-"), fex=match.group("fex"), interface=match.group("interface"))
+
+
+def static_port_path(path_type, pod, leaf, path, fex=None):
+    """Return the path of a static port of a port, vPC or PC from its pod, leaf, fex and interface or policy group"""
+    if path_type == "port" and fex is not None:
+        return "topology/{0}/paths-{1}/extpaths-{2}/pathep-[{3}]".format(pod, leaf, fex, path)
+    if path_type == "vpc":
+        return "topology/{0}/protpaths-{1}/pathep-[{2}]".format(pod, leaf, path)
+    return "topology/{0}/paths-{1}/pathep-[{2}]".format(pod, leaf, path)
+
+
+def static_port_keys(path):
+    """Return the interface key of every node of a static port path, or an empty list when the path is not known"""
+    parsed = parse_static_port_path(path)
+    if parsed is None or parsed.get("interface") is None:
+        return []
+    return [(parsed.get("pod"), node, parsed.get("fex"), parsed.get("interface")) for node in parsed.get("nodes")]
+
+
+def epg_ref_owner(epg_ref):
+    """Return the schema id, template, ANP and EPG of an EPG reference as text or dictionary"""
+    if isinstance(epg_ref, dict):
+        return (epg_ref.get("schemaId"), epg_ref.get("templateName"), epg_ref.get("anpName"), epg_ref.get("epgName"))
+    match = EPG_REF_REGEX.match(to_text(epg_ref or ""))
+    return match.groups() if match else None
+
+
+class StaticPortIndex:
+    """
+    Index of the static ports of the EPGs of a site, on the interface of every node and the VLAN.
+    Owners are (schema id, template, ANP, EPG) tuples, static ports of an EPG never conflict with the static ports of the same EPG.
+    """
+
+    def __init__(self):
+        self.vlans = {}
+        self.access = {}
+        self.schema_names = {}
+
+    def add(self, path, vlan, owner, mode=None):
+        for key in static_port_keys(path):
+            self.vlans.setdefault(key + (vlan,), {})[owner] = path
+            if mode in ACCESS_MODES:
+                self.access.setdefault(key, {})[owner] = path
+
+    def add_schema(self, schema, site_id, exclude=None):
+        """
+        Add the static ports of all site EPGs of a schema.
+        :param exclude: An owner whose static ports are not added, e.g. the EPG whose static ports are replaced. -> Tuple | None
+        """
+        self.schema_names[schema.get("id")] = schema.get("displayName")
+        for site in schema.get("sites") or []:
+            if site.get("siteId") != site_id:
+                continue
+            for anp in site.get("anps") or []:
+                for epg in anp.get("epgs") or []:
+                    owner = epg_ref_owner(epg.get("epgRef"))
+                    if owner is None or owner == exclude:
+                        continue
+                    for static_port in epg.get("staticPorts") or []:
+                        self.add(static_port.get("path"), static_port.get("portEncapVlan"), owner, static_port.get("mode"))
+
+    def owner_name(self, owner):
+        return "/".join([self.schema_names.get(owner[0], owner[0])] + list(owner[1:]))
+
+    def conflicts(self, path, vlan, owner, mode=None):
+        """
+        Return the static ports of other EPGs that conflict with a static port.
+        A conflict is the same VLAN on the same interface of a node, or a second untagged or native static port on the same interface.
+        :return: The conflicts with their type, node, interface, VLAN and the conflicting EPG. -> List[Dict]
+        """
+        conflicts = []
+        seen = set()
+        for key in static_port_keys(path):
+            found = [("vlan", other, other_path) for other, other_path in self.vlans.get(key + (vlan,), {}).items() if other != owner]
+            if mode in ACCESS_MODES:
+                found.extend(("access", other, other_path) for other, other_path in self.access.get(key, {}).items() if other != owner)
+            for conflict_type, other, other_path in found:
+                # Report a conflict of the two nodes of a vPC once
+                if (conflict_type, other, other_path) in seen:
+                    continue
+                seen.add((conflict_type, other, other_path))
+                conflicts.append(
+                    dict(
+                        type=conflict_type,
+                        pod=key[0],
+                        node=key[1],
+                        fex=key[2],
+                        interface=key[3],
+                        vlan=vlan,
+                        path=path,
+                        epg=self.owner_name(other),
+                        epg_path=other_path,
+                    )
+                )
+        return conflicts
+
+
+def site_schema_ids(mso, site_id, exclude_schema_id=None):
+    """
+    Return the ids of the schemas associated with a site, from the schema identities.
+    An identity without site associations is kept, so no schema of the site is missed.
+    """
+    schema_ids = []
+    for identity in mso.query_objs("schemas/list-identity", key="schemas"):
+        if identity.get("id") == exclude_schema_id:
+            continue
+        if "sites" in identity and not any(site.get("siteId") == site_id for site in identity.get("sites") or []):
+            continue
+        schema_ids.append(identity.get("id"))
+    return schema_ids
+
+
+def static_port_index(mso, schema, site_id, owner, mirror=None):
+    """
+    Build the static port index of the EPGs of a site, except the static ports of the owner.
+    The static ports of the other schemas are read from the mirror of mso_mirror_sync when provided,
+    otherwise only the schemas associated with the site are queried.
+    The static ports of the provided schema are always read from the schema itself.
+    """
+    index = StaticPortIndex()
+    if mirror is not None:
+        for row in mirror.static_port_rows(site_id, exclude_schema_id=schema.get("id")):
+            index.schema_names[row.get("schema_id")] = row.get("schema")
+            index.add(row.get("path"), row.get("vlan"), (row.get("schema_id"), row.get("template"), row.get("anp"), row.get("epg")), row.get("mode"))
+    else:
+        for schema_id in site_schema_ids(mso, site_id, exclude_schema_id=schema.get("id")):
+            other_schema = mso.query_obj("schemas/{0}".format(schema_id))
+            if other_schema:
+                index.add_schema(other_schema, site_id)
+    index.add_schema(schema, site_id, exclude=owner)
+    return index
+
+
+def check_static_port_conflicts(mso, index, owner, static_ports, conflict_check):
+    """
+    Check static port payloads against an index and fail or warn on conflicts, depending on conflict_check (error or warn).
+    :return: The conflicts. -> List[Dict]
+    """
+    conflicts = []
+    for static_port in static_ports:
+        conflicts.extend(index.conflicts(static_port.get("path"), static_port.get("portEncapVlan"), owner, static_port.get("mode")))
+    messages = []
+    for conflict in conflicts:
+        if conflict.get("type") == "vlan":
+            message = "VLAN {0} on node {1} interface {2} is already used by EPG '{3}'"
+        else:
+            message = "node {1} interface {2} already has an untagged or native static port of EPG '{3}'"
+        messages.append(message.format(conflict.get("vlan"), conflict.get("node"), conflict.get("interface"), conflict.get("epg")))
+    if messages and conflict_check == "error":
+        mso.fail_json(msg="Conflicting static ports: {0}".format("; ".join(messages)), conflicts=conflicts)
+    for message in messages:
+        mso.module.warn(message)
+    return conflicts
@@ -0,0 +1,250 @@
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2018, Dag Wieers (@dagwieers) <dag@wieers.com>
+# Simplified BSD License (see licenses/simplified_bsd.txt or https://opensource.org/licenses/BSD-2-Clause)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+# File upload and download helpers, only used by mso_backup.
+# Kept out of module_utils/mso.py so other modules do not import requests_toolbelt and the file handling modules.
+
+import os
+import datetime
+import shutil
+import tempfile
+from ansible.module_utils.basic import json
+from ansible.module_utils.six.moves.urllib.parse import urljoin
+from ansible.module_utils.urls import fetch_url
+from ansible.module_utils._text import to_native
+from ansible_collections.cisco.mso.plugins.module_utils.constants import NDO_API_VERSION_PATH_FORMAT
+
+try:
+    from requests_toolbelt.multipart.encoder import MultipartEncoder
+
+    HAS_MULTIPART_ENCODER = True
+except ImportError:
+    HAS_MULTIPART_ENCODER = False
+
+
+# Copied from ansible's module uri.py (url): https://github.com/ansible/ansible/blob/cdf62edc65f564fff6b7e575e084026fa7faa409/lib/ansible/modules/uri.py
+def write_file(module, url, dest, content, resp, tmpsrc=None):
+    # create a tempfile with some test content
+
+    if tmpsrc is None and content is not None:
+        fd, tmpsrc = tempfile.mkstemp(dir=module.tmpdir)
+        f = open(tmpsrc, "wb")
+        try:
+            f.write(content)
+        except Exception as e:
+            os.remove(tmpsrc)
+            module.fail_json(msg="Failed to create temporary content file: {0}".format(to_native(e)))
+        f.close()
+
+    checksum_src = None
+    checksum_dest = None
+
+    # raise an error if there is no tmpsrc file
+    if not os.path.exists(tmpsrc):
+        os.remove(tmpsrc)
+        module.fail_json(msg="Source '{0}' does not exist".format(tmpsrc))
+    if not os.access(tmpsrc, os.R_OK):
+        os.remove(tmpsrc)
+        module.fail_json(msg="Source '{0}' is not readable".format(tmpsrc))
+    checksum_src = module.sha1(tmpsrc)
+
+    # check if there is no dest file
+    if os.path.exists(dest):
+        # raise an error if copy has no permission on dest
+        if not os.access(dest, os.W_OK):
+            os.remove(tmpsrc)
+            module.fail_json(msg="Destination '{0}' not writable".format(dest))
+        if not os.access(dest, os.R_OK):
+            os.remove(tmpsrc)
+            module.fail_json(msg="Destination '{0}' not readable".format(dest))
+        checksum_dest = module.sha1(dest)
+    else:
+        if not os.access(os.path.dirname(dest), os.W_OK):
+            os.remove(tmpsrc)
+            module.fail_json(msg="Destination dir '{0}' not writable".format(os.path.dirname(dest)))
+
+    if checksum_src != checksum_dest:
+        try:
+            shutil.copyfile(tmpsrc, dest)
+        except Exception as e:
+            os.remove(tmpsrc)
+            module.fail_json(msg="failed to copy {0} to {1}: {2}".format(tmpsrc, dest, to_native(e)))
+
+    os.remove(tmpsrc)
+
+
+def request_download(mso, path, destination=None, method="GET", api_version="v1"):
+    """Generic HTTP method for MSO file downloads."""
+    mso.ensure_login()
+    if mso.platform != "nd":
+        mso.url = urljoin(mso.baseuri, path)
+
+    redirected = False
+    redir_info = {}
+    redirect = {}
+    content = None
+    data = None
+
+    src = mso.params.get("src")
+    if src:
+        try:
+            mso.headers.update({"Content-Length": os.stat(src).st_size})
+            data = open(src, "rb")
+        except OSError:
+            mso.fail_json(msg="Unable to open source file %s" % src, elapsed=0)
+
+    kwargs = {}
+    if destination is not None and os.path.isdir(destination):
+        # first check if we are redirected to a file download
+        if mso.platform == "nd":
+            redir_info = mso.connection.get_remote_file_io_stream(
+                NDO_API_VERSION_PATH_FORMAT.format(api_version=api_version, path=path), mso.module.tmpdir, method
+            )
+            # In place of Content-Disposition, NDO get_remote_file_io_stream returns content-disposition.
+            content_disposition = redir_info.get("content-disposition")
+        else:
+            check, redir_info = fetch_url(mso.module, mso.url, headers=mso.headers, method=method, timeout=mso.params.get("timeout"))
+            content_disposition = check.headers.get("Content-Disposition")
+
+        if content_disposition:
+            file_name = content_disposition.split("filename=")[1]
+        else:
+            mso.fail_json(msg="Failed to fetch {0} backup information from MSO/NDO, response: {1}".format(mso.params.get("backup"), redir_info))
+
+        # if we are redirected, update the url with the location header and update dest with the new url filename
+        if redir_info["status"] in (301, 302, 303, 307):
+            mso.url = redir_info.get("location")
+            redirected = True
+        destination = os.path.join(destination, file_name)
+
+    # if destination file already exist, only download if file newer
+    if os.path.exists(destination):
+        kwargs["last_mod_time"] = datetime.datetime.utcfromtimestamp(os.path.getmtime(destination))
+
+    if mso.platform == "nd":
+        if redir_info["status"] == 200 and redirected is False:
+            info = redir_info
+        else:
+            info = mso.connection.get_remote_file_io_stream("/mso/{0}".format(mso.url.split("/mso/", 1)), mso.module.tmpdir, method)
+    else:
+        resp, info = fetch_url(
+            mso.module,
+            mso.url,
+            data=data,
+            headers=mso.headers,
+            method=method,
+            timeout=mso.params.get("timeout"),
+            unix_socket=mso.params.get("unix_socket"),
+            **kwargs
+        )
+
+        try:
+            content = resp.read()
+        except AttributeError:
+            # there was no content, but the error read() may have been stored in the info as 'body'
+            content = info.pop("body", "")
+
+        if src:
+            # Try to close the open file handle
+            try:
+                data.close()
+            except Exception:
+                pass
+
+    redirect["redirected"] = redirected or info.get("url") != mso.url
+    redirect.update(redir_info)
+    redirect.update(info)
+
+    write_file(mso.module, mso.url, destination, content, redirect, info.get("tmpsrc"))
+
+    return redirect, destination
+
+
+def request_upload(mso, path, fields=None, method="POST", api_version="v1"):
+    """Generic HTTP MultiPart POST method for MSO uploads."""
+    mso.ensure_login()
+    mso.path = path
+    if mso.platform != "nd":
+        mso.url = urljoin(mso.baseuri, path)
+
+    info = dict()
+
+    if mso.platform == "nd":
+        try:
+            if os.path.exists(mso.params.get("backup")):
+                info = mso.connection.send_file_request(
+                    method,
+                    NDO_API_VERSION_PATH_FORMAT.format(api_version=api_version, path=path),
+                    file=mso.params.get("backup"),
+                    remote_path=mso.params.get("remote_path"),
+                )
+            else:
+                mso.fail_json(msg="Upload failed due to: No such file or directory, Backup file: '{0}'".format(mso.params.get("backup")))
+        except Exception as error:
+            mso.fail_json("NDO upload failed due to: {0}".format(error))
+    else:
+        if not HAS_MULTIPART_ENCODER:
+            mso.fail_json(msg="requests-toolbelt is required for the upload state of this module")
+
+        mp_encoder = MultipartEncoder(fields=fields)
+        mso.headers["Content-Type"] = mp_encoder.content_type
+        mso.headers["Accept-Encoding"] = "gzip, deflate, br"
+
+        resp, info = fetch_url(
+            mso.module,
+            mso.url,
+            headers=mso.headers,
+            data=mp_encoder,
+            method=method,
+            timeout=mso.params.get("timeout"),
+            use_proxy=mso.params.get("use_proxy"),
+        )
+
+    mso.response = info.get("msg")
+    mso.status = info.get("status")
+
+    # Get change status from HTTP headers
+    if "modified" in info:
+        mso.has_modified = True
+        if info.get("modified") == "false":
+            mso.result["changed"] = False
+        elif info.get("modified") == "true":
+            mso.result["changed"] = True
+
+    # 200: OK, 201: Created, 202: Accepted, 204: No Content
+    if mso.status in (200, 201, 202, 204):
+        if mso.platform == "nd":
+            return info
+        else:
+            output = resp.read()
+            if output:
+                return json.loads(output)
+
+    # 400: Bad Request, 401: Unauthorized, 403: Forbidden,
+    # 405: Method Not Allowed, 406: Not Acceptable
+    # 500: Internal Server Error, 501: Not Implemented
+    elif mso.status:
+        if mso.status >= 400:
+            try:
+                if mso.platform == "nd":
+                    payload = info.get("body")
+                else:
+                    payload = json.loads(resp.read())
+            except (ValueError, AttributeError):
+                try:
+                    payload = json.loads(info.get("body"))
+                except Exception:
+                    mso.fail_json(msg="MSO Error:", info=info)
+            if "code" in payload:
+                mso.fail_json(msg="MSO Error {code}: {message}".format(**payload), info=info, payload=payload)
+            else:
+                mso.fail_json(msg="MSO Error:".format(**payload), info=info, payload=payload)
+    else:
+        mso.fail_json(msg="Backup file upload failed due to: {0}".format(info))
+    return {}
@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+
+# GNU General Public License v3.0+ (see LICENSE or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+from copy import deepcopy
+from ansible.module_utils._text import to_text
+
+try:
+    import ipaddress
+
+    HAS_IPADDRESS = True
+except ImportError:
+    HAS_IPADDRESS = False
+
+VLAN_RANGE = (1, 4094)
+
+
+def item_options(options):
+    """
+    Return the argument spec of the items of a list option whose items accept the options of the task.
+    The item options have no default and are not required, an option that is not set in an item is None and falls back to the task option.
+    :param options: The argument spec of the task options. -> Dict
+    :return: The argument spec to use as C(options) of the list option. -> Dict
+    """
+    spec = deepcopy(options)
+    for option in spec.values():
+        option.pop("default", None)
+        option.pop("required", None)
+    return spec
+
+
+def item_params(options, item, defaults=None):
+    """
+    Merge the parameters of a list item, validated by the argument spec of the list option, with defaults.
+    :param options: The argument spec of the item parameters, the aliases of an item are ignored. -> Dict
+    :param item: The parameters of the item. -> Dict
+    :param defaults: The default value of every parameter, usually the task parameters. -> Dict
+    :return: The merged parameters. -> Dict
+    """
+    params = dict(defaults or {})
+    params.update((name, value) for name, value in item.items() if name in options and value is not None)
+    return params
+
+
+class MSOValidator:
+    """
+    Collect input validation errors locally, before any request is sent to MSO.
+    All checks append to the list of errors instead of failing, so a module can report every problem of a (bulk) input at once.
+    """
+
+    def __init__(self, mso_module):
+        self.mso = mso_module
+        self.errors = []
+        self.unique_values = {}
+
+    @staticmethod
+    def _prefix(context):
+        return "{0}: ".format(context) if context else ""
+
+    def error(self, msg, context=None):
+        self.errors.append("{0}{1}".format(self._prefix(context), msg))
+
+    def required(self, context=None, **values):
+        """
+        Validate that all provided values are set.
+        :param context: Description of the validated object (e.g. 'static_ports[2]'). -> Str
+        :param values: Names and values that must not be None. -> Dict
+        :return: True when no value is missing. -> Bool
+        """
+        missing = [key for key in sorted(values) if values.get(key) is None]
+        if missing:
+            self.error("the following are missing: {0}".format(", ".join(missing)), context)
+        return not missing
+
+    def required_one_of(self, context=None, **values):
+        """Validate that at least one of the provided values is set"""
+        if all(value is None for value in values.values()):
+            self.error("one of the following is required: {0}".format(", ".join(sorted(values))), context)
+            return False
+        return True
+
+    def required_by(self, name, value, context=None, **values):
+        """Validate that all provided values are set when the value of name is set"""
+        if value is None:
+            return True
+        missing = [key for key in sorted(values) if values.get(key) is None]
+        if missing:
+            self.error("{0} requires: {1}".format(name, ", ".join(missing)), context)
+        return not missing
+
+    def unique(self, scope, value, context=None, msg=None):
+        """
+        Validate that a value is only used once within a scope.
+        :param scope: Name of the set of values the value should be unique in (e.g. 'path'). -> Str
+        """
+        seen = self.unique_values.setdefault(scope, set())
+        if value in seen:
+            self.error(msg or "duplicate {0} '{1}'".format(scope, value), context)
+            return False
+        seen.add(value)
+        return True
+
+    def vlan(self, name, value, context=None):
+        """Validate that a value is a VLAN id in the range 1-4094"""
+        if value is None:
+            return True
+        try:
+            valid = VLAN_RANGE[0] <= int(value) <= VLAN_RANGE[1]
+        except (TypeError, ValueError):
+            valid = False
+        if not valid:
+            self.error("{0} '{1}' is not a valid VLAN id, must be in range {2}-{3}".format(name, value, *VLAN_RANGE), context)
+        return valid
+
+    def ip_address(self, name, value, context=None, version=None, prefix=None):
+        """
+        Validate the format of an IP address.
+        :param version: Required IP version, 4 or 6. -> Int | None
+        :param prefix: True when a prefix length is required, False when not allowed, None when optional. -> Bool | None
+        """
+        if value is None or not HAS_IPADDRESS:
+            return True
+        value = to_text(value)
+        if prefix is True and "/" not in value:
+            self.error("{0} '{1}' must be an IP address with prefix length".format(name, value), context)
+            return False
+        if prefix is False and "/" in value:
+            self.error("{0} '{1}' must be an IP address without prefix length".format(name, value), context)
+            return False
+        try:
+            address = ipaddress.ip_interface(value)
+        except ValueError:
+            self.error("{0} '{1}' is not a valid IP address".format(name, value), context)
+            return False
+        if version is not None and address.version != version:
+            self.error("{0} '{1}' is not a valid IPv{2} address".format(name, value, version), context)
+            return False
+        return True
+
+    def ip_network(self, name, value, context=None, version=None):
+        """Validate the format of an IP network (prefix), host bits are not allowed"""
+        if value is None or not HAS_IPADDRESS:
+            return True
+        try:
+            network = ipaddress.ip_network(to_text(value))
+        except ValueError:
+            self.error("{0} '{1}' is not a valid IP network".format(name, value), context)
+            return False
+        if version is not None and network.version != version:
+            self.error("{0} '{1}' is not a valid IPv{2} network".format(name, value, version), context)
+            return False
+        return True
+
+    def fail_on_errors(self):
+        """Fail the module with all collected errors"""
+        if self.errors:
+            if len(self.errors) == 1:
+                msg = "Input validation failed: {0}".format(self.errors[0])
+            else:
+                msg = "Input validation failed with {0} errors: {1}".format(len(self.errors), "; ".join(self.errors))
+            self.mso.fail_json(msg=msg, errors=self.errors)
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+
+# GNU General Public License v3.0+ (see LICENSE or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+# Concurrent requests: every job runs with a worker, a copy of the MSO module with its own request state and connection,
+# and a failed request raises WorkerError instead of exiting the module.
+
+import copy
+from concurrent.futures import ThreadPoolExecutor
+from ansible.module_utils.connection import Connection
+
+
+class WorkerError(Exception):
+    pass
+
+
+def raise_error(msg, **kwargs):
+    raise WorkerError(msg)
+
+
+def worker_copy(mso):
+    """
+    Return a copy of the MSO module that raises WorkerError when a request fails.
+    The worker only shares the parameters, the authentication token and the deploy queue, it has its own headers, result,
+    response state and connection.
+    """
+    worker = copy.copy(mso)
+    worker.module = copy.copy(mso.module)
+    worker.params = worker.module.params = dict(mso.params)
+    worker.headers = dict(mso.headers)
+    worker.result = dict(changed=False)
+    worker.existing = dict()
+    worker.jsondata = None
+    worker.error = dict(code=None, message=None, info=None)
+    worker.previous = dict()
+    worker.proposed = dict()
+    worker.sent = dict()
+    worker.stdout = None
+    worker.patch_operation = None
+    worker.has_modified = False
+    worker.method = None
+    worker.path = None
+    worker.response = None
+    worker.status = None
+    worker.url = None
+    worker.httpapi_logs = list()
+    if mso.module._socket_path is not None:
+        worker.connection = Connection(mso.module._socket_path)
+    worker.fail_json = raise_error
+    return worker
+
+
+def run_concurrently(mso, func, jobs, workers=8):
+    """
+    Run func(worker, *job) for every job, with at most workers jobs at once.
+    The jobs run one after the other with fixtures or in plan mode, their requests must be recorded and replayed in order.
+    :return: The result and the error message of every job, in the order of the jobs. -> List[Tuple]
+    """
+    if not jobs:
+        return []
+    if mso.fixtures is not None or mso.plan is not None:
+        workers = 1
+    # Log in once, before the workers copy the MSO module
+    mso.ensure_login()
+
+    def run(job):
+        worker = worker_copy(mso)
+        try:
+            return func(worker, *job), None, worker.httpapi_logs
+        except WorkerError as e:
+            return None, str(e), worker.httpapi_logs
+
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(jobs)))) as executor:
+        results = list(executor.map(run, jobs))
+    # The logs of the HTTPAPI connection plugin are returned with the module, in the order of the jobs
+    for result, error, logs in results:
+        mso.httpapi_logs.extend(logs)
+    return [(result, error) for result, error, logs in results]
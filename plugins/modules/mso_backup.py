@@ -180,6 +180,7 @@ RETURN = r"""
 
 from ansible.module_utils.basic import AnsibleModule
 from ansible_collections.cisco.mso.plugins.module_utils.mso import MSOModule, mso_argument_spec
+from ansible_collections.cisco.mso.plugins.module_utils.transfer import request_download, request_upload
 import os
 
 
@@ -290,7 +291,7 @@ def main():
                 else:
                     payload = dict(name=(os.path.basename(backup), open(backup, "rb"), "application/x-gzip"))
 
-                mso.existing = mso.request_upload(request_url, fields=payload)
+                mso.existing = request_upload(mso, request_url, fields=payload)
             except Exception as error:
                 mso.module.fail_json(msg="Upload failed due to: {0}, Backup file: '{1}'".format(error, ", ".join(backup.split("/")[-1:])))
         mso.exit_json()
@@ -312,7 +313,7 @@ def main():
         if module.check_mode:
             mso.existing = mso.proposed
         else:
-            mso.existing = mso.request_download("backups/{id}/download".format(id=mso.existing[0].get("id")), destination=destination)
+            mso.existing = request_download(mso, "backups/{id}/download".format(id=mso.existing[0].get("id")), destination=destination)
 
     elif state == "move":
         mso.previous = mso.existing
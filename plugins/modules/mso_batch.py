@@ -0,0 +1,116 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# GNU General Public License v3.0+ (see LICENSE or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+ANSIBLE_METADATA = {"metadata_version": "1.1", "status": ["preview"], "supported_by": "community"}
+
+DOCUMENTATION = r"""
+---
+module: mso_batch
+short_description: Run a MSO module for many items in a single task
+description:
+- Run one cisco.mso module for a list of parameter sets within a single task, instead of using C(loop).
+- The items are executed on the controller by a thread pool.
+- Items that target the same schema (or the same template when no schema is provided) are executed one after the other,
+  items of different schemas are executed concurrently.
+- When the MSO HTTPAPI connection plugin is used all items share the persistent connection, so the session is only logged in once
+  and GET responses (schemas, templates, sites, ...) are fetched once and shared until a write invalidates them.
+options:
+  module:
+    description:
+    - The name of the cisco.mso module to execute, with or without the C(cisco.mso.) prefix.
+    type: str
+    required: true
+  items:
+    description:
+    - The list of module parameter sets, one per module execution.
+    - The parameters of an item take precedence over the common parameters of the task.
+    type: list
+    elements: dict
+    required: true
+  workers:
+    description:
+    - The maximum number of items executed concurrently.
+    type: int
+    default: 8
+  serialize_by:
+    description:
+    - The item parameter used to group the items that must be executed one after the other.
+    - By default items are grouped by C(schema), or by C(template) when C(schema) is not provided.
+    type: str
+notes:
+- Every other parameter of the task (including the connection parameters) is passed on to every item.
+- This module must be executed on the controller, use the HTTPAPI connection plugin or C(delegate_to) localhost.
+- Without the HTTPAPI connection plugin every item logs in and queries its own objects.
+- Every item executes the module like a regular task, with the environment and become settings of the task,
+  in its own Python process, so the startup cost of a module is paid for every item.
+- Without pipelining all items transfer their module to the same temporary directory, so the items are executed one after the other.
+  Enable pipelining to execute the items concurrently.
+  The time saved comes from the concurrent execution of the items, and with the HTTPAPI connection plugin from the shared login and GET responses.
+- The shared GET responses are only used during the task, the cache of the persistent connection is disabled when the task ends, also when it fails.
+seealso:
+- module: cisco.mso.mso_schema_template_bd
+- module: cisco.mso.mso_schema_site_anp_epg_staticport
+extends_documentation_fragment: cisco.mso.modules
+"""
+
+EXAMPLES = r"""
+- name: Add many BDs to a template in one task
+  cisco.mso.mso_batch:
+    host: mso_host
+    username: admin
+    password: SomeSecretPassword
+    module: mso_schema_template_bd
+    schema: Schema 1
+    template: Template 1
+    items:
+    - bd: BD 1
+      vrf:
+        name: VRF1
+    - bd: BD 2
+      vrf:
+        name: VRF1
+    state: present
+  delegate_to: localhost
+
+- name: Add static ports to EPGs of two schemas concurrently
+  cisco.mso.mso_batch:
+    module: cisco.mso.mso_schema_site_anp_epg_staticport
+    site: Site 1
+    template: Template 1
+    anp: ANP 1
+    pod: pod-1
+    leaf: '101'
+    type: port
+    deployment_immediacy: immediate
+    items: "{{ static_ports }}"
+    workers: 4
+    state: present
+"""
+
+RETURN = r"""
+results:
+  description: The result of every item, in the order of the items. The parameters of the item are returned in C(item).
+  returned: always
+  type: list
+elapsed:
+  description: The time in seconds needed to execute all items.
+  returned: always
+  type: float
+"""
+
+from ansible.module_utils.basic import AnsibleModule
+
+
+def main():
+    module = AnsibleModule(argument_spec=dict(), supports_check_mode=True)
+    module.fail_json(msg="The mso_batch module is implemented as an action plugin and must run on the controller.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# GNU General Public License v3.0+ (see LICENSE or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+ANSIBLE_METADATA = {"metadata_version": "1.1", "status": ["preview"], "supported_by": "community"}
+
+DOCUMENTATION = r"""
+---
+module: mso_deploy_queue_flush
+short_description: Deploy every template of the deploy queue once
+description:
+- Deploy the templates changed since their last deploy, every template once, concurrently.
+- The deploy queue is enabled with the C(MSO_DEPLOY_QUEUE) environment variable, the path of a state file.
+  Every cisco.mso module that changes a schema then adds the changed templates to the queue, and every deploy of a template removes it.
+  M(cisco.mso.mso_schema_template_deploy) and M(cisco.mso.ndo_schema_template_deploy) add the template to the queue instead of deploying it
+  with O(cisco.mso.mso_schema_template_deploy#module:defer=true).
+- A template that fails to deploy stays in the queue, it is deployed again by the next flush.
+options:
+  path:
+    description:
+    - The path of the deploy queue.
+    - Defaults to the path in the C(MSO_DEPLOY_QUEUE) environment variable.
+    type: path
+  workers:
+    description:
+    - The maximum number of templates deployed concurrently.
+    type: int
+    default: 8
+notes:
+- A template is deployed to all its sites at once. Templates without sites are removed from the queue without deploy.
+- Only the templates of schemas are queued, not the templates of M(cisco.mso.ndo_template).
+- This module must be executed on the controller, use the HTTPAPI connection plugin or C(delegate_to) localhost.
+seealso:
+- module: cisco.mso.mso_schema_template_deploy
+- module: cisco.mso.ndo_schema_template_deploy
+extends_documentation_fragment: cisco.mso.modules
+"""
+
+EXAMPLES = r"""
+- name: Change many templates, they are added to the deploy queue
+  cisco.mso.mso_schema_template_bd:
+    host: mso_host
+    username: admin
+    password: SomeSecretPassword
+    schema: "{{ item.schema }}"
+    template: "{{ item.template }}"
+    bd: "{{ item.bd }}"
+    vrf:
+      name: VRF1
+    state: present
+  loop: "{{ bds }}"
+  environment:
+    MSO_DEPLOY_QUEUE: /var/cache/mso/deploy_queue.json
+  delegate_to: localhost
+
+- name: Deploy every changed template once
+  cisco.mso.mso_deploy_queue_flush:
+    host: mso_host
+    username: admin
+    password: SomeSecretPassword
+    path: /var/cache/mso/deploy_queue.json
+  delegate_to: localhost
+"""
+
+RETURN = r"""
+deploys:
+  description:
+  - The templates of the queue with the number of changes since their last deploy, and their result C(deployed), C(failed) or C(skipped).
+  - The result is not set in check mode.
+  returned: always
+  type: list
+  sample: [{"schema": "Schema1", "template": "Template1", "sites": ["Site1", "Site2"], "changes": 12, "result": "deployed", "msg": null}]
+"""
+
+from collections import OrderedDict
+from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils._text import to_native
+from ansible_collections.cisco.mso.plugins.module_utils.mso import MSOModule, mso_argument_spec
+from ansible_collections.cisco.mso.plugins.module_utils.deployqueue import ALL_TEMPLATES, DeployQueueError, deploy_queue_from_env
+from ansible_collections.cisco.mso.plugins.module_utils.workers import run_concurrently
+
+
+def query_schema(worker, schema_id):
+    return worker.request("schemas/{0}".format(schema_id), method="GET")
+
+
+def deploy(worker, schema_id, template):
+    """Deploy a template to all its sites, the deploy removes the template from the queue"""
+    if worker.platform == "nd":
+        worker.request("task", method="POST", data=dict(schemaId=schema_id, templateName=template, isRedeploy=False))
+    else:
+        worker.request("execute/schema/{0}/template/{1}".format(schema_id, template), method="GET", data=dict(schemaId=schema_id, templateName=template))
+    return "deployed"
+
+
+def main():
+    argument_spec = mso_argument_spec()
+    argument_spec.update(
+        path=dict(type="path"),
+        workers=dict(type="int", default=8),
+    )
+
+    module = AnsibleModule(argument_spec=argument_spec, supports_check_mode=True)
+
+    workers = module.params.get("workers")
+
+    mso = MSOModule(module)
+    # The deploys of the flush remove the templates from this queue
+    mso.deploy_queue = deploy_queue_from_env(module.params.get("path"))
+    if mso.deploy_queue is None:
+        mso.fail_json(msg="The deploy queue is not enabled, provide a path or set the MSO_DEPLOY_QUEUE environment variable")
+    try:
+        entries = mso.deploy_queue.entries()
+    except DeployQueueError as e:
+        mso.fail_json(msg=to_native(e))
+
+    # Query every schema of the queue once, the schemas that were removed are dropped from the queue
+    schema_ids = list(OrderedDict((entry.get("schema_id"), None) for entry in entries))
+    existing_ids = set()
+    if schema_ids:
+        existing_ids = set(identity.get("id") for identity in mso.query_objs("schemas/list-identity", key="schemas"))
+    queried_ids = [schema_id for schema_id in schema_ids if schema_id in existing_ids]
+    results = run_concurrently(mso, query_schema, [(schema_id,) for schema_id in queried_ids], workers)
+    schemas = {}
+    for schema_id, (schema, error) in zip(queried_ids, results):
+        if error:
+            mso.fail_json(msg="Query of schema '{0}' failed: {1}".format(schema_id, error))
+        schemas[schema_id] = schema
+    site_names = dict((site.get("id"), site.get("name")) for site in mso.query_objs("sites")) if schemas else {}
+
+    # Every template is deployed once, also when it was queued for all templates of its schema
+    deploys = OrderedDict()
+    removed = []
+    for entry in entries:
+        schema = schemas.get(entry.get("schema_id"))
+        if schema is None:
+            removed.append((entry.get("schema_id"), entry.get("template")))
+            continue
+        names = [template.get("name") for template in schema.get("templates") or []]
+        for name in names if entry.get("template") == ALL_TEMPLATES else [entry.get("template")]:
+            if name not in names:
+                removed.append((entry.get("schema_id"), name))
+                continue
+            item = deploys.get((schema.get("id"), name))
+            if item is None:
+                site_ids = [site.get("siteId") for site in schema.get("sites") or [] if site.get("templateName") == name]
+                item = deploys[(schema.get("id"), name)] = dict(
+                    schema=schema.get("displayName"),
+                    template=name,
+                    sites=[site_names.get(site_id, site_id) for site_id in site_ids],
+                    changes=0,
+                    result=None,
+                    msg=None,
+                )
+            item["changes"] += entry.get("changes")
+    for (schema_id, name), item in deploys.items():
+        if not item.get("sites"):
+            item["result"] = "skipped"
+            removed.append((schema_id, name))
+
+    if not module.check_mode:
+        jobs = [key for key, item in deploys.items() if item.get("result") is None]
+        for key, (result, msg) in zip(jobs, run_concurrently(mso, deploy, jobs, workers)):
+            deploys[key]["result"] = result or "failed"
+            deploys[key]["msg"] = msg
+            if msg:
+                module.warn("Deploy of template '{0}' of schema '{1}' failed: {2}".format(key[1], deploys[key].get("schema"), msg))
+        # Drop the templates that cannot be deployed, and the schemas queued for all templates when none of their templates failed
+        failed_schemas = set(key[0] for key, item in deploys.items() if item.get("result") == "failed")
+        removed.extend((schema_id, ALL_TEMPLATES) for schema_id in schemas if schema_id not in failed_schemas)
+        try:
+            mso.deploy_queue.update(deployed=removed)
+        except DeployQueueError as e:
+            mso.fail_json(msg=to_native(e))
+
+    mso.result["changed"] = any(item.get("result") in ("deployed", None) for item in deploys.values())
+    mso.exit_json(deploys=list(deploys.values()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# GNU General Public License v3.0+ (see LICENSE or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+ANSIBLE_METADATA = {"metadata_version": "1.1", "status": ["preview"], "supported_by": "community"}
+
+DOCUMENTATION = r"""
+---
+module: mso_mirror_query
+short_description: Query a local mirror of the MSO configuration
+description:
+- Query the local mirror of the Cisco ACI Multi-Site configuration created by M(cisco.mso.mso_mirror_sync).
+- The mirror is queried on its indexes, MSO is not queried.
+options:
+  path:
+    description:
+    - The path of the mirror database file.
+    type: path
+    required: true
+  query:
+    description:
+    - Use C(objects) to find schema objects by kind and name.
+    - Use C(references) to find the objects and sites referencing the objects found by kind and name, or referencing O(ref).
+    - Use C(static_ports) to find the static ports and static leafs of EPGs by VLAN, node, interface or site.
+    - Use C(subnets) to find the subnets of BDs, EPGs and external EPGs containing O(ip).
+    type: str
+    choices: [ objects, references, static_ports, subnets ]
+    default: objects
+  kind:
+    description:
+    - The kind of the objects.
+    type: str
+    choices: [ anp, bd, contract, epg, external_epg, filter, l3out, service_graph, vrf ]
+  name:
+    description:
+    - The name of the objects.
+    type: str
+  schema:
+    description:
+    - The name of the schema.
+    type: str
+  template:
+    description:
+    - The name of the template.
+    type: str
+  ref:
+    description:
+    - The reference of an object, like C(/schemas/<schema_id>/templates/Template1/bds/BD1).
+    - Only used when O(query=references).
+    type: str
+  vlan:
+    description:
+    - The encapsulation VLAN of the static ports.
+    type: int
+  node:
+    description:
+    - The node id of the static ports, e.g. C(101). The static ports of a vPC match both nodes.
+    type: str
+  interface:
+    description:
+    - The interface of the static ports, e.g. C(eth1/1) or the name of a port channel or vPC policy group.
+    type: str
+  site:
+    description:
+    - The name of the site of the static ports.
+    type: str
+  ip:
+    description:
+    - The IP address or prefix the subnets must contain.
+    - Required when O(query=subnets).
+    type: str
+seealso:
+- module: cisco.mso.mso_mirror_sync
+"""
+
+EXAMPLES = r"""
+- name: Find the EPGs using VLAN 1234 on leaf 101
+  cisco.mso.mso_mirror_query:
+    path: /var/cache/mso/mirror.db
+    query: static_ports
+    vlan: 1234
+    node: "101"
+  delegate_to: localhost
+  register: ports
+
+- name: Find where a BD is referenced
+  cisco.mso.mso_mirror_query:
+    path: /var/cache/mso/mirror.db
+    query: references
+    kind: bd
+    name: BD1
+  delegate_to: localhost
+  register: references
+
+- name: Find the subnets containing an address
+  cisco.mso.mso_mirror_query:
+    path: /var/cache/mso/mirror.db
+    query: subnets
+    ip: 10.0.0.10
+  delegate_to: localhost
+  register: subnets
+"""
+
+RETURN = r"""
+results:
+  description: The matching rows of the mirror.
+  returned: always
+  type: list
+  sample: [{"schema": "Schema1", "template": "Template1", "site": "Site1", "anp": "ANP1", "epg": "EPG1", "node": "101", "vlan": 1234}]
+synced_at:
+  description: The time of the last sync of the mirror, in seconds since the epoch.
+  returned: always
+  type: int
+"""
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils._text import to_text
+from ansible_collections.cisco.mso.plugins.module_utils.mirror import MSOMirror, MirrorError
+
+# Object kinds and the template attributes holding them
+KIND_MAP = dict(
+    anp="anps",
+    bd="bds",
+    contract="contracts",
+    epg="epgs",
+    external_epg="externalEpgs",
+    filter="filters",
+    l3out="intersiteL3outs",
+    service_graph="serviceGraphs",
+    vrf="vrfs",
+)
+
+
+def main():
+    module = AnsibleModule(
+        argument_spec=dict(
+            path=dict(type="path", required=True),
+            query=dict(type="str", default="objects", choices=["objects", "references", "static_ports", "subnets"]),
+            kind=dict(type="str", choices=list(KIND_MAP)),
+            name=dict(type="str"),
+            schema=dict(type="str"),
+            template=dict(type="str"),
+            ref=dict(type="str"),
+            vlan=dict(type="int"),
+            node=dict(type="str"),
+            interface=dict(type="str"),
+            site=dict(type="str"),
+            ip=dict(type="str"),
+        ),
+        supports_check_mode=True,
+        required_if=[
+            ["query", "subnets", ["ip"]],
+            ["query", "references", ["kind", "name", "ref"], True],
+        ],
+    )
+
+    path = module.params.get("path")
+    query = module.params.get("query")
+    kind = KIND_MAP.get(module.params.get("kind"))
+    name = module.params.get("name")
+    schema = module.params.get("schema")
+    template = module.params.get("template")
+
+    try:
+        mirror = MSOMirror.open_existing(path)
+        if query == "objects":
+            results = mirror.objects(kind=kind, name=name, schema=schema, template=template)
+        elif query == "references":
+            if module.params.get("ref"):
+                targets = [module.params.get("ref")]
+            else:
+                targets = [obj.get("ref") for obj in mirror.objects(kind=kind, name=name, schema=schema, template=template)]
+            results = mirror.references(targets)
+        elif query == "static_ports":
+            results = mirror.static_ports(
+                vlan=module.params.get("vlan"),
+                node=module.params.get("node"),
+                interface=module.params.get("interface"),
+                site=module.params.get("site"),
+                schema=schema,
+            )
+        else:
+            results = mirror.subnets_containing(module.params.get("ip"))
+        synced_at = mirror.get_meta("synced_at")
+        mirror.close()
+    except MirrorError as e:
+        module.fail_json(msg=to_text(e))
+
+    module.exit_json(changed=False, results=results, synced_at=int(synced_at) if synced_at else None)
+
+
+if __name__ == "__main__":
+    main()
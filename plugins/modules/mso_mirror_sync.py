@@ -0,0 +1,221 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# GNU General Public License v3.0+ (see LICENSE or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+ANSIBLE_METADATA = {"metadata_version": "1.1", "status": ["preview"], "supported_by": "community"}
+
+DOCUMENTATION = r"""
+---
+module: mso_mirror_sync
+short_description: Mirror the MSO configuration in a local database
+description:
+- Mirror the schemas, sites and tenants of Cisco ACI Multi-Site in a local SQLite database.
+- The objects, references, static ports and subnets of the schemas are indexed, use M(cisco.mso.mso_mirror_query) to query the mirror
+  without querying MSO.
+- Only the schemas that changed since the last sync are indexed again, and schemas that no longer exist are removed from the mirror.
+- With O(refresh=incremental), the schema identities and template summaries are queried first and only the schemas and templates
+  whose version changed since the last sync are fetched. The versions of the last sync are kept in a manifest in the mirror.
+- The mirror is written on the host the module runs on, usually the Ansible controller with C(delegate_to=localhost).
+options:
+  path:
+    description:
+    - The path of the mirror database file.
+    - The file and its directory are created when they do not exist.
+    type: path
+    required: true
+  refresh:
+    description:
+    - Use C(incremental) to only fetch the schemas and templates that changed since the last sync.
+    - Use C(full) to fetch all schemas and templates.
+    - Schemas and templates without version information are always fetched.
+      When no schema identity has version information, all schemas are fetched with a single request.
+    type: str
+    choices: [ full, incremental ]
+    default: incremental
+  templates:
+    description:
+    - Whether to mirror the templates of C(templates/summaries), e.g. the tenant and fabric policy templates of NDO 4.0 and later.
+    - The templates are stored as documents, they are not indexed.
+    type: bool
+    default: false
+notes:
+- A mirror created by another version of this collection is rebuilt on the first sync.
+seealso:
+- module: cisco.mso.mso_mirror_query
+extends_documentation_fragment: cisco.mso.modules
+"""
+
+EXAMPLES = r"""
+- name: Mirror the MSO configuration
+  cisco.mso.mso_mirror_sync:
+    host: mso_host
+    username: admin
+    password: SomeSecretPassword
+    path: /var/cache/mso/mirror.db
+  delegate_to: localhost
+
+- name: Mirror the NDO configuration with the tenant and fabric templates
+  cisco.mso.mso_mirror_sync:
+    host: mso_host
+    username: admin
+    password: SomeSecretPassword
+    path: /var/cache/mso/mirror.db
+    templates: true
+  delegate_to: localhost
+
+- name: Rebuild the mirror from all schemas
+  cisco.mso.mso_mirror_sync:
+    host: mso_host
+    username: admin
+    password: SomeSecretPassword
+    path: /var/cache/mso/mirror.db
+    refresh: full
+  delegate_to: localhost
+"""
+
+RETURN = r"""
+mirror:
+  description: The result of the sync.
+  returned: always
+  type: dict
+  contains:
+    path:
+      description: The path of the mirror database file.
+      type: str
+    changed_schemas:
+      description: The names of the schemas that were added or changed since the last sync.
+      type: list
+    removed_schemas:
+      description: The ids of the schemas that were removed since the last sync.
+      type: list
+    changed_templates:
+      description: The names of the templates that were added or changed since the last sync.
+      type: list
+    removed_templates:
+      description: The ids of the templates that were removed since the last sync.
+      type: list
+    fetched_schemas:
+      description: The number of schemas fetched from MSO.
+      type: int
+    fetched_templates:
+      description: The number of templates fetched from MSO.
+      type: int
+    counts:
+      description: The number of stored schemas, templates, sites and tenants, and of indexed objects, references, static ports and subnets.
+      type: dict
+"""
+
+import os
+from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils._text import to_text
+from ansible_collections.cisco.mso.plugins.module_utils.mso import MSOModule, mso_argument_spec
+from ansible_collections.cisco.mso.plugins.module_utils.mirror import MSOMirror, MirrorError, change_marker
+
+
+def changed_since(objects, key, markers, stored, incremental):
+    """Return the objects to fetch, all objects unless incremental and their marker is the stored marker"""
+    if not incremental:
+        return objects
+    return [obj for obj in objects if markers.get(obj.get(key)) is None or markers.get(obj.get(key)) != stored.get(obj.get(key))]
+
+
+def main():
+    argument_spec = mso_argument_spec()
+    argument_spec.update(
+        path=dict(type="path", required=True),
+        refresh=dict(type="str", default="incremental", choices=["full", "incremental"]),
+        templates=dict(type="bool", default=False),
+    )
+
+    module = AnsibleModule(argument_spec=argument_spec, supports_check_mode=True)
+
+    path = module.params.get("path")
+    incremental = module.params.get("refresh") == "incremental"
+    sync_templates = module.params.get("templates")
+
+    mso = MSOModule(module)
+    # The mirror is the snapshot of plan mode, it is always synced from MSO
+    mso.plan = None
+
+    mirror = None
+    try:
+        # Do not create the mirror in check mode
+        if not (module.check_mode and not os.path.exists(path)):
+            mirror = MSOMirror(path)
+    except MirrorError as e:
+        mso.fail_json(msg=to_text(e))
+
+    sites = mso.query_objs("sites")
+    tenants = mso.query_objs("tenants", key="tenants")
+
+    identities = mso.query_objs("schemas/list-identity", key="schemas")
+    manifest = dict(schemas=dict((identity.get("id"), change_marker(identity)) for identity in identities))
+    stored = mirror.manifest("schemas") if mirror else {}
+    if not incremental or not any(manifest.get("schemas").values()):
+        # All schemas are fetched with a single request
+        schemas = mso.query_objs("schemas")
+    else:
+        schemas = []
+        for identity in changed_since(identities, "id", manifest.get("schemas"), stored, incremental):
+            schema = mso.query_obj("schemas/{0}".format(identity.get("id")))
+            if schema:
+                schemas.append(schema)
+            else:
+                # The schema was removed since the identities were queried
+                manifest.get("schemas").pop(identity.get("id"))
+
+    templates = None
+    if sync_templates:
+        summaries = mso.request("templates/summaries", method="GET") or []
+        manifest["templates"] = dict((summary.get("templateId"), change_marker(summary)) for summary in summaries)
+        stored = mirror.manifest("templates") if mirror else {}
+        templates = []
+        for summary in changed_since(summaries, "templateId", manifest.get("templates"), stored, incremental):
+            template = mso.request("templates/{0}".format(summary.get("templateId")), method="GET")
+            if template:
+                templates.append((summary, template))
+            else:
+                manifest.get("templates").pop(summary.get("templateId"))
+
+    schema_names = dict((identity.get("id"), identity.get("displayName")) for identity in identities)
+    schema_names.update((schema.get("id"), schema.get("displayName")) for schema in schemas)
+    template_names = dict((summary.get("templateId"), summary.get("templateName")) for summary, template in templates or [])
+    report = dict(path=path, fetched_schemas=len(schemas), fetched_templates=len(templates or []))
+
+    if mirror is None:
+        mso.result["changed"] = True
+        report.update(
+            changed_schemas=[schema_names.get(s.get("id")) for s in schemas],
+            removed_schemas=[],
+            changed_templates=[template_names.get(s.get("templateId")) for s, t in templates or []],
+            removed_templates=[],
+            counts={},
+        )
+        mso.exit_json(mirror=report)
+
+    try:
+        result = mirror.sync(schemas, sites=sites, tenants=tenants, templates=templates, manifest=manifest, dry_run=module.check_mode)
+        counts = mirror.counts()
+        mirror.close()
+    except MirrorError as e:
+        mso.fail_json(msg=to_text(e))
+
+    changes = ("changed_schemas", "removed_schemas", "changed_templates", "removed_templates", "sites_changed", "tenants_changed")
+    mso.result["changed"] = any(result.get(key) for key in changes)
+    report.update(
+        changed_schemas=[schema_names.get(schema_id) for schema_id in result.get("changed_schemas")],
+        removed_schemas=result.get("removed_schemas"),
+        changed_templates=[template_names.get(template_id) for template_id in result.get("changed_templates")],
+        removed_templates=result.get("removed_templates"),
+        counts=counts,
+    )
+    mso.exit_json(mirror=report)
+
+
+if __name__ == "__main__":
+    main()
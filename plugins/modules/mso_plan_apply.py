@@ -0,0 +1,168 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# GNU General Public License v3.0+ (see LICENSE or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+ANSIBLE_METADATA = {"metadata_version": "1.1", "status": ["preview"], "supported_by": "community"}
+
+DOCUMENTATION = r"""
+---
+module: mso_plan_apply
+short_description: Apply a plan of schema and template changes
+description:
+- Apply the plan created by running cisco.mso modules in plan mode, with a single request per schema and template.
+- In plan mode, enabled with the C(MSO_PLAN_PATH) and C(MSO_PLAN_SNAPSHOT) environment variables, the modules read the schemas,
+  templates, sites and tenants from a snapshot created by M(cisco.mso.mso_mirror_sync) instead of MSO.
+  Their changes are added to the plan file as JSON patch operations per schema and template, instead of being sent to MSO.
+  A module replacing a whole schema or template, like the C(ndo_*) template modules do, replaces its planned document.
+  Every module sees the changes planned by the previous modules.
+- Before anything is sent, the version of every planned schema and template is compared with its version in the snapshot.
+  The plan is not applied when any of them changed since the snapshot was taken.
+options:
+  path:
+    description:
+    - The path of the plan file.
+    type: path
+    required: true
+  verify:
+    description:
+    - Whether to verify that the schemas and templates did not change since the snapshot was taken.
+    type: bool
+    default: true
+  remove:
+    description:
+    - Whether to remove the plan file once it is applied.
+    type: bool
+    default: true
+notes:
+- Only the PATCH and PUT requests of schemas and templates can be planned. A module sending other requests, like M(cisco.mso.mso_schema_template_deploy),
+  or querying other objects than schemas, templates, sites and tenants fails in plan mode.
+- Modules in check mode do not add their changes to the plan.
+- The versions of schemas and templates are only available on recent MSO and NDO versions, otherwise they cannot be verified.
+- A schema or template that was replaced is applied with a single PUT request of its planned document, the others with a single PATCH request.
+- This module always sends its requests to MSO, also when plan mode is enabled.
+seealso:
+- module: cisco.mso.mso_mirror_sync
+extends_documentation_fragment: cisco.mso.modules
+"""
+
+EXAMPLES = r"""
+- name: Take a snapshot of the MSO configuration
+  cisco.mso.mso_mirror_sync:
+    host: mso_host
+    username: admin
+    password: SomeSecretPassword
+    path: /var/cache/mso/snapshot.db
+  delegate_to: localhost
+
+- name: Plan the changes of many tasks without querying MSO
+  cisco.mso.mso_schema_template_bd:
+    host: mso_host
+    username: admin
+    password: SomeSecretPassword
+    schema: Schema1
+    template: Template1
+    bd: "{{ item }}"
+    vrf:
+      name: VRF1
+    state: present
+  loop: "{{ bds }}"
+  environment:
+    MSO_PLAN_PATH: /var/cache/mso/plan.json
+    MSO_PLAN_SNAPSHOT: /var/cache/mso/snapshot.db
+  delegate_to: localhost
+
+- name: Apply the plan
+  cisco.mso.mso_plan_apply:
+    host: mso_host
+    username: admin
+    password: SomeSecretPassword
+    path: /var/cache/mso/plan.json
+  delegate_to: localhost
+"""
+
+RETURN = r"""
+applied:
+  description: The planned schemas and templates with their number of operations, and the number of times they were replaced.
+  returned: always
+  type: list
+  sample: [{"kind": "schemas", "id": "5c6c16d7270000c710f8094d", "name": "Schema1", "operations": 2000, "replaces": 0}]
+"""
+
+import os
+from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils._text import to_text
+from ansible_collections.cisco.mso.plugins.module_utils.mso import MSOModule, mso_argument_spec
+from ansible_collections.cisco.mso.plugins.module_utils.mirror import change_marker
+from ansible_collections.cisco.mso.plugins.module_utils.plan import PLAN_KINDS, MSOPlan, PlanError
+
+
+def main():
+    argument_spec = mso_argument_spec()
+    argument_spec.update(
+        path=dict(type="path", required=True),
+        verify=dict(type="bool", default=True),
+        remove=dict(type="bool", default=True),
+    )
+
+    module = AnsibleModule(argument_spec=argument_spec, supports_check_mode=True)
+
+    path = module.params.get("path")
+
+    mso = MSOModule(module)
+    # The plan is applied to MSO, also when plan mode is enabled
+    mso.plan = None
+
+    try:
+        plan = MSOPlan(path, None).load()
+    except PlanError as e:
+        mso.fail_json(msg=to_text(e))
+
+    applied = []
+    for kind in PLAN_KINDS:
+        for key, entry in plan.get(kind).items():
+            applied.append(dict(kind=kind, id=key, name=entry.get("name"), operations=len(entry.get("ops")), replaces=entry.get("replaces")))
+
+    # Compare the current version of every planned schema and template with its version in the snapshot
+    if module.params.get("verify") and applied:
+        markers = {}
+        if plan.get("schemas"):
+            markers["schemas"] = dict((identity.get("id"), change_marker(identity)) for identity in mso.query_objs("schemas/list-identity", key="schemas"))
+        if plan.get("templates"):
+            summaries = mso.request("templates/summaries", method="GET") or []
+            markers["templates"] = dict((summary.get("templateId"), change_marker(summary)) for summary in summaries)
+        conflicts = []
+        for item in applied:
+            base = plan.get(item.get("kind")).get(item.get("id")).get("base")
+            current = markers.get(item.get("kind")).get(item.get("id"), False)
+            if current is False:
+                conflicts.append("{0} '{1}' was removed".format(item.get("kind")[:-1], item.get("name")))
+            elif base is None or current is None:
+                module.warn("The version of {0} '{1}' is not known, it cannot be verified".format(item.get("kind")[:-1], item.get("name")))
+            elif current != base:
+                conflicts.append("{0} '{1}' changed since the snapshot was taken".format(item.get("kind")[:-1], item.get("name")))
+        if conflicts:
+            mso.fail_json(msg="The plan cannot be applied: {0}".format("; ".join(conflicts)), applied=applied)
+
+    if not module.check_mode:
+        for kind in PLAN_KINDS:
+            for key, entry in plan.get(kind).items():
+                if entry.get("replaces"):
+                    mso.request("{0}/{1}".format(kind, key), method="PUT", data=entry.get("document"))
+                else:
+                    mso.request("{0}/{1}".format(kind, key), method="PATCH", data=entry.get("ops"))
+        if module.params.get("remove"):
+            for plan_file in (path, path + ".lock"):
+                if os.path.exists(plan_file):
+                    os.remove(plan_file)
+
+    mso.result["changed"] = any(item.get("operations") or item.get("replaces") for item in applied)
+    mso.exit_json(applied=applied)
+
+
+if __name__ == "__main__":
+    main()
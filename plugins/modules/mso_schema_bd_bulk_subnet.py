@@ -0,0 +1,480 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# GNU General Public License v3.0+ (see LICENSE or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+ANSIBLE_METADATA = {"metadata_version": "1.1", "status": ["preview"], "supported_by": "community"}
+
+DOCUMENTATION = r"""
+---
+module: mso_schema_bd_bulk_subnet
+short_description: Manage the subnets of many template and site BDs in bulk in a schema
+description:
+- Manage the subnets of many template BDs and site-local BDs of a schema on Cisco ACI Multi-Site with a single task.
+- The schema is queried once and all changes are sent in a single request.
+- Before the request is sent, the subnets of all BDs of the schema are indexed per VRF to detect duplicate and overlapping subnets.
+options:
+  schema:
+    description:
+    - The name of the schema.
+    type: str
+    required: true
+  template:
+    description:
+    - The name of the template of the BDs.
+    - Used for the subnets that do not provide O(subnets[].template).
+    type: str
+  site:
+    description:
+    - The name of the site, to manage site-local BD subnets.
+    - Used for the subnets that do not provide O(subnets[].site).
+    type: str
+  bd:
+    description:
+    - The name of the BD.
+    - Used for the subnets that do not provide O(subnets[].bd).
+    type: str
+  subnets:
+    description:
+    - The subnets to manage.
+    - When O(state=query), the subnets of the BDs of the provided subnets are returned.
+    type: list
+    elements: dict
+    suboptions:
+      subnet:
+        description:
+        - The IP range in CIDR notation.
+        type: str
+        required: true
+        aliases: [ ip ]
+      template:
+        description:
+        - The name of the template of the BD.
+        type: str
+      site:
+        description:
+        - The name of the site, to manage a site-local BD subnet.
+        - The site-local BD is added when it does not exist.
+        type: str
+      bd:
+        description:
+        - The name of the BD.
+        type: str
+      description:
+        description:
+        - The description of this subnet.
+        - The description of a new subnet defaults to the subnet.
+        type: str
+      scope:
+        description:
+        - The scope of the subnet.
+        - The scope of a new subnet defaults to C(private).
+        type: str
+        choices: [ private, public ]
+      shared:
+        description:
+        - Whether this subnet is shared between VRFs.
+        type: bool
+      no_default_gateway:
+        description:
+        - Whether this subnet has a default gateway.
+        type: bool
+      querier:
+        description:
+        - Whether this subnet is an IGMP querier.
+        type: bool
+      primary:
+        description:
+        - Treat as Primary Subnet.
+        type: bool
+      is_virtual_ip:
+        description:
+        - Treat as Virtual IP Address.
+        type: bool
+  force_replace:
+    description:
+    - Remove the subnets of the provided BDs that are not provided.
+    - Only used when O(state=present).
+    type: bool
+    default: false
+  overlap_check:
+    description:
+    - What to do with duplicate or overlapping subnets within a VRF, after the changes are applied.
+    - Only conflicts with one of the provided subnets are reported.
+    - Use C(error) to fail before anything is sent, C(warn) to only report them, C(ignore) to skip the check.
+    type: str
+    choices: [ error, warn, ignore ]
+    default: error
+  state:
+    description:
+    - Use C(present) or C(absent) for adding or removing.
+    - Use C(query) for listing an object or multiple objects.
+    type: str
+    choices: [ absent, present, query ]
+    default: present
+notes:
+- The ACI MultiSite PATCH API has a deficiency requiring some objects to be referenced by index.
+  This can cause silent corruption on concurrent access when changing/removing on object as
+  the wrong object may be referenced. This module is affected by this deficiency.
+- Only the BDs of the provided schema are used for the overlap check.
+seealso:
+- module: cisco.mso.mso_schema_template_bd_subnet
+- module: cisco.mso.mso_schema_site_bd_subnet
+extends_documentation_fragment: cisco.mso.modules
+"""
+
+EXAMPLES = r"""
+- name: Add subnets to many BDs in a single request
+  cisco.mso.mso_schema_bd_bulk_subnet:
+    host: mso_host
+    username: admin
+    password: SomeSecretPassword
+    schema: Schema1
+    template: Template1
+    subnets:
+    - bd: BD1
+      subnet: 10.0.0.1/24
+    - bd: BD1
+      subnet: 10.0.1.1/24
+      scope: public
+      shared: true
+    - bd: BD2
+      subnet: 10.0.2.1/24
+    - bd: BD3
+      site: Site1
+      subnet: 10.0.3.1/24
+    state: present
+  delegate_to: localhost
+
+- name: Replace the subnets of a BD
+  cisco.mso.mso_schema_bd_bulk_subnet:
+    host: mso_host
+    username: admin
+    password: SomeSecretPassword
+    schema: Schema1
+    template: Template1
+    bd: BD1
+    subnets:
+    - subnet: 10.0.0.1/24
+    force_replace: true
+    state: present
+  delegate_to: localhost
+
+- name: Remove subnets of many BDs
+  cisco.mso.mso_schema_bd_bulk_subnet:
+    host: mso_host
+    username: admin
+    password: SomeSecretPassword
+    schema: Schema1
+    template: Template1
+    subnets:
+    - bd: BD1
+      subnet: 10.0.1.1/24
+    - bd: BD2
+      subnet: 10.0.2.1/24
+    state: absent
+  delegate_to: localhost
+
+- name: Query the subnets of a BD
+  cisco.mso.mso_schema_bd_bulk_subnet:
+    host: mso_host
+    username: admin
+    password: SomeSecretPassword
+    schema: Schema1
+    template: Template1
+    bd: BD1
+    state: query
+  delegate_to: localhost
+  register: query_result
+"""
+
+RETURN = r"""
+subnets:
+  description: The change of every provided subnet, in the order of the provided subnets.
+  returned: when state is present or absent
+  type: list
+  sample: [{"template": "Template1", "site": null, "bd": "BD1", "subnet": "10.0.0.1/24", "change": "added"}]
+conflicts:
+  description: The duplicate and overlapping subnets within a VRF.
+  returned: when state is present
+  type: list
+  sample: [{"vrf": "Template1/VRF1", "type": "overlap", "prefix": "10.0.0.1/16", "owner": "Template1/BD1",
+            "other_prefix": "10.0.1.1/24", "other_owner": "Template1/BD2"}]
+"""
+
+from collections import OrderedDict
+from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.cisco.mso.plugins.module_utils.mso import MSOModule, mso_argument_spec
+from ansible_collections.cisco.mso.plugins.module_utils.prefixes import PrefixIndex, normalize_gateway
+from ansible_collections.cisco.mso.plugins.module_utils.validation import MSOValidator
+
+SUBNET_OPTIONS = dict(
+    subnet=dict(type="str", required=True, aliases=["ip"]),
+    template=dict(type="str"),
+    site=dict(type="str"),
+    bd=dict(type="str"),
+    description=dict(type="str"),
+    scope=dict(type="str", choices=["private", "public"]),
+    shared=dict(type="bool"),
+    no_default_gateway=dict(type="bool"),
+    querier=dict(type="bool"),
+    primary=dict(type="bool"),
+    is_virtual_ip=dict(type="bool"),
+)
+
+# Subnet payload keys and their option, with the default of a new subnet
+SUBNET_ATTRIBUTES = [
+    ("description", "description", None),
+    ("scope", "scope", "private"),
+    ("shared", "shared", False),
+    ("noDefaultGateway", "no_default_gateway", False),
+    ("querier", "querier", False),
+    ("primary", "primary", False),
+    ("virtual", "is_virtual_ip", False),
+]
+
+
+def build_subnet(subnet, existing=None):
+    """Build a subnet payload, unset values are kept from the existing subnet or get the default of a new subnet"""
+    payload = dict(ip=subnet.get("subnet"))
+    for key, option, default in SUBNET_ATTRIBUTES:
+        value = subnet.get(option)
+        if value is None:
+            value = existing.get(key) if existing is not None and key in existing else default
+        if value is None and key == "description":
+            value = subnet.get("subnet")
+        payload[key] = value
+    return payload
+
+
+def ref_key(mso, ref):
+    """Return a reference as a (schemaId, templateName, name) tuple, whether it is a reference string or a dictionary"""
+    if not ref:
+        return None
+    if not isinstance(ref, dict):
+        ref = mso.dict_from_ref(ref)
+        if not isinstance(ref, dict):
+            return None
+    name = ref.get("vrfName") or ref.get("bdName")
+    return (ref.get("schemaId"), ref.get("templateName"), name)
+
+
+def main():
+    argument_spec = mso_argument_spec()
+    argument_spec.update(
+        schema=dict(type="str", required=True),
+        template=dict(type="str"),
+        site=dict(type="str"),
+        bd=dict(type="str"),
+        subnets=dict(type="list", elements="dict", options=SUBNET_OPTIONS),
+        force_replace=dict(type="bool", default=False),
+        overlap_check=dict(type="str", default="error", choices=["error", "warn", "ignore"]),
+        state=dict(type="str", default="present", choices=["absent", "present", "query"]),
+    )
+
+    module = AnsibleModule(
+        argument_spec=argument_spec,
+        supports_check_mode=True,
+        required_if=[
+            ["state", "absent", ["subnets"]],
+            ["state", "present", ["subnets"]],
+        ],
+    )
+
+    schema = module.params.get("schema")
+    subnets = module.params.get("subnets")
+    force_replace = module.params.get("force_replace")
+    overlap_check = module.params.get("overlap_check")
+    state = module.params.get("state")
+
+    mso = MSOModule(module)
+
+    # Validate all subnets and group them per BD before the schema is queried
+    validator = MSOValidator(mso)
+    groups = OrderedDict()
+    if subnets is None:
+        subnets = []
+        if module.params.get("template") is not None and module.params.get("bd") is not None:
+            groups[(module.params.get("template").replace(" ", ""), module.params.get("site"), module.params.get("bd"))] = []
+    for index, subnet in enumerate(subnets):
+        context = "subnets[{0}]".format(index)
+        subnet = dict(subnet)
+        for name in ["template", "site", "bd"]:
+            if subnet.get(name) is None:
+                subnet[name] = module.params.get(name)
+        if subnet.get("template") is not None:
+            subnet["template"] = subnet.get("template").replace(" ", "")
+        if not validator.required(context, template=subnet.get("template"), bd=subnet.get("bd")):
+            continue
+        if validator.ip_address("subnet", subnet.get("subnet"), context, prefix=True):
+            subnet["subnet"] = normalize_gateway(subnet.get("subnet"))
+        location = (subnet.get("template"), subnet.get("site"), subnet.get("bd"))
+        validator.unique("subnet", location + (subnet.get("subnet"),), context, msg="duplicate subnet '{0}'".format(subnet.get("subnet")))
+        groups.setdefault(location, []).append(subnet)
+    validator.fail_on_errors()
+
+    # Get schema objects
+    schema_id, schema_path, schema_obj = mso.query_schema(schema)
+
+    # Index the templates, template BDs, site-templates and site BDs once
+    templates = dict((t.get("name"), t) for t in schema_obj.get("templates") or [])
+    template_bds = {}
+    for template_name, template_obj in templates.items():
+        for bd_obj in template_obj.get("bds") or []:
+            template_bds[(template_name, bd_obj.get("name"))] = bd_obj
+    site_templates = dict(((s.get("siteId"), s.get("templateName")), s) for s in schema_obj.get("sites") or [])
+    site_bds = {}
+    for (site_id, template_name), site_obj in site_templates.items():
+        for bd_obj in site_obj.get("bds") or []:
+            key = ref_key(mso, bd_obj.get("bdRef"))
+            if key is not None and key[0] == schema_id:
+                site_bds[(site_id, template_name, key[2])] = bd_obj
+
+    site_ids = {}
+    for template_name, site, bd in groups:
+        if site is not None and site not in site_ids:
+            site_ids[site] = mso.lookup_site(site)
+
+    # Resolve the BD of every group
+    for (template_name, site, bd), group in groups.items():
+        context = "{0}/{1}".format(template_name, bd) if site is None else "{0}/{1}/{2}".format(site, template_name, bd)
+        if template_name not in templates:
+            validator.error("template '{0}' does not exist. Existing templates: {1}".format(template_name, ", ".join(sorted(templates))), context)
+        elif (template_name, bd) not in template_bds:
+            validator.error("BD '{0}' does not exist in template '{1}'".format(bd, template_name), context)
+        elif site is not None:
+            if (site_ids.get(site), template_name) not in site_templates:
+                validator.error("site-template association '{0}-{1}' does not exist".format(site, template_name), context)
+            elif state == "present" and template_bds[(template_name, bd)].get("l2Stretch") is True:
+                validator.error("the l2Stretch of template BD should be false in order to create a site BD subnet", context)
+    validator.fail_on_errors()
+
+    def bd_location(template_name, site, bd):
+        """Return the existing BD object, the BD path and the site BD path of a group"""
+        if site is None:
+            return template_bds.get((template_name, bd)), "/templates/{0}/bds/{1}".format(template_name, bd), None
+        site_template = "/sites/{0}-{1}/bds".format(site_ids.get(site), template_name)
+        return site_bds.get((site_ids.get(site), template_name, bd)), "{0}/{1}".format(site_template, bd), site_template
+
+    if state == "query":
+        mso.existing = []
+        for template_name, site, bd in groups:
+            bd_obj = bd_location(template_name, site, bd)[0] or {}
+            mso.existing.append(dict(template=template_name, site=site, bd=bd, subnets=bd_obj.get("subnets") or []))
+        mso.exit_json()
+
+    ops = []
+    removes = []
+    report = []
+    previous = []
+    proposed = []
+    # The proposed subnets of every changed BD, used for the overlap check
+    proposed_subnets = {}
+
+    for (template_name, site, bd), group in groups.items():
+        bd_obj, bd_path, site_bds_path = bd_location(template_name, site, bd)
+        existing_subnets = (bd_obj or {}).get("subnets") or []
+        subnet_indexes = dict((normalize_gateway(s.get("ip")), idx) for idx, s in enumerate(existing_subnets))
+        new_subnets = list(existing_subnets)
+        removed = set()
+
+        for subnet in group:
+            subnet_idx = subnet_indexes.get(subnet.get("subnet"))
+            change = "unchanged"
+            if state == "absent":
+                if subnet_idx is None:
+                    change = "absent"
+                else:
+                    removed.add(subnet_idx)
+                    change = "removed"
+            elif subnet_idx is None:
+                payload = build_subnet(subnet)
+                new_subnets.append(payload)
+                if bd_obj is not None:
+                    ops.append(dict(op="add", path="{0}/subnets/-".format(bd_path), value=payload))
+                change = "added"
+            else:
+                payload = build_subnet(subnet, existing_subnets[subnet_idx])
+                if any(existing_subnets[subnet_idx].get(key) != value for key, value in payload.items() if key != "ip"):
+                    new_subnets[subnet_idx] = dict(existing_subnets[subnet_idx], **payload)
+                    ops.append(dict(op="replace", path="{0}/subnets/{1}".format(bd_path, subnet_idx), value=new_subnets[subnet_idx]))
+                    change = "updated"
+            report.append(dict(template=template_name, site=site, bd=bd, subnet=subnet.get("subnet"), change=change))
+
+        if state == "present" and force_replace:
+            provided = set(subnet.get("subnet") for subnet in group)
+            for subnet_idx, existing_subnet in enumerate(existing_subnets):
+                if normalize_gateway(existing_subnet.get("ip")) not in provided:
+                    removed.add(subnet_idx)
+                    report.append(dict(template=template_name, site=site, bd=bd, subnet=existing_subnet.get("ip"), change="removed"))
+
+        if bd_obj is None and state == "present":
+            # Add the site-local BD together with its subnets
+            bd_payload = dict(
+                bdRef=dict(schemaId=schema_id, templateName=template_name, bdName=bd),
+                hostBasedRouting=False,
+                subnets=new_subnets,
+            )
+            ops.append(dict(op="add", path="{0}/-".format(site_bds_path), value=bd_payload))
+        removes.extend((bd_path, subnet_idx) for subnet_idx in removed)
+
+        new_subnets = [s for idx, s in enumerate(new_subnets) if idx not in removed]
+        proposed_subnets[(template_name, site_ids.get(site), bd)] = (new_subnets, set(subnet.get("subnet") for subnet in group))
+        previous.append(dict(template=template_name, site=site, bd=bd, subnets=existing_subnets))
+        proposed.append(dict(template=template_name, site=site, bd=bd, subnets=new_subnets))
+
+    # Removals are sent last and from the highest index, so the indexes of the other operations stay valid
+    for bd_path, subnet_idx in sorted(removes, key=lambda remove: remove[1], reverse=True):
+        ops.append(dict(op="remove", path="{0}/subnets/{1}".format(bd_path, subnet_idx)))
+
+    extra = dict(subnets=report)
+    if state == "present" and overlap_check != "ignore":
+        # Index the proposed subnets of every BD of the schema per VRF
+        prefix_index = PrefixIndex()
+        site_names = dict((site_id, site) for site, site_id in site_ids.items())
+        bd_subnets = []
+        for (template_name, bd), bd_obj in template_bds.items():
+            bd_subnets.append((template_name, None, bd, bd_obj.get("subnets") or []))
+        for (site_id, template_name, bd), bd_obj in site_bds.items():
+            bd_subnets.append((template_name, site_id, bd, bd_obj.get("subnets") or []))
+        for template_name, site_id, bd in proposed_subnets:
+            if site_id is not None and (site_id, template_name, bd) not in site_bds:
+                bd_subnets.append((template_name, site_id, bd, []))
+        for template_name, site_id, bd, existing_subnets in bd_subnets:
+            new_subnets, managed = proposed_subnets.get((template_name, site_id, bd), (existing_subnets, set()))
+            vrf = ref_key(mso, template_bds.get((template_name, bd), {}).get("vrfRef"))
+            if vrf is None:
+                continue
+            owner = "{0}/{1}".format(template_name, bd) if site_id is None else "{0}/{1}/{2}".format(site_names.get(site_id, site_id), template_name, bd)
+            for new_subnet in new_subnets:
+                ip = normalize_gateway(new_subnet.get("ip"))
+                prefix_index.add(vrf, ip, owner, managed=ip in managed)
+
+        conflicts = []
+        for conflict in prefix_index.conflicts():
+            vrf = conflict.pop("scope")
+            conflict["vrf"] = "{0}/{1}".format(vrf[1], vrf[2]) if vrf[0] == schema_id else "{0}/{1}/{2}".format(*vrf)
+            conflicts.append(conflict)
+        extra["conflicts"] = conflicts
+        if conflicts:
+            messages = ["{type} of {prefix} ({owner}) and {other_prefix} ({other_owner}) in VRF {vrf}".format(**conflict) for conflict in conflicts]
+            if overlap_check == "error":
+                mso.fail_json(msg="Duplicate or overlapping subnets: {0}".format("; ".join(messages)), conflicts=conflicts)
+            for message in messages:
+                mso.module.warn(message)
+
+    mso.previous = previous
+    mso.existing = mso.proposed = mso.sent = proposed
+
+    if ops and not module.check_mode:
+        mso.request(schema_path, method="PATCH", data=ops)
+
+    mso.exit_json(**extra)
+
+
+if __name__ == "__main__":
+    main()
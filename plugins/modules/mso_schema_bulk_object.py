@@ -0,0 +1,383 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# GNU General Public License v3.0+ (see LICENSE or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+ANSIBLE_METADATA = {"metadata_version": "1.1", "status": ["preview"], "supported_by": "community"}
+
+DOCUMENTATION = r"""
+---
+module: mso_schema_bulk_object
+short_description: Build and tear down many schema template objects in dependency order
+description:
+- Add, update or remove many VRFs, BDs, filters, contracts, ANPs, EPGs, external EPGs, L3Outs and service graphs of Cisco ACI Multi-Site
+  templates with a single task.
+- The objects are ordered on their references, e.g. a BD after its VRF and an EPG after its ANP and BD.
+  Objects are removed in the reverse order.
+- The objects are grouped in layers of objects that do not depend on each other, the changes of a layer are sent in a single request
+  per schema.
+- Every schema of the objects is queried once.
+options:
+  schema:
+    description:
+    - The name of the schema of the objects.
+    - Used for the objects that do not provide O(objects[].schema).
+    type: str
+    required: true
+  template:
+    description:
+    - The name of the template of the objects.
+    - Used for the objects that do not provide O(objects[].template).
+    type: str
+  objects:
+    description:
+    - The template objects.
+    type: list
+    elements: dict
+    required: true
+    suboptions:
+      kind:
+        description:
+        - The kind of the object.
+        type: str
+        required: true
+        choices: [ anp, bd, contract, epg, external_epg, filter, l3out, service_graph, vrf ]
+      name:
+        description:
+        - The name of the object.
+        type: str
+        required: true
+      display_name:
+        description:
+        - The name as displayed on the MSO web interface.
+        - Defaults to the name when the object is added.
+        type: str
+      schema:
+        description:
+        - The name of the schema of the object.
+        type: str
+      template:
+        description:
+        - The name of the template of the object.
+        type: str
+      anp:
+        description:
+        - The name of the ANP of the EPG.
+        - Required when O(objects[].kind=epg).
+        type: str
+      attributes:
+        description:
+        - The other attributes of the object, as in the MSO API payload of the object, e.g. C(vrfRef) and C(l2Stretch) for a BD.
+        - References can be provided as dictionaries with the C(name) of the referenced object and optionally its C(schema),
+          C(template) and C(anp). The schema and template default to the schema and template of the object.
+        - Only the provided attributes of an existing object are updated.
+        - Not used when O(state=absent).
+        type: dict
+  state:
+    description:
+    - Use C(present) or C(absent) for adding or removing.
+    type: str
+    choices: [ absent, present ]
+    default: present
+notes:
+- References to objects that are not provided must exist already.
+- A JSON patch request cannot span schemas, the changes of a layer are sent in one request per schema.
+seealso:
+- module: cisco.mso.mso_schema_template_vrf
+- module: cisco.mso.mso_schema_template_bd
+- module: cisco.mso.mso_schema_template_anp_epg
+extends_documentation_fragment: cisco.mso.modules
+"""
+
+EXAMPLES = r"""
+- name: Build a VRF, a BD, a filter, a contract, an ANP and EPGs
+  cisco.mso.mso_schema_bulk_object:
+    host: mso_host
+    username: admin
+    password: SomeSecretPassword
+    schema: Schema1
+    template: Template1
+    objects:
+    - kind: epg
+      anp: ANP1
+      name: Web
+      attributes:
+        bdRef:
+          name: BD1
+        contractRelationships:
+        - relationshipType: consumer
+          contractRef:
+            name: Web-to-App
+    - kind: anp
+      name: ANP1
+    - kind: bd
+      name: BD1
+      attributes:
+        vrfRef:
+          name: VRF1
+    - kind: vrf
+      name: VRF1
+    - kind: contract
+      name: Web-to-App
+      attributes:
+        scope: context
+        filterRelationships:
+        - filterRef:
+            name: Web
+    - kind: filter
+      name: Web
+    state: present
+  delegate_to: localhost
+
+- name: Tear down the same objects, in the reverse order
+  cisco.mso.mso_schema_bulk_object:
+    host: mso_host
+    username: admin
+    password: SomeSecretPassword
+    schema: Schema1
+    template: Template1
+    objects:
+    - kind: vrf
+      name: VRF1
+    - kind: bd
+      name: BD1
+    - kind: anp
+      name: ANP1
+    - kind: epg
+      anp: ANP1
+      name: Web
+    - kind: contract
+      name: Web-to-App
+    - kind: filter
+      name: Web
+    state: absent
+  delegate_to: localhost
+"""
+
+RETURN = r"""
+objects:
+  description: The change of every provided object, in the order of the provided objects.
+  returned: always
+  type: list
+  sample: [{"kind": "bd", "name": "BD1", "schema": "Schema1", "template": "Template1", "anp": null, "layer": 1, "change": "added"}]
+layers:
+  description: The objects of every layer, in the order the layers are sent.
+  returned: always
+  type: list
+  sample: [["vrf VRF1", "filter Web"], ["bd BD1", "contract Web-to-App", "anp ANP1"], ["epg ANP1/Web"]]
+"""
+
+from collections import OrderedDict
+from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.cisco.mso.plugins.module_utils.mso import MSOModule, mso_argument_spec
+from ansible_collections.cisco.mso.plugins.module_utils.specs import mso_schema_bulk_object_spec
+from ansible_collections.cisco.mso.plugins.module_utils.validation import MSOValidator
+from ansible_collections.cisco.mso.plugins.module_utils.graph import (
+    OBJECT_KINDS,
+    DependencyGraph,
+    GraphError,
+    make_references,
+    object_key,
+    ref_key,
+    ref_schemas,
+    schema_objects,
+)
+
+
+def normalize(mso, value):
+    """Return a value with its references, as text or dictionary, replaced by their graph keys so they can be compared"""
+    if isinstance(value, dict):
+        return dict((key, ref_key(mso, item) or item if key.endswith("Ref") else normalize(mso, item)) for key, item in value.items())
+    if isinstance(value, list):
+        return [normalize(mso, item) for item in value]
+    return value
+
+
+def object_path(template, kind, name, anp=None):
+    """Return the path of a template object"""
+    if kind == "epg":
+        return "/templates/{0}/anps/{1}/epgs/{2}".format(template, anp, name)
+    return "/templates/{0}/{1}/{2}".format(template, OBJECT_KINDS.get(kind).get("attribute"), name)
+
+
+def layer_name(key):
+    return "{0} {1}".format(key[2], key[3])
+
+
+def main():
+    argument_spec = mso_argument_spec()
+    argument_spec.update(
+        schema=dict(type="str", required=True),
+        template=dict(type="str"),
+        objects=dict(type="list", elements="dict", required=True, options=mso_schema_bulk_object_spec()),
+        state=dict(type="str", default="present", choices=["absent", "present"]),
+    )
+
+    module = AnsibleModule(
+        argument_spec=argument_spec,
+        supports_check_mode=True,
+    )
+
+    state = module.params.get("state")
+
+    mso = MSOModule(module)
+
+    # Validate all objects before anything is queried
+    validator = MSOValidator(mso)
+    objects = []
+    schema_names = set()
+    for index, obj in enumerate(module.params.get("objects")):
+        context = "objects[{0}]".format(index)
+        obj = dict(obj)
+        for name in ["schema", "template"]:
+            if obj.get(name) is None:
+                obj[name] = module.params.get(name)
+        if not validator.required(context, template=obj.get("template")):
+            continue
+        obj["template"] = obj.get("template").replace(" ", "")
+        if obj.get("kind") == "epg":
+            if not validator.required(context, anp=obj.get("anp")):
+                continue
+        else:
+            obj["anp"] = None
+        validator.unique(
+            "object",
+            (obj.get("schema"), obj.get("template"), obj.get("kind"), obj.get("anp"), obj.get("name")),
+            context,
+            msg="duplicate {0} '{1}'".format(obj.get("kind"), obj.get("name")),
+        )
+        schema_names.add(obj.get("schema"))
+        if state == "present":
+            schema_names.update(ref_schemas(obj.get("attributes")))
+        objects.append(obj)
+    validator.fail_on_errors()
+
+    # Resolve all schemas with a single query of the schema identities and query every schema of the objects once
+    schema_ids = mso.lookup_schemas(sorted(schema_names))
+    schema_objs = OrderedDict()
+    existing = {}
+    for obj in objects:
+        schema = obj.get("schema")
+        if schema in schema_objs:
+            continue
+        schema_path = "schemas/{0}".format(schema_ids.get(schema))
+        schema_obj = mso.query_obj(schema_path, displayName=schema)
+        if not schema_obj:
+            mso.fail_json(msg="Schema '{0}' is not a valid schema name.".format(schema))
+        schema_objs[schema] = (schema_path, schema_obj)
+        existing.update((key, (template_obj, path)) for key, template_obj, path in schema_objects(schema_obj))
+
+    graph = DependencyGraph()
+    keys = []
+    payloads = {}
+    for index, obj in enumerate(objects):
+        schema_id = schema_ids.get(obj.get("schema"))
+        schema_obj = schema_objs[obj.get("schema")][1]
+        if obj.get("template") not in [template.get("name") for template in schema_obj.get("templates") or []]:
+            validator.error("template '{0}' does not exist in schema '{1}'".format(obj.get("template"), obj.get("schema")), obj.get("name"))
+            continue
+        key = object_key(schema_id, obj.get("template"), obj.get("kind"), obj.get("name"), obj.get("anp"))
+        keys.append(key)
+        if state == "absent":
+            if key in existing:
+                graph.add_object(mso, key, existing.get(key)[0])
+            continue
+        payload = make_references(mso, obj.get("attributes") or {}, schema_ids, schema_id, obj.get("template"))
+        payload.update(name=obj.get("name"))
+        if obj.get("display_name") is not None:
+            payload.update(displayName=obj.get("display_name"))
+        payloads[key] = payload
+        graph.add_object(mso, key, payload)
+    for key in payloads:
+        if key[2] == "epg":
+            anp = key[3].split("/")[0]
+            if object_key(key[0], key[1], "anp", anp) not in existing and object_key(key[0], key[1], "anp", anp) not in payloads:
+                validator.error("ANP '{0}' does not exist and is not provided".format(anp), layer_name(key))
+    validator.fail_on_errors()
+
+    try:
+        layers = graph.layers()
+    except GraphError as e:
+        mso.fail_json(msg=str(e))
+    if state == "absent":
+        layers.reverse()
+        # Warn about the objects that still reference the removed objects, MSO rejects the removal of a referenced object
+        schema_graph = DependencyGraph()
+        for schema_path, schema_obj in schema_objs.values():
+            for key, template_obj, path in schema_objects(schema_obj):
+                schema_graph.add_object(mso, key, template_obj)
+        removed = set(graph.dependencies)
+        for key in schema_graph.dependents(removed) - removed:
+            if key[2] == "epg" and object_key(key[0], key[1], "anp", key[3].split("/")[0]) in removed:
+                continue
+            module.warn("{0} '{1}' in template '{2}' references removed objects".format(key[2], key[3], key[1]))
+
+    schema_paths = dict((schema_ids.get(schema), schema_path) for schema, (schema_path, schema_obj) in schema_objs.items())
+    changes = {}
+    patches = []
+    previous = []
+    proposed = []
+    for layer in layers:
+        layer_ops = OrderedDict()
+        for key in layer:
+            template, kind, name = key[1], key[2], key[3]
+            anp, name = name.split("/") if kind == "epg" else (None, name)
+            path = object_path(template, kind, name, anp)
+            ops = layer_ops.setdefault(schema_paths.get(key[0]), [])
+            if state == "absent":
+                previous.append(existing.get(key)[0])
+                ops.append(dict(op="remove", path=path))
+                changes[key] = "removed"
+            elif key not in existing:
+                payload = dict(displayName=name)
+                if kind == "anp":
+                    payload.update(epgs=[])
+                payload.update(payloads.get(key))
+                proposed.append(payload)
+                ops.append(dict(op="add", path=path.rsplit("/", 1)[0] + "/-", value=payload))
+                changes[key] = "added"
+            else:
+                current = existing.get(key)[0]
+                previous.append(current)
+                update = dict((attribute, value) for attribute, value in payloads.get(key).items() if attribute != "name")
+                updated = dict(current)
+                changes[key] = "unchanged"
+                for attribute, value in update.items():
+                    if normalize(mso, {attribute: current.get(attribute)}) != normalize(mso, {attribute: value}):
+                        ops.append(dict(op="replace" if attribute in current else "add", path="{0}/{1}".format(path, attribute), value=value))
+                        updated[attribute] = value
+                        changes[key] = "updated"
+                proposed.append(updated)
+        patches.extend((schema_path, ops) for schema_path, ops in layer_ops.items() if ops)
+
+    report = []
+    for obj, key in zip(objects, keys):
+        layer = [index for index, layer in enumerate(layers) if key in layer]
+        report.append(
+            dict(
+                kind=obj.get("kind"),
+                name=obj.get("name"),
+                schema=obj.get("schema"),
+                template=obj.get("template"),
+                anp=obj.get("anp"),
+                layer=layer[0] if layer else None,
+                change=changes.get(key, "absent"),
+            )
+        )
+
+    mso.previous = previous
+    mso.existing = mso.proposed = mso.sent = proposed
+
+    if not module.check_mode:
+        for schema_path, ops in patches:
+            mso.request(schema_path, method="PATCH", data=ops)
+
+    mso.exit_json(objects=report, layers=[[layer_name(key) for key in layer] for layer in layers])
+
+
+if __name__ == "__main__":
+    main()
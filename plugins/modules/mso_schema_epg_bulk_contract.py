@@ -0,0 +1,381 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# GNU General Public License v3.0+ (see LICENSE or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+ANSIBLE_METADATA = {"metadata_version": "1.1", "status": ["preview"], "supported_by": "community"}
+
+DOCUMENTATION = r"""
+---
+module: mso_schema_epg_bulk_contract
+short_description: Manage the contracts of many EPGs and external EPGs in bulk
+description:
+- Manage the provider and consumer contracts of many EPGs and external EPGs on Cisco ACI Multi-Site with a single task.
+- The schemas of the EPGs and contracts are looked up with a single query, and every schema of the EPGs is queried once.
+- All changes of a schema are sent in a single request.
+options:
+  schema:
+    description:
+    - The name of the schema of the EPGs.
+    - Used for the relationships that do not provide O(relationships[].schema).
+    type: str
+    required: true
+  template:
+    description:
+    - The name of the template of the EPGs.
+    - Used for the relationships that do not provide O(relationships[].template).
+    type: str
+  anp:
+    description:
+    - The name of the ANP of the EPGs.
+    - Used for the relationships that do not provide O(relationships[].anp).
+    type: str
+  relationships:
+    description:
+    - The contract relationships, one per EPG, contract and contract type.
+    - When O(state=query), the contract relationships of the EPGs of the provided relationships are returned.
+    type: list
+    elements: dict
+    required: true
+    suboptions:
+      schema:
+        description:
+        - The name of the schema of the EPG.
+        type: str
+      template:
+        description:
+        - The name of the template of the EPG.
+        type: str
+      anp:
+        description:
+        - The name of the ANP of the EPG.
+        type: str
+      epg:
+        description:
+        - The name of the EPG.
+        - Mutually exclusive with O(relationships[].external_epg).
+        type: str
+      external_epg:
+        description:
+        - The name of the external EPG.
+        - Mutually exclusive with O(relationships[].epg).
+        type: str
+      contract:
+        description:
+        - The contract associated to the EPG.
+        type: dict
+        required: true
+        suboptions:
+          name:
+            description:
+            - The name of the Contract to associate with.
+            required: true
+            type: str
+          schema:
+            description:
+            - The schema that defines the referenced contract.
+            - If this parameter is unspecified, it defaults to the schema of the EPG.
+            type: str
+          template:
+            description:
+            - The template that defines the referenced contract.
+            - If this parameter is unspecified, it defaults to the template of the EPG.
+            type: str
+          type:
+            description:
+            - The type of contract.
+            type: str
+            required: true
+            choices: [ consumer, provider ]
+  force_replace:
+    description:
+    - Remove the contract relationships of the provided EPGs that are not provided.
+    - Only used when O(state=present).
+    type: bool
+    default: false
+  state:
+    description:
+    - Use C(present) or C(absent) for adding or removing.
+    - Use C(query) for listing an object or multiple objects.
+    type: str
+    choices: [ absent, present, query ]
+    default: present
+notes:
+- The ACI MultiSite PATCH API has a deficiency requiring some objects to be referenced by index.
+  This can cause silent corruption on concurrent access when changing/removing on object as
+  the wrong object may be referenced. This module is affected by this deficiency.
+seealso:
+- module: cisco.mso.mso_schema_template_anp_epg_contract
+- module: cisco.mso.mso_schema_template_external_epg_contract
+extends_documentation_fragment: cisco.mso.modules
+"""
+
+EXAMPLES = r"""
+- name: Add provider and consumer contracts to many EPGs
+  cisco.mso.mso_schema_epg_bulk_contract:
+    host: mso_host
+    username: admin
+    password: SomeSecretPassword
+    schema: Schema1
+    template: Template1
+    anp: ANP1
+    relationships:
+    - epg: Web
+      contract:
+        name: Web-to-App
+        type: consumer
+    - epg: App
+      contract:
+        name: Web-to-App
+        type: provider
+    - epg: App
+      contract:
+        name: Shared-Services
+        schema: Common
+        template: Common
+        type: consumer
+    - external_epg: Internet
+      contract:
+        name: Internet-to-Web
+        type: consumer
+    state: present
+  delegate_to: localhost
+
+- name: Remove contracts from many EPGs
+  cisco.mso.mso_schema_epg_bulk_contract:
+    host: mso_host
+    username: admin
+    password: SomeSecretPassword
+    schema: Schema1
+    template: Template1
+    anp: ANP1
+    relationships:
+    - epg: Web
+      contract:
+        name: Web-to-App
+        type: consumer
+    state: absent
+  delegate_to: localhost
+"""
+
+RETURN = r"""
+relationships:
+  description: The change of every provided relationship, in the order of the provided relationships.
+  returned: when state is present or absent
+  type: list
+  sample: [{"schema": "Schema1", "template": "Template1", "anp": "ANP1", "epg": "Web", "external_epg": null,
+            "contract": {"name": "Web-to-App", "schema": "Schema1", "template": "Template1", "type": "consumer"}, "change": "added"}]
+"""
+
+from collections import OrderedDict
+from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.cisco.mso.plugins.module_utils.mso import MSOModule, mso_argument_spec
+from ansible_collections.cisco.mso.plugins.module_utils.specs import mso_schema_epg_bulk_contract_spec
+from ansible_collections.cisco.mso.plugins.module_utils.validation import MSOValidator
+
+
+def contract_key(mso, ref):
+    """Return a contractRef as a (schemaId, templateName, contractName) tuple, whether it is a reference string or a dictionary"""
+    if not isinstance(ref, dict):
+        ref = mso.dict_from_ref(ref) or {}
+    return (ref.get("schemaId"), ref.get("templateName"), ref.get("contractName"))
+
+
+def epg_path(key):
+    """Return the path of an EPG or external EPG from its (template, anp, epg, external_epg) key"""
+    template, anp, epg, external_epg = key
+    if external_epg is not None:
+        return "/templates/{0}/externalEpgs/{1}".format(template, external_epg)
+    return "/templates/{0}/anps/{1}/epgs/{2}".format(template, anp, epg)
+
+
+def epg_state(mso, schema, key, relationships):
+    """Return the contract relationships of an EPG with the references as dictionaries"""
+    template, anp, epg, external_epg = key
+    return dict(
+        schema=schema,
+        template=template,
+        anp=anp,
+        epg=epg,
+        external_epg=external_epg,
+        contractRelationships=[
+            dict(r, contractRef=dict(zip(["schemaId", "templateName", "contractName"], contract_key(mso, r.get("contractRef"))))) for r in relationships
+        ],
+    )
+
+
+def main():
+    argument_spec = mso_argument_spec()
+    argument_spec.update(
+        schema=dict(type="str", required=True),
+        template=dict(type="str"),
+        anp=dict(type="str"),
+        relationships=dict(type="list", elements="dict", required=True, options=mso_schema_epg_bulk_contract_spec()),
+        force_replace=dict(type="bool", default=False),
+        state=dict(type="str", default="present", choices=["absent", "present", "query"]),
+    )
+
+    module = AnsibleModule(
+        argument_spec=argument_spec,
+        supports_check_mode=True,
+    )
+
+    relationships = module.params.get("relationships")
+    force_replace = module.params.get("force_replace")
+    state = module.params.get("state")
+
+    mso = MSOModule(module)
+
+    # Validate all relationships and group them per schema and EPG before anything is queried
+    validator = MSOValidator(mso)
+    groups = OrderedDict()
+    for index, relationship in enumerate(relationships):
+        context = "relationships[{0}]".format(index)
+        relationship = dict(relationship, contract=dict(relationship.get("contract")))
+        for name in ["schema", "template", "anp"]:
+            if relationship.get(name) is None:
+                relationship[name] = module.params.get(name)
+        if relationship.get("external_epg") is not None:
+            relationship["anp"] = None
+        if not validator.required(context, template=relationship.get("template")):
+            continue
+        relationship["template"] = relationship.get("template").replace(" ", "")
+        if relationship.get("epg") is not None and relationship.get("external_epg") is not None:
+            validator.error("parameters are mutually exclusive: epg|external_epg", context)
+            continue
+        if not validator.required_one_of(context, epg=relationship.get("epg"), external_epg=relationship.get("external_epg")):
+            continue
+        if relationship.get("epg") is not None and not validator.required(context, anp=relationship.get("anp")):
+            continue
+
+        contract = relationship.get("contract")
+        contract["schema"] = contract.get("schema") or relationship.get("schema")
+        contract["template"] = (contract.get("template") or relationship.get("template")).replace(" ", "")
+        key = (relationship.get("template"), relationship.get("anp"), relationship.get("epg"), relationship.get("external_epg"))
+        validator.unique(
+            "relationship",
+            (relationship.get("schema"),) + key + (contract.get("schema"), contract.get("template"), contract.get("name"), contract.get("type")),
+            context,
+            msg="duplicate relationship of contract '{0}' ({1})".format(contract.get("name"), contract.get("type")),
+        )
+        groups.setdefault(relationship.get("schema"), OrderedDict()).setdefault(key, []).append(relationship)
+    validator.fail_on_errors()
+
+    # Resolve all schemas of the EPGs and contracts with a single query of the schema identities
+    schema_names = set(groups)
+    for epgs in groups.values():
+        for group in epgs.values():
+            schema_names.update(relationship["contract"]["schema"] for relationship in group)
+    schema_ids = mso.lookup_schemas(sorted(schema_names))
+
+    # Query every schema of the EPGs once and index its EPGs
+    schema_objs = {}
+    for schema, epgs in groups.items():
+        schema_path = "schemas/{0}".format(schema_ids.get(schema))
+        schema_obj = mso.query_obj(schema_path, displayName=schema)
+        if not schema_obj:
+            mso.fail_json(msg="Schema '{0}' is not a valid schema name.".format(schema))
+        epg_objs = {}
+        for template_obj in schema_obj.get("templates") or []:
+            for anp_obj in template_obj.get("anps") or []:
+                for epg_obj in anp_obj.get("epgs") or []:
+                    epg_objs[(template_obj.get("name"), anp_obj.get("name"), epg_obj.get("name"), None)] = epg_obj
+            for epg_obj in template_obj.get("externalEpgs") or []:
+                epg_objs[(template_obj.get("name"), None, None, epg_obj.get("name"))] = epg_obj
+        for key in epgs:
+            if key not in epg_objs:
+                validator.error("{0} does not exist".format(epg_path(key).lstrip("/")), schema)
+        schema_objs[schema] = (schema_path, epg_objs)
+    validator.fail_on_errors()
+
+    if state == "query":
+        mso.existing = []
+        for schema, epgs in groups.items():
+            epg_objs = schema_objs[schema][1]
+            for key in epgs:
+                mso.existing.append(epg_state(mso, schema, key, epg_objs[key].get("contractRelationships") or []))
+        mso.exit_json()
+
+    report = []
+    previous = []
+    proposed = []
+    patches = []
+    for schema, epgs in groups.items():
+        schema_path, epg_objs = schema_objs[schema]
+        ops = []
+        removes = []
+        for key, group in epgs.items():
+            contracts_path = "{0}/contractRelationships".format(epg_path(key))
+            existing_relationships = epg_objs[key].get("contractRelationships") or []
+            # Hash the existing relationships by contract and relationship type
+            relationship_indexes = dict(
+                ((contract_key(mso, r.get("contractRef")), r.get("relationshipType")), idx) for idx, r in enumerate(existing_relationships)
+            )
+            new_relationships = list(existing_relationships)
+            provided = set()
+            removed = set()
+            for relationship in group:
+                contract = relationship.get("contract")
+                relationship_key = ((schema_ids.get(contract.get("schema")), contract.get("template"), contract.get("name")), contract.get("type"))
+                provided.add(relationship_key)
+                relationship_idx = relationship_indexes.get(relationship_key)
+                change = "unchanged"
+                if state == "absent":
+                    if relationship_idx is None:
+                        change = "absent"
+                    else:
+                        removed.add(relationship_idx)
+                        change = "removed"
+                elif relationship_idx is None:
+                    payload = dict(
+                        relationshipType=contract.get("type"),
+                        contractRef=dict(
+                            contractName=contract.get("name"),
+                            templateName=contract.get("template"),
+                            schemaId=schema_ids.get(contract.get("schema")),
+                        ),
+                    )
+                    new_relationships.append(payload)
+                    ops.append(dict(op="add", path=contracts_path + "/-", value=payload))
+                    change = "added"
+                report.append(
+                    dict(
+                        schema=schema,
+                        template=key[0],
+                        anp=key[1],
+                        epg=key[2],
+                        external_epg=key[3],
+                        contract=contract,
+                        change=change,
+                    )
+                )
+
+            if state == "present" and force_replace:
+                removed.update(idx for relationship_key, idx in relationship_indexes.items() if relationship_key not in provided)
+            removes.extend((contracts_path, idx) for idx in removed)
+
+            previous.append(epg_state(mso, schema, key, existing_relationships))
+            proposed.append(epg_state(mso, schema, key, [r for idx, r in enumerate(new_relationships) if idx not in removed]))
+
+        # Removals are sent last and from the highest index, so the indexes of the other operations stay valid
+        for contracts_path, idx in sorted(removes, key=lambda remove: remove[1], reverse=True):
+            ops.append(dict(op="remove", path="{0}/{1}".format(contracts_path, idx)))
+        if ops:
+            patches.append((schema_path, ops))
+
+    mso.previous = previous
+    mso.existing = mso.proposed = mso.sent = proposed
+
+    if not module.check_mode:
+        for schema_path, ops in patches:
+            mso.request(schema_path, method="PATCH", data=ops)
+
+    mso.exit_json(relationships=report)
+
+
+if __name__ == "__main__":
+    main()
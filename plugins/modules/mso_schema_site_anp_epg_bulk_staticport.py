@@ -150,6 +150,21 @@ options:
         description:
         - Primary micro-seg VLAN of the static port.
         type: int
+  conflict_check:
+    description:
+    - What to do with static ports that conflict with a static port of another EPG of the site, in any schema, after the changes are applied.
+    - A conflict is the same VLAN on the same interface of a node, or a second untagged or native static port on the same interface.
+    - Use C(error) to fail before anything is sent, C(warn) to only report them, C(ignore) to skip the check.
+    - The check queries the schemas associated with the site, unless O(conflict_mirror) is provided.
+    type: str
+    choices: [ error, warn, ignore ]
+    default: ignore
+  conflict_mirror:
+    description:
+    - The path of a mirror created by M(cisco.mso.mso_mirror_sync).
+    - The static ports of the other schemas are read from the mirror instead of querying the schemas of the site.
+    - The static ports of the schema of the EPG are always taken from MSO.
+    type: path
   state:
     description:
     - Use C(present) or C(absent) for adding or removing.
@@ -278,8 +293,12 @@ RETURN = r"""
 """
 
 from ansible.module_utils.basic import AnsibleModule
-from ansible_collections.cisco.mso.plugins.module_utils.mso import MSOModule, mso_argument_spec, mso_site_anp_epg_bulk_staticport_spec
+from ansible.module_utils._text import to_text
+from ansible_collections.cisco.mso.plugins.module_utils.staticports import static_port_path
+from ansible_collections.cisco.mso.plugins.module_utils.mso import MSOModule, mso_argument_spec
+from ansible_collections.cisco.mso.plugins.module_utils.specs import mso_site_anp_epg_bulk_staticport_spec
 from ansible_collections.cisco.mso.plugins.module_utils.schema import MSOSchema
+from ansible_collections.cisco.mso.plugins.module_utils.validation import MSOValidator
 
 
 def main():
@@ -300,6 +319,8 @@ def main():
         deployment_immediacy=dict(type="str", default="lazy", choices=["immediate", "lazy"]),
         mode=dict(type="str", default="untagged", choices=["native", "regular", "untagged"]),
         static_ports=dict(type="list", elements="dict", options=mso_site_anp_epg_bulk_staticport_spec()),
+        conflict_check=dict(type="str", default="ignore", choices=["error", "warn", "ignore"]),
+        conflict_mirror=dict(type="path"),
         state=dict(type="str", default="present", choices=["absent", "present", "query"]),
     )
 
@@ -326,10 +347,52 @@ def main():
     module_deployment_immediacy = module.params.get("deployment_immediacy")
     module_mode = module.params.get("mode")
     static_ports = module.params.get("static_ports")
+    conflict_check = module.params.get("conflict_check")
+    conflict_mirror = module.params.get("conflict_mirror")
     state = module.params.get("state")
 
     mso = MSOModule(module)
 
+    # Validate all static ports before the schema is queried
+    staticport_list = []
+    if state == "present":
+        validator = MSOValidator(mso)
+        for index, static_port in enumerate(static_ports):
+            context = "static_ports[{0}]".format(index)
+            path_type = static_port.get("type") or module_path_type
+            pod = static_port.get("pod") or module_pod
+            leaf = static_port.get("leaf") or module_leaf
+            fex = static_port.get("fex") or module_fex
+            path = static_port.get("path") or module_path  # Note :path has to be diffent in each leaf for every static port in the list.
+            vlan = static_port.get("vlan") or module_vlan
+            primary_micro_segment_vlan = static_port.get("primary_micro_segment_vlan") or module_primary_micro_segment_vlan
+            deployment_immediacy = static_port.get("deployment_immediacy") or module_deployment_immediacy
+            mode = static_port.get("mode") or module_mode
+
+            validator.vlan("vlan", vlan, context)
+            validator.vlan("primary_micro_segment_vlan", primary_micro_segment_vlan, context)
+            if not validator.required(context, pod=pod, leaf=leaf, path=path, vlan=vlan):
+                continue
+
+            portpath = static_port_path(path_type, pod, leaf, path, fex)
+
+            new_leaf = dict(
+                deploymentImmediacy=deployment_immediacy,
+                mode=mode,
+                path=portpath,
+                portEncapVlan=vlan,
+                type=path_type,
+            )
+
+            if primary_micro_segment_vlan:
+                new_leaf.update(microSegVlan=primary_micro_segment_vlan)
+
+            # validate and append staticports to staticport_list if path variable is different
+            duplicate_msg = "each leaf in a pod of a static port should have an unique path, '{0}' is duplicate".format(portpath)
+            if validator.unique("path", portpath, context, msg=duplicate_msg):
+                staticport_list.append(new_leaf)
+        validator.fail_on_errors()
+
     # Get schema objects
     mso_schema = MSOSchema(mso, schema, template, site)
     mso_objects = mso_schema.schema_objects
@@ -383,9 +446,6 @@ def main():
         op_path = "{0}/{1}/epgs/{2}/staticPorts".format(op_path, anp, epg)
         mso.existing = mso_objects.get("site_anp_epg").details.get("staticPorts", [])
 
-    staticport_list = []
-    unique_paths = []
-
     mso.previous = mso.existing
 
     if state == "absent":
@@ -394,48 +454,6 @@ def main():
             ops.append(dict(op="remove", path=op_path))
 
     elif state == "present":
-        for static_port in static_ports:
-            path_type = static_port.get("type") or module_path_type
-            pod = static_port.get("pod") or module_pod
-            leaf = static_port.get("leaf") or module_leaf
-            fex = static_port.get("fex") or module_fex
-            path = static_port.get("path") or module_path  # Note :path has to be diffent in each leaf for every static port in the list.
-            vlan = static_port.get("vlan") or module_vlan
-            primary_micro_segment_vlan = static_port.get("primary_micro_segment_vlan") or module_primary_micro_segment_vlan
-            deployment_immediacy = static_port.get("deployment_immediacy") or module_deployment_immediacy
-            mode = static_port.get("mode") or module_mode
-
-            required_dict = {"pod": pod, "leaf": leaf, "path": path, "vlan": vlan}
-            if None in required_dict.values():
-                res = [key for key in required_dict.keys() if required_dict[key] is None]
-                mso.fail_json(msg="state is present but all of the following are missing: {0}.".format(", ".join(res)))
-            else:
-                if path_type == "port" and fex is not None:
-                    # Select port path for fex if fex param is used
-                    portpath = "topology/{0}/paths-{1}/extpaths-{2}/pathep-[{3}]".format(pod, leaf, fex, path)
-                elif path_type == "vpc":
-                    portpath = "topology/{0}/protpaths-{1}/pathep-[{2}]".format(pod, leaf, path)
-                else:
-                    portpath = "topology/{0}/paths-{1}/pathep-[{2}]".format(pod, leaf, path)
-
-            new_leaf = dict(
-                deploymentImmediacy=deployment_immediacy,
-                mode=mode,
-                path=portpath,
-                portEncapVlan=vlan,
-                type=path_type,
-            )
-
-            if primary_micro_segment_vlan:
-                new_leaf.update(microSegVlan=primary_micro_segment_vlan)
-
-            # validate and append staticports to staticport_list if path variable is different
-            if portpath in unique_paths:
-                mso.fail_json(msg="Each leaf in a pod of a static port should have an unique path.")
-            else:
-                unique_paths.append(portpath)
-                staticport_list.append(new_leaf)
-
         # If payload is empty, anp and EPG already exist at site level
         if not payload:
             payload = staticport_list
@@ -454,6 +472,20 @@ def main():
 
         mso.existing = mso.proposed
 
+    if state == "present" and conflict_check != "ignore":
+        # The conflict check and the mirror (sqlite3) are only imported when the check is enabled
+        from ansible_collections.cisco.mso.plugins.module_utils.mirror import MSOMirror, MirrorError
+        from ansible_collections.cisco.mso.plugins.module_utils.staticports import check_static_port_conflicts, static_port_index
+
+        try:
+            mirror = MSOMirror.open_existing(conflict_mirror) if conflict_mirror else None
+        except MirrorError as e:
+            mso.fail_json(msg=to_text(e))
+        owner = (mso_schema.id, template, anp, epg)
+        index = static_port_index(mso, mso_schema.schema, mso_schema.schema_objects.get("site").details.get("siteId"), owner, mirror)
+        proposed_ports = mso.proposed if isinstance(mso.proposed, list) else [mso.proposed]
+        mso.result["conflicts"] = check_static_port_conflicts(mso, index, owner, proposed_ports, conflict_check)
+
     if not module.check_mode and mso.proposed != mso.previous:
         mso.request(mso_schema.path, method="PATCH", data=ops)
 
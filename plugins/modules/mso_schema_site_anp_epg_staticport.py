@@ -165,6 +165,21 @@ options:
         description:
         - Primary micro-seg VLAN of static port.
         type: int
+  conflict_check:
+    description:
+    - What to do with static ports that conflict with a static port of another EPG of the site, in any schema, after the changes are applied.
+    - A conflict is the same VLAN on the same interface of a node, or a second untagged or native static port on the same interface.
+    - Use C(error) to fail before anything is sent, C(warn) to only report them, C(ignore) to skip the check.
+    - The check queries the schemas associated with the site, unless O(conflict_mirror) is provided.
+    type: str
+    choices: [ error, warn, ignore ]
+    default: ignore
+  conflict_mirror:
+    description:
+    - The path of a mirror created by M(cisco.mso.mso_mirror_sync).
+    - The static ports of the other schemas are read from the mirror instead of querying the schemas of the site.
+    - The static ports of the schema of the EPG are always taken from MSO.
+    type: path
   state:
     description:
     - Use C(present) or C(absent) for adding or removing.
@@ -391,7 +406,9 @@ RETURN = r"""
 """
 
 from ansible.module_utils.basic import AnsibleModule
-from ansible_collections.cisco.mso.plugins.module_utils.mso import MSOModule, mso_argument_spec, mso_site_anp_epg_bulk_staticport_spec
+from ansible.module_utils._text import to_text
+from ansible_collections.cisco.mso.plugins.module_utils.mso import MSOModule, mso_argument_spec
+from ansible_collections.cisco.mso.plugins.module_utils.specs import mso_site_anp_epg_bulk_staticport_spec
 from ansible_collections.cisco.mso.plugins.module_utils.schema import MSOSchema
 
 
@@ -414,6 +431,8 @@ def main():
         deployment_immediacy=dict(type="str", default="lazy", choices=["immediate", "lazy"]),
         mode=dict(type="str", default="untagged", choices=["native", "regular", "untagged"]),
         static_ports=dict(type="list", elements="dict", options=mso_site_anp_epg_bulk_staticport_spec()),
+        conflict_check=dict(type="str", default="ignore", choices=["error", "warn", "ignore"]),
+        conflict_mirror=dict(type="path"),
         state=dict(type="str", default="present", choices=["absent", "present", "query"]),
     )
 
@@ -438,6 +457,8 @@ def main():
     mode = module.params.get("mode")
     force_replace = module.params.get("force_replace")
     static_ports = module.params.get("static_ports")
+    conflict_check = module.params.get("conflict_check")
+    conflict_mirror = module.params.get("conflict_mirror")
     state = module.params.get("state")
 
     if not static_ports and state in ["present", "absent"]:
@@ -610,6 +631,20 @@ def main():
 
     mso.existing = mso.proposed
 
+    if state == "present" and conflict_check != "ignore":
+        # The conflict check and the mirror (sqlite3) are only imported when the check is enabled
+        from ansible_collections.cisco.mso.plugins.module_utils.mirror import MSOMirror, MirrorError
+        from ansible_collections.cisco.mso.plugins.module_utils.staticports import check_static_port_conflicts, static_port_index
+
+        try:
+            mirror = MSOMirror.open_existing(conflict_mirror) if conflict_mirror else None
+        except MirrorError as e:
+            mso.fail_json(msg=to_text(e))
+        owner = (mso_schema.id, template, anp, epg)
+        index = static_port_index(mso, mso_schema.schema, mso_schema.schema_objects.get("site").details.get("siteId"), owner, mirror)
+        proposed_ports = mso.proposed if isinstance(mso.proposed, list) else [mso.proposed]
+        mso.result["conflicts"] = check_static_port_conflicts(mso, index, owner, proposed_ports, conflict_check)
+
     if not module.check_mode and mso.proposed != mso.previous:
         mso.request(mso_schema.path, method="PATCH", data=ops)
 
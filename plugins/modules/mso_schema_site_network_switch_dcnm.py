@@ -48,8 +48,27 @@ options:
   switch_serial_number:
     description:
     - Switch Serial Number
+    - Mutually exclusive with O(switches).
     type: str
-    required: yes
+  interface:
+    description:
+    - A port of the switch.
+    type: str
+  switches:
+    description:
+    - A map of switch serial numbers to the list of their ports.
+    - Port ranges are expanded, C(Ethernet1/1-4) is the same as C(Ethernet1/1), C(Ethernet1/2), C(Ethernet1/3) and C(Ethernet1/4).
+    - When O(state=present), the ports are added to the switch, and the switch is added when needed.
+    - When O(state=absent), the ports are removed from the switch, the switch is removed when no ports are provided.
+    - When O(state=present), a switch without ports is added without ports, or keeps its ports unless O(force_replace=true).
+    - All switches are updated with a single request.
+    - Mutually exclusive with O(switch_serial_number).
+    type: dict
+  force_replace:
+    description:
+    - Replace the ports of the provided switches with the provided ports instead of adding them.
+    type: bool
+    default: false
   state:
     description:
     - Use C(present) or C(absent) for adding or removing.
@@ -73,6 +92,24 @@ EXAMPLES = r'''
     state: present
   delegate_to: localhost
 
+- name: Add ports of many switches to site Network in a single request
+  cisco.mso.mso_schema_site_network_switch_dcnm:
+    host: mso_host
+    username: admin
+    password: SomeSecretPassword
+    schema: Schema1
+    site: Site1
+    template: Template1
+    network: Network1
+    switches:
+      ABCD1234:
+      - Ethernet1/1-48
+      EFGH5678:
+      - Ethernet1/1-24
+      - Ethernet1/49
+    state: present
+  delegate_to: localhost
+
 - name: Remove Switch from site Network
   cisco.mso.mso_schema_site_network_switch_dcnm:
     host: mso_host
@@ -103,9 +140,34 @@ EXAMPLES = r'''
 RETURN = r'''
 '''
 
+import re
 from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils.six import string_types
+from ansible.module_utils._text import to_text
 from ansible_collections.cisco.mso.plugins.module_utils.mso import MSOModule, mso_argument_spec
 
+PORT_RANGE_REGEX = re.compile(r'^(.*?)(\d+)-(\d+)$')
+
+
+def expand_ports(ports):
+    """Expand a list of ports with port ranges like 'Ethernet1/1-4' in a list of ports, in order and without duplicates"""
+    if ports is None:
+        return []
+    if isinstance(ports, string_types):
+        ports = ports.split(',')
+    expanded = []
+    for port in ports:
+        port = to_text(port).strip()
+        match = PORT_RANGE_REGEX.match(port)
+        if match and int(match.group(2)) <= int(match.group(3)):
+            values = ['{0}{1}'.format(match.group(1), number) for number in range(int(match.group(2)), int(match.group(3)) + 1)]
+        else:
+            values = [port] if port else []
+        for value in values:
+            if value not in expanded:
+                expanded.append(value)
+    return expanded
+
 
 def main():
     argument_spec = mso_argument_spec()
@@ -114,17 +176,25 @@ def main():
         site=dict(type='str', required=True),
         template=dict(type='str', required=True),
         network=dict(type='str', required=True),
-        switch_serial_number=dict(type='str', required=True),  # This parameter is not required for querying all objects
+        switch_serial_number=dict(type='str'),  # This parameter is not required for querying all objects
         interface=dict(type='str'),
+        switches=dict(type='dict'),
+        force_replace=dict(type='bool', default=False),
         state=dict(type='str', default='present', choices=['absent', 'present', 'query']),
     )
 
     module = AnsibleModule(
         argument_spec=argument_spec,
         supports_check_mode=True,
+        mutually_exclusive=[
+            ['switches', 'switch_serial_number'],
+            ['switches', 'interface'],
+        ],
         required_if=[
             ['state', 'absent', ['network']],
             ['state', 'present', ['network']],
+            ['state', 'absent', ['switch_serial_number', 'switches'], True],
+            ['state', 'present', ['switch_serial_number', 'switches'], True],
         ],
     )
 
@@ -134,6 +204,8 @@ def main():
     network = module.params.get('network')
     switch_serial_number = module.params.get('switch_serial_number')
     interface = module.params.get('interface')
+    switches = module.params.get('switches')
+    force_replace = module.params.get('force_replace')
     state = module.params.get('state')
 
     mso = MSOModule(module)
@@ -168,52 +240,73 @@ def main():
 
 
     # Get DCNM Static Leafs
-    leafs = [r.get('switchSN') for r in schema_obj.get('sites')[site_idx]['networks'][network_idx]['dcnmStaticPorts']]
-    if switch_serial_number is not None and switch_serial_number in leafs:
-        leaf_idx = leafs.index(switch_serial_number)
-        leaf_path = '/sites/{0}/networks/{1}/dcnmStaticPorts/{2}'.format(site_template, network, leaf_idx)
-        mso.existing = schema_obj.get('sites')[site_idx]['networks'][network_idx]['dcnmStaticPorts'][leaf_idx]
+    static_ports = schema_obj.get('sites')[site_idx]['networks'][network_idx].get('dcnmStaticPorts') or []
+    leafs = dict((r.get('switchSN'), idx) for idx, r in enumerate(static_ports))
 
     if state == 'query':
         if switch_serial_number is None:
-            mso.existing = schema_obj.get('sites')[site_idx]['networks'][network_idx]['dcnmStaticPorts']
-        elif not mso.existing:
+            mso.existing = static_ports
+        elif switch_serial_number not in leafs:
             mso.fail_json(msg="Switch '{serial}' not found".format(serial=switch_serial_number))
+        else:
+            mso.existing = static_ports[leafs.get(switch_serial_number)]
         mso.exit_json()
 
+    if switches is None:
+        # A single switch is removed as a whole, and its port is added to the existing ports when present
+        if state == 'absent':
+            switches = {switch_serial_number: []}
+        else:
+            switches = {switch_serial_number: [interface] if interface else []}
+    else:
+        switches = dict((serial, expand_ports(ports)) for serial, ports in switches.items())
+
     leafs_path = '/sites/{0}/networks/{1}/dcnmStaticPorts'.format(site_template, network)
     ops = []
-
-    mso.previous = mso.existing
-    if state == 'absent':
-        if mso.existing:
-            mso.sent = mso.existing = {}
-            ops.append(dict(op='remove', path=leaf_path))
-
-    elif state == 'present':
-
-        payload = dict(
-            switchSN=switch_serial_number
-        )
-        if interface:
-            payload.update(
-                {
-                    'ports': []
-                }
-            )
-            payload['ports'].append(interface)
-
-
-        mso.sanitize(payload, collate=True)
-        if mso.existing:
-            #ops.append(dict(op='replace', path=leaf_path, value=mso.sent))
-            mso.exit_json()
+    removes = []
+    proposed = [dict(leaf) for leaf in static_ports]
+
+    for serial in sorted(switches):
+        ports = switches.get(serial)
+        leaf_idx = leafs.get(serial)
+        existing_ports = (static_ports[leaf_idx].get('ports') or []) if leaf_idx is not None else []
+
+        if state == 'absent':
+            if leaf_idx is None:
+                continue
+            if not ports:
+                removes.append(leaf_idx)
+                continue
+            new_ports = [port for port in existing_ports if port not in set(ports)]
+        elif force_replace:
+            new_ports = ports
         else:
-            ops.append(dict(op='add', path=leafs_path + '/-', value=mso.sent))
-
-        mso.existing = mso.proposed
-
-    if not module.check_mode:
+            new_ports = existing_ports + [port for port in ports if port not in set(existing_ports)]
+
+        if leaf_idx is None:
+            payload = dict(switchSN=serial)
+            if new_ports:
+                payload.update(ports=new_ports)
+            proposed.append(payload)
+            ops.append(dict(op='add', path=leafs_path + '/-', value=payload))
+        elif set(new_ports) != set(existing_ports):
+            proposed[leaf_idx] = dict(static_ports[leaf_idx], ports=new_ports)
+            ops.append(dict(op='replace', path='{0}/{1}'.format(leafs_path, leaf_idx), value=proposed[leaf_idx]))
+
+    # Switches are removed last and from the end, so the indexes of the other operations stay valid
+    for leaf_idx in sorted(removes, reverse=True):
+        del proposed[leaf_idx]
+        ops.append(dict(op='remove', path='{0}/{1}'.format(leafs_path, leaf_idx)))
+
+    if switch_serial_number is not None:
+        # A single switch returns its own entry, or an empty dict when it does not exist
+        mso.previous = static_ports[leafs.get(switch_serial_number)] if switch_serial_number in leafs else {}
+        mso.existing = mso.proposed = mso.sent = next((leaf for leaf in proposed if leaf.get('switchSN') == switch_serial_number), {})
+    else:
+        mso.previous = static_ports
+        mso.existing = mso.proposed = mso.sent = proposed
+
+    if ops and not module.check_mode:
         mso.request(schema_path, method='PATCH', data=ops)
 
     mso.exit_json()
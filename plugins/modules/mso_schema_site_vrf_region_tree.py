@@ -0,0 +1,616 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# GNU General Public License v3.0+ (see LICENSE or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+ANSIBLE_METADATA = {"metadata_version": "1.1", "status": ["preview"], "supported_by": "community"}
+
+DOCUMENTATION = r"""
+---
+module: mso_schema_site_vrf_region_tree
+short_description: Manage the regions, CIDRs and subnets of a site-local VRF in schema template
+description:
+- Manage the full region, CIDR and subnet tree of a site-local VRF in schema template on Cisco ACI Multi-Site with a single task.
+- The existing tree is queried once and all changes are sent in a single request.
+options:
+  schema:
+    description:
+    - The name of the schema.
+    type: str
+    required: true
+  site:
+    description:
+    - The name of the site.
+    type: str
+    required: true
+  template:
+    description:
+    - The name of the template.
+    type: str
+    required: true
+  vrf:
+    description:
+    - The name of the VRF.
+    type: str
+    required: true
+  regions:
+    description:
+    - The regions of the site-local VRF.
+    - When O(state=absent), a region without O(regions[].cidrs) is removed, otherwise only the provided CIDRs are removed.
+    - When O(state=query), only the provided regions are returned.
+    type: list
+    elements: dict
+    suboptions:
+      name:
+        description:
+        - The name of the region.
+        type: str
+        required: true
+      vpn_gateway_router:
+        description:
+        - Whether VPN gateway router is enabled or not.
+        type: bool
+      container_overlay:
+        description:
+        - The name of the context profile type.
+        - This parameter is only available for Azure sites.
+        type: bool
+      underlay_context_profile:
+        description:
+        - The name of the context profile type.
+        - This parameter is only available for Azure sites.
+        type: dict
+        suboptions:
+          vrf:
+            description:
+            - The name of the VRF to associate with underlay context profile.
+            type: str
+            required: true
+          region:
+            description:
+            - The name of the region associated with underlay context profile VRF.
+            type: str
+            required: true
+      hub_network:
+        description:
+        - The hub network to be managed.
+        type: dict
+        suboptions:
+          name:
+            description:
+            - The name of the hub network.
+            type: str
+            required: true
+          tenant:
+            description:
+            - The name of the tenant.
+            type: str
+            required: true
+      cidrs:
+        description:
+        - The CIDRs of the region.
+        - When not provided the CIDRs of an existing region are left untouched.
+        - When O(state=absent), a CIDR without O(regions[].cidrs[].subnets) is removed, otherwise only the provided subnets are removed.
+        type: list
+        elements: dict
+        suboptions:
+          ip:
+            description:
+            - The IP range of for the region CIDR.
+            type: str
+            required: true
+          primary:
+            description:
+            - Whether this is the primary CIDR.
+            type: bool
+            default: true
+          subnets:
+            description:
+            - The subnets of the region CIDR.
+            - When not provided the subnets of an existing CIDR are left untouched.
+            type: list
+            elements: dict
+            suboptions:
+              ip:
+                description:
+                - The IP subnet of this region CIDR.
+                type: str
+                required: true
+              zone:
+                description:
+                - The name of the zone for the region CIDR subnet.
+                - This argument is required for AWS sites.
+                type: str
+              vgw:
+                description:
+                - Whether this subnet is used for the Azure Gateway in Azure.
+                - Whether this subnet is used for the Transit Gateway Attachment in AWS.
+                type: bool
+              private_link_label:
+                description:
+                - The private link label used to represent this subnet.
+                type: str
+              hosted_vrf:
+                description:
+                - The name of hosted vrf associated with region CIDR subnet.
+                type: str
+  force_replace:
+    description:
+    - Remove the regions, CIDRs and subnets that are not provided.
+    - CIDRs and subnets are only removed from the regions and CIDRs that provide O(regions[].cidrs) and O(regions[].cidrs[].subnets).
+    - Only used when O(state=present).
+    type: bool
+    default: false
+  state:
+    description:
+    - Use C(present) or C(absent) for adding or removing.
+    - Use C(query) for listing an object or multiple objects.
+    type: str
+    choices: [ absent, present, query ]
+    default: present
+notes:
+- The ACI MultiSite PATCH API has a deficiency requiring some objects to be referenced by index.
+  This can cause silent corruption on concurrent access when changing/removing on object as
+  the wrong object may be referenced. This module is affected by this deficiency.
+- Removals are sent after all other operations and from the highest index, so the indexes of the other operations stay valid.
+seealso:
+- module: cisco.mso.mso_schema_site_vrf_region
+- module: cisco.mso.mso_schema_site_vrf_region_cidr
+- module: cisco.mso.mso_schema_site_vrf_region_cidr_subnet
+- module: cisco.mso.mso_schema_site_vrf_region_hub_network
+extends_documentation_fragment: cisco.mso.modules
+"""
+
+EXAMPLES = r"""
+- name: Add the regions, CIDRs and subnets of a site VRF
+  cisco.mso.mso_schema_site_vrf_region_tree:
+    host: mso_host
+    username: admin
+    password: SomeSecretPassword
+    schema: Schema1
+    site: Site1
+    template: Template1
+    vrf: VRF1
+    regions:
+    - name: us-west-1
+      vpn_gateway_router: true
+      hub_network:
+        name: hub-default
+        tenant: infra
+      cidrs:
+      - ip: 10.0.0.0/16
+        subnets:
+        - ip: 10.0.0.0/24
+          zone: us-west-1a
+        - ip: 10.0.1.0/24
+          zone: us-west-1b
+          vgw: true
+    - name: us-east-1
+      cidrs:
+      - ip: 10.1.0.0/16
+        subnets:
+        - ip: 10.1.0.0/24
+          zone: us-east-1a
+    state: present
+  delegate_to: localhost
+
+- name: Make the region tree of a site VRF match exactly
+  cisco.mso.mso_schema_site_vrf_region_tree:
+    host: mso_host
+    username: admin
+    password: SomeSecretPassword
+    schema: Schema1
+    site: Site1
+    template: Template1
+    vrf: VRF1
+    regions: "{{ vrf1_regions }}"
+    force_replace: true
+    state: present
+  delegate_to: localhost
+
+- name: Remove a subnet and a region
+  cisco.mso.mso_schema_site_vrf_region_tree:
+    host: mso_host
+    username: admin
+    password: SomeSecretPassword
+    schema: Schema1
+    site: Site1
+    template: Template1
+    vrf: VRF1
+    regions:
+    - name: us-west-1
+      cidrs:
+      - ip: 10.0.0.0/16
+        subnets:
+        - ip: 10.0.1.0/24
+    - name: us-east-1
+    state: absent
+  delegate_to: localhost
+
+- name: Query the region tree of a site VRF
+  cisco.mso.mso_schema_site_vrf_region_tree:
+    host: mso_host
+    username: admin
+    password: SomeSecretPassword
+    schema: Schema1
+    site: Site1
+    template: Template1
+    vrf: VRF1
+    state: query
+  delegate_to: localhost
+  register: query_result
+"""
+
+RETURN = r"""
+"""
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.cisco.mso.plugins.module_utils.mso import MSOModule, mso_argument_spec
+from ansible_collections.cisco.mso.plugins.module_utils.validation import MSOValidator
+
+SUBNET_OPTIONS = dict(
+    ip=dict(type="str", required=True),
+    zone=dict(type="str"),
+    vgw=dict(type="bool"),
+    private_link_label=dict(type="str"),
+    hosted_vrf=dict(type="str"),
+)
+
+CIDR_OPTIONS = dict(
+    ip=dict(type="str", required=True),
+    primary=dict(type="bool", default=True),
+    subnets=dict(type="list", elements="dict", options=SUBNET_OPTIONS),
+)
+
+REGION_OPTIONS = dict(
+    name=dict(type="str", required=True),
+    vpn_gateway_router=dict(type="bool"),
+    container_overlay=dict(type="bool"),
+    underlay_context_profile=dict(
+        type="dict",
+        options=dict(
+            vrf=dict(type="str", required=True),
+            region=dict(type="str", required=True),
+        ),
+    ),
+    hub_network=dict(
+        type="dict",
+        options=dict(
+            name=dict(type="str", required=True),
+            tenant=dict(type="str", required=True),
+        ),
+    ),
+    cidrs=dict(type="list", elements="dict", options=CIDR_OPTIONS),
+)
+
+
+def build_subnet(subnet, schema_id, template):
+    """Build the payload of a region CIDR subnet"""
+    payload = dict(ip=subnet.get("ip"), zone=subnet.get("zone") or "")
+    if subnet.get("vgw") is True:
+        payload["usage"] = "gateway"
+    if subnet.get("private_link_label") is not None:
+        payload["privateLinkLabel"] = dict(name=subnet.get("private_link_label"))
+    if subnet.get("hosted_vrf") is not None:
+        payload["vrfRef"] = dict(schemaId=schema_id, templateName=template, vrfName=subnet.get("hosted_vrf"))
+        payload["inEditing"] = "false"
+    return payload
+
+
+def build_cidr(cidr, schema_id, template):
+    """Build the payload of a region CIDR with its subnets"""
+    return dict(
+        ip=cidr.get("ip"),
+        primary=cidr.get("primary"),
+        subnets=[build_subnet(subnet, schema_id, template) for subnet in cidr.get("subnets") or []],
+    )
+
+
+def build_region_attributes(region, schema_id, template):
+    """Build the attributes of a region that are set by the user, without CIDRs"""
+    attributes = {}
+    if region.get("vpn_gateway_router") is not None:
+        attributes["isVpnGatewayRouter"] = region.get("vpn_gateway_router")
+    if region.get("container_overlay"):
+        attributes["contextProfileType"] = "container-overlay"
+        if region.get("underlay_context_profile"):
+            attributes["underlayCtxProfile"] = dict(
+                vrfRef=dict(schemaId=schema_id, templateName=template, vrfName=region["underlay_context_profile"]["vrf"]),
+                regionName=region["underlay_context_profile"]["region"],
+            )
+    if region.get("hub_network"):
+        attributes["cloudRsCtxProfileToGatewayRouterP"] = dict(name=region["hub_network"]["name"], tenantName=region["hub_network"]["tenant"])
+        attributes["isTGWAttachment"] = True
+    return attributes
+
+
+def build_region(region, schema_id, template):
+    """Build the payload of a new region, the underlay context profile is set once the region exists"""
+    payload = dict(name=region.get("name"))
+    payload.update(build_region_attributes(region, schema_id, template))
+    payload.pop("underlayCtxProfile", None)
+    payload["cidrs"] = [build_cidr(cidr, schema_id, template) for cidr in region.get("cidrs") or []]
+    return payload
+
+
+def normalize_vrf_ref(mso, vrf_ref):
+    """Return a vrfRef as a dictionary, whether it is a reference string or a dictionary"""
+    if not vrf_ref:
+        return None
+    if isinstance(vrf_ref, dict):
+        return dict(schemaId=vrf_ref.get("schemaId"), templateName=vrf_ref.get("templateName"), vrfName=vrf_ref.get("vrfName"))
+    return mso.vrf_dict_from_ref(vrf_ref)
+
+
+def subnet_values(mso, subnet):
+    """Return the values of a subnet that are managed by this module, in a comparable form"""
+    return dict(
+        ip=subnet.get("ip"),
+        zone=subnet.get("zone") or "",
+        usage=subnet.get("usage") or None,
+        privateLinkLabel=(subnet.get("privateLinkLabel") or {}).get("name"),
+        vrfRef=normalize_vrf_ref(mso, subnet.get("vrfRef")),
+    )
+
+
+def reconcile_subnets(mso, cidr_path, existing_subnets, subnets, schema_id, template, state, force_replace, ops, removes):
+    """
+    Compare the provided subnets of a CIDR with the existing subnets and append the needed operations.
+    :return: The proposed subnets of the CIDR. -> List
+    """
+    proposed = list(existing_subnets)
+    subnet_indexes = dict((subnet.get("ip"), idx) for idx, subnet in enumerate(existing_subnets))
+    provided = set()
+    for subnet in subnets:
+        provided.add(subnet.get("ip"))
+        subnet_idx = subnet_indexes.get(subnet.get("ip"))
+        if state == "absent":
+            if subnet_idx is not None:
+                removes.append((cidr_path, subnet_idx))
+            continue
+        payload = build_subnet(subnet, schema_id, template)
+        if subnet_idx is None:
+            proposed.append(payload)
+            ops.append(dict(op="add", path="{0}/subnets/-".format(cidr_path), value=payload))
+        elif subnet_values(mso, existing_subnets[subnet_idx]) != subnet_values(mso, payload):
+            proposed[subnet_idx] = payload
+            ops.append(dict(op="replace", path="{0}/subnets/{1}".format(cidr_path, subnet_idx), value=payload))
+
+    if state == "present" and force_replace:
+        for subnet_idx, subnet in enumerate(existing_subnets):
+            if subnet.get("ip") not in provided:
+                removes.append((cidr_path, subnet_idx))
+
+    removed = set(idx for path, idx in removes if path == cidr_path)
+    return [subnet for idx, subnet in enumerate(proposed) if idx not in removed]
+
+
+def main():
+    argument_spec = mso_argument_spec()
+    argument_spec.update(
+        schema=dict(type="str", required=True),
+        site=dict(type="str", required=True),
+        template=dict(type="str", required=True),
+        vrf=dict(type="str", required=True),
+        regions=dict(type="list", elements="dict", options=REGION_OPTIONS),
+        force_replace=dict(type="bool", default=False),
+        state=dict(type="str", default="present", choices=["absent", "present", "query"]),
+    )
+
+    module = AnsibleModule(
+        argument_spec=argument_spec,
+        supports_check_mode=True,
+        required_if=[
+            ["state", "absent", ["regions"]],
+            ["state", "present", ["regions"]],
+        ],
+    )
+
+    schema = module.params.get("schema")
+    site = module.params.get("site")
+    template = module.params.get("template").replace(" ", "")
+    vrf = module.params.get("vrf")
+    regions = module.params.get("regions")
+    force_replace = module.params.get("force_replace")
+    state = module.params.get("state")
+
+    mso = MSOModule(module)
+
+    # Validate the whole tree before anything is queried
+    validator = MSOValidator(mso)
+    for region_idx, region in enumerate(regions or []):
+        region_context = "regions[{0}]".format(region_idx)
+        validator.unique("region", region.get("name"), region_context)
+        if region.get("underlay_context_profile") and not region.get("container_overlay"):
+            validator.error("underlay_context_profile requires container_overlay", region_context)
+        for cidr_idx, cidr in enumerate(region.get("cidrs") or []):
+            cidr_context = "{0}.cidrs[{1}]".format(region_context, cidr_idx)
+            validator.ip_network("ip", cidr.get("ip"), cidr_context)
+            validator.unique("{0} cidr".format(region.get("name")), cidr.get("ip"), cidr_context)
+            for subnet_idx, subnet in enumerate(cidr.get("subnets") or []):
+                subnet_context = "{0}.subnets[{1}]".format(cidr_context, subnet_idx)
+                validator.ip_network("ip", subnet.get("ip"), subnet_context)
+                validator.unique("{0} {1} subnet".format(region.get("name"), cidr.get("ip")), subnet.get("ip"), subnet_context)
+    validator.fail_on_errors()
+
+    # Get schema objects
+    schema_id, schema_path, schema_obj = mso.query_schema(schema)
+
+    # Get template
+    templates = [t.get("name") for t in schema_obj.get("templates")]
+    if template not in templates:
+        mso.fail_json(msg="Provided template '{0}' does not exist. Existing templates: {1}".format(template, ", ".join(templates)))
+    template_idx = templates.index(template)
+
+    # Get site
+    site_id = mso.lookup_site(site)
+    # Path-based access uses site_id-template
+    site_template = "{0}-{1}".format(site_id, template)
+
+    # Index the site-template and the site VRF once
+    sites = dict(((s.get("siteId"), s.get("templateName")), idx) for idx, s in enumerate(schema_obj.get("sites") or []))
+    site_idx = sites.get((site_id, template))
+    vrf_ref = mso.vrf_ref(schema_id=schema_id, template=template, vrf=vrf)
+    site_vrf = None
+    if site_idx is not None:
+        site_vrfs = dict((v.get("vrfRef"), v) for v in schema_obj.get("sites")[site_idx].get("vrfs") or [])
+        site_vrf = site_vrfs.get(vrf_ref)
+
+    existing_regions = (site_vrf.get("regions") or []) if site_vrf is not None else []
+
+    if state == "query":
+        if site_idx is None:
+            mso.fail_json(msg="Provided site-template association '{0}-{1}' does not exist.".format(site, template))
+        elif site_vrf is None:
+            mso.fail_json(msg="Provided vrf '{0}' does not exist at site level.".format(vrf))
+        if regions:
+            names = set(region.get("name") for region in regions)
+            mso.existing = [region for region in existing_regions if region.get("name") in names]
+        else:
+            mso.existing = existing_regions
+        mso.exit_json()
+
+    ops = []
+    mso.previous = existing_regions
+
+    if site_vrf is None:
+        if state == "present":
+            template_vrfs = [v.get("name") for v in schema_obj.get("templates")[template_idx].get("vrfs") or []]
+            if vrf not in template_vrfs:
+                mso.fail_json(msg="Provided vrf '{0}' does not exist. Existing vrfs: {1}".format(vrf, ", ".join(template_vrfs)))
+
+            proposed = [build_region(region, schema_id, template) for region in regions]
+            new_vrf = dict(vrfRef=dict(schemaId=schema_id, templateName=template, vrfName=vrf), regions=list(proposed))
+            if site_idx is None:
+                # Create the site-template together with the site VRF
+                ops.append(dict(op="add", path="/sites/-", value=dict(siteId=site_id, templateName=template, vrfs=[new_vrf])))
+            else:
+                ops.append(dict(op="add", path="/sites/{0}/vrfs/-".format(site_template), value=new_vrf))
+            for region_idx, region in enumerate(regions):
+                underlay = build_region_attributes(region, schema_id, template).get("underlayCtxProfile")
+                if underlay:
+                    region_path = "/sites/{0}/vrfs/{1}/regions/{2}".format(site_template, vrf, region.get("name"))
+                    ops.append(dict(op="add", path=region_path + "/underlayCtxProfile", value=underlay))
+                    proposed[region_idx] = dict(proposed[region_idx], underlayCtxProfile=underlay)
+        else:
+            proposed = []
+    else:
+        regions_path = "/sites/{0}/vrfs/{1}/regions".format(site_template, vrf)
+        region_indexes = dict((region.get("name"), idx) for idx, region in enumerate(existing_regions))
+        proposed = [dict(region) for region in existing_regions]
+        removed_regions = []
+        # Subnet and CIDR removals as (parent path, index), applied after all other operations
+        subnet_removes = []
+        cidr_removes = []
+
+        for region in regions:
+            region_idx = region_indexes.get(region.get("name"))
+            region_path = "{0}/{1}".format(regions_path, region.get("name"))
+
+            if region_idx is None:
+                if state == "present":
+                    payload = build_region(region, schema_id, template)
+                    ops.append(dict(op="add", path=regions_path + "/-", value=payload))
+                    underlay = build_region_attributes(region, schema_id, template).get("underlayCtxProfile")
+                    if underlay:
+                        payload = dict(payload, underlayCtxProfile=underlay)
+                        ops.append(dict(op="add", path=region_path + "/underlayCtxProfile", value=underlay))
+                    proposed.append(payload)
+                continue
+
+            existing_region = existing_regions[region_idx]
+            if state == "absent" and region.get("cidrs") is None:
+                removed_regions.append(region.get("name"))
+                continue
+
+            if state == "present":
+                for key, value in build_region_attributes(region, schema_id, template).items():
+                    existing_value = existing_region.get(key)
+                    if key == "underlayCtxProfile" and existing_value:
+                        existing_value = dict(existing_value, vrfRef=normalize_vrf_ref(mso, existing_value.get("vrfRef")))
+                    if existing_value != value:
+                        ops.append(dict(op="replace" if key in existing_region else "add", path="{0}/{1}".format(region_path, key), value=value))
+                        proposed[region_idx][key] = value
+
+            if region.get("cidrs") is None:
+                continue
+
+            existing_cidrs = existing_region.get("cidrs") or []
+            cidr_indexes = dict((cidr.get("ip"), idx) for idx, cidr in enumerate(existing_cidrs))
+            proposed_cidrs = [dict(cidr) for cidr in existing_cidrs]
+            provided = set()
+            removed_cidrs = set()
+            for cidr in region.get("cidrs"):
+                provided.add(cidr.get("ip"))
+                cidr_idx = cidr_indexes.get(cidr.get("ip"))
+                # FIXME: Changes based on index are DANGEROUS
+                cidr_path = "{0}/cidrs/{1}".format(region_path, cidr_idx)
+
+                if cidr_idx is None:
+                    if state == "present":
+                        payload = build_cidr(cidr, schema_id, template)
+                        proposed_cidrs.append(payload)
+                        ops.append(dict(op="add", path=region_path + "/cidrs/-", value=payload))
+                    continue
+
+                if state == "absent" and cidr.get("subnets") is None:
+                    removed_cidrs.add(cidr_idx)
+                    continue
+
+                if state == "present" and existing_cidrs[cidr_idx].get("primary") != cidr.get("primary"):
+                    op = "replace" if "primary" in existing_cidrs[cidr_idx] else "add"
+                    ops.append(dict(op=op, path=cidr_path + "/primary", value=cidr.get("primary")))
+                    proposed_cidrs[cidr_idx]["primary"] = cidr.get("primary")
+
+                if cidr.get("subnets") is not None:
+                    proposed_cidrs[cidr_idx]["subnets"] = reconcile_subnets(
+                        mso,
+                        cidr_path,
+                        existing_cidrs[cidr_idx].get("subnets") or [],
+                        cidr.get("subnets"),
+                        schema_id,
+                        template,
+                        state,
+                        force_replace,
+                        ops,
+                        subnet_removes,
+                    )
+
+            if state == "present" and force_replace:
+                removed_cidrs.update(idx for idx, cidr in enumerate(existing_cidrs) if cidr.get("ip") not in provided)
+            for cidr_idx in removed_cidrs:
+                cidr_removes.append(("{0}/cidrs".format(region_path), cidr_idx))
+            # Subnets of removed CIDRs are removed with their CIDR
+            removed_paths = set("{0}/cidrs/{1}".format(region_path, idx) for idx in removed_cidrs)
+            subnet_removes[:] = [(path, idx) for path, idx in subnet_removes if path not in removed_paths]
+            proposed[region_idx]["cidrs"] = [cidr for idx, cidr in enumerate(proposed_cidrs) if idx not in removed_cidrs]
+
+        if state == "present" and force_replace:
+            provided = set(region.get("name") for region in regions)
+            removed_regions.extend(region.get("name") for region in existing_regions if region.get("name") not in provided)
+
+        # Removals are sent last, from the highest index, so the indexes of all other operations stay valid
+        for path, idx in sorted(subnet_removes, key=lambda remove: remove[1], reverse=True):
+            if not any(path.startswith("{0}/{1}/".format(regions_path, name)) for name in removed_regions):
+                ops.append(dict(op="remove", path="{0}/subnets/{1}".format(path, idx)))
+        for path, idx in sorted(cidr_removes, key=lambda remove: remove[1], reverse=True):
+            if not any(path.startswith("{0}/{1}/".format(regions_path, name)) for name in removed_regions):
+                ops.append(dict(op="remove", path="{0}/{1}".format(path, idx)))
+        for name in removed_regions:
+            ops.append(dict(op="remove", path="{0}/{1}".format(regions_path, name)))
+        proposed = [region for region in proposed if region.get("name") not in removed_regions]
+
+    mso.existing = mso.proposed = mso.sent = proposed
+
+    if ops and not module.check_mode:
+        mso.request(schema_path, method="PATCH", data=ops)
+
+    mso.exit_json()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,814 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# GNU General Public License v3.0+ (see LICENSE or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+ANSIBLE_METADATA = {"metadata_version": "1.1", "status": ["preview"], "supported_by": "community"}
+
+DOCUMENTATION = r"""
+---
+module: mso_schema_template_bulk_filter
+short_description: Manage filters with their entries and the filters of contracts in bulk in schema templates
+description:
+- Manage complete filters, with all their entries, and the complete filter set of contracts in schema templates on Cisco ACI Multi-Site with a single task.
+- The schema is queried once and all changes are sent in a single request.
+- Filter entries can be generated from lists of ports and port ranges.
+options:
+  schema:
+    description:
+    - The name of the schema.
+    type: str
+    required: true
+  template:
+    description:
+    - The name of the template.
+    type: str
+    required: true
+  filters:
+    description:
+    - The filters to manage.
+    - When O(state=absent), a filter without O(filters[].entries) is removed, otherwise only the provided entries are removed.
+      A filter is removed with its last entry.
+    type: list
+    elements: dict
+    suboptions:
+      name:
+        description:
+        - The name of the filter.
+        type: str
+        required: true
+      display_name:
+        description:
+        - The name as displayed on the MSO web interface.
+        - This defaults to the filter name when unset on creation.
+        type: str
+      description:
+        description:
+        - The description of the filter.
+        type: str
+      entries:
+        description:
+        - The entries of the filter.
+        - Entries are matched with the existing entries by their match criteria (ethertype, protocol, ports, TCP session rules, ARP flag
+          and fragments only), or by name when no existing entry has the same match criteria.
+        type: list
+        elements: dict
+        suboptions:
+          name:
+            description:
+            - The name of the entry.
+            - When O(filters[].entries[].source_ports) or O(filters[].entries[].destination_ports) generate many entries, the name can use
+              the C({source}) and C({destination}) placeholders.
+            - This defaults to the IP protocol, followed by the source ports and the destination ports of the entry, e.g. C(tcp-8000-8080).
+            type: str
+          display_name:
+            description:
+            - The name as displayed on the MSO web interface.
+            - This defaults to the entry name when unset on creation.
+            type: str
+          description:
+            description:
+            - The description of the entry.
+            type: str
+          ethertype:
+            description:
+            - The ethernet type to use for this filter entry.
+            - This defaults to C(ip) when O(filters[].entries[].ip_protocol) is set, and C(unspecified) otherwise, when unset on creation.
+            type: str
+            choices: [ arp, fcoe, ip, ipv4, ipv6, mac-security, mpls-unicast, trill, unspecified ]
+          ip_protocol:
+            description:
+            - The IP protocol to use for this filter entry.
+            type: str
+            choices: [ eigrp, egp, icmp, icmpv6, igmp, igp, l2tp, ospfigp, pim, tcp, udp, unspecified ]
+          tcp_session_rules:
+            description:
+            - A list of TCP session rules.
+            type: list
+            elements: str
+            choices: [ acknowledgement, established, finish, synchronize, reset, unspecified ]
+          source_ports:
+            description:
+            - The source ports of the entry, one entry is generated per port or port range.
+            - A port is a port number, a well-known port name like C(https), or a port range like C(8000-8080).
+            type: list
+            elements: str
+          destination_ports:
+            description:
+            - The destination ports of the entry, one entry is generated per port or port range.
+            - A port is a port number, a well-known port name like C(https), or a port range like C(8000-8080).
+            type: list
+            elements: str
+          arp_flag:
+            description:
+            - The ARP flag to use for this filter entry.
+            type: str
+            choices: [ reply, request, unspecified ]
+          stateful:
+            description:
+            - Whether this filter entry is stateful.
+            type: bool
+          fragments_only:
+            description:
+            - Whether this filter entry only matches fragments.
+            type: bool
+  contracts:
+    description:
+    - The contracts to manage, with their filters.
+    - When O(state=absent), a contract without O(contracts[].filters) is removed, otherwise only the provided filters are removed.
+      A contract is removed with its last filter.
+    type: list
+    elements: dict
+    suboptions:
+      name:
+        description:
+        - The name of the contract.
+        type: str
+        required: true
+      display_name:
+        description:
+        - The name as displayed on the MSO web interface.
+        - This defaults to the contract name when unset on creation.
+        type: str
+      description:
+        description:
+        - The description of the contract.
+        type: str
+      scope:
+        description:
+        - The scope of the contract.
+        - This defaults to C(vrf) when unset on creation.
+        type: str
+        choices: [ application-profile, global, tenant, vrf ]
+      qos_level:
+        description:
+        - The QoS level of the contract.
+        type: str
+        choices: [ unspecified, level1, level2, level3, level4, level5, level6 ]
+      filters:
+        description:
+        - The filters of the contract.
+        type: list
+        elements: dict
+        suboptions:
+          name:
+            description:
+            - The name of the filter.
+            type: str
+            required: true
+          schema:
+            description:
+            - The schema name in which the filter is located.
+            - This defaults to the schema of the contract.
+            type: str
+          template:
+            description:
+            - The template name in which the filter is located.
+            - This defaults to the template of the contract.
+            type: str
+          type:
+            description:
+            - The type of filter.
+            - A contract with only C(both-way) filters is a both-way contract, other contracts are one-way contracts.
+            type: str
+            choices: [ both-way, consumer-to-provider, provider-to-consumer ]
+            default: both-way
+          directives:
+            description:
+            - A list of filter directives.
+            - This defaults to C(none) when unset on creation.
+            type: list
+            elements: str
+            choices: [ log, none, policy_compression ]
+          action:
+            description:
+            - The filter action.
+            type: str
+            choices: [ permit, deny ]
+          priority:
+            description:
+            - The filter priority override, only used when the action is C(deny).
+            type: str
+            choices: [ default, lowest_priority, medium_priority, highest_priority ]
+  force_replace:
+    description:
+    - Remove the entries of the provided filters and the filters of the provided contracts that are not provided.
+    - Only used when O(state=present).
+    type: bool
+    default: false
+  state:
+    description:
+    - Use C(present) or C(absent) for adding or removing.
+    - Use C(query) for listing an object or multiple objects.
+    type: str
+    choices: [ absent, present, query ]
+    default: present
+seealso:
+- module: cisco.mso.mso_schema_template_filter_entry
+- module: cisco.mso.mso_schema_template_contract_filter
+extends_documentation_fragment: cisco.mso.modules
+"""
+
+EXAMPLES = r"""
+- name: Add a web filter and a contract using it
+  cisco.mso.mso_schema_template_bulk_filter:
+    host: mso_host
+    username: admin
+    password: SomeSecretPassword
+    schema: Schema1
+    template: Template1
+    filters:
+    - name: web
+      entries:
+      - ip_protocol: tcp
+        destination_ports: [http, https, 8000-8080]
+        stateful: true
+      - name: dns-{destination}
+        ip_protocol: udp
+        destination_ports: [53]
+    contracts:
+    - name: web-to-app
+      scope: vrf
+      filters:
+      - name: web
+        directives: [log]
+    state: present
+  delegate_to: localhost
+
+- name: Make the entries of a filter match exactly
+  cisco.mso.mso_schema_template_bulk_filter:
+    host: mso_host
+    username: admin
+    password: SomeSecretPassword
+    schema: Schema1
+    template: Template1
+    filters:
+    - name: web
+      entries:
+      - ip_protocol: tcp
+        destination_ports: [https]
+    force_replace: true
+    state: present
+  delegate_to: localhost
+
+- name: Remove a contract and a filter
+  cisco.mso.mso_schema_template_bulk_filter:
+    host: mso_host
+    username: admin
+    password: SomeSecretPassword
+    schema: Schema1
+    template: Template1
+    filters:
+    - name: web
+    contracts:
+    - name: web-to-app
+    state: absent
+  delegate_to: localhost
+
+- name: Query filters and contracts
+  cisco.mso.mso_schema_template_bulk_filter:
+    host: mso_host
+    username: admin
+    password: SomeSecretPassword
+    schema: Schema1
+    template: Template1
+    state: query
+  delegate_to: localhost
+  register: query_result
+"""
+
+RETURN = r"""
+entries:
+  description: The change of every provided (or generated) filter entry, in the order of the filters and entries.
+  returned: when state is present or absent
+  type: list
+  sample: [{"filter": "web", "entry": "tcp-443", "change": "added"}]
+contract_filters:
+  description: The change of every provided contract filter, in the order of the contracts and filters.
+  returned: when state is present or absent
+  type: list
+  sample: [{"contract": "web-to-app", "filter": "web", "type": "both-way", "change": "added"}]
+"""
+
+import re
+from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils._text import to_text
+from ansible_collections.cisco.mso.plugins.module_utils.mso import MSOModule, mso_argument_spec
+from ansible_collections.cisco.mso.plugins.module_utils.constants import FILTER_KEY_MAP, FILTER_PORT_MAP, PRIORITY_MAP
+from ansible_collections.cisco.mso.plugins.module_utils.validation import MSOValidator
+
+ENTRY_OPTIONS = dict(
+    name=dict(type="str"),
+    display_name=dict(type="str"),
+    description=dict(type="str"),
+    ethertype=dict(type="str", choices=["arp", "fcoe", "ip", "ipv4", "ipv6", "mac-security", "mpls-unicast", "trill", "unspecified"]),
+    ip_protocol=dict(type="str", choices=["eigrp", "egp", "icmp", "icmpv6", "igmp", "igp", "l2tp", "ospfigp", "pim", "tcp", "udp", "unspecified"]),
+    tcp_session_rules=dict(type="list", elements="str", choices=["acknowledgement", "established", "finish", "synchronize", "reset", "unspecified"]),
+    source_ports=dict(type="list", elements="str"),
+    destination_ports=dict(type="list", elements="str"),
+    arp_flag=dict(type="str", choices=["reply", "request", "unspecified"]),
+    stateful=dict(type="bool"),
+    fragments_only=dict(type="bool"),
+)
+
+FILTER_OPTIONS = dict(
+    name=dict(type="str", required=True),
+    display_name=dict(type="str"),
+    description=dict(type="str"),
+    entries=dict(type="list", elements="dict", options=ENTRY_OPTIONS),
+)
+
+CONTRACT_FILTER_OPTIONS = dict(
+    name=dict(type="str", required=True),
+    schema=dict(type="str"),
+    template=dict(type="str"),
+    type=dict(type="str", default="both-way", choices=list(FILTER_KEY_MAP)),
+    directives=dict(type="list", elements="str", choices=["log", "none", "policy_compression"]),
+    action=dict(type="str", choices=["permit", "deny"]),
+    priority=dict(type="str", choices=["default", "lowest_priority", "medium_priority", "highest_priority"]),
+)
+
+CONTRACT_OPTIONS = dict(
+    name=dict(type="str", required=True),
+    display_name=dict(type="str"),
+    description=dict(type="str"),
+    scope=dict(type="str", choices=["application-profile", "global", "tenant", "vrf"]),
+    qos_level=dict(type="str", choices=["unspecified", "level1", "level2", "level3", "level4", "level5", "level6"]),
+    filters=dict(type="list", elements="dict", options=CONTRACT_FILTER_OPTIONS),
+)
+
+# Entry payload keys and their default on creation
+ENTRY_DEFAULTS = dict(
+    description="",
+    etherType="unspecified",
+    ipProtocol="unspecified",
+    tcpSessionRules=["unspecified"],
+    sourceFrom="unspecified",
+    sourceTo="unspecified",
+    destinationFrom="unspecified",
+    destinationTo="unspecified",
+    arpFlag="unspecified",
+    stateful=False,
+    matchOnlyFragments=False,
+)
+
+PORT_RANGE_REGEX = re.compile(r"^\s*([^\s-]+)\s*-\s*([^\s-]+)\s*$")
+
+
+def canonical_port(port):
+    """Return a port as a port number string, well-known port names are replaced by their number"""
+    if port is None:
+        return "unspecified"
+    port = to_text(port).strip()
+    return FILTER_PORT_MAP.get(port, port)
+
+
+def parse_ports(value):
+    """
+    Parse a port, a well-known port name or a port range.
+    :return: The first and last port of the range. -> Tuple
+    :raises ValueError: When the value is not a valid port or port range.
+    """
+    match = PORT_RANGE_REGEX.match(to_text(value))
+    first, last = match.groups() if match else (to_text(value).strip(), to_text(value).strip())
+    for port in (first, last):
+        if port != "unspecified" and port not in FILTER_PORT_MAP and not (port.isdigit() and 0 <= int(port) <= 65535):
+            raise ValueError("'{0}' is not a valid port or port range".format(value))
+    if first.isdigit() and last.isdigit() and int(first) > int(last):
+        raise ValueError("'{0}' is not a valid port range, the first port is higher than the last port".format(value))
+    return first, last
+
+
+def port_token(ports):
+    """Return the name part of a port range"""
+    return ports[0] if ports[0] == ports[1] else "{0}-{1}".format(*ports)
+
+
+def expand_entry(entry):
+    """
+    Generate one entry per source and destination port range of an entry definition.
+    :return: The entry definitions with source_from, source_to, destination_from and destination_to. -> List[Dict]
+    :raises ValueError: When a port is not valid.
+    """
+    sources = [parse_ports(port) for port in entry.get("source_ports") or []] or [None]
+    destinations = [parse_ports(port) for port in entry.get("destination_ports") or []] or [None]
+    expanded = []
+    for source in sources:
+        for destination in destinations:
+            definition = dict(entry, source_from=None, source_to=None, destination_from=None, destination_to=None)
+            parts = [entry.get("ip_protocol") or "any"]
+            if source is not None:
+                definition.update(source_from=source[0], source_to=source[1])
+                parts.append("src-" + port_token(source))
+            if destination is not None:
+                definition.update(destination_from=destination[0], destination_to=destination[1])
+                parts.append(port_token(destination))
+            name = entry.get("name")
+            if name is None:
+                name = "-".join(parts)
+            else:
+                name = name.replace("{source}", port_token(source) if source else "").replace("{destination}", port_token(destination) if destination else "")
+            definition["name"] = name
+            expanded.append(definition)
+    return expanded
+
+
+def build_entry(definition, existing=None):
+    """Build an entry payload, unset values are kept from the existing entry or get their default on creation"""
+    values = dict(
+        displayName=definition.get("display_name"),
+        description=definition.get("description"),
+        etherType=definition.get("ethertype"),
+        ipProtocol=definition.get("ip_protocol"),
+        tcpSessionRules=definition.get("tcp_session_rules"),
+        sourceFrom=definition.get("source_from"),
+        sourceTo=definition.get("source_to"),
+        destinationFrom=definition.get("destination_from"),
+        destinationTo=definition.get("destination_to"),
+        arpFlag="req" if definition.get("arp_flag") == "request" else definition.get("arp_flag"),
+        stateful=definition.get("stateful"),
+        matchOnlyFragments=definition.get("fragments_only"),
+    )
+    payload = dict(name=definition.get("name"))
+    for key, value in values.items():
+        if value is None and existing is not None and key in existing:
+            value = existing.get(key)
+        if value is None:
+            value = ENTRY_DEFAULTS.get(key, definition.get("name"))
+            if key == "etherType" and definition.get("ip_protocol") not in (None, "unspecified"):
+                value = "ip"
+        payload[key] = value
+    return payload
+
+
+def entry_key(entry):
+    """Return the canonical match criteria of an entry payload"""
+    return (
+        entry.get("etherType") or "unspecified",
+        entry.get("ipProtocol") or "unspecified",
+        canonical_port(entry.get("sourceFrom")),
+        canonical_port(entry.get("sourceTo")),
+        canonical_port(entry.get("destinationFrom")),
+        canonical_port(entry.get("destinationTo")),
+        entry.get("arpFlag") or "unspecified",
+        tuple(sorted(entry.get("tcpSessionRules") or ["unspecified"])),
+        bool(entry.get("matchOnlyFragments")),
+    )
+
+
+def same_value(attribute, current, value):
+    """Compare an entry attribute, ports are compared by port number"""
+    if attribute in ("sourceFrom", "sourceTo", "destinationFrom", "destinationTo"):
+        return canonical_port(current) == canonical_port(value)
+    return current == value
+
+
+def relationship_key(contract_filter, schema_ids):
+    """Return the filter type and the filter reference of a contract filter"""
+    return (contract_filter.get("type"), schema_ids.get(contract_filter.get("schema")), contract_filter.get("template"), contract_filter.get("name"))
+
+
+def build_contract_filter(contract_filter, filter_schema_id):
+    """Build the payload of a contract filter relationship"""
+    directives = ["no_stats" if directive == "policy_compression" else directive for directive in contract_filter.get("directives") or ["none"]]
+    payload = dict(
+        filterRef=dict(filterName=contract_filter.get("name"), templateName=contract_filter.get("template"), schemaId=filter_schema_id),
+        directives=directives,
+    )
+    if contract_filter.get("action"):
+        payload["action"] = contract_filter.get("action")
+        if contract_filter.get("action") == "deny" and contract_filter.get("priority"):
+            payload["priorityOverride"] = PRIORITY_MAP.get(contract_filter.get("priority"))
+    return payload
+
+
+def main():
+    argument_spec = mso_argument_spec()
+    argument_spec.update(
+        schema=dict(type="str", required=True),
+        template=dict(type="str", required=True),
+        filters=dict(type="list", elements="dict", options=FILTER_OPTIONS),
+        contracts=dict(type="list", elements="dict", options=CONTRACT_OPTIONS),
+        force_replace=dict(type="bool", default=False),
+        state=dict(type="str", default="present", choices=["absent", "present", "query"]),
+    )
+
+    module = AnsibleModule(
+        argument_spec=argument_spec,
+        supports_check_mode=True,
+        required_if=[
+            ["state", "absent", ["filters", "contracts"], True],
+            ["state", "present", ["filters", "contracts"], True],
+        ],
+    )
+
+    schema = module.params.get("schema")
+    template = module.params.get("template").replace(" ", "")
+    filters = module.params.get("filters") or []
+    contracts = module.params.get("contracts") or []
+    force_replace = module.params.get("force_replace")
+    state = module.params.get("state")
+
+    mso = MSOModule(module)
+
+    # Generate and validate all entries and contract filters before the schema is queried
+    validator = MSOValidator(mso)
+    filter_entries = {}
+    for filter_idx, filter_def in enumerate(filters):
+        context = "filters[{0}]".format(filter_idx)
+        validator.unique("filter", filter_def.get("name"), context)
+        if filter_def.get("entries") is None:
+            continue
+        definitions = []
+        for entry_idx, entry in enumerate(filter_def.get("entries")):
+            entry_context = "{0}.entries[{1}]".format(context, entry_idx)
+            try:
+                expanded = expand_entry(entry)
+            except ValueError as e:
+                validator.error(to_text(e), entry_context)
+                continue
+            for definition in expanded:
+                validator.unique("{0} entry".format(filter_def.get("name")), definition.get("name"), entry_context)
+                validator.unique(
+                    "{0} match".format(filter_def.get("name")),
+                    entry_key(build_entry(definition)),
+                    entry_context,
+                    msg="entry '{0}' has the same match criteria as another entry".format(definition.get("name")),
+                )
+            definitions.extend(expanded)
+        filter_entries[filter_def.get("name")] = definitions
+
+    filter_schemas = set()
+    for contract_idx, contract in enumerate(contracts):
+        context = "contracts[{0}]".format(contract_idx)
+        validator.unique("contract", contract.get("name"), context)
+        for contract_filter in contract.get("filters") or []:
+            contract_filter["schema"] = contract_filter.get("schema") or schema
+            contract_filter["template"] = (contract_filter.get("template") or template).replace(" ", "")
+            filter_schemas.add(contract_filter.get("schema"))
+            validator.unique(
+                "{0} filter".format(contract.get("name")),
+                (contract_filter.get("type"), contract_filter.get("schema"), contract_filter.get("template"), contract_filter.get("name")),
+                context,
+                msg="duplicate {0} filter '{1}'".format(contract_filter.get("type"), contract_filter.get("name")),
+            )
+    validator.fail_on_errors()
+
+    # Get schema
+    schema_id, schema_path, schema_obj = mso.query_schema(schema)
+    # Resolve the schemas of the filters with a single query of the schema identities
+    schema_ids = mso.lookup_schemas(sorted(filter_schemas - set([schema]))) if filter_schemas - set([schema]) else {}
+    schema_ids[schema] = schema_id
+
+    # Get template
+    templates = dict((t.get("name"), t) for t in schema_obj.get("templates"))
+    if template not in templates:
+        mso.fail_json(msg="Provided template '{0}' does not exist. Existing templates: {1}".format(template, ", ".join(templates)))
+    template_obj = templates.get(template)
+
+    # Index the filters and contracts of the template once
+    existing_filters = dict((f.get("name"), f) for f in template_obj.get("filters") or [])
+    existing_contracts = dict((c.get("name"), c) for c in template_obj.get("contracts") or [])
+
+    if state == "query":
+        mso.existing = dict(
+            filters=[f for f in template_obj.get("filters") or [] if not filters or f.get("name") in set(f.get("name") for f in filters)],
+            contracts=[c for c in template_obj.get("contracts") or [] if not contracts or c.get("name") in set(c.get("name") for c in contracts)],
+        )
+        mso.exit_json()
+
+    filters_path = "/templates/{0}/filters".format(template)
+    contracts_path = "/templates/{0}/contracts".format(template)
+    filter_ops = []
+    contract_ops = []
+    entry_report = []
+    contract_report = []
+    previous = dict(filters=[], contracts=[])
+    proposed = dict(filters=[], contracts=[])
+
+    for filter_def in filters:
+        filter_name = filter_def.get("name")
+        filter_path = "{0}/{1}".format(filters_path, filter_name)
+        filter_obj = existing_filters.get(filter_name)
+        definitions = filter_entries.get(filter_name)
+        if filter_obj is not None:
+            previous["filters"].append(filter_obj)
+
+        if state == "absent":
+            if filter_obj is None:
+                continue
+            existing_entries = filter_obj.get("entries") or []
+            if definitions is None:
+                filter_ops.append(dict(op="remove", path=filter_path))
+                continue
+            by_name = dict((e.get("name"), e) for e in existing_entries)
+            by_key = dict((entry_key(e), e) for e in existing_entries)
+            removed = set()
+            for definition in definitions:
+                existing_entry = by_key.get(entry_key(build_entry(definition))) or by_name.get(definition.get("name"))
+                if existing_entry is None or existing_entry.get("name") in removed:
+                    entry_report.append(dict(filter=filter_name, entry=definition.get("name"), change="absent"))
+                    continue
+                removed.add(existing_entry.get("name"))
+                entry_report.append(dict(filter=filter_name, entry=existing_entry.get("name"), change="removed"))
+            remaining = [e for e in existing_entries if e.get("name") not in removed]
+            if not remaining:
+                # A filter needs at least one entry, remove the filter with its last entry
+                filter_ops.append(dict(op="remove", path=filter_path))
+                continue
+            filter_ops.extend(dict(op="remove", path="{0}/entries/{1}".format(filter_path, name)) for name in sorted(removed))
+            proposed["filters"].append(dict(filter_obj, entries=remaining))
+            continue
+
+        # state == "present"
+        if filter_obj is None:
+            entries = [build_entry(definition) for definition in definitions or []]
+            for entry in entries:
+                entry_report.append(dict(filter=filter_name, entry=entry.get("name"), change="added"))
+            new_filter = dict(
+                name=filter_name,
+                displayName=filter_def.get("display_name") or filter_name,
+                description=filter_def.get("description") or "",
+                entries=entries,
+            )
+            if not entries:
+                validator.error("a new filter requires at least one entry", filter_name)
+            filter_ops.append(dict(op="add", path=filters_path + "/-", value=new_filter))
+            proposed["filters"].append(new_filter)
+            continue
+
+        new_filter = dict(filter_obj)
+        for key, option in (("displayName", "display_name"), ("description", "description")):
+            if filter_def.get(option) is not None and filter_obj.get(key) != filter_def.get(option):
+                filter_ops.append(dict(op="replace", path="{0}/{1}".format(filter_path, key), value=filter_def.get(option)))
+                new_filter[key] = filter_def.get(option)
+
+        if definitions is not None:
+            existing_entries = filter_obj.get("entries") or []
+            by_name = dict((e.get("name"), e) for e in existing_entries)
+            by_key = dict((entry_key(e), e) for e in existing_entries)
+            entries = dict((e.get("name"), e) for e in existing_entries)
+            matched = set()
+            for definition in definitions:
+                key = entry_key(build_entry(definition))
+                # Match on the canonical entry key first, so existing entries are kept whatever their name
+                existing_entry = by_key.get(key)
+                if existing_entry is None or existing_entry.get("name") in matched:
+                    existing_entry = by_name.get(definition.get("name"))
+                if existing_entry is not None and existing_entry.get("name") not in matched:
+                    definition = dict(definition, name=existing_entry.get("name"))
+                    payload = build_entry(definition, existing_entry)
+                    matched.add(existing_entry.get("name"))
+                    change = "unchanged"
+                    for attribute, value in payload.items():
+                        if not same_value(attribute, existing_entry.get(attribute), value):
+                            filter_ops.append(dict(op="replace", path="{0}/entries/{1}/{2}".format(filter_path, payload.get("name"), attribute), value=value))
+                            change = "updated"
+                    if change == "updated":
+                        entries[payload.get("name")] = dict(existing_entry, **payload)
+                else:
+                    payload = build_entry(definition)
+                    filter_ops.append(dict(op="add", path="{0}/entries/-".format(filter_path), value=payload))
+                    entries[payload.get("name")] = payload
+                    matched.add(payload.get("name"))
+                    change = "added"
+                entry_report.append(dict(filter=filter_name, entry=payload.get("name"), change=change))
+
+            if force_replace:
+                for entry in existing_entries:
+                    if entry.get("name") not in matched:
+                        filter_ops.append(dict(op="remove", path="{0}/entries/{1}".format(filter_path, entry.get("name"))))
+                        entry_report.append(dict(filter=filter_name, entry=entry.get("name"), change="removed"))
+                        del entries[entry.get("name")]
+            new_filter["entries"] = list(entries.values())
+        proposed["filters"].append(new_filter)
+
+    for contract in contracts:
+        contract_name = contract.get("name")
+        contract_path = "{0}/{1}".format(contracts_path, contract_name)
+        contract_obj = existing_contracts.get(contract_name)
+        contract_filters = contract.get("filters")
+        if contract_obj is not None:
+            previous["contracts"].append(contract_obj)
+
+        # Hash the filters of the contract by filter type and filter reference
+        existing_relationships = {}
+        for filter_type, filter_key in FILTER_KEY_MAP.items():
+            for relationship in (contract_obj or {}).get(filter_key) or []:
+                ref = relationship.get("filterRef")
+                ref = ref if isinstance(ref, dict) else mso.dict_from_ref(ref)
+                existing_relationships[(filter_type, ref.get("schemaId"), ref.get("templateName"), ref.get("filterName"))] = relationship
+
+        if state == "absent":
+            if contract_obj is None:
+                continue
+            if contract_filters is None:
+                contract_ops.append(dict(op="remove", path=contract_path))
+                continue
+            removed = set()
+            for contract_filter in contract_filters:
+                key = relationship_key(contract_filter, schema_ids)
+                change = "absent"
+                if key in existing_relationships:
+                    removed.add(key)
+                    change = "removed"
+                contract_report.append(dict(contract=contract_name, filter=contract_filter.get("name"), type=contract_filter.get("type"), change=change))
+            if len(removed) == len(existing_relationships):
+                # A contract needs at least one filter, remove the contract with its last filter
+                contract_ops.append(dict(op="remove", path=contract_path))
+                continue
+            new_contract = dict(contract_obj)
+            for key in sorted(removed):
+                contract_ops.append(dict(op="remove", path="{0}/{1}/{2}".format(contract_path, FILTER_KEY_MAP.get(key[0]), key[3])))
+                new_contract[FILTER_KEY_MAP.get(key[0])] = [r for r in new_contract.get(FILTER_KEY_MAP.get(key[0])) if r is not existing_relationships[key]]
+            proposed["contracts"].append(new_contract)
+            continue
+
+        # state == "present"
+        provided = {}
+        for contract_filter in contract_filters or []:
+            key = relationship_key(contract_filter, schema_ids)
+            provided[key] = build_contract_filter(contract_filter, schema_ids.get(contract_filter.get("schema")))
+        filter_type = "bothWay" if all(key[0] == "both-way" for key in provided) else "oneWay"
+        scope = "context" if contract.get("scope") == "vrf" else contract.get("scope")
+
+        if contract_obj is None:
+            if not provided:
+                validator.error("a new contract requires at least one filter", contract_name)
+            new_contract = dict(
+                name=contract_name,
+                displayName=contract.get("display_name") or contract_name,
+                filterType=filter_type,
+                scope=scope or "context",
+            )
+            if contract.get("description"):
+                new_contract["description"] = contract.get("description")
+            if contract.get("qos_level"):
+                new_contract["prio"] = contract.get("qos_level")
+            for key, payload in provided.items():
+                new_contract.setdefault(FILTER_KEY_MAP.get(key[0]), []).append(payload)
+                contract_report.append(dict(contract=contract_name, filter=key[3], type=key[0], change="added"))
+            contract_ops.append(dict(op="add", path=contracts_path + "/-", value=new_contract))
+            proposed["contracts"].append(new_contract)
+            continue
+
+        if provided and contract_obj.get("filterType") != filter_type and (force_replace or filter_type == "oneWay"):
+            validator.error(
+                "current filter type '{0}' is not allowed to change to '{1}'".format(contract_obj.get("filterType"), filter_type),
+                contract_name,
+            )
+        new_contract = dict(contract_obj)
+        for key, value in (("displayName", contract.get("display_name")), ("description", contract.get("description")), ("scope", scope)):
+            if value is not None and contract_obj.get(key) != value:
+                contract_ops.append(dict(op="replace", path="{0}/{1}".format(contract_path, key), value=value))
+                new_contract[key] = value
+        if contract.get("qos_level") is not None and contract_obj.get("prio") != contract.get("qos_level"):
+            contract_ops.append(dict(op="replace" if contract_obj.get("prio") else "add", path=contract_path + "/prio", value=contract.get("qos_level")))
+            new_contract["prio"] = contract.get("qos_level")
+
+        if contract_filters is not None:
+            for key, payload in provided.items():
+                filter_key = FILTER_KEY_MAP.get(key[0])
+                relationship = existing_relationships.get(key)
+                change = "unchanged"
+                if relationship is None:
+                    contract_ops.append(dict(op="add", path="{0}/{1}/-".format(contract_path, filter_key), value=payload))
+                    new_contract[filter_key] = list(new_contract.get(filter_key) or []) + [payload]
+                    change = "added"
+                elif any(relationship.get(attribute) != value for attribute, value in payload.items() if attribute != "filterRef") or (
+                    "priorityOverride" in relationship and "priorityOverride" not in payload
+                ):
+                    contract_ops.append(dict(op="replace", path="{0}/{1}/{2}".format(contract_path, filter_key, key[3]), value=payload))
+                    new_contract[filter_key] = [payload if r is relationship else r for r in new_contract.get(filter_key)]
+                    change = "updated"
+                contract_report.append(dict(contract=contract_name, filter=key[3], type=key[0], change=change))
+
+            if force_replace:
+                for key, relationship in existing_relationships.items():
+                    if key not in provided:
+                        filter_key = FILTER_KEY_MAP.get(key[0])
+                        contract_ops.append(dict(op="remove", path="{0}/{1}/{2}".format(contract_path, filter_key, key[3])))
+                        new_contract[filter_key] = [r for r in new_contract.get(filter_key) if r is not relationship]
+                        contract_report.append(dict(contract=contract_name, filter=key[3], type=key[0], change="removed"))
+        proposed["contracts"].append(new_contract)
+
+    validator.fail_on_errors()
+
+    # Contracts reference filters: filters are added before the contracts, and removed after them
+    ops = filter_ops + contract_ops if state == "present" else contract_ops + filter_ops
+
+    mso.previous = previous
+    mso.existing = mso.proposed = mso.sent = proposed
+
+    if ops and not module.check_mode:
+        mso.request(schema_path, method="PATCH", data=ops)
+
+    mso.exit_json(entries=entry_report, contract_filters=contract_report)
+
+
+if __name__ == "__main__":
+    main()
@@ -16,7 +16,7 @@ module: mso_schema_template_deploy
 short_description: Deploy schema templates to sites
 description:
 - Deploy schema templates to sites.
-- Prior to deploy a schema validation is executed for MSO releases running on the ND platform.
+- Prior to deploy a schema validation is executed for MSO releases running on the ND platform, or locally with I(validation=local).
 - When schema validation fails, M(cisco.mso.mso_schema_template_deploy) fails and deploy will not be executed.
 - DEPRECATED for NDO v4.1 and later. Use M(cisco.mso.ndo_schema_template_deploy) on NDO v4.1 and later.
 author:
@@ -45,9 +45,27 @@ options:
     type: str
     choices: [ deploy, status, undeploy ]
     default: deploy
+  validation:
+    description:
+    - How the schema is validated prior to deploy.
+    - Use C(remote) to validate the schema with the validation API of MSO, only available for MSO releases running on the ND platform.
+    - Use C(local) to validate the schema without the validation API. All dangling references, site-local objects without their template object,
+      duplicate object names and duplicate subnets within a VRF are reported at once.
+    - Use C(both) to validate the schema locally first, and with the validation API when no problem is found locally.
+    type: str
+    choices: [ remote, local, both ]
+    default: remote
+  defer:
+    description:
+    - Whether to add the template to the deploy queue instead of deploying it, see M(cisco.mso.mso_deploy_queue_flush).
+    - Requires the deploy queue, enabled with the C(MSO_DEPLOY_QUEUE) environment variable.
+    - A template changed and deployed by many tasks is then deployed once by M(cisco.mso.mso_deploy_queue_flush).
+    type: bool
+    default: false
 seealso:
 - module: cisco.mso.mso_schema_site
 - module: cisco.mso.mso_schema_template
+- module: cisco.mso.mso_deploy_queue_flush
 extends_documentation_fragment: cisco.mso.modules
 """
 
@@ -62,6 +80,17 @@ EXAMPLES = r"""
     state: deploy
   delegate_to: localhost
 
+- name: Deploy a schema template after validating it locally
+  cisco.mso.mso_schema_template_deploy:
+    host: mso_host
+    username: admin
+    password: SomeSecretPassword
+    schema: Schema 1
+    template: Template 1
+    validation: both
+    state: deploy
+  delegate_to: localhost
+
 - name: Undeploy a schema template
   cisco.mso.mso_schema_template_deploy:
     host: mso_host
@@ -90,6 +119,7 @@ RETURN = r"""
 
 from ansible.module_utils.basic import AnsibleModule
 from ansible_collections.cisco.mso.plugins.module_utils.mso import MSOModule, mso_argument_spec
+from ansible_collections.cisco.mso.plugins.module_utils.schemacheck import VALIDATION_CHOICES, validate_schema
 
 
 def main():
@@ -99,6 +129,8 @@ def main():
         template=dict(type="str", required=True, aliases=["name"]),
         site=dict(type="str"),
         state=dict(type="str", default="deploy", choices=["deploy", "status", "undeploy"]),
+        validation=dict(type="str", default="remote", choices=VALIDATION_CHOICES),
+        defer=dict(type="bool", default=False),
     )
 
     module = AnsibleModule(
@@ -119,6 +151,10 @@ def main():
     # Get schema id
     schema_id = mso.lookup_schema(schema)
 
+    if state == "deploy" and module.params.get("defer"):
+        mso.defer_deploy(schema_id, template)
+        mso.exit_json(deferred=True)
+
     payload = dict(
         schemaId=schema_id,
         templateName=template,
@@ -126,8 +162,11 @@ def main():
 
     qs = None
     if state == "deploy":
-        if mso.platform == "nd":
-            mso.validate_schema(schema_id)
+        validation = module.params.get("validation")
+        if mso.platform != "nd":
+            # The validation API is only available on the ND platform
+            validation = "local" if validation in ("local", "both") else None
+        validate_schema(mso, schema_id, validation)
         path = "execute/schema/{0}/template/{1}".format(schema_id, template)
     elif state == "status":
         path = "status/schema/{0}/template/{1}".format(schema_id, template)
@@ -16,14 +16,28 @@ module: mso_schema_template_deploy_status
 short_description: Check query of objects before deployment to site
 description:
 - Check query of objects in a template of a schema
+- With O(schemas) or O(all_schemas), the deploy state of many schemas is queried concurrently and rolled up in a matrix of templates and sites.
 author:
 - Shreyas Srish (@shrsr)
 options:
   schema:
     description:
     - The name of the schema.
+    - Mutually exclusive with O(schemas) and O(all_schemas).
     type: str
     aliases: [ name ]
+  schemas:
+    description:
+    - The names of the schemas to query concurrently.
+    - The deploy state of their templates is returned as a matrix of templates and sites.
+    type: list
+    elements: str
+  all_schemas:
+    description:
+    - Whether to query all schemas concurrently.
+    - The deploy state of their templates is returned as a matrix of templates and sites.
+    type: bool
+    default: false
   template:
     description:
     - The name of the template.
@@ -32,6 +46,11 @@ options:
     description:
     - The name of the site.
     type: str
+  workers:
+    description:
+    - The maximum number of schemas queried concurrently with O(schemas) or O(all_schemas).
+    type: int
+    default: 8
   state:
     description:
     - Use C(query) for listing query of objects.
@@ -77,6 +96,16 @@ EXAMPLES = r"""
   delegate_to: localhost
   register: query_result
 
+- name: Query the deploy state of all templates of all schemas
+  cisco.mso.mso_schema_template_deploy_status:
+    host: mso_host
+    username: admin
+    password: SomeSecretPassword
+    all_schemas: true
+    state: query
+  delegate_to: localhost
+  register: fleet_result
+
 - name: Query status of objects in all templates
   cisco.mso.mso_schema_template_deploy_status:
     host: mso_host
@@ -89,30 +118,113 @@ EXAMPLES = r"""
 """
 
 RETURN = r"""
+current:
+  description:
+  - The policy states of the schema, or with O(schemas) or O(all_schemas) the deploy state of every template on its sites.
+  - A template is deployed on a site when none of its objects are pending.
+  returned: always
+  type: list
+  sample: [{"schema": "Schema1", "template": "Template1", "sites": {"Site1": {"deployed": false, "pending": 3, "pending_objects": {"bds": 2, "vrfs": 1}}}}]
+summary:
+  description: The number of schemas and templates queried, and the number of template sites deployed or with pending objects.
+  returned: with O(schemas) or O(all_schemas)
+  type: dict
+  sample: {"schemas": 300, "templates": 412, "deployed": 820, "pending": 4, "failed": 0}
+errors:
+  description: The schemas for which the deploy status could not be queried.
+  returned: with O(schemas) or O(all_schemas)
+  type: list
+  sample: [{"schema": "Schema2", "msg": "MSO Error 500: Internal Server Error"}]
 """
 
 from ansible.module_utils.basic import AnsibleModule
 from ansible_collections.cisco.mso.plugins.module_utils.mso import MSOModule, mso_argument_spec
+from ansible_collections.cisco.mso.plugins.module_utils.workers import run_concurrently
+
+
+def query_policy_states(worker, schema_id):
+    return worker.request("schemas/{0}/policy-states".format(schema_id), method="GET")
+
+
+def site_state(policy_state):
+    """Return the deploy state of a template on a site, the objects of the policy state are the objects not deployed yet"""
+    pending = dict((key, len(value)) for key, value in policy_state.items() if isinstance(value, list) and value)
+    return dict(deployed=not pending, pending=sum(pending.values()), pending_objects=pending)
+
+
+def fleet_status(mso, schemas, template, site):
+    """Query the policy states of many schemas concurrently and roll them up in a matrix of templates and sites"""
+    site_names = dict((item.get("id"), item.get("name")) for item in mso.query_objs("sites"))
+    site_id = None
+    if site:
+        site_ids = [key for key, name in site_names.items() if name == site]
+        if not site_ids:
+            mso.fail_json(msg="Site '{0}' is not a valid site name.".format(site))
+        site_id = site_ids[0]
+
+    identities = mso.query_objs("schemas/list-identity", key="schemas")
+    if schemas:
+        schema_ids = dict((identity.get("displayName"), identity.get("id")) for identity in identities)
+        missing = [name for name in schemas if name not in schema_ids]
+        if missing:
+            mso.fail_json(msg="Schema '{0}' not found.".format("', '".join(missing)))
+        jobs = [(schema_ids.get(name), name) for name in schemas]
+    else:
+        jobs = [(identity.get("id"), identity.get("displayName")) for identity in identities]
+
+    matrix = []
+    errors = []
+    results = run_concurrently(mso, query_policy_states, [(schema_id,) for schema_id, name in jobs], mso.params.get("workers"))
+    for (schema_id, name), (data, error) in zip(jobs, results):
+        if error:
+            mso.module.warn("Deploy status of schema '{0}' failed: {1}".format(name, error))
+            errors.append(dict(schema=name, msg=error))
+            continue
+        rows = {}
+        for policy_state in (data or {}).get("policyStates") or []:
+            if (template and policy_state.get("templateName") != template) or (site_id and policy_state.get("siteId") != site_id):
+                continue
+            row = rows.get(policy_state.get("templateName"))
+            if row is None:
+                row = rows[policy_state.get("templateName")] = dict(schema=name, template=policy_state.get("templateName"), sites={})
+                matrix.append(row)
+            row["sites"][site_names.get(policy_state.get("siteId"), policy_state.get("siteId"))] = site_state(policy_state)
+
+    states = [state for row in matrix for state in row.get("sites").values()]
+    summary = dict(
+        schemas=len(jobs) - len(errors),
+        templates=len(matrix),
+        deployed=len([state for state in states if state.get("deployed")]),
+        pending=len([state for state in states if not state.get("deployed")]),
+        failed=len(errors),
+    )
+    mso.existing = matrix
+    mso.exit_json(summary=summary, errors=errors)
 
 
 def main():
     argument_spec = mso_argument_spec()
     argument_spec.update(
         schema=dict(type="str", aliases=["name"]),
+        schemas=dict(type="list", elements="str"),
+        all_schemas=dict(type="bool", default=False),
         template=dict(type="str"),
         site=dict(type="str"),
+        workers=dict(type="int", default=8),
         state=dict(type="str", default="query", choices=["query"]),
     )
 
     module = AnsibleModule(
         argument_spec=argument_spec,
         supports_check_mode=True,
-        required_if=[
-            ["state", "query", ["schema"]],
+        mutually_exclusive=[
+            ["schema", "schemas"],
         ],
     )
 
     schema = module.params.get("schema")
+    schemas = module.params.get("schemas")
+    all_schemas = module.params.get("all_schemas")
     template = module.params.get("template")
     if template is not None:
         template = template.replace(" ", "")
@@ -121,10 +233,15 @@ def main():
 
     mso = MSOModule(module)
 
-    schema_id = None
-    path = "schemas"
+    if all_schemas and (schema or schemas):
+        mso.fail_json(msg="parameters are mutually exclusive: all_schemas|schema, schemas")
+    if not (schema or schemas or all_schemas):
+        mso.fail_json(msg="one of the following is required: schema, schemas, all_schemas")
+
+    if schemas or all_schemas:
+        fleet_status(mso, schemas, template, site)
 
-    get_schema = mso.get_obj(path, displayName=schema)
+    get_schema = mso.get_obj("schemas/list-identity", key="schemas", displayName=schema)
     if get_schema:
         schema_id = get_schema.get("id")
         path = "schemas/{id}/policy-states".format(id=schema_id)
@@ -143,8 +260,10 @@ def main():
 
         if site:
             mso.existing.clear()
+            # Look up the site once, not for every policy state
+            site_id = mso.lookup_site(site)
             for configuration_objects in get_data.get("policyStates"):
-                if configuration_objects.get("siteId") == mso.lookup_site(site):
+                if configuration_objects.get("siteId") == site_id:
                     if template:
                         if configuration_objects.get("templateName") == template:
                             mso.existing = configuration_objects
@@ -0,0 +1,422 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# GNU General Public License v3.0+ (see LICENSE or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+ANSIBLE_METADATA = {"metadata_version": "1.1", "status": ["preview"], "supported_by": "community"}
+
+DOCUMENTATION = r"""
+---
+module: mso_tenant_drift
+short_description: Compare the desired model of a tenant with its configuration
+description:
+- Compare the desired VRFs, BDs, filters, contracts, ANPs, EPGs, external EPGs, L3Outs, service graphs and static ports of a tenant
+  with the configuration of Cisco ACI Multi-Site, and report the drift.
+- The schema identities are queried once, and every schema of the model or with templates of the tenant is queried once.
+- Nothing is changed, use M(cisco.mso.mso_schema_bulk_object) to apply the model.
+options:
+  tenant:
+    description:
+    - The name of the tenant.
+    - The objects of the templates of the tenant that are not in the model are reported as extra.
+    type: str
+    required: true
+  schema:
+    description:
+    - The name of the schema of the objects and static ports.
+    - Used for the objects and static ports that do not provide a schema.
+    type: str
+  template:
+    description:
+    - The name of the template of the objects and static ports.
+    - Used for the objects and static ports that do not provide a template.
+    type: str
+  objects:
+    description:
+    - The desired template objects, like the objects of M(cisco.mso.mso_schema_bulk_object).
+    - Only the provided attributes are compared.
+    type: list
+    elements: dict
+    default: []
+    suboptions:
+      kind:
+        description:
+        - The kind of the object.
+        type: str
+        required: true
+        choices: [ anp, bd, contract, epg, external_epg, filter, l3out, service_graph, vrf ]
+      name:
+        description:
+        - The name of the object.
+        type: str
+        required: true
+      display_name:
+        description:
+        - The name as displayed on the MSO web interface.
+        type: str
+      schema:
+        description:
+        - The name of the schema of the object.
+        type: str
+      template:
+        description:
+        - The name of the template of the object.
+        type: str
+      anp:
+        description:
+        - The name of the ANP of the EPG.
+        - Required when O(objects[].kind=epg).
+        type: str
+      attributes:
+        description:
+        - The other attributes of the object, as in the MSO API payload of the object.
+        - References can be provided as dictionaries with the C(name) of the referenced object and optionally its C(schema),
+          C(template) and C(anp).
+        type: dict
+  static_ports:
+    description:
+    - The desired static ports of the site EPGs.
+    - The other static ports of the site EPGs with desired static ports are reported as extra.
+    type: list
+    elements: dict
+    default: []
+    suboptions:
+      schema:
+        description:
+        - The name of the schema of the EPG.
+        type: str
+      template:
+        description:
+        - The name of the template of the EPG.
+        type: str
+      site:
+        description:
+        - The name of the site.
+        type: str
+        required: true
+      anp:
+        description:
+        - The name of the ANP.
+        type: str
+        required: true
+      epg:
+        description:
+        - The name of the EPG.
+        type: str
+        required: true
+      type:
+        description:
+        - The path type of the static port.
+        type: str
+        choices: [ port, vpc, dpc ]
+        default: port
+      pod:
+        description:
+        - The pod of the static port, e.g. C(pod-1).
+        type: str
+        required: true
+      leaf:
+        description:
+        - The leaf of the static port, e.g. C(101) or C(101-102) for a vPC.
+        type: str
+        required: true
+      fex:
+        description:
+        - The fex id of the static port.
+        type: str
+      path:
+        description:
+        - The interface or policy group of the static port.
+        type: str
+        required: true
+      vlan:
+        description:
+        - The port encap VLAN id of the static port.
+        type: int
+      deployment_immediacy:
+        description:
+        - The deployment immediacy of the static port.
+        type: str
+        choices: [ immediate, lazy ]
+      mode:
+        description:
+        - The mode of the static port.
+        type: str
+        choices: [ native, regular, untagged ]
+  extra:
+    description:
+    - Whether to report the objects and static ports that are not in the model.
+    type: bool
+    default: true
+seealso:
+- module: cisco.mso.mso_schema_bulk_object
+extends_documentation_fragment: cisco.mso.modules
+"""
+
+EXAMPLES = r"""
+- name: Report the drift of a tenant
+  cisco.mso.mso_tenant_drift:
+    host: mso_host
+    username: admin
+    password: SomeSecretPassword
+    tenant: Tenant1
+    schema: Schema1
+    template: Template1
+    objects:
+    - kind: vrf
+      name: VRF1
+    - kind: bd
+      name: BD1
+      attributes:
+        vrfRef:
+          name: VRF1
+        l2Stretch: true
+    - kind: anp
+      name: ANP1
+    - kind: epg
+      anp: ANP1
+      name: EPG1
+      attributes:
+        bdRef:
+          name: BD1
+    static_ports:
+    - site: Site1
+      anp: ANP1
+      epg: EPG1
+      pod: pod-1
+      leaf: "101"
+      path: eth1/1
+      vlan: 100
+      mode: regular
+  delegate_to: localhost
+  register: drift
+
+- name: Fail when the tenant drifted
+  ansible.builtin.assert:
+    that:
+    - drift.in_sync
+"""
+
+RETURN = r"""
+drift:
+  description: The drift of the tenant.
+  returned: always
+  type: dict
+  contains:
+    missing:
+      description: The objects and static ports of the model that do not exist.
+      type: list
+      sample: [{"kind": "bd", "schema": "Schema1", "template": "Template1", "anp": null, "name": "BD2"}]
+    extra:
+      description: The objects of the templates of the tenant and the static ports of the site EPGs of the model that are not in the model.
+      type: list
+      sample: [{"kind": "static_port", "schema": "Schema1", "template": "Template1", "site": "Site1", "anp": "ANP1", "epg": "EPG1",
+                "name": "topology/pod-1/paths-101/pathep-[eth1/2]"}]
+    changed:
+      description: The objects and static ports with attributes that differ from the model, with the desired and current value of every attribute.
+      type: list
+      sample: [{"kind": "bd", "schema": "Schema1", "template": "Template1", "anp": null, "name": "BD1",
+                "fields": {"l2Stretch": {"desired": true, "current": false}}}]
+in_sync:
+  description: Whether the configuration matches the model.
+  returned: always
+  type: bool
+fetched_schemas:
+  description: The names of the schemas that were queried.
+  returned: always
+  type: list
+"""
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.cisco.mso.plugins.module_utils.mso import MSOModule, mso_argument_spec
+from ansible_collections.cisco.mso.plugins.module_utils.specs import mso_schema_bulk_object_spec, mso_tenant_drift_static_port_spec
+from ansible_collections.cisco.mso.plugins.module_utils.validation import MSOValidator
+from ansible_collections.cisco.mso.plugins.module_utils.graph import make_references, object_key, ref_schemas, schema_objects
+from ansible_collections.cisco.mso.plugins.module_utils.mirror import ref_text
+from ansible_collections.cisco.mso.plugins.module_utils.staticports import epg_ref_owner, static_port_path
+
+# Static port attributes compared with the model
+STATIC_PORT_FIELDS = dict(vlan="portEncapVlan", mode="mode", deployment_immediacy="deploymentImmediacy", type="type")
+
+
+def text_refs(value):
+    """Return a value with its references, as text or dictionary, as text so they can be compared and reported"""
+    if isinstance(value, dict):
+        return dict((key, ref_text(item) if key.endswith("Ref") else text_refs(item)) for key, item in value.items())
+    if isinstance(value, list):
+        return [text_refs(item) for item in value]
+    return value
+
+
+def changed_fields(desired, current):
+    """Return the desired attributes with another current value"""
+    fields = {}
+    for attribute, value in desired.items():
+        desired_value = text_refs({attribute: value}).get(attribute)
+        current_value = text_refs({attribute: current.get(attribute)}).get(attribute)
+        if desired_value != current_value:
+            fields[attribute] = dict(desired=desired_value, current=current_value)
+    return fields
+
+
+def main():
+    argument_spec = mso_argument_spec()
+    argument_spec.update(
+        tenant=dict(type="str", required=True),
+        schema=dict(type="str"),
+        template=dict(type="str"),
+        objects=dict(type="list", elements="dict", default=[], options=mso_schema_bulk_object_spec()),
+        static_ports=dict(type="list", elements="dict", default=[], options=mso_tenant_drift_static_port_spec()),
+        extra=dict(type="bool", default=True),
+    )
+
+    module = AnsibleModule(
+        argument_spec=argument_spec,
+        supports_check_mode=True,
+    )
+
+    tenant = module.params.get("tenant")
+    report_extra = module.params.get("extra")
+
+    mso = MSOModule(module)
+
+    # Validate the model before anything is queried
+    validator = MSOValidator(mso)
+    objects = []
+    static_ports = []
+    schema_names = set()
+    for name, items, collected in [("objects", module.params.get("objects"), objects), ("static_ports", module.params.get("static_ports"), static_ports)]:
+        for index, item in enumerate(items):
+            context = "{0}[{1}]".format(name, index)
+            item = dict(item)
+            for parameter in ["schema", "template"]:
+                if item.get(parameter) is None:
+                    item[parameter] = module.params.get(parameter)
+            if not validator.required(context, schema=item.get("schema"), template=item.get("template")):
+                continue
+            item["template"] = item.get("template").replace(" ", "")
+            if name == "objects":
+                if item.get("kind") == "epg" and not validator.required(context, anp=item.get("anp")):
+                    continue
+                if item.get("kind") != "epg":
+                    item["anp"] = None
+                unique = (item.get("schema"), item.get("template"), item.get("kind"), item.get("anp"), item.get("name"))
+                validator.unique("object", unique, context, msg="duplicate {0} '{1}'".format(item.get("kind"), item.get("name")))
+                schema_names.update(ref_schemas(item.get("attributes")))
+            else:
+                validator.vlan("vlan", item.get("vlan"), context)
+                item["port_path"] = static_port_path(item.get("type"), item.get("pod"), item.get("leaf"), item.get("path"), item.get("fex"))
+                unique = (item.get("schema"), item.get("template"), item.get("site"), item.get("anp"), item.get("epg"), item.get("port_path"))
+                validator.unique("static port", unique, context, msg="duplicate static port '{0}'".format(item.get("port_path")))
+            schema_names.add(item.get("schema"))
+            collected.append(item)
+    validator.fail_on_errors()
+
+    # The schema identities and their templates are queried once, to resolve the schemas and find the templates of the tenant
+    tenant_id = mso.lookup_tenant(tenant)
+    identities = mso.query_objs("schemas/list-identity", key="schemas")
+    schema_ids = dict((identity.get("displayName"), identity.get("id")) for identity in identities)
+    for name in sorted(schema_names):
+        if name not in schema_ids:
+            validator.error("schema '{0}' does not exist".format(name))
+    validator.fail_on_errors()
+    relevant = set(schema_ids.get(obj.get("schema")) for obj in objects + static_ports)
+    for identity in identities:
+        if any(template.get("tenantId") == tenant_id for template in identity.get("templates") or []):
+            relevant.add(identity.get("id"))
+
+    # Every relevant schema is queried once and its objects and static ports are indexed
+    index = {}
+    port_index = {}
+    tenant_templates = set()
+    fetched = []
+    names = dict((schema_id, name) for name, schema_id in schema_ids.items())
+    for identity in identities:
+        if identity.get("id") not in relevant:
+            continue
+        schema = mso.query_obj("schemas/{0}".format(identity.get("id")))
+        if not schema:
+            continue
+        fetched.append(schema.get("displayName"))
+        tenant_templates.update((schema.get("id"), t.get("name")) for t in schema.get("templates") or [] if t.get("tenantId") == tenant_id)
+        index.update((key, obj) for key, obj, path in schema_objects(schema))
+        for site in schema.get("sites") or []:
+            for anp in site.get("anps") or []:
+                for epg in anp.get("epgs") or []:
+                    owner = epg_ref_owner(epg.get("epgRef"))
+                    if owner is None:
+                        continue
+                    for static_port in epg.get("staticPorts") or []:
+                        port_index[(schema.get("id"), site.get("templateName"), site.get("siteId"), owner[2], owner[3], static_port.get("path"))] = static_port
+
+    site_ids = dict((site.get("name"), site.get("id")) for site in mso.query_objs("sites")) if static_ports else {}
+    site_names = dict((site_id, name) for name, site_id in site_ids.items())
+    for item in static_ports:
+        if item.get("site") not in site_ids:
+            validator.error("site '{0}' does not exist".format(item.get("site")), "static_ports")
+    validator.fail_on_errors()
+
+    drift = dict(missing=[], extra=[], changed=[])
+
+    def entry(key):
+        schema_id, template, kind, name = key
+        anp, name = name.split("/") if kind == "epg" else (None, name)
+        return dict(kind=kind, schema=names.get(schema_id, schema_id), template=template, anp=anp, name=name)
+
+    desired = set()
+    for obj in objects:
+        schema_id = schema_ids.get(obj.get("schema"))
+        key = object_key(schema_id, obj.get("template"), obj.get("kind"), obj.get("name"), obj.get("anp"))
+        desired.add(key)
+        if key not in index:
+            drift["missing"].append(entry(key))
+            continue
+        attributes = make_references(mso, obj.get("attributes") or {}, schema_ids, schema_id, obj.get("template"))
+        if obj.get("display_name") is not None:
+            attributes["displayName"] = obj.get("display_name")
+        fields = changed_fields(attributes, index.get(key))
+        if fields:
+            drift["changed"].append(dict(entry(key), fields=fields))
+
+    if report_extra:
+        for key in index:
+            if key in desired or (key[0], key[1]) not in tenant_templates:
+                continue
+            # The EPGs of an extra ANP are not reported on their own
+            if key[2] == "epg" and object_key(key[0], key[1], "anp", key[3].split("/")[0]) not in desired:
+                continue
+            drift["extra"].append(entry(key))
+
+    def port_entry(key):
+        schema_id, template, site_id, anp, epg, path = key
+        return dict(kind="static_port", schema=names.get(schema_id, schema_id), template=template, site=site_names.get(site_id), anp=anp, epg=epg, name=path)
+
+    desired_ports = set()
+    for item in static_ports:
+        site_id = site_ids.get(item.get("site"))
+        key = (schema_ids.get(item.get("schema")), item.get("template"), site_id, item.get("anp"), item.get("epg"), item.get("port_path"))
+        desired_ports.add(key)
+        if key not in port_index:
+            drift["missing"].append(port_entry(key))
+            continue
+        attributes = dict((field, item.get(option)) for option, field in STATIC_PORT_FIELDS.items() if item.get(option) is not None)
+        fields = changed_fields(attributes, port_index.get(key))
+        if fields:
+            drift["changed"].append(dict(port_entry(key), fields=fields))
+
+    if report_extra:
+        desired_epgs = set(key[:5] for key in desired_ports)
+        for key in port_index:
+            if key[:5] in desired_epgs and key not in desired_ports:
+                drift["extra"].append(port_entry(key))
+
+    mso.existing = drift
+    mso.exit_json(drift=drift, in_sync=not any(drift.values()), fetched_schemas=fetched)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,301 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# GNU General Public License v3.0+ (see LICENSE or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+ANSIBLE_METADATA = {"metadata_version": "1.1", "status": ["preview"], "supported_by": "community"}
+
+DOCUMENTATION = r"""
+---
+module: mso_tenant_teardown
+short_description: Remove a tenant with all its schemas, templates and objects
+description:
+- Remove everything tied to a tenant of Cisco ACI Multi-Site in a single task.
+- All schemas are queried with a single request, the templates of the tenant are found in every schema.
+- The templates of the tenant are undeployed from their sites concurrently.
+- The objects of the templates are removed in the reverse order of their references, the objects that do not depend on each other
+  are removed in a single request per schema.
+- The sites are detached from the templates before their objects are removed. The schemas that only hold templates of the tenant
+  are removed, the templates of the tenant are removed from the other schemas, and finally the tenant is removed.
+options:
+  tenant:
+    description:
+    - The name of the tenant.
+    type: str
+    required: true
+  undeploy:
+    description:
+    - Whether to undeploy the templates from their sites first.
+    - An undeploy that fails is reported as a warning, the teardown continues.
+    type: bool
+    default: true
+  remove_tenant:
+    description:
+    - Whether to remove the tenant itself, after its templates.
+    type: bool
+    default: true
+  workers:
+    description:
+    - The maximum number of templates undeployed concurrently.
+    type: int
+    default: 8
+notes:
+- Objects of other tenants referencing objects of the tenant are reported as warnings, MSO rejects the removal of a referenced object.
+- This module must be executed on the controller, use the HTTPAPI connection plugin or C(delegate_to) localhost.
+seealso:
+- module: cisco.mso.mso_tenant
+- module: cisco.mso.mso_schema
+- module: cisco.mso.mso_schema_bulk_object
+- module: cisco.mso.mso_schema_template_deploy
+extends_documentation_fragment: cisco.mso.modules
+"""
+
+EXAMPLES = r"""
+- name: Tear down a test tenant
+  cisco.mso.mso_tenant_teardown:
+    host: mso_host
+    username: admin
+    password: SomeSecretPassword
+    tenant: test_tenant
+  delegate_to: localhost
+  register: teardown
+
+- name: Remove the schemas of a tenant but keep the tenant
+  cisco.mso.mso_tenant_teardown:
+    host: mso_host
+    username: admin
+    password: SomeSecretPassword
+    tenant: test_tenant
+    remove_tenant: false
+  delegate_to: localhost
+"""
+
+RETURN = r"""
+teardown:
+  description: The objects removed by the teardown.
+  returned: always
+  type: dict
+  contains:
+    templates:
+      description: The templates of the tenant, as C(schema/template).
+      type: list
+    removed_schemas:
+      description: The schemas that were removed.
+      type: list
+    undeploys:
+      description: The undeploy of every template from its sites, with its result C(undeployed) or C(failed), or no result in check mode.
+      type: list
+      sample: [{"schema": "Schema1", "template": "Template1", "sites": ["Site1", "Site2"], "result": "undeployed", "msg": null}]
+    layers:
+      description: The number of objects removed in every layer, in the order the layers are removed.
+      type: list
+      sample: [12, 4, 3]
+    tenant_removed:
+      description: Whether the tenant was removed.
+      type: bool
+steps:
+  description: The progress of the teardown, the number of requests and the time in seconds of every step.
+  returned: always
+  type: list
+  sample: [{"step": "undeploy", "requests": 4, "elapsed": 2.304}, {"step": "objects", "requests": 3, "elapsed": 1.201}]
+elapsed:
+  description: The time in seconds needed for the whole teardown.
+  returned: always
+  type: float
+"""
+
+import time
+from collections import OrderedDict
+from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.cisco.mso.plugins.module_utils.mso import MSOModule, mso_argument_spec
+from ansible_collections.cisco.mso.plugins.module_utils.graph import DependencyGraph, GraphError, key_text, schema_objects
+from ansible_collections.cisco.mso.plugins.module_utils.workers import run_concurrently
+
+
+class Steps:
+    """Record the number of requests and the time of every step of the teardown"""
+
+    def __init__(self):
+        self.start = self.step_start = time.time()
+        self.steps = []
+
+    def begin(self, name):
+        self.step_start = time.time()
+        self.steps.append(dict(step=name, requests=0, elapsed=None))
+
+    def request(self, count=1):
+        self.steps[-1]["requests"] += count
+
+    def end(self):
+        self.steps[-1]["elapsed"] = round(time.time() - self.step_start, 3)
+
+    def elapsed(self):
+        return round(time.time() - self.start, 3)
+
+
+def undeploy(worker, schema_id, template, site_ids):
+    """Undeploy a template from its sites"""
+    if worker.platform == "nd":
+        worker.request("task", method="POST", data=dict(schemaId=schema_id, templateName=template, undeploy=site_ids))
+    else:
+        path = "execute/schema/{0}/template/{1}".format(schema_id, template)
+        for site_id in site_ids:
+            worker.request(path, method="GET", data=dict(schemaId=schema_id, templateName=template), qs=dict(undeploy=site_id))
+    return "undeployed"
+
+
+def main():
+    argument_spec = mso_argument_spec()
+    argument_spec.update(
+        tenant=dict(type="str", required=True),
+        undeploy=dict(type="bool", default=True),
+        remove_tenant=dict(type="bool", default=True),
+        workers=dict(type="int", default=8),
+    )
+
+    module = AnsibleModule(
+        argument_spec=argument_spec,
+        supports_check_mode=True,
+    )
+
+    tenant = module.params.get("tenant")
+    workers = module.params.get("workers")
+
+    mso = MSOModule(module)
+    steps = Steps()
+
+    # Enumerate the templates of the tenant in all schemas, queried with a single request
+    steps.begin("enumerate")
+    tenant_obj = mso.get_obj("tenants", key="tenants", name=tenant)
+    steps.request()
+    tenant_id = tenant_obj.get("id") if tenant_obj else None
+    schemas = []
+    site_names = {}
+    if tenant_id:
+        schemas = mso.query_objs("schemas")
+        site_names = dict((site.get("id"), site.get("name")) for site in mso.query_objs("sites"))
+        steps.request(2)
+
+    templates = OrderedDict()
+    removed_schemas = []
+    for schema in schemas:
+        names = [template.get("name") for template in schema.get("templates") or [] if template.get("tenantId") == tenant_id]
+        if not names:
+            continue
+        templates[schema.get("id")] = names
+        if len(names) == len(schema.get("templates")):
+            removed_schemas.append(schema)
+    schema_by_id = dict((schema.get("id"), schema) for schema in schemas if schema.get("id") in templates)
+    report = dict(
+        templates=["{0}/{1}".format(schema_by_id[schema_id].get("displayName"), name) for schema_id, names in templates.items() for name in names],
+        removed_schemas=[schema.get("displayName") for schema in removed_schemas],
+        undeploys=[],
+        layers=[],
+        tenant_removed=bool(tenant_id) and module.params.get("remove_tenant"),
+    )
+
+    # Order the objects of the templates on their references, objects of other templates referencing them are reported
+    graph = DependencyGraph()
+    other_graph = DependencyGraph()
+    paths = {}
+    for schema in schemas:
+        for key, obj, path in schema_objects(schema):
+            if key[1] in templates.get(schema.get("id"), []):
+                graph.add_object(mso, key, obj)
+                paths[key] = path
+            elif templates:
+                other_graph.add_object(mso, key, obj)
+    for key in other_graph.dependents(graph.dependencies):
+        schema_name = [schema.get("displayName") for schema in schemas if schema.get("id") == key[0]][0]
+        module.warn("{0} of schema '{1}' references objects of tenant '{2}'".format(key_text(key), schema_name, tenant))
+    try:
+        layers = graph.layers()
+    except GraphError as e:
+        mso.fail_json(msg=str(e))
+    layers.reverse()
+    steps.end()
+
+    # A template is undeployed from all its sites at once, the templates are undeployed concurrently
+    jobs = []
+    for schema_id, names in templates.items():
+        for name in names:
+            site_ids = [site.get("siteId") for site in schema_by_id[schema_id].get("sites") or [] if site.get("templateName") == name]
+            if site_ids:
+                jobs.append((schema_id, name, site_ids))
+    if module.params.get("undeploy") and jobs:
+        steps.begin("undeploy")
+        if not module.check_mode:
+            results = [("failed", msg) if msg else (result, msg) for result, msg in run_concurrently(mso, undeploy, jobs, workers)]
+            steps.request(sum(1 if mso.platform == "nd" else len(job[2]) for job in jobs))
+        else:
+            results = [(None, None)] * len(jobs)
+        for (schema_id, name, site_ids), (result, msg) in zip(jobs, results):
+            if result == "failed":
+                module.warn("Undeploy of template '{0}' failed: {1}".format(name, msg))
+            report["undeploys"].append(
+                dict(
+                    schema=schema_by_id[schema_id].get("displayName"),
+                    template=name,
+                    sites=[site_names.get(site_id, site_id) for site_id in site_ids],
+                    result=result,
+                    msg=msg,
+                )
+            )
+        steps.end()
+
+    # Detach the sites from the templates, with a single request per schema
+    steps.begin("sites")
+    for schema_id, names in templates.items():
+        site_indexes = [index for index, site in enumerate(schema_by_id[schema_id].get("sites") or []) if site.get("templateName") in names]
+        if not site_indexes:
+            continue
+        # Remove from the highest index, so the other indexes stay valid
+        ops = [dict(op="remove", path="/sites/{0}".format(index)) for index in reversed(site_indexes)]
+        if not module.check_mode:
+            mso.request("schemas/{0}".format(schema_id), method="PATCH", data=ops)
+        steps.request()
+    steps.end()
+
+    # Remove the objects layer by layer, with a single request per schema and layer
+    steps.begin("objects")
+    for layer in layers:
+        ops = OrderedDict()
+        for key in layer:
+            ops.setdefault(key[0], []).append(dict(op="remove", path=paths.get(key)))
+        for schema_id, schema_ops in ops.items():
+            if not module.check_mode:
+                mso.request("schemas/{0}".format(schema_id), method="PATCH", data=schema_ops)
+            steps.request()
+        report["layers"].append(len(layer))
+    steps.end()
+
+    # Remove the schemas that only hold templates of the tenant, and the templates of the tenant from the other schemas
+    steps.begin("schemas")
+    for schema_id, names in templates.items():
+        if schema_by_id[schema_id] in removed_schemas:
+            if not module.check_mode:
+                mso.request("schemas/{0}".format(schema_id), method="DELETE")
+        elif not module.check_mode:
+            mso.request("schemas/{0}".format(schema_id), method="PATCH", data=[dict(op="remove", path="/templates/{0}".format(name)) for name in names])
+        steps.request()
+    steps.end()
+
+    if report.get("tenant_removed"):
+        steps.begin("tenant")
+        if not module.check_mode:
+            mso.request("tenants/{0}".format(tenant_id), method="DELETE")
+        steps.request()
+        steps.end()
+
+    mso.previous = dict(tenant=tenant_obj, templates=report.get("templates")) if tenant_obj else {}
+    mso.existing = {}
+    mso.result["changed"] = bool(templates) or report.get("tenant_removed")
+    mso.exit_json(teardown=report, steps=steps.steps, elapsed=steps.elapsed())
+
+
+if __name__ == "__main__":
+    main()
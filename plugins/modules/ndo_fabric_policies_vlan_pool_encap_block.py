@@ -12,44 +12,56 @@ ANSIBLE_METADATA = {"metadata_version": "1.1", "status": ["preview"], "supported
 
 DOCUMENTATION = r"""
 ---
-module: mso_schema_template
-short_description: Manage templates in schemas
+module: ndo_fabric_policies_vlan_pool_encap_block
+short_description: Manage VLAN pool encap blocks in fabric policy templates
 description:
-- Manage templates on Cisco ACI Multi-Site.
+- Manage the encap blocks of VLAN pools in fabric policy templates on Cisco Nexus Dashboard Orchestrator.
+- The encap blocks of a pool are kept as a sorted list of ranges, overlapping and adjacent ranges are merged.
+- Removing a range from a pool splits the encap blocks that only partially overlap the range.
+- All requested ranges are applied to the template with a single request.
 author:
 - Dag Wieers (@dagwieers)
 options:
-  tenant:
-    description:
-    - The tenant used for this template.
-    type: str
-    required: true
-  schema:
+  template:
     description:
-    - The name of the schema.
+    - The name of the fabric policy template.
     type: str
     required: true
-  schema_description:
-    description:
-    - The description of Schema is supported on versions of MSO that are 3.3 or greater.
-    type: str
-  template_description:
+  pool:
     description:
-    - The description of template is supported on versions of MSO that are 3.3 or greater.
+    - The name of the VLAN pool.
+    - The VLAN pool is created when needed, and removed when its last encap block has been removed.
     type: str
-  template:
+    aliases: [ pool_name ]
+  block_start:
     description:
-    - The name of the template.
-    type: str
-    aliases: [ name ]
-  display_name:
+    - The first VLAN id of the encap block.
+    - Mutually exclusive with I(blocks).
+    type: int
+    aliases: [ start ]
+  block_end:
     description:
-    - The name as displayed on the MSO web interface.
-    type: str
- template_type:
+    - The last VLAN id of the encap block.
+    - Defaults to I(block_start).
+    type: int
+    aliases: [ end ]
+  blocks:
     description:
-     - Deployment Mode. Use stretched-template for Multi-Site or non-stretched-template for Autonomous
-     type: str
+    - A list of encap blocks to add to or remove from the VLAN pool.
+    - Mutually exclusive with I(block_start) and I(block_end).
+    type: list
+    elements: dict
+    suboptions:
+      start:
+        description:
+        - The first VLAN id of the encap block.
+        type: int
+        required: true
+      end:
+        description:
+        - The last VLAN id of the encap block.
+        - Defaults to C(start).
+        type: int
   state:
     description:
     - Use C(present) or C(absent) for adding or removing.
@@ -58,65 +70,102 @@ options:
     choices: [ absent, present, query ]
     default: present
 notes:
-- Due to restrictions of the MSO REST API this module creates schemas when needed, and removes them when the last template has been removed.
-seealso:
-- module: cisco.mso.mso_schema
-- module: cisco.mso.mso_schema_site
+- Encap blocks of the VLAN pool that overlap encap blocks of other VLAN pools in the template are reported as warnings and in C(overlaps).
 extends_documentation_fragment: cisco.mso.modules
 """
 
 EXAMPLES = r"""
-- name: Add a new template to a schema
-  cisco.mso.mso_schema_template:
+- name: Add an encap block to a VLAN pool
+  cisco.mso.ndo_fabric_policies_vlan_pool_encap_block:
     host: mso_host
     username: admin
     password: SomeSecretPassword
-    tenant: Tenant 1
-    schema: Schema 1
-    template: Template 1
+    template: Fabric Policies
+    pool: VLAN Pool 1
+    block_start: 100
+    block_end: 199
     state: present
   delegate_to: localhost
 
-- name: Remove a template from a schema
-  cisco.mso.mso_schema_template:
+- name: Add many encap blocks to a VLAN pool in a single request
+  cisco.mso.ndo_fabric_policies_vlan_pool_encap_block:
     host: mso_host
     username: admin
     password: SomeSecretPassword
-    tenant: Tenant 1
-    schema: Schema 1
-    template: Template 1
-    state: absent
+    template: Fabric Policies
+    pool: VLAN Pool 1
+    blocks:
+    - start: 200
+      end: 299
+    - start: 300
+      end: 310
+    - start: 400
+    state: present
   delegate_to: localhost
 
-- name: Query a template
-  cisco.mso.mso_schema_template:
+- name: Remove VLAN 150 from a VLAN pool, the encap block 100-199 is split
+  cisco.mso.ndo_fabric_policies_vlan_pool_encap_block:
     host: mso_host
     username: admin
     password: SomeSecretPassword
-    tenant: Tenant 1
-    schema: Schema 1
-    template: Template 1
-    state: query
+    template: Fabric Policies
+    pool: VLAN Pool 1
+    blocks:
+    - start: 150
+    state: absent
   delegate_to: localhost
-  register: query_result
 
-- name: Query all templates
-  cisco.mso.mso_schema_template:
+- name: Query the fabric policy template
+  cisco.mso.ndo_fabric_policies_vlan_pool_encap_block:
     host: mso_host
     username: admin
     password: SomeSecretPassword
-    tenant: Tenant 1
-    schema: Schema 1
+    template: Fabric Policies
     state: query
   delegate_to: localhost
   register: query_result
 """
 
 RETURN = r"""
+overlaps:
+  description: The ranges of the VLAN pool that overlap with encap blocks of other VLAN pools of the template.
+  returned: when state is present
+  type: list
+  sample: [{"pool": "VLAN Pool 2", "start": 150, "end": 160}]
 """
 
+from copy import deepcopy
 from ansible.module_utils.basic import AnsibleModule
 from ansible_collections.cisco.mso.plugins.module_utils.mso import MSOModule, mso_argument_spec
+from ansible_collections.cisco.mso.plugins.module_utils.intervals import merge_intervals, normalize_interval, overlapping_intervals, subtract_intervals
+from ansible_collections.cisco.mso.plugins.module_utils.validation import MSOValidator
+
+
+def encap_block_intervals(vlan_pool):
+    """Return the intervals of the encap blocks of a VLAN pool, keyed by allocation mode"""
+    intervals = {}
+    for block in vlan_pool.get("encapBlocks", []):
+        block_range = block.get("range", {})
+        intervals.setdefault(block_range.get("allocMode", "static"), []).append(normalize_interval(block_range.get("from"), block_range.get("to")))
+    return intervals
+
+
+def build_encap_blocks(vlan_pool, intervals):
+    """Build the sorted encap blocks of a VLAN pool, unchanged blocks are kept as-is"""
+    existing_blocks = {}
+    for block in vlan_pool.get("encapBlocks", []):
+        block_range = block.get("range", {})
+        key = (block_range.get("allocMode", "static"),) + normalize_interval(block_range.get("from"), block_range.get("to"))
+        existing_blocks[key] = block
+
+    encap_blocks = []
+    for alloc_mode, values in intervals.items():
+        for start, end in values:
+            block = existing_blocks.get((alloc_mode, start, end))
+            if block is None:
+                block = {"range": {"from": start, "to": end, "allocMode": alloc_mode}}
+            encap_blocks.append(block)
+    return sorted(encap_blocks, key=lambda block: (int(block["range"]["from"]), int(block["range"]["to"])))
 
 
 def main():
@@ -126,15 +175,29 @@ def main():
         pool=dict(type="str", aliases=["pool_name"]),  # Not required for querying all objects
         block_end=dict(type="int", aliases=["end"]),  # Not required for querying all objects
         block_start=dict(type="int", aliases=["start"]),  # Not required for querying all objects
+        blocks=dict(
+            type="list",
+            elements="dict",
+            options=dict(
+                start=dict(type="int", required=True),
+                end=dict(type="int"),
+            ),
+        ),
         state=dict(type="str", default="present", choices=["absent", "present", "query"]),
     )
 
     module = AnsibleModule(
         argument_spec=argument_spec,
         supports_check_mode=True,
+        mutually_exclusive=[
+            ["blocks", "block_start"],
+            ["blocks", "block_end"],
+        ],
         required_if=[
-            ["state", "absent", ["template"]],
-            ["state", "present", ["template"]],
+            ["state", "absent", ["pool"]],
+            ["state", "present", ["pool"]],
+            ["state", "absent", ["blocks", "block_start"], True],
+            ["state", "present", ["blocks", "block_start"], True],
         ],
     )
 
@@ -145,49 +208,39 @@ def main():
     pool = module.params.get("pool")
     block_end = module.params.get("block_end")
     block_start = module.params.get("block_start")
+    blocks = module.params.get("blocks")
+
+    if blocks is None and block_start is not None:
+        blocks = [dict(start=block_start, end=block_end)]
 
     mso = MSOModule(module)
 
-    template_type = "fabricPolicy"
+    requested = []
+    if blocks:
+        validator = MSOValidator(mso)
+        for index, block in enumerate(blocks):
+            context = "blocks[{0}]".format(index)
+            if validator.vlan("start", block.get("start"), context) and validator.vlan("end", block.get("end"), context):
+                requested.append(normalize_interval(block.get("start"), block.get("end")))
+        validator.fail_on_errors()
 
+    template_type = "fabricPolicy"
+    template_id = None
 
     templates = mso.request(path="templates/summaries", method="GET", api_version="v1")
 
-
     mso.existing = {}
 
     if templates:
         for temp in templates:
-            if temp['templateName'] == template and temp['templateType'] == template_type:
-                template_id = temp['templateId']
+            if temp["templateName"] == template and temp["templateType"] == template_type:
+                template_id = temp["templateId"]
 
     if not template_id:
         mso.fail_json(msg="Template '{template}' not found".format(template=template))
 
-
-    ##get the template
-
-    mso.existing = mso.request(path=f"templates/{template_id}", method="GET", api_version="v1")
-
-    pool_exist = False
-    block_exist = False
-
-    if 'template' in mso.existing['fabricPolicyTemplate'] and 'vlanPools' in mso.existing['fabricPolicyTemplate']['template']:
-        #try to find if the vlan pool exist
-        for count, v in enumerate(mso.existing['fabricPolicyTemplate']['template']['vlanPools']):
-            if v['name'] == pool:
-                pool_exist = True
-                pool_index = count
-
-    if pool_exist:
-        #case the vlan pool exist, verify if the vlan is already on the pool
-        if 'encapBlocks' in mso.existing['fabricPolicyTemplate']['template']['vlanPools'][pool_index]:
-            for count, e in enumerate(mso.existing['fabricPolicyTemplate']['template']['vlanPools'][pool_index]['encapBlocks']):
-                if int(e['range']['from']) == block_start and int(e['range']['to']) == block_end:
-                    block_exist = True
-                    block_index = count
-
-
+    template_path = "templates/{0}".format(template_id)
+    mso.existing = mso.request(path=template_path, method="GET", api_version="v1")
 
     if state == "query":
         if not mso.existing:
@@ -197,56 +250,48 @@ def main():
                 mso.existing = []
         mso.exit_json()
 
-    template_path = f"templates/{template_id}"
-    ops = []
-
     mso.previous = mso.existing
+    proposed = deepcopy(mso.existing)
+    template_obj = proposed["fabricPolicyTemplate"].get("template", {})
+    vlan_pools = template_obj.get("vlanPools", [])
+    vlan_pool = next((vlan_pool for vlan_pool in vlan_pools if vlan_pool.get("name") == pool), None)
+
+    overlaps = []
     if state == "absent":
-        mso.proposed = mso.sent = {}
-        if block_exist:
-            del mso.existing['fabricPolicyTemplate']['template']['vlanPools'][pool_index]['encapBlocks'][block_index]
-            if len(mso.existing['fabricPolicyTemplate']['template']['vlanPools'][pool_index]['encapBlocks']) == 0:
-                del mso.existing['fabricPolicyTemplate']['template']['vlanPools'][pool_index]
-            if not module.check_mode:
-                mso.request(template_path, method="PUT", data=mso.existing)
-            mso.existing = {}
+        if vlan_pool is not None:
+            # Ranges are removed from the blocks of every allocation mode, partially removed blocks are split
+            existing_intervals = encap_block_intervals(vlan_pool)
+            intervals = dict((alloc_mode, subtract_intervals(values, requested)) for alloc_mode, values in existing_intervals.items())
+            vlan_pool["encapBlocks"] = build_encap_blocks(vlan_pool, intervals)
+            if not vlan_pool["encapBlocks"]:
+                vlan_pools.remove(vlan_pool)
 
     elif state == "present":
-
-
-
-        if not block_exist:
-            #block doesnt exist, need be created
-            if not pool_exist:
-                #case pool doesn't need, need be created
-                if not 'vlanPools' in mso.existing['fabricPolicyTemplate']['template']:
-                    mso.existing['fabricPolicyTemplate']['template'].update({'vlanPools': []})
-                mso.existing['fabricPolicyTemplate']['template']['vlanPools'].append(
-                    {
-                        "name": pool,
-                        "allocMode": "static",
-                        'encapBlocks': []
-                    }
-                )
-                pool_index = len(mso.existing['fabricPolicyTemplate']['template']['vlanPools']) -1
-
-
-            mso.existing['fabricPolicyTemplate']['template']['vlanPools'][pool_index]['encapBlocks'].append(
-                {
-                    "range":
-                        {
-                            "from": block_start,
-                            "to": block_end,
-                            "allocMode": "static"
-                        }
-                }
-            )
-
-            # mso.sanitize(payload, collate=True)
-            if not module.check_mode:
-                mso.request(template_path, method="PUT", data=mso.existing)
-            mso.existing = mso.proposed
-
+        if vlan_pool is None:
+            vlan_pool = dict(name=pool, allocMode="static", encapBlocks=[])
+            vlan_pools.append(vlan_pool)
+            template_obj["vlanPools"] = vlan_pools
+            proposed["fabricPolicyTemplate"]["template"] = template_obj
+        intervals = encap_block_intervals(vlan_pool)
+        intervals["static"] = merge_intervals(intervals.get("static", []) + requested)
+        vlan_pool["encapBlocks"] = build_encap_blocks(vlan_pool, intervals)
+
+        pool_intervals = [interval for values in intervals.values() for interval in values]
+        for other_pool in vlan_pools:
+            if other_pool is vlan_pool:
+                continue
+            other_intervals = [interval for values in encap_block_intervals(other_pool).values() for interval in values]
+            for start, end in overlapping_intervals(pool_intervals, other_intervals):
+                overlaps.append(dict(pool=other_pool.get("name"), start=start, end=end))
+                mso.module.warn("VLAN range {0}-{1} of pool '{2}' overlaps with pool '{3}'".format(start, end, pool, other_pool.get("name")))
+
+    mso.sent = mso.proposed = proposed
+    if proposed != mso.previous and not module.check_mode:
+        mso.request(template_path, method="PUT", data=proposed)
+    mso.existing = proposed
+
+    if state == "present":
+        mso.exit_json(overlaps=overlaps)
     mso.exit_json()
 
 
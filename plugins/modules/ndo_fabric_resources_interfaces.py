@@ -12,44 +12,131 @@ ANSIBLE_METADATA = {"metadata_version": "1.1", "status": ["preview"], "supported
 
 DOCUMENTATION = r"""
 ---
-module: mso_schema_template
-short_description: Manage templates in schemas
+module: ndo_fabric_resources_interfaces
+short_description: Manage interfaces in fabric resource templates
 description:
-- Manage templates on Cisco ACI Multi-Site.
+- Manage physical, breakout, port-channel, virtual port-channel and FEX interfaces in fabric resource templates on Cisco Nexus Dashboard Orchestrator.
+- Many interfaces can be provided with O(interfaces), all interfaces are reconciled with a single request.
+- Interface lists like C(1/1-4,1/10) are compared in their canonical form, C(1/1,1/2-4,1/10) and C(1/1-4,1/10) are the same.
 author:
 - Dag Wieers (@dagwieers)
 options:
-  tenant:
+  template:
     description:
-    - The tenant used for this template.
+    - The name of the fabric resource template.
     type: str
     required: true
-  schema:
+  interfaces:
+    description:
+    - A list of interface definitions.
+    - Every interface definition accepts the interface options of this module, from O(interface) to O(fex_id).
+    - The interface options of the task are used for the options that are not provided in an interface definition.
+    - When the name of an interface definition contains C({port}) or C({interface}), one interface is managed per port of O(interfaces_node1).
+      C({port}) is replaced by the port number and C({interface}) by the interface with C(_) instead of C(/), for example C(1_5).
+      The ports of O(interfaces_node2) are assigned to the interfaces in the same order.
+    type: list
+    elements: dict
+    suboptions:
+      interface:
+        description:
+        - The name of the interface.
+        type: str
+        aliases: [ name ]
+      description:
+        description:
+        - The description of the interface.
+        type: str
+        aliases: [ descr ]
+      interface_type:
+        description:
+        - The type of the interface.
+        type: str
+        choices: [ physical, breakout, port-channel, vpc, fex ]
+      node1:
+        description:
+        - The ID of the (first) node.
+        type: str
+      node2:
+        description:
+        - The ID of the second node, required when O(interface_type=vpc).
+        type: str
+      interfaces_node1:
+        description:
+        - The interfaces of the (first) node, for example C(1/1-48) or C(1/1,1/3).
+        type: str
+      interfaces_node2:
+        description:
+        - The interfaces of the second node, required when O(interface_type=vpc).
+        type: str
+      interface_policy:
+        description:
+        - The name of the interface policy group, required when O(interface_type) is C(physical), C(port-channel) or C(vpc).
+        type: str
+      fabric_policy_template:
+        description:
+        - The name of the fabric policy template of O(interface_policy).
+        type: str
+      breakout_interface:
+        description:
+        - The breakout mode of a breakout interface.
+        type: str
+        choices: [ 4x10G, 4x25G, 4x100G ]
+      fex_id:
+        description:
+        - The ID of a FEX.
+        type: int
+  interface:
     description:
-    - The name of the schema.
+    - The name of the interface.
+    - Required when O(interfaces) is not provided.
     type: str
-    required: true
-  schema_description:
+    aliases: [ name ]
+  description:
     description:
-    - The description of Schema is supported on versions of MSO that are 3.3 or greater.
+    - The description of the interface.
     type: str
-  template_description:
+    aliases: [ descr ]
+  interface_type:
     description:
-    - The description of template is supported on versions of MSO that are 3.3 or greater.
+    - The type of the interface.
+    - Required when O(interfaces) is not provided.
     type: str
-  template:
+    choices: [ physical, breakout, port-channel, vpc, fex ]
+  node1:
     description:
-    - The name of the template.
+    - The ID of the (first) node.
+    - Required when O(interfaces) is not provided.
     type: str
-    aliases: [ name ]
-  display_name:
+  node2:
+    description:
+    - The ID of the second node, required when O(interface_type=vpc).
+    type: str
+  interfaces_node1:
+    description:
+    - The interfaces of the (first) node, for example C(1/1-48) or C(1/1,1/3).
+    - Required when O(interfaces) is not provided.
+    type: str
+  interfaces_node2:
+    description:
+    - The interfaces of the second node, required when O(interface_type=vpc).
+    type: str
+  interface_policy:
+    description:
+    - The name of the interface policy group, required when O(interface_type) is C(physical), C(port-channel) or C(vpc).
+    type: str
+  fabric_policy_template:
     description:
-    - The name as displayed on the MSO web interface.
+    - The name of the fabric policy template of O(interface_policy).
     type: str
- template_type:
+  breakout_interface:
     description:
-     - Deployment Mode. Use stretched-template for Multi-Site or non-stretched-template for Autonomous
-     type: str
+    - The breakout mode of a breakout interface.
+    type: str
+    choices: [ 4x10G, 4x25G, 4x100G ]
+  fex_id:
+    description:
+    - The ID of a FEX.
+    type: int
   state:
     description:
     - Use C(present) or C(absent) for adding or removing.
@@ -57,85 +144,277 @@ options:
     type: str
     choices: [ absent, present, query ]
     default: present
-notes:
-- Due to restrictions of the MSO REST API this module creates schemas when needed, and removes them when the last template has been removed.
-seealso:
-- module: cisco.mso.mso_schema
-- module: cisco.mso.mso_schema_site
 extends_documentation_fragment: cisco.mso.modules
 """
 
 EXAMPLES = r"""
-- name: Add a new template to a schema
-  cisco.mso.mso_schema_template:
+- name: Add a port-channel interface
+  cisco.mso.ndo_fabric_resources_interfaces:
     host: mso_host
     username: admin
     password: SomeSecretPassword
-    tenant: Tenant 1
-    schema: Schema 1
-    template: Template 1
+    template: Fabric Resources
+    interface: PC_101_1
+    interface_type: port-channel
+    node1: "101"
+    interfaces_node1: 1/1-2
+    interface_policy: PC Policy
+    fabric_policy_template: Fabric Policies
     state: present
   delegate_to: localhost
 
-- name: Remove a template from a schema
-  cisco.mso.mso_schema_template:
-    host: mso_host
-    username: admin
-    password: SomeSecretPassword
-    tenant: Tenant 1
-    schema: Schema 1
-    template: Template 1
-    state: absent
-  delegate_to: localhost
-
-- name: Query a template
-  cisco.mso.mso_schema_template:
+- name: Add one VPC per port of a new rack in a single request
+  cisco.mso.ndo_fabric_resources_interfaces:
     host: mso_host
     username: admin
     password: SomeSecretPassword
-    tenant: Tenant 1
-    schema: Schema 1
-    template: Template 1
-    state: query
-  delegate_to: localhost
-  register: query_result
-
-- name: Query all templates
-  cisco.mso.mso_schema_template:
-    host: mso_host
-    username: admin
-    password: SomeSecretPassword
-    tenant: Tenant 1
-    schema: Schema 1
-    state: query
+    template: Fabric Resources
+    interface_type: vpc
+    interface_policy: VPC Policy
+    fabric_policy_template: Fabric Policies
+    interfaces:
+    - interface: VPC_101_102_{port}
+      node1: "101"
+      node2: "102"
+      interfaces_node1: 1/1-48
+      interfaces_node2: 1/1-48
+    - interface: VPC_103_104_{port}
+      node1: "103"
+      node2: "104"
+      interfaces_node1: 1/1-48
+      interfaces_node2: 1/1-48
+    state: present
   delegate_to: localhost
-  register: query_result
 """
 
 RETURN = r"""
+interfaces:
+  description: The change of every interface, in the order of the (expanded) interface definitions.
+  returned: when state is present or absent
+  type: list
+  sample: [{"interface": "VPC_101_102_1", "interface_type": "vpc", "change": "added"}]
 """
 
+from copy import deepcopy
 from ansible.module_utils.basic import AnsibleModule
-from ansible_collections.cisco.mso.plugins.module_utils.mso import MSOModule, mso_argument_spec, diff_dicts, update_payload
+from ansible.module_utils._text import to_text
+from ansible_collections.cisco.mso.plugins.module_utils.mso import MSOModule, mso_argument_spec, diff_dicts, update_payload, get_template_id
+from ansible_collections.cisco.mso.plugins.module_utils.intervals import merge_intervals
+from ansible_collections.cisco.mso.plugins.module_utils.validation import MSOValidator, item_options, item_params
+
+INTERFACE_TYPE_PATH = {
+    "physical": "interfaceProfiles",
+    "breakout": "interfaceProfiles",
+    "port-channel": "portChannels",
+    "vpc": "virtualPortChannels",
+    "fex": "fexDevices",
+}
+
+REQUIRES_POLICY = ["physical", "port-channel", "vpc"]
+
+INTERFACE_OPTIONS = dict(
+    interface=dict(type="str", aliases=["name"]),
+    description=dict(type="str", aliases=["descr"]),
+    interface_type=dict(type="str", choices=["physical", "breakout", "port-channel", "vpc", "fex"]),
+    node1=dict(type="str"),
+    node2=dict(type="str"),
+    interfaces_node1=dict(type="str"),
+    interfaces_node2=dict(type="str"),
+    interface_policy=dict(type="str"),
+    fabric_policy_template=dict(type="str"),
+    breakout_interface=dict(type="str", choices=["4x10G", "4x25G", "4x100G"]),
+    fex_id=dict(type="int"),
+)
+
+PORT_PLACEHOLDERS = ["{port}", "{interface}"]
+
+
+def parse_interfaces(interfaces):
+    """
+    Parse an interface list like '1/1-4,1/10' or '1/1-1/4' into the list of its interfaces.
+    :param interfaces: The interface list. -> Str
+    :return: Sorted list of interfaces, an interface is a tuple of ints like (1, 10). -> List[Tuple]
+    :raises ValueError: When the interface list is not valid.
+    """
+    result = set()
+    for token in to_text(interfaces).replace(" ", "").split(","):
+        if not token:
+            continue
+        start, dummy, end = token.partition("-")
+        start = tuple(int(part) for part in start.split("/"))
+        if not end:
+            result.add(start)
+            continue
+        end = tuple(int(part) for part in end.split("/"))
+        if len(end) == 1:
+            end = start[:-1] + end
+        if len(start) < 2 or len(end) != len(start) or end[:-1] != start[:-1] or end[-1] < start[-1]:
+            raise ValueError("invalid interface range '{0}'".format(token))
+        result.update(start[:-1] + (port,) for port in range(start[-1], end[-1] + 1))
+    if any(len(interface) < 2 for interface in result):
+        raise ValueError("invalid interface list '{0}'".format(interfaces))
+    return sorted(result)
+
+
+def format_interfaces(interfaces):
+    """Format a list of interfaces as the shortest interface list, like '1/1-4,1/10'"""
+    ports = {}
+    for interface in interfaces:
+        ports.setdefault(interface[:-1], []).append((interface[-1], interface[-1]))
+    tokens = []
+    for prefix in sorted(ports):
+        for start, end in merge_intervals(ports[prefix]):
+            path = "/".join(str(part) for part in prefix + (start,))
+            tokens.append(path if start == end else "{0}-{1}".format(path, end))
+    return ",".join(tokens)
+
+
+def canonical_interfaces(interfaces):
+    """Return the canonical form of an interface list, the interface list as-is when it is not valid"""
+    try:
+        return format_interfaces(parse_interfaces(interfaces))
+    except ValueError:
+        return interfaces
+
+
+def expand_definition(validator, definition, context):
+    """Return one definition per port when the interface name contains a port placeholder"""
+    name = definition.get("interface") or ""
+    if not any(placeholder in name for placeholder in PORT_PLACEHOLDERS):
+        return [definition]
+    try:
+        ports_node1 = parse_interfaces(definition.get("interfaces_node1") or "")
+        ports_node2 = parse_interfaces(definition.get("interfaces_node2")) if definition.get("interfaces_node2") else None
+    except ValueError as e:
+        validator.error("interfaces_node1: {0}".format(e), context)
+        return []
+    if ports_node2 is not None and len(ports_node2) != len(ports_node1):
+        validator.error("interfaces_node1 and interfaces_node2 must have the same number of interfaces", context)
+        return []
+    definitions = []
+    for index, port in enumerate(ports_node1):
+        expanded = dict(definition)
+        path = "/".join(str(part) for part in port)
+        expanded["interface"] = name.replace("{port}", str(port[-1])).replace("{interface}", path.replace("/", "_"))
+        expanded["interfaces_node1"] = path
+        if ports_node2 is not None:
+            expanded["interfaces_node2"] = "/".join(str(part) for part in ports_node2[index])
+        definitions.append(expanded)
+    return definitions
+
+
+def validate_definition(validator, definition, context):
+    """Validate an interface definition"""
+    validator.required(
+        context,
+        interface=definition.get("interface"),
+        interface_type=definition.get("interface_type"),
+        node1=definition.get("node1"),
+        interfaces_node1=definition.get("interfaces_node1"),
+    )
+    if definition.get("interface_type") == "vpc":
+        validator.required_by(
+            "interface_type vpc", definition.get("interface_type"), context, node2=definition.get("node2"), interfaces_node2=definition.get("interfaces_node2")
+        )
+    if definition.get("interface_type") in REQUIRES_POLICY:
+        validator.required_by(
+            "interface_type {0}".format(definition.get("interface_type")),
+            definition.get("interface_type"),
+            context,
+            interface_policy=definition.get("interface_policy"),
+            fabric_policy_template=definition.get("fabric_policy_template"),
+        )
+    for name in ("interfaces_node1", "interfaces_node2"):
+        if definition.get(name):
+            try:
+                parse_interfaces(definition.get(name))
+            except ValueError as e:
+                validator.error("{0}: {1}".format(name, e), context)
+
+
+def build_interface(definition, template_id, interface_policy_uuid):
+    """Build the payload of an interface definition"""
+    interface_type = definition.get("interface_type")
+    interfaces_node1 = canonical_interfaces(definition.get("interfaces_node1"))
+    new_interface = {
+        "name": definition.get("interface"),
+        "description": definition.get("description") or "",
+        "adminState": "up",
+    }
+    if interface_type == "physical":
+        new_interface.update(
+            {
+                "nodes": [definition.get("node1")],
+                "interfaces": interfaces_node1,
+                "policyGroupType": "physical",
+                "policy": interface_policy_uuid,
+                "interfaceDescriptions": None,
+            }
+        )
+    elif interface_type == "breakout":
+        new_interface.update(
+            {
+                "nodes": [definition.get("node1")],
+                "interfaces": interfaces_node1,
+                "policyGroupType": "breakout",
+                "breakoutMode": definition.get("breakout_interface"),
+            }
+        )
+    elif interface_type == "port-channel":
+        new_interface.update(
+            {
+                "templateId": template_id,
+                "node": definition.get("node1"),
+                "memberInterfaces": interfaces_node1,
+                "policy": interface_policy_uuid,
+                "interfaceDescriptions": None,
+            }
+        )
+    elif interface_type == "vpc":
+        new_interface.update(
+            {
+                "templateId": template_id,
+                "node1Details": {"node": definition.get("node1"), "memberInterfaces": interfaces_node1, "role": "standby"},
+                "node2Details": {
+                    "node": definition.get("node2"),
+                    "memberInterfaces": canonical_interfaces(definition.get("interfaces_node2")),
+                    "role": "standby",
+                },
+                "policy": interface_policy_uuid,
+                "interfaceDescriptions": None,
+            }
+        )
+    else:
+        new_interface.update(
+            {
+                "nodes": [definition.get("node1")],
+                "interfaces": interfaces_node1,
+                "fexId": definition.get("fex_id"),
+            }
+        )
+        new_interface.pop("adminState")
+    return new_interface
+
+
+def keep_equivalent_interfaces(new_interface, current):
+    """Keep the interface lists of the current interface that are equivalent to the new interface lists"""
+    for key in ("interfaces", "memberInterfaces"):
+        if key in new_interface and canonical_interfaces(current.get(key)) == new_interface[key]:
+            new_interface[key] = current.get(key)
+    for details in ("node1Details", "node2Details"):
+        if details in new_interface and isinstance(current.get(details), dict):
+            if canonical_interfaces(current[details].get("memberInterfaces")) == new_interface[details]["memberInterfaces"]:
+                new_interface[details]["memberInterfaces"] = current[details].get("memberInterfaces")
 
 
 def main():
     argument_spec = mso_argument_spec()
     argument_spec.update(
-        interface=dict(type="str", aliases=["name"], required=True),
-        description=dict(type="str", aliases=["descr"]),
         template=dict(type="str", required=True),
-        interface_type=dict(type="str", choices=["physical", "breakout", "port-channel", "vpc", "fex"], required=True),
-        node1=dict(type="str", required=True),
-        node2=dict(type="str"),
-        interfaces_node1=dict(type="str", required=True),
-        interfaces_node2=dict(type="str"),
-        interface_policy=dict(type="str"),
-        fabric_policy_template=dict(type="str"),
-        breakout_interface=dict(type="str", choices=["4x10G", "4x25G", "4x100G"]),
-        fex_id=dict(type="int"),
+        interfaces=dict(type="list", elements="dict", options=item_options(INTERFACE_OPTIONS)),
         state=dict(type="str", default="present", choices=["absent", "present", "query"]),
     )
+    argument_spec.update(deepcopy(INTERFACE_OPTIONS))
 
     module = AnsibleModule(
         argument_spec=argument_spec,
@@ -150,86 +429,45 @@ def main():
     if template is not None:
         template = template.replace(" ", "")
     state = module.params.get("state")
-    description = module.params.get("description")
-    interface = module.params.get("interface")
-    interface_type = module.params.get("interface_type")
-    node1 = module.params.get("node1")
-    node2 = module.params.get("node2")
-    interfaces_node1 = module.params.get("interfaces_node1")
-    interfaces_node2 = module.params.get("interfaces_node2")
-    interface_policy = module.params.get("interface_policy")
-    breakout_interface = module.params.get("breakout_interface")
-    fabric_policy_template = module.params.get("fabric_policy_template")
-    fex_id = module.params.get("fex_id")
-
-
+    interfaces = module.params.get("interfaces")
 
     mso = MSOModule(module)
 
     template_type = "fabricResource"
-    physical_types = ["physical", "breakout"]
-    requires_policy = ["physical", "port-channel", "vpc"]
-    interface_type_path = {
-        "physical": "interfaceProfiles",
-        "breakout": "interfaceProfiles",
-        "port-channel": "portChannels",
-        "vpc": "virtualPortChannels",
-        "fex": "fexDevices"
-    }
 
+    # The interface options of the task are the defaults of every interface definition
+    defaults = dict((name, module.params.get(name)) for name in INTERFACE_OPTIONS)
+    definitions = []
+
+    # Validate the input before any request is sent
+    validator = MSOValidator(mso)
+    for index, item in enumerate(interfaces if interfaces is not None else [{}]):
+        context = "interfaces[{0}]".format(index) if interfaces is not None else None
+        definition = item_params(INTERFACE_OPTIONS, item, defaults)
+        if state == "query":
+            continue
+        for expanded in expand_definition(validator, definition, context):
+            validate_definition(validator, expanded, context)
+            validator.unique(
+                "interface",
+                (INTERFACE_TYPE_PATH.get(expanded.get("interface_type")), expanded.get("interface")),
+                context,
+                msg="duplicate interface '{0}'".format(expanded.get("interface")),
+            )
+            definitions.append(expanded)
+    validator.fail_on_errors()
 
     templates = mso.request(path="templates/summaries", method="GET", api_version="v1")
 
-
     mso.existing = {}
-    
-    template_id = ''
-    template_policy_id = ''
 
-    #try to find the fabric resources template
-    if templates:
-        for temp in templates:
-            if temp['templateName'] == template and temp['templateType'] == template_type:
-                template_id = temp['templateId']
+    template_id = get_template_id(template_name=template, template_type=template_type, template_dict=templates)
 
     if not template_id:
         mso.fail_json(msg="Template '{template}' not found".format(template=template))
 
-    mso.existing = mso.request(path=f"templates/{template_id}", method="GET", api_version="v1")
-    
-    interface_exist = False
-    #try to find if interface exist
-    # if 'template' in mso.existing['fabricResourceTemplate'] and interface_type_path[interface_type] in mso.existing['fabricResourceTemplate']['template']:
-    if interface_type_path[interface_type] in mso.existing['fabricResourceTemplate']['template'] and mso.existing['fabricResourceTemplate']['template'][interface_type_path[interface_type]]:
-        for count, d in enumerate(mso.existing['fabricResourceTemplate']['template'][interface_type_path[interface_type]]):
-            if d['name'] == interface:
-                interface_exist = True
-                interface_index = count
-
-    interface_policy_uuid = ''
-    if interface_type in requires_policy:
-        # try to find the find fabric policies template
-        for temp in templates:
-            if temp['templateName'] == fabric_policy_template and temp['templateType'] == 'fabricPolicy':
-                template_policy_id = temp['templateId']
-
-        if not template_policy_id:
-            mso.fail_json(msg="Template '{template}' not found".format(template=fabric_policy_template))
-
-        fabric_pol_temp =  mso.request(path=f"templates/{template_policy_id}", method="GET", api_version="v1")
-
-        # try to find if the interface policy exist
-        if 'template' in fabric_pol_temp['fabricPolicyTemplate'] and 'interfacePolicyGroups' in fabric_pol_temp['fabricPolicyTemplate']['template']:
-
-            for count, i in enumerate(fabric_pol_temp['fabricPolicyTemplate']['template']['interfacePolicyGroups']):
-                if i['name'] == interface_policy:
-                    interface_policy_uuid = i['uuid']
-
-        if not interface_policy_uuid:
-            mso.fail_json(msg="Interface Policy '{policy}' not found".format(policy=interface_policy))
-
-    if interface_type == 'vpc' and (not node2 or not interfaces_node2):
-        mso.fail_json(msg="Interface type VPC requires second node and interfaces")
+    template_path = "templates/{0}".format(template_id)
+    mso.existing = mso.request(path=template_path, method="GET", api_version="v1")
 
     if state == "query":
         if not mso.existing:
@@ -239,118 +477,82 @@ def main():
                 mso.existing = []
         mso.exit_json()
 
-    template_path = f"templates/{template_id}"
-
-    mso.previous = mso.existing
-    if state == "absent":
-        mso.proposed = mso.sent = {}
-        if interface_exist:
-            del mso.existing['fabricResourceTemplate']['template'][interface_type_path[interface_type]][interface_index]
-            if len(mso.existing['fabricResourceTemplate']['template'][interface_type_path[interface_type]]) == 0:
-                mso.existing['fabricResourceTemplate']['template'][interface_type_path[interface_type]] = None
-            if not module.check_mode:
-                mso.request(template_path, method="PUT", data=mso.existing)
-            mso.existing = {}
-
-    elif state == "present":
-        new_interface = {
-            "name": interface,
-            "description": "",
-            "adminState": "up"
-        }
-        if description:
-            new_interface['description'] = description
-        if interface_type == 'physical':
-            new_interface.update(
-                {
-                    "nodes": [
-                        node1
-                    ],
-                    "interfaces": interfaces_node1,
-                    "policyGroupType": "physical",
-                    "policy": interface_policy_uuid,
-                    "interfaceDescriptions": None
-                }
-            )
-        elif interface_type == 'breakout':
-            new_interface.update(
-                {
-                    "nodes": [
-                        node1
-                    ],
-                    "interfaces": interfaces_node1,
-                    "policyGroupType": "breakout",
-                    "breakoutMode": breakout_interface,
-                }
+    # The interface policy groups of every referenced fabric policy template are indexed once
+    policy_groups = {}
+    if state == "present":
+        for definition in definitions:
+            policy_template = definition.get("fabric_policy_template")
+            if definition.get("interface_type") not in REQUIRES_POLICY or policy_template in policy_groups:
+                continue
+            template_policy_id = get_template_id(template_name=policy_template, template_type="fabricPolicy", template_dict=templates)
+            if not template_policy_id:
+                mso.fail_json(msg="Template '{template}' not found".format(template=policy_template))
+            fabric_pol_temp = mso.request(path="templates/{0}".format(template_policy_id), method="GET", api_version="v1")
+            policy_groups[policy_template] = dict(
+                (group.get("name"), group.get("uuid"))
+                for group in (fabric_pol_temp.get("fabricPolicyTemplate", {}).get("template", {}).get("interfacePolicyGroups") or [])
             )
-        elif interface_type == 'port-channel':
-            new_interface.update(
-                {
-                    "templateId": template_id,
-                    "node": node1,
-                    "memberInterfaces": interfaces_node1,
-                    "policy": interface_policy_uuid,
-                    "interfaceDescriptions": None
-                }
+        missing = sorted(
+            set(
+                definition.get("interface_policy")
+                for definition in definitions
+                if definition.get("interface_type") in REQUIRES_POLICY
+                and definition.get("interface_policy") not in policy_groups[definition.get("fabric_policy_template")]
             )
-        elif interface_type == 'vpc':
-            new_interface.update(
-                {
-                    "templateId": template_id,
-                    "node1Details":
-                        {
-                            "node": node1,
-                            "memberInterfaces": interfaces_node1,
-                            "role": "standby"
-                        },
-                    "node2Details":
-                        {
-                            "node": node2,
-                            "memberInterfaces": interfaces_node2,
-                            "role": "standby"
-                        },
-                    "policy": interface_policy_uuid,
-                    "interfaceDescriptions": None
-                }
-            )
-        else:
-            new_interface.update(
-                {
-                    "nodes":
-                        [
-                            node1
-                        ],
-                    "interfaces": interfaces_node1,
-                    "fexId": fex_id
-                }
-            )
-            new_interface.pop('adminState')
-        
-        #interface doesn't exitst, need be created
-        if not interface_exist:
-            if not interface_type_path[interface_type] in mso.existing['fabricResourceTemplate']['template']:
-                mso.existing['fabricResourceTemplate']['template'][interface_type_path[interface_type]] = []
-            if not mso.existing['fabricResourceTemplate']['template'][interface_type_path[interface_type]]:
-                mso.existing['fabricResourceTemplate']['template'][interface_type_path[interface_type]] = []
-            mso.existing['fabricResourceTemplate']['template'][interface_type_path[interface_type]].append(new_interface)
-            # mso.sanitize(payload, collate=True)
-            if not module.check_mode:
-                mso.request(template_path, method="PUT", data=mso.existing)
-            mso.existing = mso.proposed
-        else:
-            #interface exist check if need be updated
-            current = mso.existing['fabricResourceTemplate']['template'][interface_type_path[interface_type]][interface_index].copy()
-            diff = diff_dicts(new_interface, current)
-            if diff:
-                mso.existing['fabricResourceTemplate']['template'][interface_type_path[interface_type]][interface_index] = update_payload(diff=diff, payload=mso.existing['fabricResourceTemplate']['template'][interface_type_path[interface_type]][interface_index])
-                if not module.check_mode:
-                    mso.request(template_path, method="PUT", data=mso.existing)
-                mso.existing = mso.proposed
-
-    
-    
-
-    mso.exit_json()
+        )
+        if missing:
+            mso.fail_json(msg="Interface Policy '{policy}' not found".format(policy="', '".join(missing)))
+
+    mso.previous = mso.existing
+    proposed = deepcopy(mso.existing)
+    template_obj = proposed["fabricResourceTemplate"].setdefault("template", {})
+
+    # Index the existing interfaces by template path and name
+    existing_interfaces = {}
+    for path in set(INTERFACE_TYPE_PATH.values()):
+        for interface in template_obj.get(path) or []:
+            existing_interfaces[(path, interface.get("name"))] = interface
+
+    report = []
+    for definition in definitions:
+        path = INTERFACE_TYPE_PATH[definition.get("interface_type")]
+        current = existing_interfaces.get((path, definition.get("interface")))
+        change = "unchanged"
+
+        if state == "absent":
+            if current is not None:
+                template_obj[path].remove(current)
+                if not template_obj[path]:
+                    template_obj[path] = None
+                change = "removed"
+            else:
+                change = "absent"
+
+        elif state == "present":
+            interface_policy_uuid = policy_groups.get(definition.get("fabric_policy_template"), {}).get(definition.get("interface_policy"), "")
+            new_interface = build_interface(definition, template_id, interface_policy_uuid)
+            if current is None:
+                if not template_obj.get(path):
+                    template_obj[path] = []
+                template_obj[path].append(new_interface)
+                existing_interfaces[(path, definition.get("interface"))] = new_interface
+                change = "added"
+            else:
+                keep_equivalent_interfaces(new_interface, current)
+                diff = diff_dicts(new_interface, current)
+                if diff:
+                    update_payload(diff=diff, payload=current)
+                    change = "updated"
+
+        report.append(dict(interface=definition.get("interface"), interface_type=definition.get("interface_type"), change=change))
+
+    mso.sent = mso.proposed = proposed
+    if proposed != mso.previous:
+        if not module.check_mode:
+            mso.request(template_path, method="PUT", data=proposed)
+        mso.existing = proposed
+
+    mso.exit_json(interfaces=report)
 
 
 if __name__ == "__main__":
@@ -159,7 +159,8 @@ RETURN = r"""
 """
 
 from ansible.module_utils.basic import AnsibleModule
-from ansible_collections.cisco.mso.plugins.module_utils.mso import MSOModule, mso_argument_spec, mso_reference_spec, get_template_id
+from ansible_collections.cisco.mso.plugins.module_utils.mso import MSOModule, mso_argument_spec, get_template_id
+from ansible_collections.cisco.mso.plugins.module_utils.specs import mso_reference_spec
 from ansible_collections.cisco.mso.plugins.module_utils.schema import MSOSchema
 
 
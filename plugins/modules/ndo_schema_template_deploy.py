@@ -16,7 +16,7 @@ module: ndo_schema_template_deploy
 short_description: Deploy schema templates to sites for NDO v3.7 and higher
 description:
 - Deploy schema templates to sites.
-- Prior to deploy or redeploy a schema validation is executed.
+- Prior to deploy or redeploy a schema validation is executed, with the validation API or locally, see I(validation).
 - When schema validation fails, M(cisco.mso.ndo_schema_template_deploy) fails and deploy or redeploy will not be executed.
 - Only supports NDO v3.7 and higher
 author:
@@ -46,9 +46,27 @@ options:
     type: str
     choices: [ deploy, redeploy, undeploy, query ]
     default: deploy
+  validation:
+    description:
+    - How the schema is validated prior to deploy or redeploy.
+    - Use C(remote) to validate the schema with the validation API of MSO.
+    - Use C(local) to validate the schema without the validation API. All dangling references, site-local objects without their template object,
+      duplicate object names and duplicate subnets within a VRF are reported at once.
+    - Use C(both) to validate the schema locally first, and with the validation API when no problem is found locally.
+    type: str
+    choices: [ remote, local, both ]
+    default: remote
+  defer:
+    description:
+    - Whether to add the template to the deploy queue instead of deploying it, see M(cisco.mso.mso_deploy_queue_flush).
+    - Requires the deploy queue, enabled with the C(MSO_DEPLOY_QUEUE) environment variable.
+    - A template changed and deployed by many tasks is then deployed once by M(cisco.mso.mso_deploy_queue_flush).
+    type: bool
+    default: false
 seealso:
 - module: cisco.mso.mso_schema_site
 - module: cisco.mso.mso_schema_template
+- module: cisco.mso.mso_deploy_queue_flush
 extends_documentation_fragment: cisco.mso.modules
 """
 
@@ -63,6 +81,17 @@ EXAMPLES = r"""
     state: deploy
   delegate_to: localhost
 
+- name: Deploy a schema template after validating it locally
+  cisco.mso.ndo_schema_template_deploy:
+    host: mso_host
+    username: admin
+    password: SomeSecretPassword
+    schema: Schema 1
+    template: Template 1
+    validation: both
+    state: deploy
+  delegate_to: localhost
+
 - name: Redeploy a schema template
   cisco.mso.ndo_schema_template_deploy:
     host: mso_host
@@ -100,6 +129,7 @@ RETURN = r"""
 
 from ansible.module_utils.basic import AnsibleModule
 from ansible_collections.cisco.mso.plugins.module_utils.mso import MSOModule, mso_argument_spec
+from ansible_collections.cisco.mso.plugins.module_utils.schemacheck import VALIDATION_CHOICES, validate_schema
 
 
 def main():
@@ -109,6 +139,8 @@ def main():
         template=dict(type="str", required=True),
         sites=dict(type="list", elements="str"),
         state=dict(type="str", default="deploy", choices=["deploy", "redeploy", "undeploy", "query"]),
+        validation=dict(type="str", default="remote", choices=VALIDATION_CHOICES),
+        defer=dict(type="bool", default=False),
     )
 
     module = AnsibleModule(
@@ -127,6 +159,10 @@ def main():
     mso = MSOModule(module)
     schema_id = mso.lookup_schema(schema)
 
+    if state == "deploy" and module.params.get("defer"):
+        mso.defer_deploy(schema_id, template)
+        mso.exit_json(deferred=True)
+
     if state == "query":
         path = "status/schema/{0}/template/{1}".format(schema_id, template)
         method = "GET"
@@ -136,10 +172,10 @@ def main():
         method = "POST"
         payload = dict(schemaId=schema_id, templateName=template)
         if state == "deploy":
-            mso.validate_schema(schema_id)
+            validate_schema(mso, schema_id, module.params.get("validation"))
             payload.update(isRedeploy=False)
         elif state == "redeploy":
-            mso.validate_schema(schema_id)
+            validate_schema(mso, schema_id, module.params.get("validation"))
             payload.update(isRedeploy=True)
         elif state == "undeploy":
             payload.update(undeploy=[site.get("siteId") for site in mso.lookup_sites(sites)])
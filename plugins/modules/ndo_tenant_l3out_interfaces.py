@@ -12,44 +12,297 @@ ANSIBLE_METADATA = {"metadata_version": "1.1", "status": ["preview"], "supported
 
 DOCUMENTATION = r"""
 ---
-module: mso_schema_template
-short_description: Manage templates in schemas
+module: ndo_tenant_l3out_interfaces
+short_description: Manage interfaces of L3Outs in L3Out templates
 description:
-- Manage templates on Cisco ACI Multi-Site.
+- Manage the routed, routed sub-interfaces and SVI interfaces of L3Outs, and their nodes, in L3Out templates on Cisco Nexus Dashboard Orchestrator.
+- Many interfaces can be provided with O(interfaces), all interfaces are reconciled with a single request.
+- Interfaces are identified by their interface type, node(s), path and VLAN encap.
+- Nodes are added when needed, and removed when their last interface has been removed.
 author:
 - Dag Wieers (@dagwieers)
 options:
-  tenant:
+  template:
     description:
-    - The tenant used for this template.
+    - The name of the L3Out template.
     type: str
     required: true
-  schema:
+  l3out:
     description:
-    - The name of the schema.
+    - The name of the L3Out.
     type: str
     required: true
-  schema_description:
+  interfaces:
+    description:
+    - A list of interface definitions.
+    - Every interface definition accepts the interface options of this module, from O(interface_type) to O(encap_scope).
+    - The interface options of the task are used for the options that are not provided in an interface definition.
+    type: list
+    elements: dict
+    suboptions:
+      interface_type:
+        description:
+        - The type of the interface.
+        type: str
+        choices: [ routed_sub, routed, svi ]
+      path_type:
+        description:
+        - The type of the path.
+        type: str
+        choices: [ port, vpc, pc ]
+      node1:
+        description:
+        - The ID of the (first) node.
+        type: str
+      node1_router_id:
+        description:
+        - The router ID of the (first) node.
+        type: str
+      node1_router_id_as_loopback:
+        description:
+        - Whether the router ID of the (first) node is used as loopback address.
+        type: bool
+      node2:
+        description:
+        - The ID of the second node, required when O(path_type=vpc).
+        type: str
+      node2_router_id:
+        description:
+        - The router ID of the second node, required when O(path_type=vpc).
+        type: str
+      node2_router_id_as_loopback:
+        description:
+        - Whether the router ID of the second node is used as loopback address.
+        type: bool
+      pod_id:
+        description:
+        - The ID of the pod of the node(s).
+        type: str
+      path:
+        description:
+        - The path of the interface, for example C(eth1/1) or the name of a PC/VPC interface policy group.
+        type: str
+      vlan_encap_id:
+        description:
+        - The VLAN encap of the interface, required when O(interface_type) is not C(routed).
+        type: int
+      trunk_mode:
+        description:
+        - The mode of a SVI interface.
+        type: str
+        choices: [ trunk, access8021p, access ]
+      ipv4_addr_node1:
+        description:
+        - The IPv4 address with prefix length of the (first) node.
+        type: str
+      ipv4_addr_node2:
+        description:
+        - The IPv4 address with prefix length of the second node.
+        type: str
+      ipv4_secondary_ip:
+        description:
+        - A secondary IPv4 address.
+        type: str
+      ipv6_addr_node1:
+        description:
+        - The IPv6 address with prefix length of the (first) node.
+        type: str
+      ipv6_addr_node2:
+        description:
+        - The IPv6 address with prefix length of the second node.
+        type: str
+      ipv6_secondary_ip:
+        description:
+        - A secondary IPv6 address.
+        type: str
+      mac:
+        description:
+        - The MAC address of the interface.
+        type: str
+      mtu:
+        description:
+        - The MTU of the interface.
+        type: str
+      autostate:
+        description:
+        - The autostate of a SVI interface.
+        type: str
+        choices: [ enabled, disabled ]
+      interface_group_policy:
+        description:
+        - The name of the interface group of the L3Out.
+        type: str
+      target_dscp:
+        description:
+        - The target DSCP of the interface.
+        type: str
+      ipv6_dad:
+        description:
+        - The IPv6 duplicate address detection of the interface.
+        type: str
+        choices: [ enabled, disabled ]
+      ipv6_link_local_node1:
+        description:
+        - The IPv6 link local address of the (first) node.
+        type: str
+      ipv6_link_local_node2:
+        description:
+        - The IPv6 link local address of the second node.
+        type: str
+      secondary_nd_ra_prefix:
+        description:
+        - Whether the secondary IPv6 address is used as ND RA prefix.
+        type: bool
+      secondary_ipv6_dad:
+        description:
+        - The IPv6 duplicate address detection of the secondary IPv6 address.
+        type: str
+        choices: [ enabled, disabled ]
+      encap_scope:
+        description:
+        - The encap scope of a SVI interface.
+        type: str
+        choices: [ local, vrf ]
+  interface_type:
     description:
-    - The description of Schema is supported on versions of MSO that are 3.3 or greater.
+    - The type of the interface.
+    - Required when O(interfaces) is not provided.
     type: str
-  template_description:
+    choices: [ routed_sub, routed, svi ]
+  path_type:
     description:
-    - The description of template is supported on versions of MSO that are 3.3 or greater.
+    - The type of the path.
+    - Required when O(interfaces) is not provided.
     type: str
-  template:
+    choices: [ port, vpc, pc ]
+  node1:
+    description:
+    - The ID of the (first) node.
+    - Required when O(interfaces) is not provided.
+    type: str
+  node1_router_id:
+    description:
+    - The router ID of the (first) node.
+    - Required when O(interfaces) is not provided.
+    type: str
+  node1_router_id_as_loopback:
+    description:
+    - Whether the router ID of the (first) node is used as loopback address.
+    type: bool
+    default: false
+  node2:
+    description:
+    - The ID of the second node, required when O(path_type=vpc).
+    type: str
+  node2_router_id:
+    description:
+    - The router ID of the second node, required when O(path_type=vpc).
+    type: str
+  node2_router_id_as_loopback:
+    description:
+    - Whether the router ID of the second node is used as loopback address.
+    type: bool
+    default: false
+  pod_id:
+    description:
+    - The ID of the pod of the node(s).
+    - Required when O(interfaces) is not provided.
+    type: str
+  path:
+    description:
+    - The path of the interface, for example C(eth1/1) or the name of a PC/VPC interface policy group.
+    - Required when O(interfaces) is not provided.
+    type: str
+  vlan_encap_id:
+    description:
+    - The VLAN encap of the interface, required when O(interface_type) is not C(routed).
+    type: int
+  trunk_mode:
+    description:
+    - The mode of a SVI interface.
+    type: str
+    choices: [ trunk, access8021p, access ]
+    default: trunk
+  ipv4_addr_node1:
+    description:
+    - The IPv4 address with prefix length of the (first) node.
+    type: str
+  ipv4_addr_node2:
+    description:
+    - The IPv4 address with prefix length of the second node.
+    type: str
+  ipv4_secondary_ip:
+    description:
+    - A secondary IPv4 address.
+    type: str
+  ipv6_addr_node1:
+    description:
+    - The IPv6 address with prefix length of the (first) node.
+    type: str
+  ipv6_addr_node2:
+    description:
+    - The IPv6 address with prefix length of the second node.
+    type: str
+  ipv6_secondary_ip:
+    description:
+    - A secondary IPv6 address.
+    type: str
+  ipv6_link_local_node1:
+    description:
+    - The IPv6 link local address of the (first) node.
+    type: str
+  ipv6_link_local_node2:
+    description:
+    - The IPv6 link local address of the second node.
+    type: str
+  mac:
+    description:
+    - The MAC address of the interface.
+    type: str
+    default: 00:22:BD:F8:19:FF
+  mtu:
     description:
-    - The name of the template.
+    - The MTU of the interface.
     type: str
-    aliases: [ name ]
-  display_name:
+    default: inherit
+  autostate:
     description:
-    - The name as displayed on the MSO web interface.
+    - The autostate of a SVI interface.
     type: str
- template_type:
+    choices: [ enabled, disabled ]
+    default: disabled
+  interface_group_policy:
     description:
-     - Deployment Mode. Use stretched-template for Multi-Site or non-stretched-template for Autonomous
-     type: str
+    - The name of the interface group of the L3Out.
+    type: str
+  target_dscp:
+    description:
+    - The target DSCP of the interface.
+    type: str
+    default: unspecified
+  ipv6_dad:
+    description:
+    - The IPv6 duplicate address detection of the interface.
+    type: str
+    choices: [ enabled, disabled ]
+    default: disabled
+  secondary_nd_ra_prefix:
+    description:
+    - Whether the secondary IPv6 address is used as ND RA prefix.
+    type: bool
+    default: false
+  secondary_ipv6_dad:
+    description:
+    - The IPv6 duplicate address detection of the secondary IPv6 address.
+    type: str
+    choices: [ enabled, disabled ]
+    default: enabled
+  encap_scope:
+    description:
+    - The encap scope of a SVI interface.
+    type: str
+    choices: [ local, vrf ]
+    default: local
   state:
     description:
     - Use C(present) or C(absent) for adding or removing.
@@ -57,66 +310,238 @@ options:
     type: str
     choices: [ absent, present, query ]
     default: present
-notes:
-- Due to restrictions of the MSO REST API this module creates schemas when needed, and removes them when the last template has been removed.
-seealso:
-- module: cisco.mso.mso_schema
-- module: cisco.mso.mso_schema_site
 extends_documentation_fragment: cisco.mso.modules
 """
 
 EXAMPLES = r"""
-- name: Add a new template to a schema
-  cisco.mso.mso_schema_template:
+- name: Add a routed sub-interface to an L3Out
+  cisco.mso.ndo_tenant_l3out_interfaces:
     host: mso_host
     username: admin
     password: SomeSecretPassword
-    tenant: Tenant 1
-    schema: Schema 1
-    template: Template 1
+    template: L3Out Template
+    l3out: L3Out 1
+    interface_type: routed_sub
+    path_type: port
+    pod_id: "1"
+    node1: "101"
+    node1_router_id: 1.1.1.101
+    path: eth1/1
+    vlan_encap_id: 100
+    ipv4_addr_node1: 10.0.0.1/30
     state: present
   delegate_to: localhost
 
-- name: Remove a template from a schema
-  cisco.mso.mso_schema_template:
+- name: Add many routed sub-interfaces of two border leaves in a single request
+  cisco.mso.ndo_tenant_l3out_interfaces:
     host: mso_host
     username: admin
     password: SomeSecretPassword
-    tenant: Tenant 1
-    schema: Schema 1
-    template: Template 1
-    state: absent
-  delegate_to: localhost
-
-- name: Query a template
-  cisco.mso.mso_schema_template:
-    host: mso_host
-    username: admin
-    password: SomeSecretPassword
-    tenant: Tenant 1
-    schema: Schema 1
-    template: Template 1
-    state: query
+    template: L3Out Template
+    l3out: L3Out 1
+    interface_type: routed_sub
+    path_type: port
+    pod_id: "1"
+    path: eth1/49
+    interfaces:
+    - node1: "101"
+      node1_router_id: 1.1.1.101
+      vlan_encap_id: 101
+      ipv4_addr_node1: 10.0.1.1/30
+    - node1: "102"
+      node1_router_id: 1.1.1.102
+      vlan_encap_id: 102
+      ipv4_addr_node1: 10.0.2.1/30
+    state: present
   delegate_to: localhost
-  register: query_result
+  register: result
 
-- name: Query all templates
-  cisco.mso.mso_schema_template:
+- name: Remove a routed sub-interface from an L3Out
+  cisco.mso.ndo_tenant_l3out_interfaces:
     host: mso_host
     username: admin
     password: SomeSecretPassword
-    tenant: Tenant 1
-    schema: Schema 1
-    state: query
+    template: L3Out Template
+    l3out: L3Out 1
+    interface_type: routed_sub
+    path_type: port
+    pod_id: "1"
+    node1: "101"
+    node1_router_id: 1.1.1.101
+    path: eth1/1
+    vlan_encap_id: 100
+    state: absent
   delegate_to: localhost
-  register: query_result
 """
 
 RETURN = r"""
+interfaces:
+  description: The change of every interface definition, in the order of the interface definitions.
+  returned: when state is present or absent
+  type: list
+  sample: [{"interface_type": "routed_sub", "node": "101", "path": "eth1/49", "encap": 101, "change": "added"}]
 """
 
+from copy import deepcopy
 from ansible.module_utils.basic import AnsibleModule
-from ansible_collections.cisco.mso.plugins.module_utils.mso import MSOModule, mso_argument_spec, diff_dicts, update_payload, int_to_ipv4, get_route_map_uuid, mso_reference_spec, get_template_id
+from ansible_collections.cisco.mso.plugins.module_utils.mso import MSOModule, mso_argument_spec, diff_dicts, update_payload, get_template_id
+from ansible_collections.cisco.mso.plugins.module_utils.validation import MSOValidator, item_options, item_params
+
+INTERFACE_TYPES = {
+    "routed_sub": "subInterfaces",
+    "routed": "interfaces",
+    "svi": "sviInterfaces",
+}
+
+INTERFACE_OPTIONS = dict(
+    interface_type=dict(type="str", choices=["routed_sub", "routed", "svi"]),
+    path_type=dict(type="str", choices=["port", "vpc", "pc"]),
+    node1=dict(type="str"),
+    node1_router_id=dict(type="str"),
+    node1_router_id_as_loopback=dict(type="bool", default=False),
+    node2=dict(type="str"),
+    node2_router_id=dict(type="str"),
+    node2_router_id_as_loopback=dict(type="bool", default=False),
+    pod_id=dict(type="str"),
+    path=dict(type="str"),
+    vlan_encap_id=dict(type="int"),
+    trunk_mode=dict(type="str", choices=["trunk", "access8021p", "access"], default="trunk"),
+    ipv4_addr_node1=dict(type="str"),
+    ipv4_addr_node2=dict(type="str"),
+    ipv4_secondary_ip=dict(type="str"),
+    ipv6_addr_node1=dict(type="str"),
+    ipv6_addr_node2=dict(type="str"),
+    ipv6_secondary_ip=dict(type="str"),
+    mac=dict(type="str", default="00:22:BD:F8:19:FF"),
+    mtu=dict(type="str", default="inherit"),
+    autostate=dict(type="str", choices=["enabled", "disabled"], default="disabled"),
+    interface_group_policy=dict(type="str"),
+    target_dscp=dict(type="str", default="unspecified"),
+    ipv6_dad=dict(type="str", choices=["enabled", "disabled"], default="disabled"),
+    ipv6_link_local_node1=dict(type="str"),
+    ipv6_link_local_node2=dict(type="str"),
+    secondary_nd_ra_prefix=dict(type="bool", default=False),
+    secondary_ipv6_dad=dict(type="str", choices=["enabled", "disabled"], default="enabled"),
+    encap_scope=dict(type="str", choices=["local", "vrf"], default="local"),
+)
+
+
+def interface_key(interface_type, node_id, path, encap):
+    """Return the key of an interface, routed interfaces have no encap"""
+    return (interface_type, str(node_id), path, encap if interface_type != "routed" else None)
+
+
+def existing_interface_key(interface_type, interface):
+    return interface_key(interface_type, interface.get("nodeID"), interface.get("path"), interface.get("encap", {}).get("value"))
+
+
+def validate_definition(validator, definition, state, context):
+    """Validate an interface definition"""
+    validator.required(
+        context,
+        interface_type=definition.get("interface_type"),
+        path_type=definition.get("path_type"),
+        node1=definition.get("node1"),
+        node1_router_id=definition.get("node1_router_id"),
+        pod_id=definition.get("pod_id"),
+        path=definition.get("path"),
+    )
+    if definition.get("interface_type") not in (None, "routed"):
+        validator.required(context, vlan_encap_id=definition.get("vlan_encap_id"))
+    validator.vlan("vlan_encap_id", definition.get("vlan_encap_id"), context)
+    if state == "present":
+        validator.required_one_of(context, ipv4_addr_node1=definition.get("ipv4_addr_node1"), ipv6_addr_node1=definition.get("ipv6_addr_node1"))
+        if definition.get("path_type") == "vpc":
+            validator.required(context, node2=definition.get("node2"), node2_router_id=definition.get("node2_router_id"))
+            if not (
+                (definition.get("ipv4_addr_node1") and definition.get("ipv4_addr_node2"))
+                or (definition.get("ipv6_addr_node1") and definition.get("ipv6_addr_node2"))
+            ):
+                validator.error("path_type vpc requires the IPv4 or IPv6 address of both nodes", context)
+    for name, version in [
+        ("node1_router_id", 4),
+        ("node2_router_id", 4),
+        ("ipv4_addr_node1", 4),
+        ("ipv4_addr_node2", 4),
+        ("ipv4_secondary_ip", 4),
+        ("ipv6_addr_node1", 6),
+        ("ipv6_addr_node2", 6),
+        ("ipv6_secondary_ip", 6),
+        ("ipv6_link_local_node1", 6),
+        ("ipv6_link_local_node2", 6),
+    ]:
+        validator.ip_address(name, definition.get(name), context, version=version)
+
+
+def build_node(definition, node):
+    """Build the payload of node1 or node2 of an interface definition"""
+    return {
+        "group": "",
+        "podID": definition.get("pod_id"),
+        "nodeID": definition.get(node),
+        "routerID": definition.get("{0}_router_id".format(node)),
+        "useRouteIDAsLoopback": definition.get("{0}_router_id_as_loopback".format(node)),
+    }
+
+
+def build_addresses(definition, node, ipv6_dad):
+    """Build the addresses of node1 or node2 of an interface definition"""
+    addresses = {"ipV6DAD": ipv6_dad, "secondary": []}
+    if definition.get("ipv4_addr_{0}".format(node)):
+        addresses["primaryV4"] = definition.get("ipv4_addr_{0}".format(node))
+    if definition.get("ipv6_addr_{0}".format(node)):
+        addresses["primaryV6"] = definition.get("ipv6_addr_{0}".format(node))
+    if definition.get("ipv6_link_local_{0}".format(node)):
+        addresses["linkLocalV6"] = definition.get("ipv6_link_local_{0}".format(node))
+    if definition.get("ipv4_secondary_ip"):
+        addresses["secondary"].append(
+            {
+                "address": definition.get("ipv4_secondary_ip"),
+                "dhcpRelay": False,
+                "v6RAPrefix": False,
+                "ipV6DAD": "enabled",
+            }
+        )
+    if definition.get("ipv6_secondary_ip"):
+        addresses["secondary"].append(
+            {
+                "address": definition.get("ipv6_secondary_ip"),
+                "dhcpRelay": False,
+                "v6RAPrefix": definition.get("secondary_nd_ra_prefix"),
+                "ipV6DAD": definition.get("secondary_ipv6_dad"),
+            }
+        )
+    if not addresses["secondary"]:
+        addresses.pop("secondary")
+    return addresses
+
+
+def build_interface(definition):
+    """Build the payload of an interface definition"""
+    interface_type = definition.get("interface_type")
+    new_interface = {
+        "group": definition.get("interface_group_policy") or "",
+        "pathType": definition.get("path_type"),
+        "podID": definition.get("pod_id"),
+        "nodeID": definition.get("node1"),
+        "path": definition.get("path"),
+        "addresses": build_addresses(definition, "node1", definition.get("ipv6_dad")),
+        "mac": definition.get("mac"),
+        "mtu": definition.get("mtu"),
+        "targetDscp": definition.get("target_dscp"),
+    }
+    if interface_type != "routed":
+        new_interface["encap"] = {"encapType": "vlan", "value": definition.get("vlan_encap_id")}
+    if interface_type == "svi":
+        new_interface["svi"] = {
+            "encapScope": definition.get("encap_scope"),
+            "autostate": definition.get("autostate"),
+            "mode": definition.get("trunk_mode"),
+        }
+    if definition.get("path_type") == "vpc":
+        new_interface["nodeID"] = "{0},{1}".format(definition.get("node1"), definition.get("node2"))
+        new_interface["sideBAddresses"] = build_addresses(definition, "node2", "disabled")
+    return new_interface
 
 
 def main():
@@ -124,37 +549,10 @@ def main():
     argument_spec.update(
         l3out=dict(type="str", required=True),
         template=dict(type="str", required=True),
-        interface_type=dict(type="str", choices=["routed_sub", "routed", "svi"], required=True),
-        path_type=dict(type="str", choices=["port","vpc","pc"], required=True),
-        node1=dict(type="str", required=True),
-        node1_router_id=dict(type="str", required=True),
-        node1_router_id_as_loopback=dict(type="bool", default=False),
-        node2=dict(type="str"),
-        node2_router_id=dict(type="str"),
-        node2_router_id_as_loopback=dict(type="bool", default=False),
-        pod_id=dict(type="str", required=True),
-        path=dict(type="str", required=True),
-        vlan_encap_id=dict(type="int"),
-        trunk_mode=dict(type="str", choices=["trunk","access8021p","access"], default="trunk"),
-        ipv4_addr_node1=dict(type="str"),
-        ipv4_addr_node2=dict(type="str"),
-        ipv4_secondary_ip=dict(type="str"),
-        ipv6_addr_node1=dict(type="str",),
-        ipv6_addr_node2=dict(type="str"),
-        ipv6_secondary_ip=dict(type="str"),
-        mac=dict(type="str", default="00:22:BD:F8:19:FF"),
-        mtu=dict(type="str", default="inherit"),
-        autostate=dict(type="str", choices=["enabled","disabled"], default="disabled"),
-        interface_group_policy=dict(type="str"),
-        target_dscp=dict(type="str", default="unspecified"),
-        ipv6_dad=dict(type="str", choices=["enabled","disabled"], default="disabled"),
-        ipv6_link_local_node1=dict(type="str"),
-        ipv6_link_local_node2=dict(type="str"),
-        secondary_nd_ra_prefix=dict(type="bool", default=False),
-        secondary_ipv6_dad=dict(type="str", choices=["enabled","disabled"], default="enabled"),
-        encap_scope=dict(type="str", choices=["local","vrf"], default="local"),
-        state=dict(type="str", default="present", choices=["absent", "present", "query"])
+        interfaces=dict(type="list", elements="dict", options=item_options(INTERFACE_OPTIONS)),
+        state=dict(type="str", default="present", choices=["absent", "present", "query"]),
     )
+    argument_spec.update(deepcopy(INTERFACE_OPTIONS))
 
     module = AnsibleModule(
         argument_spec=argument_spec,
@@ -170,145 +568,45 @@ def main():
         template = template.replace(" ", "")
     state = module.params.get("state")
     l3out = module.params.get("l3out")
-    interface_type = module.params.get("interface_type")
-    path_type = module.params.get("path_type")
-    node1 = module.params.get("node1")
-    node1_router_id = module.params.get("node1_router_id")
-    node1_router_id_as_loopback =module.params.get("node1_router_id_as_loopback")
-    node2 = module.params.get("node2")
-    node2_router_id = module.params.get("node2_router_id")
-    node2_router_id_as_loopback = module.params.get("node2_router_id_as_loopback")
-    pod_id = module.params.get("pod_id")
-    interface_path = module.params.get("path")
-    vlan_encap_id = module.params.get("vlan_encap_id")
-    trunk_mode = module.params.get("trunk_mode")
-    ipv4_addr_node1 = module.params.get("ipv4_addr_node1")
-    ipv4_addr_node2 = module.params.get("ipv4_addr_node2")
-    ipv4_secondary_ip = module.params.get("ipv4_secondary_ip")
-    ipv6_addr_node1 = module.params.get("ipv6_addr_node1")
-    ipv6_addr_node2 = module.params.get("ipv6_addr_node2")
-    ipv6_secondary_ip = module.params.get("ipv6_secondary_ip")
-    ipv6_link_local_node1= module.params.get("ipv6_link_local_node1")
-    ipv6_link_local_node2= module.params.get("ipv6_link_local_node2")
-    mtu = module.params.get("mtu")
-    mac =  module.params.get("mac")
-    autostate = module.params.get("autostate")
-    interface_group_policy = module.params.get("interface_group_policy")
-    target_dscp = module.params.get("target_dscp")
-    ipv6_dad = module.params.get("ipv6_dad")
-    secondary_nd_ra_prefix = module.params.get("secondary_nd_ra_prefix")
-    secondary_ipv6_dad = module.params.get("secondary_ipv6_dad")
-    encap_scope =  module.params.get("encap_scope")
-
-
-
+    interfaces = module.params.get("interfaces")
 
     mso = MSOModule(module)
 
     template_type = "l3out"
 
-    interface_type_dict= {
-        "routed_sub": "subInterfaces",
-        "routed": "interfaces",
-        "svi": "sviInterfaces"
-    }
+    # The interface options of the task are the defaults of every interface definition
+    defaults = dict((name, module.params.get(name)) for name in INTERFACE_OPTIONS)
+    definitions = []
+
+    # Validate the input before any request is sent
+    validator = MSOValidator(mso)
+    for index, item in enumerate(interfaces if interfaces is not None else [{}]):
+        context = "interfaces[{0}]".format(index) if interfaces is not None else None
+        definition = item_params(INTERFACE_OPTIONS, item, defaults)
+        definitions.append(definition)
+        if state != "query":
+            validate_definition(validator, definition, state, context)
+            validator.unique(
+                "interface",
+                interface_key(
+                    definition.get("interface_type"), build_interface(definition).get("nodeID"), definition.get("path"), definition.get("vlan_encap_id")
+                ),
+                context,
+                msg="duplicate interface definition",
+            )
+    validator.fail_on_errors()
 
     templates = mso.request(path="templates/summaries", method="GET", api_version="v1")
 
     mso.existing = {}
 
-
-    if interface_type != 'routed' and not vlan_encap_id:
-        mso.fail_json(msg="Vlan ID not not found")
-        
-    if not (ipv4_addr_node1 or ipv6_addr_node1):
-        mso.fail_json(msg="IP/IPV6 address ID not not found")
-    
-    if path_type == 'vpc' and not ((ipv4_addr_node1 and ipv4_addr_node2) or (ipv6_addr_node1 and ipv6_addr_node2)):
-        mso.fail_json(msg="VPC IP/IPV6 address ID not not found ")
-
-
-        
     template_id = get_template_id(template_name=template, template_type=template_type, template_dict=templates)
 
     if not template_id:
         mso.fail_json(msg="Template '{template}' not found".format(template=template))
-    
-    mso.existing = mso.request(path=f"templates/{template_id}", method="GET", api_version="v1")
 
-
-    # try to find if the l3out exist
-    l3out_exist = False
-    try:
-        for count, e in enumerate(mso.existing['l3outTemplate']['l3outs']):
-            if e['name'] == l3out:
-                l3out_exist = True
-                l3out_index = count
-    except:
-        pass
-
-    if not l3out_exist:
-        mso.fail_json(msg="L3out '{l3out}' not found".format(l3out=l3out))
-
-
-    # try to find if the interface Groups exist
-    group_policy_exist = False
-    try:
-        for count, e in enumerate(mso.existing['l3outTemplate']['l3outs'][l3out_index]['interfaceGroups']):
-            if e['name'] == interface_group_policy:
-                group_policy_exist = True
-                group_policy_index = count
-    except:
-        pass
-    
-
-
-    #try to find if the node exist
-    node1_exist = False
-    try:
-        for count, e in enumerate(mso.existing['l3outTemplate']['l3outs'][l3out_index]['nodes']):
-            if e['nodeID'] == node1:
-                node1_exist = True
-                node1_index = count
-    except:
-        pass
-    
-
-    #try to find if the interface exit
-    interface_exist = False
-    if node1_exist:
-        try:
-            for count, e in enumerate(mso.existing['l3outTemplate']['l3outs'][l3out_index][interface_type_dict[interface_type]]):
-                if path_type == 'vpc':
-                    if e['nodeID'] == node1+','+node2 and e['path'] == interface_path:
-                        if interface_type != 'routed':
-                            if e['encap']['value'] == vlan_encap_id:
-                                interface_exist = True
-                                interface_index = count
-                    
-                else:
-                    if e['nodeID'] == node1 and e['path'] == interface_path:
-                        if interface_type != 'routed':
-                            if e['encap']['value'] == vlan_encap_id:
-                                interface_exist = True
-                                interface_index = count
-                        else:
-                            interface_exist = True
-                            interface_index = count
-        except:
-            pass
-        
-    
-    if path_type == 'vpc':
-        node2_exist = False
-        try:
-            for count, e in enumerate(mso.existing['l3outTemplate']['l3outs'][l3out_index]['nodes']):
-                if e['nodeID'] == node2:
-                    node2_exist = True
-                    node2_index = count
-        except:
-            pass
-    
+    template_path = "templates/{0}".format(template_id)
+    mso.existing = mso.request(path=template_path, method="GET", api_version="v1")
 
     if state == "query":
         if not mso.existing:
@@ -318,281 +616,87 @@ def main():
                 mso.existing = []
         mso.exit_json()
 
-    template_path = f"templates/{template_id}"
-    
-
     mso.previous = mso.existing
-    if state == "absent":
-        mso.proposed = mso.sent = {}
-        if interface_exist:
-            nodes_to_check = str(mso.existing['l3outTemplate']['l3outs'][l3out_index][interface_type_dict[interface_type]][interface_index]['nodeID']).split(',')
-            del mso.existing['l3outTemplate']['l3outs'][l3out_index][interface_type_dict[interface_type]][interface_index]
-            
-            for int_type in interface_type_dict:
-                try:
-                    for interface in mso.existing['l3outTemplate']['l3outs'][l3out_index][interface_type_dict[int_type]]:
-                        node_ids = str(interface['nodeID']).split(',')
-                        for node in node_ids:
-                            if node in nodes_to_check:
-                                node_idx = nodes_to_check.index(node)
-                                nodes_to_check[node_idx] = None
-                except:
-                    pass
-            
-            if len(mso.existing['l3outTemplate']['l3outs'][l3out_index][interface_type_dict[int_type]]) == 0:
-                del mso.existing['l3outTemplate']['l3outs'][l3out_index][interface_type_dict[int_type]]
-
-            
-            if nodes_to_check[0]:
-                del mso.existing['l3outTemplate']['l3outs'][l3out_index]['nodes'][node1_index]
-            
-            if path_type == 'vpc' and nodes_to_check[1]:
-                #update node2 position
-                node2_exist = False
-                try:
-                    for count, e in enumerate(mso.existing['l3outTemplate']['l3outs'][l3out_index]['nodes']):
-                        if e['nodeID'] == node2:
-                            node2_exist = True
-                            node2_index = count
-                except:
-                    pass
-                del mso.existing['l3outTemplate']['l3outs'][l3out_index]['nodes'][node2_index]
-
-            if len(mso.existing['l3outTemplate']['l3outs'][l3out_index]['nodes']) == 0:
-                del mso.existing['l3outTemplate']['l3outs'][l3out_index]['nodes']
-                    
-
-            if not module.check_mode:
-                mso.request(template_path, method="PUT", data=mso.existing)
-            mso.existing = {}
-
-    elif state == "present":
-        new_node1 = {
-            "group": "",
-            "podID": pod_id,
-            "nodeID": node1,
-            "routerID": node1_router_id,
-            "useRouteIDAsLoopback": node1_router_id_as_loopback
-        }
-        new_interface = {
-            "group": "",
-            "pathType": path_type,
-            "podID": pod_id,
-            "nodeID": node1,
-            "path": interface_path,
-            "addresses":
-                {
-                    "ipV6DAD": ipv6_dad,
-                    "secondary": []
-                },
-            "mac": mac,
-            "mtu": mtu,
-            "targetDscp": target_dscp
-        }
-        if ipv4_addr_node1:
-            new_interface['addresses']['primaryV4'] = ipv4_addr_node1
-        if ipv6_addr_node1:
-            new_interface['addresses']['primaryV6'] = ipv6_addr_node1
-        if ipv6_link_local_node1:
-            new_interface['addresses']['linkLocalV6'] = ipv6_link_local_node1
-        if ipv4_secondary_ip:
-            new_secondary={
-                "address": ipv4_secondary_ip,
-                "dhcpRelay": False,
-                "v6RAPrefix": False,
-                "ipV6DAD": "enabled"
-            }
-            new_interface['addresses']['secondary'].append(new_secondary)
-        if ipv6_secondary_ip:
-            new_secondary={
-                "address": ipv6_secondary_ip,
-                "dhcpRelay": False,
-                "v6RAPrefix": secondary_nd_ra_prefix,
-                "ipV6DAD": secondary_ipv6_dad
-            }
-            new_interface['addresses']['secondary'].append(new_secondary)
-        if interface_group_policy:
-            new_interface['group']= interface_group_policy
-        if interface_type != "routed":
-            new_interface.update(
-                {
-                "encap":
-                    {
-                        "encapType": "vlan",
-                        "value": vlan_encap_id
-                    }
-                }
-            )
+    proposed = deepcopy(mso.existing)
 
-        if interface_type == "svi":
-            new_interface.update(
-                {
-                    "svi":
-                        {
-                            "encapScope": encap_scope,
-                            "autostate": autostate,
-                            "mode":  trunk_mode
-                        },
-                }
-            )
-
-        if len(new_interface['addresses']['secondary']) == 0:
-            new_interface['addresses'].pop('secondary')
-
-        if path_type =='vpc':
-            ####special case for VPC
-            new_node2 = {
-                "group": "",
-                "podID": pod_id,
-                "nodeID": node2,
-                "routerID": node2_router_id,
-                "useRouteIDAsLoopback": node2_router_id_as_loopback
-            }
-            new_interface['nodeID']=node1+","+node2
-            new_interface.update(
-                {
-                    "sideBAddresses":
-                        {
-                            "ipV6DAD": "disabled",
-                            "secondary": []
-                        },
-                    
-                }
-            )
-            if ipv4_addr_node2:
-                new_interface['sideBAddresses']['primaryV4'] = ipv4_addr_node2
-            if ipv6_addr_node2:
-                new_interface['sideBAddresses']['primaryV6'] = ipv6_addr_node2
-            if ipv6_link_local_node1:
-                new_interface['sideBAddresses']['linkLocalV6'] = ipv6_link_local_node2
-            if ipv4_secondary_ip:
-                new_secondary = {
-                    "address": ipv4_secondary_ip,
-                    "dhcpRelay": False,
-                    "v6RAPrefix": False,
-                    "ipV6DAD": "enabled"
-                }
-                new_interface['sideBAddresses']['secondary'].append(new_secondary)
-            if ipv6_secondary_ip:
-                new_secondary = {
-                    "address": ipv6_secondary_ip,
-                    "dhcpRelay": False,
-                    "v6RAPrefix": secondary_nd_ra_prefix,
-                    "ipV6DAD": secondary_ipv6_dad
-                }
-                new_interface['sideBAddresses']['secondary'].append(new_secondary)
-
-            if len(new_interface['sideBAddresses']['secondary']) == 0:
-                new_interface['sideBAddresses'].pop('secondary')
-            
-            
-            if not node1_exist or not node2_exist:
-                #case one of the nodes doesn't exist, added the missing node and the interface 
-
-                if 'nodes' not in mso.existing['l3outTemplate']['l3outs'][l3out_index]:
-                    mso.existing['l3outTemplate']['l3outs'][l3out_index].update({"nodes": []})
-                
-                if not node1_exist:
-                    mso.existing['l3outTemplate']['l3outs'][l3out_index]['nodes'].append(new_node1)
-                
-                if not node2_exist:
-                    mso.existing['l3outTemplate']['l3outs'][l3out_index]['nodes'].append(new_node2)
-
-                if interface_type_dict[interface_type] not in mso.existing['l3outTemplate']['l3outs'][l3out_index]:
-                    mso.existing['l3outTemplate']['l3outs'][l3out_index].update({interface_type_dict[interface_type]: []})
-
-                mso.existing['l3outTemplate']['l3outs'][l3out_index][interface_type_dict[interface_type]].append(new_interface)
-
-                if not module.check_mode:
-                    mso.request(template_path, method="PUT", data=mso.existing)
-                mso.existing = mso.proposed
-                
-            elif not interface_exist:
-                # interface doesn't exist 
-                if interface_type_dict[interface_type] not in mso.existing['l3outTemplate']['l3outs'][l3out_index]:
-                    mso.existing['l3outTemplate']['l3outs'][l3out_index].update(
-                        {interface_type_dict[interface_type]: []})
-
-                mso.existing['l3outTemplate']['l3outs'][l3out_index][interface_type_dict[interface_type]].append(
-                    new_interface)
-
-                if not module.check_mode:
-                    mso.request(template_path, method="PUT", data=mso.existing)
-                mso.existing = mso.proposed
+    l3out_obj = next((obj for obj in proposed.get("l3outTemplate", {}).get("l3outs", []) if obj.get("name") == l3out), None)
+    if l3out_obj is None:
+        mso.fail_json(msg="L3out '{l3out}' not found".format(l3out=l3out))
 
+    # Index the existing nodes by node ID and the existing interfaces by (interface type, node(s), path, encap)
+    nodes = dict((str(node.get("nodeID")), node) for node in l3out_obj.get("nodes", []))
+    existing_interfaces = {}
+    for interface_type, interface_list in INTERFACE_TYPES.items():
+        for interface in l3out_obj.get(interface_list, []):
+            existing_interfaces[existing_interface_key(interface_type, interface)] = interface
+
+    report = []
+    removed = []
+    for definition in definitions:
+        interface_type = definition.get("interface_type")
+        interface_list = INTERFACE_TYPES[interface_type]
+        new_interface = build_interface(definition)
+        key = interface_key(interface_type, new_interface.get("nodeID"), definition.get("path"), definition.get("vlan_encap_id"))
+        interface = existing_interfaces.get(key)
+        change = "unchanged"
+
+        if state == "absent":
+            if interface is not None:
+                l3out_obj[interface_list].remove(interface)
+                del existing_interfaces[key]
+                removed.append(interface)
+                change = "removed"
             else:
-                current_node1 = mso.existing['l3outTemplate']['l3outs'][l3out_index]['nodes'][node1_index].copy()
-                diff_node1 = diff_dicts(new_node1, current_node1)
-                
-                current_node2 = mso.existing['l3outTemplate']['l3outs'][l3out_index]['nodes'][node1_index].copy()
-                diff_node2 = diff_dicts(new_node1, current_node2)
-                
-
-                current_interface = mso.existing['l3outTemplate']['l3outs'][l3out_index][interface_type_dict[interface_type]][interface_index].copy()
-                diff_interface = diff_dicts(new_interface, current_interface, exclude_key="bgpPeers")
-
-                if diff_interface or diff_node1 or diff_node2:
-                    if diff_node1:
-                        mso.existing['l3outTemplate']['l3outs'][l3out_index]['nodes'][node1_index] = update_payload(diff=diff_node1, payload=current_node1)
-                    if diff_node2:
-                        mso.existing['l3outTemplate']['l3outs'][l3out_index]['nodes'][node2_index_] = update_payload(diff=diff_node1, payload=current_node2)
-
-                    if diff_interface:
-                        mso.existing['l3outTemplate']['l3outs'][l3out_index][interface_type_dict[interface_type]][interface_index] = update_payload(diff=diff_interface, payload=current_interface)
-                    if not module.check_mode:
-                        mso.request(template_path, method="PUT", data=mso.existing)
-                    mso.existing = mso.proposed
-
-            
-                
-        else:
-            if not node1_exist:
-                ###interface and node doesnt exist
-                if 'nodes' not in mso.existing['l3outTemplate']['l3outs'][l3out_index]:
-                    mso.existing['l3outTemplate']['l3outs'][l3out_index].update({"nodes": []})
-    
-                mso.existing['l3outTemplate']['l3outs'][l3out_index]['nodes'].append(new_node1)
-    
-                if interface_type_dict[interface_type] not in mso.existing['l3outTemplate']['l3outs'][l3out_index]:
-                    mso.existing['l3outTemplate']['l3outs'][l3out_index].update({interface_type_dict[interface_type] : []})
-    
-                mso.existing['l3outTemplate']['l3outs'][l3out_index][interface_type_dict[interface_type]].append(new_interface)
-    
-                
-                if not module.check_mode:
-                    mso.request(template_path, method="PUT", data=mso.existing)
-                mso.existing = mso.proposed
-            elif not interface_exist:
-                #interface doesn't exist 
-                if interface_type_dict[interface_type] not in mso.existing['l3outTemplate']['l3outs'][l3out_index]:
-                    mso.existing['l3outTemplate']['l3outs'][l3out_index].update({interface_type_dict[interface_type] : []})
-    
-                mso.existing['l3outTemplate']['l3outs'][l3out_index][interface_type_dict[interface_type]].append(new_interface)
-                
-                if not module.check_mode:
-                    mso.request(template_path, method="PUT", data=mso.existing)
-                mso.existing = mso.proposed
-            else:
-                # check if need be updated
-                current_node = mso.existing['l3outTemplate']['l3outs'][l3out_index]['nodes'][node1_index].copy()
-                diff_node = diff_dicts(new_node1,current_node,exclude_key="bgpPeers")
-                
-                
-                current_interface = mso.existing['l3outTemplate']['l3outs'][l3out_index][interface_type_dict[interface_type]][interface_index].copy()
-                diff_interface = diff_dicts(new_interface,current_interface,exclude_key="bgpPeers")
-                
-                if diff_interface or diff_node:
+                change = "absent"
+
+        elif state == "present":
+            node_names = ["node1", "node2"] if definition.get("path_type") == "vpc" else ["node1"]
+            for node_name in node_names:
+                new_node = build_node(definition, node_name)
+                node = nodes.get(str(new_node.get("nodeID")))
+                if node is None:
+                    nodes[str(new_node.get("nodeID"))] = new_node
+                    l3out_obj.setdefault("nodes", []).append(new_node)
+                    change = "updated"
+                else:
+                    diff_node = diff_dicts(new_node, node, exclude_key="bgpPeers")
                     if diff_node:
-                        mso.existing['l3outTemplate']['l3outs'][l3out_index]['nodes'][node1_index] = update_payload(diff=diff_node, payload=current_node)
-                    if diff_interface:
-                        mso.existing['l3outTemplate']['l3outs'][l3out_index][interface_type_dict[interface_type]][interface_index] = update_payload(diff=diff_interface, payload=current_interface)
-                    if not module.check_mode:
-                        mso.request(template_path, method="PUT", data=mso.existing)
-                    mso.existing = mso.proposed
-
-    
+                        update_payload(diff=diff_node, payload=node)
+                        change = "updated"
 
-    mso.exit_json()
+            if interface is None:
+                existing_interfaces[key] = new_interface
+                l3out_obj.setdefault(interface_list, []).append(new_interface)
+                change = "added"
+            else:
+                diff_interface = diff_dicts(new_interface, interface, exclude_key="bgpPeers")
+                if diff_interface:
+                    update_payload(diff=diff_interface, payload=interface)
+                    change = "updated"
+
+        report.append(dict(interface_type=interface_type, node=new_interface.get("nodeID"), path=definition.get("path"), encap=key[3], change=change))
+
+    if removed:
+        # Nodes are removed when no interface of any type uses them anymore
+        used_nodes = set()
+        for interface in existing_interfaces.values():
+            used_nodes.update(str(interface.get("nodeID")).split(","))
+        removed_nodes = set()
+        for interface in removed:
+            removed_nodes.update(node_id for node_id in str(interface.get("nodeID")).split(",") if node_id not in used_nodes)
+        if removed_nodes:
+            l3out_obj["nodes"] = [node for node in l3out_obj.get("nodes", []) if str(node.get("nodeID")) not in removed_nodes]
+        for key in ["nodes"] + list(INTERFACE_TYPES.values()):
+            if key in l3out_obj and not l3out_obj[key]:
+                del l3out_obj[key]
+
+    mso.sent = mso.proposed = proposed
+    if proposed != mso.previous:
+        if not module.check_mode:
+            mso.request(template_path, method="PUT", data=proposed)
+        mso.existing = proposed
+
+    mso.exit_json(interfaces=report)
 
 
 if __name__ == "__main__":
@@ -12,44 +12,351 @@ ANSIBLE_METADATA = {"metadata_version": "1.1", "status": ["preview"], "supported
 
 DOCUMENTATION = r"""
 ---
-module: mso_schema_template
-short_description: Manage templates in schemas
+module: ndo_tenant_l3out_interfaces_bgp_peer
+short_description: Manage BGP peers of L3Out interfaces in L3Out templates
 description:
-- Manage templates on Cisco ACI Multi-Site.
+- Manage the BGP peers of routed, routed sub-interfaces and SVI interfaces of L3Outs in L3Out templates on Cisco Nexus Dashboard Orchestrator.
+- Many BGP peers, of one or many interfaces of the L3Out, can be provided with O(peers), all peers are reconciled with a single request.
+- BGP peers are identified by their interface and peer IP address.
 author:
 - Dag Wieers (@dagwieers)
 options:
-  tenant:
+  template:
     description:
-    - The tenant used for this template.
+    - The name of the L3Out template.
     type: str
     required: true
-  schema:
+  l3out:
     description:
-    - The name of the schema.
+    - The name of the L3Out.
     type: str
     required: true
-  schema_description:
+  peers:
+    description:
+    - A list of BGP peer definitions.
+    - Every BGP peer definition accepts the interface and BGP peer options of this module, from O(interface_type) to O(update_password).
+    - The options of the task are used for the options that are not provided in a BGP peer definition.
+    type: list
+    elements: dict
+    suboptions:
+      interface_type:
+        description:
+        - The type of the interface of the BGP peer.
+        type: str
+        choices: [ routed_sub, routed, svi ]
+      path_type:
+        description:
+        - The path type of the interface of the BGP peer.
+        type: str
+        choices: [ port, vpc, pc ]
+      node1:
+        description:
+        - The ID of the (first) node of the interface of the BGP peer.
+        type: str
+      node2:
+        description:
+        - The ID of the second node of the interface, required when O(path_type=vpc).
+        type: str
+      pod_id:
+        description:
+        - The ID of the pod of the interface of the BGP peer.
+        type: str
+      path:
+        description:
+        - The path of the interface of the BGP peer.
+        type: str
+      vlan_encap_id:
+        description:
+        - The VLAN encap of the interface, required when O(interface_type) is not C(routed).
+        type: int
+      bgp_peer_ipv4:
+        description:
+        - The IPv4 address of the BGP peer.
+        type: str
+      bgp_peer_ipv6:
+        description:
+        - The IPv6 address of the BGP peer.
+        type: str
+      bgp_peer_as:
+        description:
+        - The AS number of the BGP peer.
+        type: int
+      use_bfd:
+        description:
+        - Whether BFD is enabled.
+        type: bool
+      bgp_password:
+        description:
+        - The BGP password.
+        type: str
+      inbound_route_map:
+        description:
+        - The name of the inbound route map.
+        type: str
+      inbound_route_map_template:
+        description:
+        - The name of the tenant policy template of O(inbound_route_map).
+        type: str
+      outbound_route_map:
+        description:
+        - The name of the outbound route map.
+        type: str
+      outbound_route_map_template:
+        description:
+        - The name of the tenant policy template of O(outbound_route_map).
+        type: str
+      local_as:
+        description:
+        - The local AS number.
+        type: int
+      local_as_options:
+        description:
+        - The local AS configuration.
+        type: str
+        choices: [ none, no-prepend, dual-as, replace-as ]
+      allow_self_as:
+        description:
+        - Whether the own AS number is allowed in the AS path.
+        type: bool
+      allow_self_as_count:
+        description:
+        - The number of times the own AS number is allowed in the AS path.
+        type: int
+      private_as_control:
+        description:
+        - The private AS control.
+        type: str
+        choices: [ remove_private_as, remove_all_private_as, replace_private_as_with_local_as ]
+      address_type_controls:
+        description:
+        - The address families.
+        type: list
+        elements: str
+        choices: [ af-ucast, af-mcast ]
+      disable_connected_check:
+        description:
+        - Whether the connected check is disabled.
+        type: bool
+      as_override:
+        description:
+        - Whether AS override is enabled.
+        type: bool
+      disable_peer_as_check:
+        description:
+        - Whether the peer AS check is disabled.
+        type: bool
+      next_hop_self:
+        description:
+        - Whether next hop self is enabled.
+        type: bool
+      send_community:
+        description:
+        - Whether communities are sent.
+        type: bool
+      send_extended_community:
+        description:
+        - Whether extended communities are sent.
+        type: bool
+      send_domain_path:
+        description:
+        - Whether the domain path is sent.
+        type: bool
+      admin_state:
+        description:
+        - The admin state of the BGP peer.
+        type: str
+        choices: [ enabled, disabled ]
+      ebgp_multihop_ttl:
+        description:
+        - The eBGP multihop TTL.
+        type: int
+      weight:
+        description:
+        - The weight of the routes of the BGP peer.
+        type: int
+      site_of_origin:
+        description:
+        - The site of origin.
+        type: str
+      bgp_peer_prefix_policy:
+        description:
+        - The BGP peer prefix policy.
+        type: str
+      update_password:
+        description:
+        - Whether the BGP password of an existing BGP peer is updated.
+        - The password can not be compared with the configured password, so an existing BGP peer is only changed because of its password
+          when O(update_password=true).
+        type: bool
+  interface_type:
     description:
-    - The description of Schema is supported on versions of MSO that are 3.3 or greater.
+    - The type of the interface of the BGP peer.
+    - Required when O(peers) is not provided.
     type: str
-  template_description:
+    choices: [ routed_sub, routed, svi ]
+  path_type:
     description:
-    - The description of template is supported on versions of MSO that are 3.3 or greater.
+    - The path type of the interface of the BGP peer.
+    - Required when O(peers) is not provided.
     type: str
-  template:
+    choices: [ port, vpc, pc ]
+  node1:
+    description:
+    - The ID of the (first) node of the interface of the BGP peer.
+    - Required when O(peers) is not provided.
+    type: str
+  node2:
+    description:
+    - The ID of the second node of the interface, required when O(path_type=vpc).
+    type: str
+  pod_id:
+    description:
+    - The ID of the pod of the interface of the BGP peer.
+    - Required when O(peers) is not provided.
+    type: str
+  path:
+    description:
+    - The path of the interface of the BGP peer.
+    - Required when O(peers) is not provided.
+    type: str
+  vlan_encap_id:
+    description:
+    - The VLAN encap of the interface, required when O(interface_type) is not C(routed).
+    type: int
+  bgp_peer_ipv4:
+    description:
+    - The IPv4 address of the BGP peer.
+    type: str
+  bgp_peer_ipv6:
+    description:
+    - The IPv6 address of the BGP peer.
+    type: str
+  bgp_peer_as:
+    description:
+    - The AS number of the BGP peer.
+    type: int
+  use_bfd:
+    description:
+    - Whether BFD is enabled.
+    type: bool
+    default: false
+  bgp_password:
+    description:
+    - The BGP password.
+    type: str
+  inbound_route_map:
+    description:
+    - The name of the inbound route map.
+    type: str
+  inbound_route_map_template:
+    description:
+    - The name of the tenant policy template of O(inbound_route_map).
+    type: str
+  outbound_route_map:
     description:
-    - The name of the template.
+    - The name of the outbound route map.
     type: str
-    aliases: [ name ]
-  display_name:
+  outbound_route_map_template:
+    description:
+    - The name of the tenant policy template of O(outbound_route_map).
+    type: str
+  local_as:
+    description:
+    - The local AS number.
+    type: int
+  local_as_options:
     description:
-    - The name as displayed on the MSO web interface.
+    - The local AS configuration.
     type: str
- template_type:
+    choices: [ none, no-prepend, dual-as, replace-as ]
+    default: none
+  allow_self_as:
+    description:
+    - Whether the own AS number is allowed in the AS path.
+    type: bool
+    default: false
+  allow_self_as_count:
+    description:
+    - The number of times the own AS number is allowed in the AS path.
+    type: int
+    default: 3
+  private_as_control:
+    description:
+    - The private AS control.
+    type: str
+    choices: [ remove_private_as, remove_all_private_as, replace_private_as_with_local_as ]
+  address_type_controls:
+    description:
+    - The address families.
+    type: list
+    elements: str
+    choices: [ af-ucast, af-mcast ]
+    default: [ af-ucast ]
+  disable_connected_check:
+    description:
+    - Whether the connected check is disabled.
+    type: bool
+    default: false
+  as_override:
+    description:
+    - Whether AS override is enabled.
+    type: bool
+    default: false
+  disable_peer_as_check:
+    description:
+    - Whether the peer AS check is disabled.
+    type: bool
+    default: false
+  next_hop_self:
+    description:
+    - Whether next hop self is enabled.
+    type: bool
+    default: false
+  send_community:
+    description:
+    - Whether communities are sent.
+    type: bool
+    default: false
+  send_extended_community:
+    description:
+    - Whether extended communities are sent.
+    type: bool
+    default: false
+  send_domain_path:
+    description:
+    - Whether the domain path is sent.
+    type: bool
+    default: false
+  admin_state:
+    description:
+    - The admin state of the BGP peer.
+    type: str
+    choices: [ enabled, disabled ]
+    default: enabled
+  ebgp_multihop_ttl:
+    description:
+    - The eBGP multihop TTL.
+    type: int
+    default: 1
+  weight:
     description:
-     - Deployment Mode. Use stretched-template for Multi-Site or non-stretched-template for Autonomous
-     type: str
+    - The weight of the routes of the BGP peer.
+    type: int
+  site_of_origin:
+    description:
+    - The site of origin.
+    type: str
+  bgp_peer_prefix_policy:
+    description:
+    - The BGP peer prefix policy.
+    type: str
+  update_password:
+    description:
+    - Whether the BGP password of an existing BGP peer is updated.
+    - The password can not be compared with the configured password, so an existing BGP peer is only changed because of its password
+      when O(update_password=true).
+    type: bool
+    default: false
   state:
     description:
     - Use C(present) or C(absent) for adding or removing.
@@ -57,66 +364,224 @@ options:
     type: str
     choices: [ absent, present, query ]
     default: present
-notes:
-- Due to restrictions of the MSO REST API this module creates schemas when needed, and removes them when the last template has been removed.
-seealso:
-- module: cisco.mso.mso_schema
-- module: cisco.mso.mso_schema_site
 extends_documentation_fragment: cisco.mso.modules
 """
 
 EXAMPLES = r"""
-- name: Add a new template to a schema
-  cisco.mso.mso_schema_template:
+- name: Add a BGP peer to a routed sub-interface
+  cisco.mso.ndo_tenant_l3out_interfaces_bgp_peer:
     host: mso_host
     username: admin
     password: SomeSecretPassword
-    tenant: Tenant 1
-    schema: Schema 1
-    template: Template 1
+    template: L3Out Template
+    l3out: L3Out 1
+    interface_type: routed_sub
+    path_type: port
+    pod_id: "1"
+    node1: "101"
+    path: eth1/1
+    vlan_encap_id: 100
+    bgp_peer_ipv4: 10.0.0.2
+    bgp_peer_as: 65001
+    inbound_route_map: RM-IN
+    inbound_route_map_template: Tenant Policies
     state: present
   delegate_to: localhost
 
-- name: Remove a template from a schema
-  cisco.mso.mso_schema_template:
+- name: Add the BGP peers of many sub-interfaces in a single request
+  cisco.mso.ndo_tenant_l3out_interfaces_bgp_peer:
     host: mso_host
     username: admin
     password: SomeSecretPassword
-    tenant: Tenant 1
-    schema: Schema 1
-    template: Template 1
-    state: absent
-  delegate_to: localhost
-
-- name: Query a template
-  cisco.mso.mso_schema_template:
-    host: mso_host
-    username: admin
-    password: SomeSecretPassword
-    tenant: Tenant 1
-    schema: Schema 1
-    template: Template 1
-    state: query
-  delegate_to: localhost
-  register: query_result
-
-- name: Query all templates
-  cisco.mso.mso_schema_template:
-    host: mso_host
-    username: admin
-    password: SomeSecretPassword
-    tenant: Tenant 1
-    schema: Schema 1
-    state: query
+    template: L3Out Template
+    l3out: L3Out 1
+    interface_type: routed_sub
+    path_type: port
+    pod_id: "1"
+    path: eth1/49
+    bgp_peer_as: 65001
+    inbound_route_map: RM-IN
+    inbound_route_map_template: Tenant Policies
+    outbound_route_map: RM-OUT
+    outbound_route_map_template: Tenant Policies
+    peers:
+    - node1: "101"
+      vlan_encap_id: 101
+      bgp_peer_ipv4: 10.0.1.2
+    - node1: "102"
+      vlan_encap_id: 102
+      bgp_peer_ipv4: 10.0.2.2
+      bgp_password: SomeBGPPassword
+      update_password: true
+    state: present
   delegate_to: localhost
-  register: query_result
 """
 
 RETURN = r"""
+peers:
+  description: The change of every BGP peer definition, in the order of the BGP peer definitions.
+  returned: when state is present or absent
+  type: list
+  sample: [{"interface_type": "routed_sub", "node": "101", "path": "eth1/49", "encap": 101, "peer": "10.0.1.2", "change": "added"}]
 """
 
+from copy import deepcopy
 from ansible.module_utils.basic import AnsibleModule
-from ansible_collections.cisco.mso.plugins.module_utils.mso import MSOModule, mso_argument_spec, diff_dicts, update_payload, int_to_ipv4, get_route_map_uuid, mso_reference_spec, get_template_id
+from ansible_collections.cisco.mso.plugins.module_utils.mso import (
+    MSOModule,
+    mso_argument_spec,
+    diff_dicts,
+    update_payload,
+    get_route_map_uuid,
+    get_template_id,
+)
+from ansible_collections.cisco.mso.plugins.module_utils.validation import MSOValidator, item_options, item_params
+
+INTERFACE_TYPES = {
+    "routed_sub": "subInterfaces",
+    "routed": "interfaces",
+    "svi": "sviInterfaces",
+}
+
+PEER_OPTIONS = dict(
+    interface_type=dict(type="str", choices=["routed_sub", "routed", "svi"]),
+    path_type=dict(type="str", choices=["port", "vpc", "pc"]),
+    node1=dict(type="str"),
+    node2=dict(type="str"),
+    pod_id=dict(type="str"),
+    path=dict(type="str"),
+    vlan_encap_id=dict(type="int"),
+    bgp_peer_ipv4=dict(type="str"),
+    bgp_peer_ipv6=dict(type="str"),
+    bgp_peer_as=dict(type="int"),
+    use_bfd=dict(type="bool", default=False),
+    bgp_password=dict(type="str", no_log=True),
+    inbound_route_map=dict(type="str"),
+    inbound_route_map_template=dict(type="str"),
+    outbound_route_map=dict(type="str"),
+    outbound_route_map_template=dict(type="str"),
+    local_as=dict(type="int"),
+    local_as_options=dict(type="str", choices=["none", "no-prepend", "dual-as", "replace-as"], default="none"),
+    allow_self_as=dict(type="bool", default=False),
+    allow_self_as_count=dict(type="int", default=3),
+    private_as_control=dict(type="str", choices=["remove_private_as", "remove_all_private_as", "replace_private_as_with_local_as"]),
+    address_type_controls=dict(type="list", elements="str", choices=["af-ucast", "af-mcast"], default=["af-ucast"]),
+    disable_connected_check=dict(type="bool", default=False),
+    as_override=dict(type="bool", default=False),
+    disable_peer_as_check=dict(type="bool", default=False),
+    next_hop_self=dict(type="bool", default=False),
+    send_community=dict(type="bool", default=False),
+    send_extended_community=dict(type="bool", default=False),
+    send_domain_path=dict(type="bool", default=False),
+    admin_state=dict(type="str", choices=["enabled", "disabled"], default="enabled"),
+    ebgp_multihop_ttl=dict(type="int", default=1),
+    weight=dict(type="int"),
+    site_of_origin=dict(type="str"),
+    bgp_peer_prefix_policy=dict(type="str"),
+    update_password=dict(type="bool", default=False, no_log=False),
+)
+
+
+def interface_key(interface_type, node_id, path, encap):
+    """Return the key of an interface, routed interfaces have no encap"""
+    return (interface_type, str(node_id), path, encap if interface_type != "routed" else None)
+
+
+def definition_interface_key(definition):
+    node_id = definition.get("node1")
+    if definition.get("path_type") == "vpc":
+        node_id = "{0},{1}".format(definition.get("node1"), definition.get("node2"))
+    return interface_key(definition.get("interface_type"), node_id, definition.get("path"), definition.get("vlan_encap_id"))
+
+
+def definition_peer_address(definition):
+    return definition.get("bgp_peer_ipv4") or definition.get("bgp_peer_ipv6")
+
+
+def validate_definition(validator, definition, state, context):
+    """Validate a BGP peer definition"""
+    validator.required(
+        context,
+        interface_type=definition.get("interface_type"),
+        path_type=definition.get("path_type"),
+        node1=definition.get("node1"),
+        pod_id=definition.get("pod_id"),
+        path=definition.get("path"),
+    )
+    if definition.get("interface_type") not in (None, "routed"):
+        validator.required(context, vlan_encap_id=definition.get("vlan_encap_id"))
+    validator.vlan("vlan_encap_id", definition.get("vlan_encap_id"), context)
+    if definition.get("path_type") == "vpc":
+        validator.required_by("path_type vpc", definition.get("path_type"), context, node2=definition.get("node2"))
+    validator.required_one_of(context, bgp_peer_ipv4=definition.get("bgp_peer_ipv4"), bgp_peer_ipv6=definition.get("bgp_peer_ipv6"))
+    validator.ip_address("bgp_peer_ipv4", definition.get("bgp_peer_ipv4"), context, version=4)
+    validator.ip_address("bgp_peer_ipv6", definition.get("bgp_peer_ipv6"), context, version=6)
+    if state == "present":
+        validator.required_by(
+            "inbound_route_map", definition.get("inbound_route_map"), context, inbound_route_map_template=definition.get("inbound_route_map_template")
+        )
+        validator.required_by(
+            "outbound_route_map", definition.get("outbound_route_map"), context, outbound_route_map_template=definition.get("outbound_route_map_template")
+        )
+
+
+def build_bgp_peer(definition, route_map_uuids):
+    """Build the payload of a BGP peer definition"""
+    new_bgp_peer = {
+        "adminState": definition.get("admin_state"),
+        "authEnabled": False,
+        "allowedSelfASCount": definition.get("allow_self_as_count"),
+        "ebpgMultiHopTTL": definition.get("ebgp_multihop_ttl"),
+        "localAsnConfig": definition.get("local_as_options"),
+        "bgpControls": {
+            "allowSelfAS": definition.get("allow_self_as"),
+            "asOverride": definition.get("as_override"),
+            "disablePeerASCheck": definition.get("disable_peer_as_check"),
+            "nextHopSelf": definition.get("next_hop_self"),
+            "sendCommunity": definition.get("send_community"),
+            "sendExtendedCommunity": definition.get("send_extended_community"),
+            "sendDomainPath": definition.get("send_domain_path"),
+        },
+        "peerControls": {
+            "bfd": definition.get("use_bfd"),
+            "disableConnectedCheck": definition.get("disable_connected_check"),
+        },
+        "privateASControls": {
+            "removeAll": False,
+            "removeExclusive": False,
+            "replaceWithLocalAS": False,
+        },
+        "addressTypeControls": {
+            "afMast": "af-mcast" in (definition.get("address_type_controls") or []),
+            "afUcast": "af-ucast" in (definition.get("address_type_controls") or []),
+        },
+    }
+    if definition.get("bgp_peer_as"):
+        new_bgp_peer["peerAsn"] = definition.get("bgp_peer_as")
+    if definition.get("local_as"):
+        new_bgp_peer["localAsn"] = definition.get("local_as")
+    if definition.get("bgp_peer_ipv4"):
+        new_bgp_peer["peerAddressV4"] = definition.get("bgp_peer_ipv4")
+    if definition.get("bgp_peer_ipv6"):
+        new_bgp_peer["peerAddressV6"] = definition.get("bgp_peer_ipv6")
+    private_as_control = definition.get("private_as_control")
+    if private_as_control:
+        new_bgp_peer["privateASControls"]["removeExclusive"] = True
+        if private_as_control in ("remove_all_private_as", "replace_private_as_with_local_as"):
+            new_bgp_peer["privateASControls"]["removeAll"] = True
+        if private_as_control == "replace_private_as_with_local_as":
+            new_bgp_peer["privateASControls"]["replaceWithLocalAS"] = True
+    if definition.get("weight"):
+        new_bgp_peer["weight"] = definition.get("weight")
+    if definition.get("site_of_origin"):
+        new_bgp_peer["siteOfOrigin"] = definition.get("site_of_origin")
+    if definition.get("bgp_password"):
+        new_bgp_peer.update({"authEnabled": True, "password": {"value": definition.get("bgp_password")}})
+    if definition.get("inbound_route_map"):
+        new_bgp_peer["importRouteMapRef"] = route_map_uuids[(definition.get("inbound_route_map_template"), definition.get("inbound_route_map"))]
+    if definition.get("outbound_route_map"):
+        new_bgp_peer["exportRouteMapRef"] = route_map_uuids[(definition.get("outbound_route_map_template"), definition.get("outbound_route_map"))]
+    return new_bgp_peer
 
 
 def main():
@@ -124,43 +589,10 @@ def main():
     argument_spec.update(
         l3out=dict(type="str", required=True),
         template=dict(type="str", required=True),
-        interface_type=dict(type="str", choices=["routed_sub", "routed", "svi"], required=True),
-        path_type=dict(type="str", choices=["port","vpc","pc"], required=True),
-        node1=dict(type="str", required=True),
-        node2=dict(type="str"),
-        pod_id=dict(type="str", required=True),
-        path=dict(type="str", required=True),
-        vlan_encap_id=dict(type="int"),
-        bgp_peer_ipv4=dict(type="str"),
-        bgp_peer_ipv6=dict(type="str"),
-        bgp_peer_as=dict(type="int"),
-        use_bfd=dict(type="bool", default=False),
-        bgp_password=dict(type="str"),
-        inbound_route_map=dict(type="str"),
-        inbound_route_map_template=dict(type="str"),
-        outbound_route_map=dict(type="str"),
-        outbound_route_map_template=dict(type="str"),
-        local_as=dict(type="int"),
-        local_as_options=dict(type="str", choices=["none","no-prepend","dual-as","replace-as"], default="none"),
-        allow_self_as=dict(type="bool", default=False),
-        allow_self_as_count=dict(type="int", default=3),
-        private_as_control=dict(type="str", choices=["remove_private_as","remove_all_private_as", "replace_private_as_with_local_as"]),
-        address_type_controls=dict(type="list", elements="str", choices=["af-ucast", "af-mcast"], default=['af-ucast']),
-        disable_connected_check=dict(type="bool", default=False),
-        as_override=dict(type="bool", default=False),
-        disable_peer_as_check=dict(type="bool", default=False),
-        next_hop_self=dict(type="bool", default=False),
-        send_community=dict(type="bool", default=False),
-        send_extended_community=dict(type="bool", default=False),
-        send_domain_path=dict(type="bool", default=False),
-        admin_state=dict(type="str", choices=["enabled", "disabled"], default="enabled"),
-        ebgp_multihop_ttl=dict(type="int", default=1),
-        weight=dict(type="int"),
-        site_of_origin=dict(type="str"),
-        bgp_peer_prefix_policy=dict(type="str"),
-        update_password=dict(type="bool", default=False),
-        state=dict(type="str", default="present", choices=["absent", "present", "query"])
+        peers=dict(type="list", elements="dict", options=item_options(PEER_OPTIONS)),
+        state=dict(type="str", default="present", choices=["absent", "present", "query"]),
     )
+    argument_spec.update(deepcopy(PEER_OPTIONS))
 
     module = AnsibleModule(
         argument_spec=argument_spec,
@@ -176,127 +608,38 @@ def main():
         template = template.replace(" ", "")
     state = module.params.get("state")
     l3out = module.params.get("l3out")
-    interface_type = module.params.get("interface_type")
-    path_type = module.params.get("path_type")
-    node1 = module.params.get("node1")
-    node2 = module.params.get("node2")
-    pod_id = module.params.get("pod_id")
-    interface_path = module.params.get("path")
-    vlan_encap_id = module.params.get("vlan_encap_id")
-    bgp_peer_ipv4 = module.params.get("bgp_peer_ipv4")
-    bgp_peer_ipv6 = module.params.get("bgp_peer_ipv6")
-    bgp_peer_as = module.params.get("bgp_peer_as")
-    use_bfd = module.params.get("use_bfd")
-    bgp_password = module.params.get("bgp_password")
-    inbound_route_map = module.params.get("inbound_route_map")
-    inbound_route_map_template = module.params.get("inbound_route_map_template")
-    outbound_route_map = module.params.get("outbound_route_map")
-    outbound_route_map_template = module.params.get("outbound_route_map_template")
-    local_as = module.params.get("local_as")
-    local_as_options = module.params.get("local_as_options")
-    allow_self_as = module.params.get("allow_self_as")
-    allow_self_as_count = module.params.get("allow_self_as_count")
-    private_as_control = module.params.get("private_as_control")
-    address_type_controls = module.params.get("address_type_controls")
-    disable_connected_check =module.params.get("disable_connected_check")
-    as_override = module.params.get("as_override")
-    disable_peer_as_check = module.params.get("disable_peer_as_check")
-    next_hop_self = module.params.get("next_hop_self")
-    send_community = module.params.get("send_community")
-    send_extended_community =module.params.get("send_extended_community")
-    send_domain_path = module.params.get("send_domain_path")
-    admin_state = module.params.get("admin_state")
-    ebgp_multihop_ttl = module.params.get("ebgp_multihop_ttl")
-    weight = module.params.get("weight")
-    site_of_origin = module.params.get("site_of_origin")
-    bgp_peer_prefix_policy = module.params.get("bgp_peer_prefix_policy")
-    update_password = module.params.get("update_password")
-
+    peers = module.params.get("peers")
 
     mso = MSOModule(module)
 
     template_type = "l3out"
 
-    interface_type_dict= {
-        "routed_sub": "subInterfaces",
-        "routed": "interfaces",
-        "svi": "sviInterfaces"
-    }
+    # The options of the task are the defaults of every BGP peer definition
+    defaults = dict((name, module.params.get(name)) for name in PEER_OPTIONS)
+    definitions = []
+
+    # Validate the input before any request is sent
+    validator = MSOValidator(mso)
+    for index, item in enumerate(peers if peers is not None else [{}]):
+        context = "peers[{0}]".format(index) if peers is not None else None
+        definition = item_params(PEER_OPTIONS, item, defaults)
+        definitions.append(definition)
+        if state != "query":
+            validate_definition(validator, definition, state, context)
+            validator.unique("peer", (definition_interface_key(definition), definition_peer_address(definition)), context, msg="duplicate BGP peer definition")
+    validator.fail_on_errors()
 
     templates = mso.request(path="templates/summaries", method="GET", api_version="v1")
 
     mso.existing = {}
 
-
-    if interface_type != 'routed' and not vlan_encap_id:
-        mso.fail_json(msg="Vlan ID not not found")
-
-    if not (bgp_peer_ipv4 or bgp_peer_ipv6):
-        mso.fail_json(msg="At least one Peer must exist")
-
-        
     template_id = get_template_id(template_name=template, template_type=template_type, template_dict=templates)
 
     if not template_id:
         mso.fail_json(msg="Template '{template}' not found".format(template=template))
-    
-    mso.existing = mso.request(path=f"templates/{template_id}", method="GET", api_version="v1")
-
-
-    # try to find if the l3out exist
-    l3out_exist = False
-    try:
-        for count, e in enumerate(mso.existing['l3outTemplate']['l3outs']):
-            if e['name'] == l3out:
-                l3out_exist = True
-                l3out_index = count
-    except:
-        pass
-
-    if not l3out_exist:
-        mso.fail_json(msg="L3out '{l3out}' not found".format(l3out=l3out))
-
-    
 
-    #try to find if the interface exit
-    interface_exist = False
-    try:
-        for count, e in enumerate(mso.existing['l3outTemplate']['l3outs'][l3out_index][interface_type_dict[interface_type]]):
-            if path_type == 'vpc':
-                if e['nodeID'] == node1+','+node2 and e['path'] == interface_path:
-                    if interface_type != 'routed':
-                        if e['encap']['value'] == vlan_encap_id:
-                            interface_exist = True
-                            interface_index = count
-
-            else:
-                if e['nodeID'] == node1 and e['path'] == interface_path:
-                    if interface_type != 'routed':
-                        if e['encap']['value'] == vlan_encap_id:
-                            interface_exist = True
-                            interface_index = count
-                    else:
-                        interface_exist = True
-                        interface_index = count
-    except:
-        pass
-
-    if not interface_exist:
-        mso.fail_json(msg="Interface not found")
-
-
-    #try to find the bgp peer
-    bgp_peer_exist = False
-    try:
-        for count, e in enumerate(mso.existing['l3outTemplate']['l3outs'][l3out_index][interface_type_dict[interface_type]][interface_index]['bgpPeers']):
-            if e['peerAddressV4'] == bgp_peer_ipv4 or e['peerAddressV6'] == bgp_peer_ipv6 :
-                bgp_peer_exist = True
-                bgp_peer_index = count
-    except:
-        pass
-
-
-    
+    template_path = "templates/{0}".format(template_id)
+    mso.existing = mso.request(path=template_path, method="GET", api_version="v1")
 
     if state == "query":
         if not mso.existing:
@@ -306,139 +649,94 @@ def main():
                 mso.existing = []
         mso.exit_json()
 
-    template_path = f"templates/{template_id}"
-    
-
     mso.previous = mso.existing
-    if state == "absent":
-        mso.proposed = mso.sent = {}
-        if bgp_peer_exist:
-            del mso.existing['l3outTemplate']['l3outs'][l3out_index][interface_type_dict[interface_type]][interface_index]['bgpPeers'][bgp_peer_index]
-            if len(mso.existing['l3outTemplate']['l3outs'][l3out_index][interface_type_dict[interface_type]][interface_index]['bgpPeers']) == 0:
-                del mso.existing['l3outTemplate']['l3outs'][l3out_index][interface_type_dict[interface_type]][interface_index]['bgpPeers']
-            if not module.check_mode:
-                mso.request(template_path, method="PUT", data=mso.existing)
-            mso.existing = {}
-
-    elif state == "present":
-        new_bgp_peer = {
-            "adminState": admin_state,
-            "authEnabled": False,
-            "allowedSelfASCount": allow_self_as_count,
-            "ebpgMultiHopTTL": ebgp_multihop_ttl,
-            "localAsnConfig": local_as_options,
-            "bgpControls":
-                {
-                    "allowSelfAS": allow_self_as,
-                    "asOverride": as_override,
-                    "disablePeerASCheck": disable_peer_as_check,
-                    "nextHopSelf": next_hop_self,
-                    "sendCommunity": send_community,
-                    "sendExtendedCommunity": send_extended_community,
-                    "sendDomainPath": send_domain_path
-                },
-            "peerControls":
-                {
-                    "bfd": use_bfd,
-                    "disableConnectedCheck": disable_connected_check
-                },
-            "privateASControls":
-                {
-                    "removeAll": False,
-                    "removeExclusive": False,
-                    "replaceWithLocalAS": False
-                },
-            "addressTypeControls":
-                {
-                    "afMast": False,
-                    "afUcast": False
-                },
-
-        }
-        if bgp_peer_as:
-            new_bgp_peer['peerAsn'] = bgp_peer_as
-        if local_as:
-            new_bgp_peer['localAsn'] = local_as
-        if bgp_peer_ipv4:
-            new_bgp_peer['peerAddressV4'] = bgp_peer_ipv4
-        if bgp_peer_ipv6:
-            new_bgp_peer['peerAddressV6'] = bgp_peer_ipv6
-        if 'af-ucast' in address_type_controls:
-            new_bgp_peer['addressTypeControls']['afUcast'] = True
-        if 'af-mcast' in address_type_controls:
-            new_bgp_peer['addressTypeControls']['afMast'] = True
-        if private_as_control:
-            if private_as_control == "remove_private_as":
-                new_bgp_peer['privateASControls']['removeExclusive'] = True
-            elif private_as_control == "remove_all_private_as":
-                new_bgp_peer['privateASControls']['removeExclusive'] = True
-                new_bgp_peer['privateASControls']['removeAll'] = True
-            else:
-                new_bgp_peer['privateASControls']['removeExclusive'] = True
-                new_bgp_peer['privateASControls']['removeAll'] = True
-                new_bgp_peer['privateASControls']['replaceWithLocalAS'] = True
-        if weight:
-            new_bgp_peer['weight'] = weight
-        if site_of_origin:
-            new_bgp_peer['siteOfOrigin'] = site_of_origin
-        if bgp_password:
-            new_bgp_peer.update(
-                {
-                    "authEnabled": True,
-                    "password":
-                        {
-                            "value": bgp_password
-                        },
-                }
-            )
-
-        if inbound_route_map:
-            template_id = get_template_id(template_name=inbound_route_map_template, template_type='tenantPolicy',template_dict=templates)
-            rm_template = mso.request(path=f"templates/{template_id}", method="GET", api_version="v1")
-            inbound_route_map_uuid = get_route_map_uuid(route_map=inbound_route_map, template_dict=rm_template)
-            if inbound_route_map_uuid:
-                new_bgp_peer['importRouteMapRef'] = inbound_route_map_uuid
-            else:
-                mso.fail_json(msg=f"Route-map {inbound_route_map} not found")
-
-        if outbound_route_map:
-            template_id = get_template_id(template_name=outbound_route_map_template, template_type='tenantPolicy', template_dict=templates)
-            rm_template = mso.request(path=f"templates/{template_id}", method="GET", api_version="v1")
-            outbound_route_map_uuid = get_route_map_uuid(route_map=outbound_route_map, template_dict=rm_template)
-            if outbound_route_map_uuid:
-                new_bgp_peer['exportRouteMapRef'] = outbound_route_map_uuid
-            else:
-                mso.fail_json(msg=f"Route-map {outbound_route_map} not found")
-                            
-        if not bgp_peer_exist:
-            ### bgp peer doesnt exist
-            if 'bgpPeers' not in mso.existing['l3outTemplate']['l3outs'][l3out_index][interface_type_dict[interface_type]][interface_index]:
-                mso.existing['l3outTemplate']['l3outs'][l3out_index][interface_type_dict[interface_type]][interface_index].update({"bgpPeers": []})
-
-            mso.existing['l3outTemplate']['l3outs'][l3out_index][interface_type_dict[interface_type]][interface_index]['bgpPeers'].append(new_bgp_peer)
+    proposed = deepcopy(mso.existing)
 
+    l3out_obj = next((obj for obj in proposed.get("l3outTemplate", {}).get("l3outs", []) if obj.get("name") == l3out), None)
+    if l3out_obj is None:
+        mso.fail_json(msg="L3out '{l3out}' not found".format(l3out=l3out))
 
-            if not module.check_mode:
-                mso.request(template_path, method="PUT", data=mso.existing)
-            mso.existing = mso.proposed
+    # Index the existing interfaces by (interface type, node(s), path, encap)
+    interfaces = {}
+    for interface_type, interface_list in INTERFACE_TYPES.items():
+        for interface in l3out_obj.get(interface_list, []):
+            interfaces[interface_key(interface_type, interface.get("nodeID"), interface.get("path"), interface.get("encap", {}).get("value"))] = interface
+
+    missing = sorted(set(str(definition_interface_key(definition)) for definition in definitions if definition_interface_key(definition) not in interfaces))
+    if missing and state == "present":
+        mso.fail_json(msg="Interface not found: {0}".format(", ".join(missing)))
+
+    # Every referenced route map template is queried once
+    route_map_uuids = {}
+    if state == "present":
+        route_maps = set()
+        for definition in definitions:
+            for direction in ("inbound", "outbound"):
+                if definition.get("{0}_route_map".format(direction)):
+                    route_maps.add((definition.get("{0}_route_map_template".format(direction)), definition.get("{0}_route_map".format(direction))))
+        route_map_templates = {}
+        for rm_template_name, route_map in sorted(route_maps):
+            if rm_template_name not in route_map_templates:
+                rm_template_id = get_template_id(template_name=rm_template_name, template_type="tenantPolicy", template_dict=templates)
+                if not rm_template_id:
+                    mso.fail_json(msg="Template '{template}' not found".format(template=rm_template_name))
+                route_map_templates[rm_template_name] = mso.request(path="templates/{0}".format(rm_template_id), method="GET", api_version="v1")
+            route_map_uuids[(rm_template_name, route_map)] = get_route_map_uuid(route_map=route_map, template_dict=route_map_templates[rm_template_name])
+            if not route_map_uuids[(rm_template_name, route_map)]:
+                mso.fail_json(msg="Route-map {0} not found".format(route_map))
+
+    report = []
+    for definition in definitions:
+        key = definition_interface_key(definition)
+        interface = interfaces.get(key)
+        address = definition_peer_address(definition)
+        change = "unchanged"
+
+        bgp_peer = None
+        if interface is not None:
+            bgp_peer = next(
+                (
+                    peer
+                    for peer in interface.get("bgpPeers", [])
+                    if (definition.get("bgp_peer_ipv4") and peer.get("peerAddressV4") == definition.get("bgp_peer_ipv4"))
+                    or (definition.get("bgp_peer_ipv6") and peer.get("peerAddressV6") == definition.get("bgp_peer_ipv6"))
+                ),
+                None,
+            )
 
-        else:
-            # check if need be updated
-            current = mso.existing['l3outTemplate']['l3outs'][l3out_index][interface_type_dict[interface_type]][interface_index]['bgpPeers'][bgp_peer_index].copy()
-            if update_password:
-                diff = diff_dicts(new_bgp_peer,current)
+        if state == "absent":
+            if bgp_peer is not None:
+                interface["bgpPeers"].remove(bgp_peer)
+                if not interface["bgpPeers"]:
+                    del interface["bgpPeers"]
+                change = "removed"
             else:
-                diff = diff_dicts(new_bgp_peer,current,exclude_key="password,authEnabled")
-            if diff:
-           
-                mso.existing['l3outTemplate']['l3outs'][l3out_index][interface_type_dict[interface_type]][interface_index]['bgpPeers'][bgp_peer_index] = update_payload(diff=diff, payload=current)
-                if not module.check_mode:
-                    mso.request(template_path, method="PUT", data=mso.existing)
-                mso.existing = mso.proposed
+                change = "absent"
 
-    
-
-    mso.exit_json()
+        elif state == "present":
+            new_bgp_peer = build_bgp_peer(definition, route_map_uuids)
+            if bgp_peer is None:
+                interface.setdefault("bgpPeers", []).append(new_bgp_peer)
+                change = "added"
+            else:
+                # The password can not be compared, so it is only updated when requested for this peer
+                if definition.get("update_password"):
+                    diff = diff_dicts(new_bgp_peer, bgp_peer)
+                else:
+                    diff = diff_dicts(new_bgp_peer, bgp_peer, exclude_key="password,authEnabled")
+                if diff:
+                    update_payload(diff=diff, payload=bgp_peer)
+                    change = "updated"
+
+        report.append(dict(interface_type=key[0], node=key[1], path=key[2], encap=key[3], peer=address, change=change))
+
+    mso.sent = mso.proposed = proposed
+    if proposed != mso.previous:
+        if not module.check_mode:
+            mso.request(template_path, method="PUT", data=proposed)
+        mso.existing = proposed
+
+    mso.exit_json(peers=report)
 
 
 if __name__ == "__main__":
@@ -12,44 +12,116 @@ ANSIBLE_METADATA = {"metadata_version": "1.1", "status": ["preview"], "supported
 
 DOCUMENTATION = r"""
 ---
-module: mso_schema_template
-short_description: Manage templates in schemas
+module: ndo_tenant_policies_route_map_entry_match
+short_description: Manage match rules of route map entries in tenant policy templates
 description:
-- Manage templates on Cisco ACI Multi-Site.
+- Manage the match prefixes and match communities of route map entries in tenant policy templates on Cisco Nexus Dashboard Orchestrator.
+- Many match prefixes can be provided as a list or as a CSV or JSON lines file, all changes are applied to the template with a single request.
 author:
 - Dag Wieers (@dagwieers)
 options:
-  tenant:
+  template:
     description:
-    - The tenant used for this template.
+    - The name of the tenant policy template.
     type: str
     required: true
-  schema:
+  route_map:
     description:
-    - The name of the schema.
+    - The name of the route map policy.
     type: str
     required: true
-  schema_description:
+  context_name:
     description:
-    - The description of Schema is supported on versions of MSO that are 3.3 or greater.
+    - The name of the route map entry context.
     type: str
-  template_description:
+    required: true
+  match_prefix:
     description:
-    - The description of template is supported on versions of MSO that are 3.3 or greater.
+    - A single match prefix.
+    - Mutually exclusive with O(match_prefixes) and O(src).
     type: str
-  template:
+  aggregate:
+    description:
+    - Whether O(match_prefix) is an aggregate prefix.
+    - Required when O(ge) or O(le) is provided.
+    type: bool
+    default: false
+  ge:
+    description:
+    - The minimum prefix length of O(match_prefix).
+    type: int
+    default: 0
+  le:
     description:
-    - The name of the template.
+    - The maximum prefix length of O(match_prefix).
+    type: int
+    default: 0
+  match_prefixes:
+    description:
+    - A list of match prefixes.
+    - Prefixes are normalized, C(2001:DB8::/32) and C(2001:db8::/32) are the same prefix.
+    type: list
+    elements: dict
+    suboptions:
+      prefix:
+        description:
+        - The prefix, the host bits must not be set.
+        type: str
+        required: true
+      aggregate:
+        description:
+        - Whether the prefix is an aggregate prefix.
+        type: bool
+        default: false
+      ge:
+        description:
+        - The minimum prefix length.
+        type: int
+        default: 0
+      le:
+        description:
+        - The maximum prefix length.
+        type: int
+        default: 0
+  src:
+    description:
+    - The path to a file with match prefixes, read line by line.
+    - A CSV file must have a header line with the column C(prefix), and optionally the columns C(aggregate), C(ge) and C(le).
+    - A JSON lines file must have one object per line, with the same keys as O(match_prefixes).
+    - The format is determined by the file extension, C(.csv) for CSV, anything else for JSON lines.
+    type: path
+  match_community:
+    description:
+    - A single match community, for example C(regular:as2-nn2:100:200).
+    - Mutually exclusive with O(match_communities).
     type: str
-    aliases: [ name ]
-  display_name:
+  match_community_scope:
     description:
-    - The name as displayed on the MSO web interface.
+    - The scope of O(match_community).
     type: str
- template_type:
+    choices: [ transitive, non-transitive ]
+  match_communities:
+    description:
+    - A list of match communities.
+    type: list
+    elements: dict
+    suboptions:
+      community:
+        description:
+        - The community.
+        type: str
+        required: true
+      scope:
+        description:
+        - The scope of the community.
+        type: str
+        choices: [ transitive, non-transitive ]
+  force_replace:
     description:
-     - Deployment Mode. Use stretched-template for Multi-Site or non-stretched-template for Autonomous
-     type: str
+    - Remove the existing match prefixes and match communities that are not provided.
+    - Only the kind of match rule that is provided is replaced, match communities are kept when only prefixes are provided and vice versa.
+    type: bool
+    default: false
   state:
     description:
     - Use C(present) or C(absent) for adding or removing.
@@ -57,66 +129,195 @@ options:
     type: str
     choices: [ absent, present, query ]
     default: present
-notes:
-- Due to restrictions of the MSO REST API this module creates schemas when needed, and removes them when the last template has been removed.
-seealso:
-- module: cisco.mso.mso_schema
-- module: cisco.mso.mso_schema_site
 extends_documentation_fragment: cisco.mso.modules
 """
 
 EXAMPLES = r"""
-- name: Add a new template to a schema
-  cisco.mso.mso_schema_template:
+- name: Add a match prefix to a route map entry
+  cisco.mso.ndo_tenant_policies_route_map_entry_match:
     host: mso_host
     username: admin
     password: SomeSecretPassword
-    tenant: Tenant 1
-    schema: Schema 1
-    template: Template 1
+    template: Tenant Policies
+    route_map: RM 1
+    context_name: Context 1
+    match_prefix: 10.0.0.0/8
+    aggregate: true
+    le: 24
     state: present
   delegate_to: localhost
 
-- name: Remove a template from a schema
-  cisco.mso.mso_schema_template:
+- name: Replace all match prefixes of a route map entry with the prefixes of an IPAM export
+  cisco.mso.ndo_tenant_policies_route_map_entry_match:
     host: mso_host
     username: admin
     password: SomeSecretPassword
-    tenant: Tenant 1
-    schema: Schema 1
-    template: Template 1
-    state: absent
+    template: Tenant Policies
+    route_map: RM 1
+    context_name: Context 1
+    src: /tmp/prefixes.csv
+    force_replace: true
+    state: present
   delegate_to: localhost
 
-- name: Query a template
-  cisco.mso.mso_schema_template:
+- name: Remove match prefixes and communities from a route map entry
+  cisco.mso.ndo_tenant_policies_route_map_entry_match:
     host: mso_host
     username: admin
     password: SomeSecretPassword
-    tenant: Tenant 1
-    schema: Schema 1
-    template: Template 1
-    state: query
+    template: Tenant Policies
+    route_map: RM 1
+    context_name: Context 1
+    match_prefixes:
+    - prefix: 10.1.0.0/16
+    - prefix: 2001:db8::/32
+    match_communities:
+    - community: regular:as2-nn2:100:200
+    state: absent
   delegate_to: localhost
-  register: query_result
 
-- name: Query all templates
-  cisco.mso.mso_schema_template:
+- name: Query the tenant policy template
+  cisco.mso.ndo_tenant_policies_route_map_entry_match:
     host: mso_host
     username: admin
     password: SomeSecretPassword
-    tenant: Tenant 1
-    schema: Schema 1
+    template: Tenant Policies
+    route_map: RM 1
+    context_name: Context 1
     state: query
   delegate_to: localhost
   register: query_result
 """
 
 RETURN = r"""
+prefixes:
+  description: The match prefixes that were added, updated or removed.
+  returned: when state is present or absent
+  type: dict
+  sample: {"added": ["10.1.0.0/16"], "updated": [], "removed": ["10.2.0.0/16"]}
+communities:
+  description: The match communities that were added, updated or removed.
+  returned: when state is present or absent
+  type: dict
+  sample: {"added": ["regular:as2-nn2:100:200"], "updated": [], "removed": []}
 """
 
+import csv
+import os
+from copy import deepcopy
 from ansible.module_utils.basic import AnsibleModule
-from ansible_collections.cisco.mso.plugins.module_utils.mso import MSOModule, mso_argument_spec, diff_dicts, update_payload
+from ansible.module_utils.parsing.convert_bool import boolean
+from ansible.module_utils._text import to_native, to_text
+from ansible_collections.cisco.mso.plugins.module_utils.codec import json_loads
+from ansible_collections.cisco.mso.plugins.module_utils.mso import MSOModule, mso_argument_spec
+from ansible_collections.cisco.mso.plugins.module_utils.validation import MSOValidator
+
+try:
+    import ipaddress
+
+    HAS_IPADDRESS = True
+except ImportError:
+    HAS_IPADDRESS = False
+
+
+def normalize_prefix(prefix):
+    """Return the canonical notation of a prefix, the prefix as-is when it is not a valid prefix"""
+    if not HAS_IPADDRESS:
+        return to_text(prefix).strip()
+    try:
+        return to_text(ipaddress.ip_network(to_text(prefix).strip()))
+    except ValueError:
+        return to_text(prefix).strip()
+
+
+def read_prefix_file(mso, src):
+    """Read the match prefixes of a CSV or JSON lines file, line by line"""
+    if not os.path.isfile(src):
+        mso.fail_json(msg="Source file '{0}' does not exist".format(src))
+    prefixes = []
+    try:
+        with open(src) as f:
+            if os.path.splitext(src)[1].lower() == ".csv":
+                reader = csv.DictReader(f)
+                if "prefix" not in (reader.fieldnames or []):
+                    mso.fail_json(msg="Source file '{0}' must have a header line with the column 'prefix'".format(src))
+                for row in reader:
+                    prefixes.append(dict((key.strip(), value.strip()) for key, value in row.items() if key and value and value.strip()))
+            else:
+                for line in f:
+                    if line.strip():
+                        prefixes.append(json_loads(line))
+    except (IOError, OSError, ValueError) as e:
+        mso.fail_json(msg="Failed to read source file '{0}': {1}".format(src, to_native(e)))
+    return prefixes
+
+
+def build_prefix_entry(validator, prefix_obj, context):
+    """Validate a match prefix and return its normalized prefix and match prefix entry"""
+    if not isinstance(prefix_obj, dict):
+        validator.error("must be a dictionary with the key 'prefix'", context)
+        return None, None
+    try:
+        aggregate = boolean(prefix_obj.get("aggregate") or False)
+        ge = int(prefix_obj.get("ge") or 0)
+        le = int(prefix_obj.get("le") or 0)
+    except (TypeError, ValueError) as e:
+        validator.error(to_native(e), context)
+        return None, None
+    if not validator.required(context, prefix=prefix_obj.get("prefix")) or not validator.ip_network("prefix", prefix_obj.get("prefix"), context):
+        return None, None
+    prefix = normalize_prefix(prefix_obj.get("prefix"))
+    if (ge or le) and not aggregate:
+        validator.error("ge and le require aggregate for prefix '{0}'".format(prefix), context)
+    max_length = 128 if ":" in prefix else 32
+    for name, value in (("ge", ge), ("le", le)):
+        if not 0 <= value <= max_length:
+            validator.error("{0} '{1}' must be in range 0-{2}".format(name, value, max_length), context)
+    if not validator.unique("prefix", prefix, context):
+        return None, None
+
+    entry = {"prefix": prefix, "fromPfxLen": ge, "toPfxLen": le}
+    if aggregate:
+        entry["aggregate"] = True
+    return prefix, entry
+
+
+def reconcile_match_list(match_list, desired, key, state, force_replace):
+    """
+    Reconcile a match list with the desired entries.
+    :param match_list: Existing match entries. -> List
+    :param desired: Desired entries keyed by their normalized identity. -> Dict
+    :param key: Function returning the normalized identity of an existing entry. -> Function
+    :return: The new match list and the identities that were added, updated and removed. -> Tuple
+    """
+    changes = dict(added=[], updated=[], removed=[])
+    new_list = []
+    seen = set()
+    for entry in match_list:
+        identity = key(entry)
+        if state == "absent" and identity in desired:
+            changes["removed"].append(identity)
+        elif state == "present" and identity in desired:
+            if identity in seen:
+                continue
+            seen.add(identity)
+            new_entry = dict(entry)
+            new_entry.update(desired[identity])
+            if "aggregate" not in desired[identity] and entry.get("aggregate"):
+                new_entry.pop("aggregate", None)
+            if new_entry != entry:
+                changes["updated"].append(identity)
+            new_list.append(new_entry)
+        elif state == "present" and force_replace:
+            changes["removed"].append(identity)
+        else:
+            new_list.append(entry)
+    if state == "present":
+        for identity, entry in desired.items():
+            if identity not in seen:
+                changes["added"].append(identity)
+                new_list.append(entry)
+    return new_list, changes
 
 
 def main():
@@ -129,14 +330,38 @@ def main():
         aggregate=dict(type="bool", default=False),
         ge=dict(type="int", default=0),
         le=dict(type="int", default=0),
+        match_prefixes=dict(
+            type="list",
+            elements="dict",
+            options=dict(
+                prefix=dict(type="str", required=True),
+                aggregate=dict(type="bool", default=False),
+                ge=dict(type="int", default=0),
+                le=dict(type="int", default=0),
+            ),
+        ),
+        src=dict(type="path"),
         match_community=dict(type="str"),
         match_community_scope=dict(type="str", choices=["transitive", "non-transitive"]),
-        state = dict(type="str", default="present", choices=["absent", "present", "query"])
+        match_communities=dict(
+            type="list",
+            elements="dict",
+            options=dict(
+                community=dict(type="str", required=True),
+                scope=dict(type="str", choices=["transitive", "non-transitive"]),
+            ),
+        ),
+        force_replace=dict(type="bool", default=False),
+        state=dict(type="str", default="present", choices=["absent", "present", "query"]),
     )
 
     module = AnsibleModule(
         argument_spec=argument_spec,
         supports_check_mode=True,
+        mutually_exclusive=[
+            ["match_prefix", "match_prefixes", "src"],
+            ["match_community", "match_communities"],
+        ],
         required_if=[
             ["state", "absent", ["template"]],
             ["state", "present", ["template"]],
@@ -150,92 +375,62 @@ def main():
     route_map = module.params.get("route_map")
     context_name = module.params.get("context_name")
     match_prefix = module.params.get("match_prefix")
-    aggregate = module.params.get("aggregate")
-    ge = module.params.get("ge")
-    le = module.params.get("le")
+    match_prefixes = module.params.get("match_prefixes")
+    src = module.params.get("src")
     match_community = module.params.get("match_community")
     match_community_scope = module.params.get("match_community_scope")
-
-
-    
-
-
+    match_communities = module.params.get("match_communities")
+    force_replace = module.params.get("force_replace")
 
     mso = MSOModule(module)
-    
 
-    template_type = "tenantPolicy"
+    if match_prefix is not None:
+        match_prefixes = [dict(prefix=match_prefix, aggregate=module.params.get("aggregate"), ge=module.params.get("ge"), le=module.params.get("le"))]
+    elif src is not None:
+        match_prefixes = read_prefix_file(mso, src)
+    if match_community is not None:
+        match_communities = [dict(community=match_community, scope=match_community_scope)]
+
+    # Validate and normalize all match rules before querying the template
+    desired_prefixes = None
+    desired_communities = None
+    if state != "query":
+        validator = MSOValidator(mso)
+        if match_prefixes is not None:
+            desired_prefixes = {}
+            for index, prefix_obj in enumerate(match_prefixes):
+                prefix, entry = build_prefix_entry(validator, prefix_obj, "match_prefixes[{0}]".format(index))
+                if prefix is not None:
+                    desired_prefixes[prefix] = entry
+        if match_communities is not None:
+            desired_communities = {}
+            for index, community_obj in enumerate(match_communities):
+                community = to_text(community_obj.get("community")).strip()
+                if validator.unique("community", community, "match_communities[{0}]".format(index)):
+                    desired_communities[community] = dict(community=community)
+                    if community_obj.get("scope") is not None:
+                        desired_communities[community]["scope"] = community_obj.get("scope")
+        if desired_prefixes is None and desired_communities is None:
+            validator.error("one of the following is required: match_prefix, match_prefixes, src, match_community, match_communities")
+        validator.fail_on_errors()
 
+    template_type = "tenantPolicy"
 
     templates = mso.request(path="templates/summaries", method="GET", api_version="v1")
 
-
     mso.existing = {}
 
-    template_id = ''
+    template_id = ""
     if templates:
         for temp in templates:
-            if temp['templateName'] == template and temp['templateType'] == template_type:
-                template_id = temp['templateId']
+            if temp["templateName"] == template and temp["templateType"] == template_type:
+                template_id = temp["templateId"]
 
     if not template_id:
         mso.fail_json(msg="Template '{template}' not found".format(template=template))
-        
-
-    mso.existing = mso.request(path=f"templates/{template_id}", method="GET", api_version="v1")
-
-    rm_exist = False
-    # try to find if the rm policy exist
-    if 'template' in mso.existing['tenantPolicyTemplate'] and 'routeMapPolicies' in mso.existing['tenantPolicyTemplate']['template']:
-        for count, r in enumerate(mso.existing['tenantPolicyTemplate']['template']['routeMapPolicies']):
-            if r['name'] == route_map:
-                rm_exist = True
-                rm_index = count
-
-
-    if not rm_exist:
-        if not template_id:
-            mso.fail_json(msg="Route-Map '{route_map}' not found".format(route_map=route_map))
-
-
-    # try to find if the entry exist in the RM
-    entry_exist = False
-    if rm_exist and 'rtMapEntryList' in mso.existing['tenantPolicyTemplate']['template']['routeMapPolicies'][rm_index]:
-        for count, e in enumerate(mso.existing['tenantPolicyTemplate']['template']['routeMapPolicies'][rm_index]['rtMapEntryList']):
-            if e['rtMapContext']['name'] == context_name:
-                entry_exist = True
-                entry_index = count
-
-    if not entry_exist:
-        if not template_id:
-            mso.fail_json(msg="Route-Map Entry '{entry}' not found".format(entry=context_name))
-
-
-    # if not match_prefix or match_community:
-    #     mso.fail_json(msg="Hey, you can't leave both 'Match prefix' and 'Match Community' empty. Fill in at least one!")
-
-    match_prefix_exist = False
-    match_com_exist = False
-
-    if match_prefix:
-        try:
-            if len(mso.existing['tenantPolicyTemplate']['template']['routeMapPolicies'][rm_index]['rtMapEntryList'][entry_index]['matchRule'][0]['matchPrefixList'])  > 0:
-                for count, e in enumerate(mso.existing['tenantPolicyTemplate']['template']['routeMapPolicies'][rm_index]['rtMapEntryList'][entry_index]['matchRule'][0]['matchPrefixList']):
-                    if e['prefix'] == match_prefix:
-                        match_prefix_exist = True
-                        match_prefix_index = count
-        except:
-            pass
-
-    if match_community:
-        try:
-            if len(mso.existing['tenantPolicyTemplate']['template']['routeMapPolicies'][rm_index]['rtMapEntryList'][ entry_index]['matchRule'][0]['matchCommunityList']) > 0:
-                for count, e in enumerate(mso.existing['tenantPolicyTemplate']['template']['routeMapPolicies'][rm_index]['rtMapEntryList'][entry_index]['matchRule'][0]['matchCommunityList']):
-                    if e['community'] == match_community:
-                        match_com_exist = True
-                        match_com_index = count
-        except:
-            pass
+
+    template_path = "templates/{0}".format(template_id)
+    mso.existing = mso.request(path=template_path, method="GET", api_version="v1")
 
     if state == "query":
         if not mso.existing:
@@ -245,115 +440,52 @@ def main():
                 mso.existing = []
         mso.exit_json()
 
-    template_path = f"templates/{template_id}"
-
     mso.previous = mso.existing
-    if state == "absent":
-        mso.proposed = mso.sent = {}
-        if match_prefix_exist or match_com_exist:
-            if match_prefix_exist:
-                del mso.existing['tenantPolicyTemplate']['template']['routeMapPolicies'][rm_index]['rtMapEntryList'][entry_index]['matchRule'][0]['matchPrefixList'][match_prefix_index]
-                if len(mso.existing['tenantPolicyTemplate']['template']['routeMapPolicies'][rm_index]['rtMapEntryList'][entry_index]['matchRule'][0]['matchPrefixList']) == 0:
-                    del mso.existing['tenantPolicyTemplate']['template']['routeMapPolicies'][rm_index]['rtMapEntryList'][entry_index]['matchRule'][0]['matchPrefixList']
-            
-            if match_com_exist:
-                del mso.existing['tenantPolicyTemplate']['template']['routeMapPolicies'][rm_index]['rtMapEntryList'][entry_index]['matchRule'][0]['matchCommunityList'][match_com_index]
-                if len(mso.existing['tenantPolicyTemplate']['template']['routeMapPolicies'][rm_index]['rtMapEntryList'][entry_index]['matchRule'][0]['matchCommunityList']) == 0:
-                    del mso.existing['tenantPolicyTemplate']['template']['routeMapPolicies'][rm_index]['rtMapEntryList'][entry_index]['matchRule'][0]['matchCommunityList']
-
-            if len(mso.existing['tenantPolicyTemplate']['template']['routeMapPolicies'][rm_index]['rtMapEntryList'][entry_index]['matchRule'][0]) == 0:
-                del mso.existing['tenantPolicyTemplate']['template']['routeMapPolicies'][rm_index]['rtMapEntryList'][entry_index]['matchRule']
-                
-            if not module.check_mode:
-                mso.request(template_path, method="PUT", data=mso.existing)
-            mso.existing = {}
-
-    elif state == "present":
-        if (le or ge) and (not aggregate):
-            mso.fail_json(
-                msg="The Ge or Le exists, however, the aggregate is not True".format(entry=context_name))
-
-
-
-        if match_prefix:
-            new_prefix_entry = {
-                "prefix": match_prefix,
-                "fromPfxLen": ge,
-                "toPfxLen": le
-            }
-            if aggregate:
-                new_prefix_entry.update(
-                    {
-                        "aggregate": True,
-                    }
-                )
-
-        if match_community:
-            new_com_entry = {
-                "community": match_community,
-                "scope": match_community_scope
-            }
-            
-        
-        #rm doesn't exitst, need be created
-        if (not match_prefix_exist  and match_prefix) or (not match_com_exist and match_community):
-            if not 'matchRule' in mso.existing['tenantPolicyTemplate']['template']['routeMapPolicies'][rm_index]['rtMapEntryList'][entry_index]:
-                mso.existing['tenantPolicyTemplate']['template']['routeMapPolicies'][rm_index]['rtMapEntryList'][entry_index].update({'matchRule': [{}]})
-
-            if match_prefix:
-
-                if not 'matchPrefixList' in mso.existing['tenantPolicyTemplate']['template']['routeMapPolicies'][rm_index]['rtMapEntryList'][entry_index]['matchRule'][0]:
-                    mso.existing['tenantPolicyTemplate']['template']['routeMapPolicies'][rm_index]['rtMapEntryList'][entry_index]['matchRule'][0].update({'matchPrefixList': []})
-
-                mso.existing['tenantPolicyTemplate']['template']['routeMapPolicies'][rm_index]['rtMapEntryList'][entry_index]['matchRule'][0]['matchPrefixList'].append(
-                    new_prefix_entry
-                )
-
-            if match_community:
-                if not 'matchCommunityList' in mso.existing['tenantPolicyTemplate']['template']['routeMapPolicies'][rm_index]['rtMapEntryList'][entry_index]['matchRule'][0]:
-                    mso.existing['tenantPolicyTemplate']['template']['routeMapPolicies'][rm_index]['rtMapEntryList'][entry_index]['matchRule'][0].update({'matchCommunityList': []})
-                
-                mso.existing['tenantPolicyTemplate']['template']['routeMapPolicies'][rm_index]['rtMapEntryList'][entry_index]['matchRule'][0]['matchCommunityList'].append(
-                    new_com_entry
-                )
-
-
-
-            # mso.fail_json(msg=mso.existing['tenantPolicyTemplate']['template']['routeMapPolicies'][rm_index]['rtMapEntryList'][entry_index]['matchRule'][0]['matchPrefixList'][0])
-
-            # mso.sanitize(payload, collate=True)
-            if not module.check_mode:
-                mso.request(template_path, method="PUT", data=mso.existing)
-            mso.existing = mso.proposed
-        else:
-            # set rule exist, check if need be updated
-            diff_com = ''
-            diff_prefix = ''
-            if match_prefix_exist:
-                current_prefix = mso.existing['tenantPolicyTemplate']['template']['routeMapPolicies'][rm_index]['rtMapEntryList'][entry_index]['matchRule'][0]['matchPrefixList'][match_prefix_index]
-                diff_prefix = diff_dicts(new_prefix_entry, current_prefix)
-            if match_com_exist:
-                current_com = mso.existing['tenantPolicyTemplate']['template']['routeMapPolicies'][rm_index]['rtMapEntryList'][entry_index]['matchRule'][0]['matchCommunityList'][match_com_index]
-                diff_com = diff_dicts(new_com_entry, current_com)
+    proposed = deepcopy(mso.existing)
 
-            if diff_com or diff_prefix:
-                if diff_prefix:
-                    mso.existing['tenantPolicyTemplate']['template']['routeMapPolicies'][rm_index]['rtMapEntryList'][entry_index]['matchRule'][0]['matchPrefixList'][match_prefix_index] = update_payload(diff=diff_prefix, payload=current_prefix)
-                if diff_com:
-                    mso.existing['tenantPolicyTemplate']['template']['routeMapPolicies'][rm_index]['rtMapEntryList'][entry_index]['matchRule'][0]['matchCommunityList'][match_com_index] = update_payload(diff=diff_com, payload=current_com)
-
-                if not module.check_mode:
-                    mso.request(template_path, method="PUT", data=mso.existing)
-                mso.existing = mso.proposed
-
-
-
-
-
-    
-    
-
-    mso.exit_json()
+    route_map_obj = next(
+        (rm for rm in proposed["tenantPolicyTemplate"].get("template", {}).get("routeMapPolicies", []) if rm.get("name") == route_map),
+        None,
+    )
+    if route_map_obj is None:
+        mso.fail_json(msg="Route-Map '{route_map}' not found".format(route_map=route_map))
+
+    entry_obj = next((entry for entry in route_map_obj.get("rtMapEntryList", []) if entry.get("rtMapContext", {}).get("name") == context_name), None)
+    if entry_obj is None:
+        mso.fail_json(msg="Route-Map Entry '{entry}' not found".format(entry=context_name))
+
+    match_rule = (entry_obj.get("matchRule") or [{}])[0]
+
+    prefix_changes = dict(added=[], updated=[], removed=[])
+    if desired_prefixes is not None:
+        match_prefix_list, prefix_changes = reconcile_match_list(
+            match_rule.get("matchPrefixList", []), desired_prefixes, lambda entry: normalize_prefix(entry.get("prefix")), state, force_replace
+        )
+        match_rule["matchPrefixList"] = match_prefix_list
+        if not match_prefix_list:
+            del match_rule["matchPrefixList"]
+
+    community_changes = dict(added=[], updated=[], removed=[])
+    if desired_communities is not None:
+        match_community_list, community_changes = reconcile_match_list(
+            match_rule.get("matchCommunityList", []), desired_communities, lambda entry: to_text(entry.get("community")).strip(), state, force_replace
+        )
+        match_rule["matchCommunityList"] = match_community_list
+        if not match_community_list:
+            del match_rule["matchCommunityList"]
+
+    if match_rule:
+        entry_obj["matchRule"] = [match_rule] + entry_obj.get("matchRule", [])[1:]
+    elif "matchRule" in entry_obj:
+        del entry_obj["matchRule"]
+
+    mso.sent = mso.proposed = proposed
+    if any(prefix_changes.values()) or any(community_changes.values()):
+        if not module.check_mode:
+            mso.request(template_path, method="PUT", data=proposed)
+        mso.existing = proposed
+
+    mso.exit_json(prefixes=prefix_changes, communities=community_changes)
 
 
 if __name__ == "__main__":